@@ -11,9 +11,24 @@ from .multi_engine import (
     OpenAICompatEngine,
     MockEngine,
     EngineStatus,
+    HealthMonitor,
+    DeadlineExceeded,
     create_default_engine,
     get_engine_from_config,
 )
+from .http_transport import (
+    HTTPTransport,
+    HTTPStatusError,
+    get_transport,
+)
+from .async_transport import (
+    AsyncHTTPTransport,
+    get_async_transport,
+)
+from .completion_cache import CompletionCache
+from .engine_stats import CircuitBreaker, EngineStats
+from .rate_limit import RateLimiter
+from .request_ledger import RequestLedger
 
 __all__ = [
     "MultiEngine",
@@ -22,6 +37,18 @@ __all__ = [
     "OpenAICompatEngine",
     "MockEngine",
     "EngineStatus",
+    "HealthMonitor",
+    "DeadlineExceeded",
     "create_default_engine",
     "get_engine_from_config",
+    "HTTPTransport",
+    "HTTPStatusError",
+    "get_transport",
+    "AsyncHTTPTransport",
+    "get_async_transport",
+    "CompletionCache",
+    "CircuitBreaker",
+    "EngineStats",
+    "RateLimiter",
+    "RequestLedger",
 ]
\ No newline at end of file
@@ -0,0 +1,452 @@
+"""
+PA Framework Async HTTP Transport.
+
+asyncio counterpart of ``http_transport``: a minimal HTTP/1.1 client on
+``asyncio.open_connection`` with keep-alive pools, so one event loop can
+keep many generations in flight without a thread per request.
+
+Scope is what the provider engines need: JSON request bodies,
+Content-Length / chunked / read-to-EOF response bodies, TLS for https.
+
+Design:
+    - One pool per (event loop, scheme, host, port): stream objects are
+      bound to the loop that created them, so pools of closed loops are
+      dropped instead of reused
+    - Bounded idle connections (LIFO), discarded after ``idle_timeout``
+    - A reused socket that the server already closed is retried once
+    - ``timeout`` bounds reading the whole response
+    - HTTP(S)_PROXY / NO_PROXY are honoured like ``http_transport``: plain
+      HTTP goes to the proxy with an absolute URL, HTTPS is tunnelled with
+      CONNECT and then upgraded with ``start_tls``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from .http_transport import (
+        DEFAULT_CONNECT_TIMEOUT,
+        DEFAULT_IDLE_TIMEOUT,
+        DEFAULT_POOL_SIZE,
+        DEFAULT_READ_TIMEOUT,
+        HTTPStatusError,
+        Response,
+        TransportStats,
+        _Proxy,
+        _proxy_for,
+    )
+except ImportError:  # Run as a script
+    from http_transport import (
+        DEFAULT_CONNECT_TIMEOUT,
+        DEFAULT_IDLE_TIMEOUT,
+        DEFAULT_POOL_SIZE,
+        DEFAULT_READ_TIMEOUT,
+        HTTPStatusError,
+        Response,
+        TransportStats,
+        _Proxy,
+        _proxy_for,
+    )
+
+logger = logging.getLogger(__name__)
+
+
+class _StaleConnection(Exception):
+    """The server closed a pooled connection before answering."""
+
+
+@dataclass
+class _AsyncConnection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_used: float = field(default_factory=time.monotonic)
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class AsyncConnectionPool:
+    """Bounded pool of keep-alive asyncio connections to a single host."""
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: int,
+        maxsize: int = DEFAULT_POOL_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        stats: Optional[TransportStats] = None,
+        proxy: Optional[_Proxy] = None,
+    ):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.proxy = proxy
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.stats = stats or TransportStats()
+        self._idle: Deque[_AsyncConnection] = deque()
+        default_port = 443 if scheme == "https" else 80
+        self._host_header = host if port == default_port else f"{host}:{port}"
+
+    async def _new_connection(self, connect_timeout: float) -> _AsyncConnection:
+        reader, writer = await asyncio.wait_for(self._connect(), timeout=connect_timeout)
+        self.stats.connections_opened += 1
+        return _AsyncConnection(reader, writer)
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        ssl_context = ssl.create_default_context() if self.scheme == "https" else None
+        if self.proxy is None:
+            return await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+        reader, writer = await asyncio.open_connection(self.proxy.host, self.proxy.port)
+        if ssl_context is None:
+            return reader, writer
+        try:
+            await self._tunnel(reader, writer)
+            await writer.start_tls(ssl_context, server_hostname=self.host)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _tunnel(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Open a CONNECT tunnel to the target through the proxy."""
+        lines = [f"CONNECT {self.host}:{self.port} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if self.proxy.authorization:
+            lines.append(f"Proxy-Authorization: {self.proxy.authorization}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        try:
+            _, status_text, *rest = status_line.decode("latin-1").split(" ", 2)
+            status = int(status_text)
+        except ValueError:
+            raise ConnectionError(f"Bad proxy status line: {status_line[:80]!r}")
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if status != 200:
+            reason = rest[0].strip() if rest else ""
+            raise OSError(f"Tunnel connection failed: {status} {reason}")
+
+    def _get(self) -> Optional[_AsyncConnection]:
+        now = time.monotonic()
+        while self._idle:
+            conn = self._idle.pop()
+            if (
+                now - conn.last_used < self.idle_timeout
+                and not conn.reader.at_eof()
+                and not conn.writer.is_closing()
+            ):
+                self.stats.connections_reused += 1
+                return conn
+            self.stats.discarded += 1
+            conn.close()
+        return None
+
+    def _put(self, conn: _AsyncConnection) -> None:
+        if len(self._idle) < self.maxsize:
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+            return
+        self.stats.discarded += 1
+        conn.close()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> Response:
+        if self.proxy is not None and self.scheme == "http":
+            # Plain HTTP through a proxy: absolute-form request target
+            path = f"http://{self.host}:{self.port}{path}"
+            if self.proxy.authorization:
+                headers = {**headers, "Proxy-Authorization": self.proxy.authorization}
+        conn = self._get()
+        reused = conn is not None
+
+        while True:
+            if conn is None:
+                conn = await self._new_connection(connect_timeout)
+            try:
+                response, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, method, path, body, headers),
+                    timeout=read_timeout,
+                )
+            except (_StaleConnection, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if not reused:
+                    raise ConnectionResetError(
+                        f"Connection to {self.host}:{self.port} closed: {e}"
+                    ) from e
+                logger.debug(f"Stale pooled connection to {self.host}:{self.port}: {e}")
+                self.stats.stale_retries += 1
+                conn, reused = None, False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            break
+
+        if keep_alive:
+            self._put(conn)
+        else:
+            conn.close()
+        response.reused = reused
+        return response
+
+    async def _exchange(
+        self,
+        conn: _AsyncConnection,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> Tuple[Response, bool]:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self._host_header}"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        conn.writer.write(head + body if body else head)
+        await conn.writer.drain()
+
+        reader = conn.reader
+        status_line = await reader.readline()
+        if not status_line:
+            # Nothing answered: the request never reached the server
+            raise _StaleConnection("empty status line")
+        try:
+            version, status_text, *rest = status_line.decode("latin-1").split(" ", 2)
+            status = int(status_text)
+        except ValueError:
+            raise ConnectionError(f"Bad status line: {status_line[:80]!r}")
+        reason = rest[0].strip() if rest else ""
+
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        keep_alive = (
+            version.upper() == "HTTP/1.1"
+            and response_headers.get("connection", "").lower() != "close"
+        )
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            data = b""
+        elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+            data = await self._read_chunked(reader)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+
+        return (
+            Response(status=status, reason=reason, headers=response_headers, body=data),
+            keep_alive,
+        )
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        parts = []
+
+        async def readline() -> bytes:
+            line = await reader.readline()
+            if not line:
+                # EOF before the terminating chunk: the body is truncated
+                raise asyncio.IncompleteReadError(b"".join(parts), None)
+            return line
+
+        while True:
+            size_line = await readline()
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise ConnectionError(f"Bad chunk size line: {size_line[:80]!r}")
+            if size == 0:
+                # Trailers (if any) end with an empty line
+                while (await readline()) not in (b"\r\n", b"\n"):
+                    pass
+                return b"".join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)  # CRLF after each chunk
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+class AsyncHTTPTransport:
+    """
+    Keep-alive asyncio HTTP client with one bounded pool per host.
+
+    Safe to share between event loops (each loop gets its own pools), but
+    a pool is only ever used from the loop that created it.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.stats = TransportStats()
+        self._pools: Dict[
+            Tuple[int, str, str, int, Optional[_Proxy]], Tuple[Any, AsyncConnectionPool]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def _pool_for(self, scheme: str, host: str, port: int) -> AsyncConnectionPool:
+        loop = asyncio.get_running_loop()
+        proxy = _proxy_for(scheme, host)
+        key = (id(loop), scheme, host, port, proxy)
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry is not None and entry[0] is loop:
+                return entry[1]
+            # Forget pools of loops that no longer run (their sockets died
+            # with them; ids of closed loops can be recycled)
+            for stale in [k for k, (lp, _) in self._pools.items() if lp.is_closed()]:
+                del self._pools[stale]
+            pool = AsyncConnectionPool(
+                scheme,
+                host,
+                port,
+                maxsize=self.pool_size,
+                idle_timeout=self.idle_timeout,
+                stats=self.stats,
+                proxy=proxy,
+            )
+            self._pools[key] = (loop, pool)
+            return pool
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> Response:
+        """
+        Send a request and read the full response.
+
+        Args:
+            method: HTTP method
+            url: Absolute http(s) URL
+            body: Raw request body
+            headers: Extra request headers
+            timeout: Seconds to read the whole response (default: ``read_timeout``)
+            connect_timeout: Connect timeout (default: ``connect_timeout``)
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        request_headers = {"Connection": "keep-alive", "Accept-Encoding": "identity"}
+        if headers:
+            request_headers.update(headers)
+
+        self.stats.requests += 1
+        return await self._pool_for(scheme, parts.hostname, port).request(
+            method,
+            path,
+            body,
+            request_headers,
+            connect_timeout if connect_timeout is not None else self.connect_timeout,
+            timeout if timeout is not None else self.read_timeout,
+        )
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        payload: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Send an optional JSON payload and decode the JSON response.
+
+        Raises:
+            HTTPStatusError: On a non-2xx status
+        """
+        request_headers = {"Accept": "application/json"}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            request_headers["Content-Type"] = "application/json"
+        if headers:
+            request_headers.update(headers)
+
+        resp = await self.request(
+            method,
+            url,
+            body=body,
+            headers=request_headers,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+        )
+        if not 200 <= resp.status < 300:
+            raise HTTPStatusError(url, resp.status, resp.reason, resp.body)
+        return resp.json()
+
+    def close(self) -> None:
+        """Close the idle connections of the running loop's pools."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            pools = [pool for lp, pool in self._pools.values() if lp is loop]
+        for pool in pools:
+            pool.close()
+
+
+_default_async_transport: Optional[AsyncHTTPTransport] = None
+_default_async_transport_lock = threading.Lock()
+
+
+def get_async_transport() -> AsyncHTTPTransport:
+    """Process-wide shared async transport."""
+    global _default_async_transport
+    if _default_async_transport is None:
+        with _default_async_transport_lock:
+            if _default_async_transport is None:
+                _default_async_transport = AsyncHTTPTransport()
+    return _default_async_transport
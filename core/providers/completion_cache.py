@@ -0,0 +1,207 @@
+"""
+PA Framework Completion Cache.
+
+Persistent response cache for deterministic generations: pipelines that
+send byte-identical prompts (consolidation summaries, knowledge
+extraction, repeated eval runs) get the stored completion back instead
+of paying for another inference.
+
+Design:
+    - Key: SHA-256 of the canonical JSON of (model, messages, sampling
+      kwargs); transport options (timeout, retries, ...) are not part of it
+    - One SQLite file (WAL), safe to share between processes
+    - Entries expire after ``ttl``; past ``max_entries`` / ``max_bytes``
+      the least recently used ones are evicted
+    - Hit/miss counters plus the tokens and latency saved by hits
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".pa-framework" / "completions.db"
+
+# Request options that change how a call is made, not what it returns
+NON_SAMPLING_KWARGS = frozenset(
+    {
+        "max_retries", "timeout", "deadline", "hedge", "cache", "stream", "caller",
+        "keep_alive",  # Ollama model residency only
+    }
+)
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+    """Canonical hash of a generation request."""
+    params = {k: v for k, v in kwargs.items() if k not in NON_SAMPLING_KWARGS}
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    SQLite-backed completion cache with TTL and LRU size limits.
+
+    The connection is shared between threads behind a lock; several
+    processes can use the same file (SQLite serializes writes).
+    """
+
+    DEFAULT_TTL = 7 * 24 * 3600.0
+    DEFAULT_MAX_ENTRIES = 10_000
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS completions (
+            key        TEXT PRIMARY KEY,
+            model      TEXT NOT NULL,
+            response   TEXT NOT NULL,
+            size       INTEGER NOT NULL,
+            tokens     INTEGER NOT NULL DEFAULT 0,
+            latency    REAL NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_used  REAL NOT NULL,
+            hits       INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_completions_last_used
+            ON completions(last_used);
+        CREATE INDEX IF NOT EXISTS idx_completions_created
+            ON completions(created_at);
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        Args:
+            path: SQLite file (default: ~/.pa-framework/completions.db)
+            ttl: Seconds an entry stays valid
+            max_entries: Entry limit before LRU eviction
+            max_bytes: Limit on the stored response bytes before LRU eviction
+        """
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.saved_latency = 0.0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self._SCHEMA)
+            self._evict_locked(time.time())
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored completion for ``key``, or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, tokens, latency FROM completions "
+                "WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE completions SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_tokens += row[1]
+            self.saved_latency += row[2]
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, result: Dict[str, Any], latency: float = 0.0) -> None:
+        """Store a completion and evict what no longer fits."""
+        response = json.dumps(result, ensure_ascii=False, default=str)
+        usage = result.get("usage") or {}
+        tokens = int(usage.get("prompt_tokens") or 0) + int(usage.get("completion_tokens") or 0)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, model, response, size, tokens, latency, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), tokens, latency, now, now),
+            )
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now: float) -> int:
+        """Drop expired entries, then LRU ones over the limits (lock held)."""
+        removed = self._conn.execute(
+            "DELETE FROM completions WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return removed
+
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY last_used ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", victims)
+        return removed + len(victims)
+
+    def clear(self) -> None:
+        """Remove every stored completion."""
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and savings of this process, plus the store's size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "size_bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "saved_latency_s": round(self.saved_latency, 3),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,207 @@
+"""
+PA Framework Engine Statistics.
+
+Per-engine request statistics fed by real generate outcomes, used by
+MultiEngine for routing decisions:
+
+    - EWMA latency of successful requests (expected cost of a request)
+    - Error-rate window over the last N outcomes
+    - Recent latency samples (percentiles for hedging)
+    - Circuit breaker: closed → open after repeated failures, half-open
+      after a cool-down to let a single trial request through
+
+Heartbeats do not feed these: an engine that answers health checks but
+fails generations stays open until a real request succeeds.
+"""
+
+from __future__ import annotations
+
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one engine.
+
+    Trips open after ``failure_threshold`` consecutive failures, or when
+    the error rate of the last outcomes reaches ``error_rate_threshold``
+    (with at least ``min_requests`` of them). After ``reset_timeout`` one
+    trial request is allowed (half-open): success closes the breaker,
+    failure opens it again with a doubled timeout (up to ``max_reset``).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        min_requests: int = 10,
+        reset_timeout: float = 30.0,
+        max_reset: float = 300.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.max_reset = max_reset
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self._reopens = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self._lock = threading.Lock()
+
+    def _cooldown(self) -> float:
+        return min(self.max_reset, self.reset_timeout * (2 ** self._reopens))
+
+    def available(self) -> bool:
+        """Whether ``allow()`` would let a request through (no side effects)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                return now - self._opened_at >= self._cooldown()
+            return now - self._trial_at >= self._cooldown()
+
+    def allow(self) -> bool:
+        """
+        Admit a request. In half-open state only one trial is in flight;
+        a trial that never reports back is replaced after the cool-down.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self._cooldown():
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_at = now
+                return True
+            if now - self._trial_at >= self._cooldown():
+                self._trial_at = now
+                return True
+            return False
+
+    def record_success(self) -> bool:
+        """Register a success. Returns True if the breaker just closed."""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == self.CLOSED:
+                return False
+            self.state = self.CLOSED
+            self._reopens = 0
+            return True
+
+    def record_failure(self, error_rate: float, samples: int) -> bool:
+        """Register a failure. Returns True if the breaker just opened."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN:
+                # The trial failed: back off before the next one
+                self._reopens += 1
+                self._open()
+                return True
+            if self.state == self.OPEN:
+                return False
+            tripped = self.consecutive_failures >= self.failure_threshold or (
+                samples >= self.min_requests and error_rate >= self.error_rate_threshold
+            )
+            if tripped:
+                self._open()
+            return tripped
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+
+
+class EngineStats:
+    """Latency and error statistics of one engine, plus its breaker."""
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        error_window: int = 50,
+        latency_window: int = 200,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            alpha: EWMA weight of the newest latency sample
+            error_window: Outcomes kept for the error rate
+            latency_window: Successful latencies kept for percentiles
+            breaker: Circuit breaker (default: ``CircuitBreaker()``)
+        """
+        self.alpha = alpha
+        self.breaker = breaker or CircuitBreaker()
+        self.ewma_latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self._outcomes: Deque[bool] = deque(maxlen=error_window)  # True = error
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self) -> float:
+        outcomes = list(self._outcomes)
+        return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def record_success(self, elapsed: Optional[float] = None) -> None:
+        """A request succeeded (``elapsed`` seconds, if it was timed)."""
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append(False)
+            if elapsed is not None:
+                self.latencies.append(elapsed)
+                if self.ewma_latency is None:
+                    self.ewma_latency = elapsed
+                else:
+                    self.ewma_latency += self.alpha * (elapsed - self.ewma_latency)
+        if self.breaker.record_success():
+            # Old failures must not trip the freshly closed breaker again
+            self._outcomes.clear()
+
+    def record_failure(self) -> bool:
+        """A request failed because of the engine. Returns True if it tripped."""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self._outcomes.append(True)
+        return self.breaker.record_failure(self.error_rate, len(self._outcomes))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """``q`` percentile (0-1) of recent successful latencies."""
+        samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def expected_latency(self, default: float) -> float:
+        """
+        Expected seconds per successful request: EWMA latency (``default``
+        until measured) inflated by the retries its error rate implies.
+        """
+        latency = self.ewma_latency if self.ewma_latency is not None else default
+        return latency / max(0.05, 1.0 - self.error_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ewma = self.ewma_latency
+        return {
+            "ewma_latency_ms": round(ewma * 1000, 2) if ewma is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "errors": self.errors,
+            "circuit": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+        }
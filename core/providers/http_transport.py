@@ -0,0 +1,531 @@
+"""
+PA Framework HTTP Transport.
+
+Shared keep-alive transport for provider engines and the opencode serve
+client. Built on ``http.client`` persistent connections so repeated calls
+to the same host skip TCP (and TLS) setup.
+
+Design:
+    - One ``ConnectionPool`` per (scheme, host, port), bounded to
+      ``maxsize`` idle connections (LIFO: the warmest socket is reused first)
+    - Separate connect and read timeouts
+    - A request on a reused socket that the server already closed is
+      retried once on a fresh connection (the request never reached it)
+    - Idle sockets older than ``idle_timeout`` are discarded before reuse
+    - HTTP(S)_PROXY / NO_PROXY are honoured like urllib: plain HTTP goes to
+      the proxy with an absolute URL, HTTPS is tunnelled with CONNECT
+
+Usage:
+    transport = get_transport()
+    data = transport.request_json("GET", "http://localhost:11434/api/tags")
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import socket
+import threading
+import time
+import http.client
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_POOL_SIZE = 8
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+# Errors that mean a pooled socket was closed by the server while idle
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class HTTPStatusError(Exception):
+    """Non-2xx response (mirrors ``urllib.error.HTTPError.code``)."""
+
+    def __init__(self, url: str, code: int, reason: str, body: bytes = b""):
+        super().__init__(f"HTTP {code} {reason} for {url}")
+        self.url = url
+        self.code = code
+        self.reason = reason
+        self.body = body
+
+
+@dataclass
+class Response:
+    """Fully read HTTP response."""
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes
+    reused: bool = False  # Served over a pooled (kept-alive) connection
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+class StreamingResponse:
+    """
+    Response whose body is consumed incrementally (NDJSON, SSE).
+
+    Use as a context manager: on exit the connection goes back to the pool
+    if the body was read to the end, and is closed otherwise.
+    """
+
+    def __init__(
+        self,
+        pool: "ConnectionPool",
+        conn: http.client.HTTPConnection,
+        resp: http.client.HTTPResponse,
+        reused: bool,
+    ):
+        self._pool = pool
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = {k.lower(): v for k, v in resp.getheaders()}
+        self.reused = reused
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """Yield body lines (without the line terminator) as they arrive."""
+        while True:
+            line = self._resp.readline()
+            if not line:
+                return
+            yield line.rstrip(b"\r\n")
+
+    def read(self) -> bytes:
+        return self._resp.read()
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn, self._resp)
+
+    def __enter__(self) -> "StreamingResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class TransportStats:
+    """Connection counters (for benchmarks and status reports)."""
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    stale_retries: int = 0
+    discarded: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+@dataclass(frozen=True)
+class _Proxy:
+    """Forward proxy for a pool (from ``getproxies()``)."""
+    host: str
+    port: int
+    authorization: Optional[str] = None  # Proxy-Authorization header value
+
+    @classmethod
+    def from_url(cls, url: str) -> "_Proxy":
+        if "://" not in url:
+            url = f"http://{url}"
+        parts = urlsplit(url)
+        if not parts.hostname:
+            raise ValueError(f"Invalid proxy URL: {url}")
+        authorization = None
+        if parts.username is not None:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            authorization = "Basic " + base64.b64encode(credentials.encode()).decode()
+        return cls(parts.hostname, parts.port or 8080, authorization)
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[_Proxy]:
+    """Proxy configured for ``scheme`` (None when unset or bypassed)."""
+    url = getproxies().get(scheme)
+    if not url or proxy_bypass(host):
+        return None
+    return _Proxy.from_url(url)
+
+
+@dataclass
+class _PooledConnection:
+    conn: http.client.HTTPConnection
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections to a single host."""
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: int,
+        maxsize: int = DEFAULT_POOL_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        stats: Optional[TransportStats] = None,
+        proxy: Optional[_Proxy] = None,
+    ):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.proxy = proxy
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.stats = stats or TransportStats()
+        self._idle: Deque[_PooledConnection] = deque()
+        self._lock = threading.Lock()
+
+    def _new_connection(self, connect_timeout: float) -> http.client.HTTPConnection:
+        cls = (
+            http.client.HTTPSConnection
+            if self.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        if self.proxy is None:
+            conn = cls(self.host, self.port, timeout=connect_timeout)
+        elif self.scheme == "https":
+            conn = cls(self.proxy.host, self.proxy.port, timeout=connect_timeout)
+            tunnel_headers = {}
+            if self.proxy.authorization:
+                tunnel_headers["Proxy-Authorization"] = self.proxy.authorization
+            conn.set_tunnel(self.host, self.port, headers=tunnel_headers)
+        else:
+            conn = cls(self.proxy.host, self.proxy.port, timeout=connect_timeout)
+        conn.connect()
+        if conn.sock is not None:
+            # Small JSON requests: don't wait for Nagle on keep-alive sockets
+            try:
+                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        with self._lock:
+            self.stats.connections_opened += 1
+        return conn
+
+    def _get(self) -> Optional[http.client.HTTPConnection]:
+        """Pop the most recently used idle connection, dropping expired ones."""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                pooled = self._idle.pop()
+                if (
+                    pooled.conn.sock is not None
+                    and now - pooled.last_used < self.idle_timeout
+                ):
+                    self.stats.connections_reused += 1
+                    return pooled.conn
+                self.stats.discarded += 1
+                pooled.conn.close()
+        return None
+
+    def _put(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(_PooledConnection(conn))
+                return
+            self.stats.discarded += 1
+        conn.close()
+
+    def open(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse, bool]:
+        """Send a request and return once the status line and headers arrive."""
+        if self.proxy is not None and self.scheme == "http":
+            # Plain HTTP through a proxy: absolute-form request target
+            path = f"http://{self.host}:{self.port}{path}"
+            if self.proxy.authorization:
+                headers = {**headers, "Proxy-Authorization": self.proxy.authorization}
+        conn = self._get()
+        reused = conn is not None
+
+        while True:
+            if conn is None:
+                conn = self._new_connection(connect_timeout)
+            try:
+                conn.sock.settimeout(read_timeout)
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_ERRORS as e:
+                conn.close()
+                if not reused:
+                    raise
+                # The server closed the idle socket: retry once on a new one
+                logger.debug(f"Stale pooled connection to {self.host}:{self.port}: {e}")
+                with self._lock:
+                    self.stats.stale_retries += 1
+                conn, reused = None, False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            # Only failures before the status line are retried: once the
+            # server answered, the request may have had side effects
+            return conn, resp, reused
+
+    def release(
+        self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse
+    ) -> None:
+        """Return a connection whose response was fully read, or close it."""
+        if resp.isclosed() and not resp.will_close:
+            self._put(conn)
+        else:
+            conn.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> Response:
+        conn, resp, reused = self.open(
+            method, path, body, headers, connect_timeout, read_timeout
+        )
+        try:
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        self.release(conn, resp)
+
+        return Response(
+            status=resp.status,
+            reason=resp.reason,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+            body=data,
+            reused=reused,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._idle.pop().conn.close()
+
+
+class HTTPTransport:
+    """
+    Keep-alive HTTP client with one bounded pool per host.
+
+    Thread-safe: concurrent requests to the same host each take their own
+    connection; at most ``pool_size`` idle sockets are kept afterwards.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.stats = TransportStats()
+        self._pools: Dict[Tuple[str, str, int, Optional[_Proxy]], ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def _pool_for(self, scheme: str, host: str, port: int) -> ConnectionPool:
+        proxy = _proxy_for(scheme, host)
+        key = (scheme, host, port, proxy)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = self._pools[key] = ConnectionPool(
+                        scheme,
+                        host,
+                        port,
+                        maxsize=self.pool_size,
+                        idle_timeout=self.idle_timeout,
+                        stats=self.stats,
+                        proxy=proxy,
+                    )
+        return pool
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> Response:
+        """
+        Send a request and read the full response.
+
+        Args:
+            method: HTTP method
+            url: Absolute http(s) URL
+            body: Raw request body
+            headers: Extra request headers
+            timeout: Read timeout in seconds (default: ``read_timeout``)
+            connect_timeout: Connect timeout (default: ``connect_timeout``)
+
+        Returns:
+            Response of any status (use ``request_json`` to raise on errors)
+        """
+        pool, path, request_headers = self._prepare(url, headers)
+        return pool.request(
+            method,
+            path,
+            body,
+            request_headers,
+            connect_timeout if connect_timeout is not None else self.connect_timeout,
+            timeout if timeout is not None else self.read_timeout,
+        )
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        payload: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> StreamingResponse:
+        """
+        Send an optional JSON payload and return the unread response.
+
+        ``timeout`` bounds each read (time between chunks), not the whole
+        stream.
+
+        Raises:
+            HTTPStatusError: On a non-2xx status (the body is read first)
+        """
+        request_headers = {}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            request_headers["Content-Type"] = "application/json"
+        if headers:
+            request_headers.update(headers)
+
+        pool, path, request_headers = self._prepare(url, request_headers)
+        conn, resp, reused = pool.open(
+            method,
+            path,
+            body,
+            request_headers,
+            connect_timeout if connect_timeout is not None else self.connect_timeout,
+            timeout if timeout is not None else self.read_timeout,
+        )
+        streaming = StreamingResponse(pool, conn, resp, reused)
+        if not 200 <= resp.status < 300:
+            try:
+                error_body = streaming.read()
+            except OSError:
+                error_body = b""
+            streaming.close()
+            raise HTTPStatusError(url, resp.status, resp.reason, error_body)
+        return streaming
+
+    def _prepare(
+        self, url: str, headers: Optional[Dict[str, str]]
+    ) -> Tuple[ConnectionPool, str, Dict[str, str]]:
+        """Resolve the pool, request path and headers for a URL."""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        request_headers = {"Connection": "keep-alive"}
+        if headers:
+            request_headers.update(headers)
+
+        with self._lock:
+            self.stats.requests += 1
+        return self._pool_for(scheme, parts.hostname, port), path, request_headers
+
+    def request_json(
+        self,
+        method: str,
+        url: str,
+        payload: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Send an optional JSON payload and decode the JSON response.
+
+        Raises:
+            HTTPStatusError: On a non-2xx status
+        """
+        request_headers = {"Accept": "application/json"}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            request_headers["Content-Type"] = "application/json"
+        if headers:
+            request_headers.update(headers)
+
+        resp = self.request(
+            method,
+            url,
+            body=body,
+            headers=request_headers,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+        )
+        if not 200 <= resp.status < 300:
+            raise HTTPStatusError(url, resp.status, resp.reason, resp.body)
+        return resp.json()
+
+    def close(self) -> None:
+        """Close all idle pooled connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+
+_default_transport: Optional[HTTPTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Process-wide shared transport (pools are reused across engines)."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HTTPTransport()
+    return _default_transport
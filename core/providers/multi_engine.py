@@ -18,13 +18,38 @@ Pattern source: local-first-ai-framework-patterns-april2026.md
 
 from __future__ import annotations
 
+import re
+import json
 import time
+import random
+import asyncio
 import logging
+import threading
+import http.client
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
 from pathlib import Path
 
+try:
+    from .http_transport import HTTPStatusError, HTTPTransport, get_transport
+    from .async_transport import AsyncHTTPTransport, get_async_transport
+    from .completion_cache import CompletionCache, cache_key
+    from .engine_stats import CircuitBreaker, EngineStats
+    from .rate_limit import RateLimiter
+    from .request_ledger import RequestLedger
+except ImportError:  # Run as a script (python multi_engine.py)
+    from http_transport import HTTPStatusError, HTTPTransport, get_transport
+    from async_transport import AsyncHTTPTransport, get_async_transport
+    from completion_cache import CompletionCache, cache_key
+    from engine_stats import CircuitBreaker, EngineStats
+    from rate_limit import RateLimiter
+    from request_ledger import RequestLedger
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,10 +58,24 @@ logger = logging.getLogger(__name__)
 # ─────────────────────────────────────────────────────────────────────────────
 
 class EngineBase(ABC):
-    """Abstract base for inference engines."""
+    """
+    Abstract base for inference engines.
+    
+    The async methods (``agenerate``, ``alist_models``, ``ahealth``) default
+    to running the blocking ones in a worker thread; engines that speak
+    HTTP override them with native asyncio versions.
+    """
     
     name: str = "abstract"
     
+    # Max concurrent generations routed to this engine by MultiEngine
+    # (async API and generate_batch)
+    max_concurrency: int = 8
+    
+    # Provider quota honoured by MultiEngine.generate_batch (None = unlimited)
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    
     @abstractmethod
     def list_models(self) -> List[str]:
         """Return available model IDs."""
@@ -57,6 +96,57 @@ class EngineBase(ABC):
         """Check engine availability."""
         pass
     
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a completion as incremental chunks.
+        
+        Yields ``{"delta": str}`` for each piece of content as it arrives,
+        then one final ``{"delta": "", "done": True, "model", "finish_reason",
+        "usage"}`` chunk. Engines without native streaming fall back to a
+        single chunk built from ``generate``.
+        """
+        result = self.generate(messages, model, **kwargs)
+        if result.get("content"):
+            yield {"delta": result["content"]}
+        yield {
+            "delta": "",
+            "done": True,
+            "model": result.get("model", model),
+            "finish_reason": result.get("finish_reason", "stop"),
+            "usage": result.get("usage", {}),
+        }
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Async generate (default: blocking generate in a worker thread)."""
+        return await asyncio.to_thread(self.generate, messages, model, **kwargs)
+    
+    async def alist_models(self) -> List[str]:
+        return await asyncio.to_thread(self.list_models)
+    
+    async def ahealth(self) -> bool:
+        return await asyncio.to_thread(self.health)
+    
+    def residency(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Models loaded in memory (cached view, no request), or None if the
+        engine does not track residency (cloud APIs are always "warm").
+        """
+        return None
+    
+    def refresh_residency(self) -> None:
+        """Refresh the residency view (called during model discovery)."""
+        pass
+    
     def heartbeat(self) -> Tuple[bool, float]:
         """Return health status and latency (ms)."""
         start = time.perf_counter()
@@ -97,24 +187,133 @@ class MockEngine(EngineBase):
             "usage": {"prompt_tokens": 10, "completion_tokens": 20},
         }
     
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        # Same reply as generate, one word per chunk
+        result = self.generate(messages, model, **kwargs)
+        words = result["content"].split(" ")
+        for i, word in enumerate(words):
+            yield {"delta": word if i == len(words) - 1 else word + " "}
+        yield {
+            "delta": "",
+            "done": True,
+            "model": model,
+            "finish_reason": "stop",
+            "usage": result["usage"],
+        }
+    
     def health(self) -> bool:
         return True
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        return self.generate(messages, model, **kwargs)
+    
+    async def alist_models(self) -> List[str]:
+        return self.list_models()
+    
+    async def ahealth(self) -> bool:
+        return True
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Ollama Engine (Local)
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Ollama keep_alive: a duration ("30m", 300), -1 (stay loaded), 0 (unload
+# now), or per-model values with an optional "default" entry
+KeepAlive = Union[None, str, int, float, Dict[str, Union[str, int, float]]]
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h)")
+_DURATION_UNITS = {
+    "ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0,
+}
+
+
+def _duration_seconds(value: Union[str, int, float]) -> float:
+    """Seconds of an Ollama duration; negative means forever (inf)."""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            seconds = float(text)
+        except ValueError:
+            negative = text.startswith("-")
+            parts = _DURATION_PART.findall(text.lstrip("-"))
+            if not parts:
+                raise ValueError(f"Invalid keep_alive duration: {value!r}")
+            seconds = sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+            if negative:
+                seconds = -seconds
+    else:
+        seconds = float(value)
+    return float("inf") if seconds < 0 else seconds
+
+
+def _model_key(name: str) -> str:
+    """Canonical Ollama model name ("llama3.2" == "llama3.2:latest")."""
+    return name if ":" in name else f"{name}:latest"
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    """Epoch of an Ollama RFC 3339 timestamp (nanosecond fractions allowed)."""
+    if not value:
+        return None
+    text = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
 class OllamaEngine(EngineBase):
     """Local Ollama engine — zero cost, full privacy."""
     
     name = "ollama"
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    # Ollama runs few requests per model in parallel (OLLAMA_NUM_PARALLEL);
+    # more in flight only queue inside the server
+    max_concurrency = 4
+    
+    # Ollama unloads a model 5 minutes after its last request by default
+    DEFAULT_KEEP_ALIVE = 300.0
+    
+    # Loading a large model from disk can take minutes
+    PRELOAD_TIMEOUT = 300.0
+    
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        transport: Optional[HTTPTransport] = None,
+        async_transport: Optional[AsyncHTTPTransport] = None,
+        keep_alive: KeepAlive = None,
+    ):
+        """
+        Args:
+            base_url: Ollama server URL
+            keep_alive: How long Ollama keeps a model loaded after a request
+                ("30m", 3600, -1 = always, 0 = unload at once), or a dict of
+                per-model values with an optional "default" entry. None
+                leaves the server default. A ``keep_alive`` request kwarg
+                overrides it.
+        """
         self.base_url = base_url.rstrip("/")
+        self._transport = transport or get_transport()
+        self._atransport = async_transport or get_async_transport()
         self._models_cache: List[str] = []
         self._cache_time: float = 0
         self._cache_ttl: float = 60.0  # Refresh every 60s
+        self.keep_alive = keep_alive
+        # model key -> {"expires_at": epoch (inf = never), "size": bytes, "size_vram": bytes}
+        self._resident: Dict[str, Dict[str, Any]] = {}
+        self._resident_lock = threading.Lock()
     
     def list_models(self) -> List[str]:
         # Cache models to avoid repeated HTTP calls
@@ -123,15 +322,8 @@ class OllamaEngine(EngineBase):
             return self._models_cache
         
         try:
-            import urllib.request
-            import json
-            
             url = f"{self.base_url}/api/tags"
-            req = urllib.request.Request(url, method="GET")
-            req.add_header("Accept", "application/json")
-            
-            with urllib.request.urlopen(req, timeout=5) as resp:
-                data = json.loads(resp.read().decode())
+            data = self._transport.request_json("GET", url, timeout=5)
             
             self._models_cache = [m["name"] for m in data.get("models", [])]
             self._cache_time = now
@@ -141,34 +333,57 @@ class OllamaEngine(EngineBase):
             logger.warning(f"Ollama list_models failed: {e}")
             return self._models_cache or []
     
+    async def alist_models(self) -> List[str]:
+        now = time.time()
+        if now - self._cache_time < self._cache_ttl and self._models_cache:
+            return self._models_cache
+        
+        try:
+            url = f"{self.base_url}/api/tags"
+            data = await self._atransport.request_json("GET", url, timeout=5)
+            
+            self._models_cache = [m["name"] for m in data.get("models", [])]
+            self._cache_time = now
+            return self._models_cache
+            
+        except Exception as e:
+            logger.warning(f"Ollama alist_models failed: {e}")
+            return self._models_cache or []
+    
     def generate(
         self,
         messages: List[Dict[str, str]],
         model: str,
         **kwargs
     ) -> Dict[str, Any]:
-        import urllib.request
-        import json
-        
-        # Build request body
-        body = {
-            "model": model,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": kwargs.get("temperature", 0.7),
-                "num_predict": kwargs.get("max_tokens", 2048),
-            }
-        }
-        
         url = f"{self.base_url}/api/chat"
-        data = json.dumps(body).encode()
-        req = urllib.request.Request(url, data=data, method="POST")
-        req.add_header("Content-Type", "application/json")
-        
-        with urllib.request.urlopen(req, timeout=kwargs.get("timeout", 120)) as resp:
-            result = json.loads(resp.read().decode())
-        
+        result = self._transport.request_json(
+            "POST",
+            url,
+            self._chat_body(messages, model, stream=False, **kwargs),
+            timeout=kwargs.get("timeout", 120),
+        )
+        self._mark_resident(model, self._keep_alive_for(model, kwargs))
+        return self._parse_chat(result, model)
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}/api/chat"
+        result = await self._atransport.request_json(
+            "POST",
+            url,
+            self._chat_body(messages, model, stream=False, **kwargs),
+            timeout=kwargs.get("timeout", 120),
+        )
+        self._mark_resident(model, self._keep_alive_for(model, kwargs))
+        return self._parse_chat(result, model)
+    
+    @staticmethod
+    def _parse_chat(result: Dict[str, Any], model: str) -> Dict[str, Any]:
         message = result.get("message", {})
         content = message.get("content", "")
         
@@ -189,13 +404,224 @@ class OllamaEngine(EngineBase):
             },
         }
     
+    def _chat_body(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        stream: bool,
+        **kwargs
+    ) -> Dict[str, Any]:
+        body = {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "options": {
+                "temperature": kwargs.get("temperature", 0.7),
+                "num_predict": kwargs.get("max_tokens", 2048),
+            }
+        }
+        keep_alive = self._keep_alive_for(model, kwargs)
+        if keep_alive is not None:
+            body["keep_alive"] = keep_alive
+        return body
+    
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream /api/chat (NDJSON: one JSON object per line)."""
+        url = f"{self.base_url}/api/chat"
+        body = self._chat_body(messages, model, stream=True, **kwargs)
+        
+        with self._transport.stream(
+            "POST", url, body, timeout=kwargs.get("timeout", 120)
+        ) as resp:
+            for line in resp.iter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {event['error']}")
+                
+                message = event.get("message", {})
+                chunk: Dict[str, Any] = {"delta": message.get("content", "")}
+                if message.get("thinking"):
+                    chunk["thinking"] = message["thinking"]
+                
+                if not event.get("done"):
+                    yield chunk
+                    continue
+                
+                chunk.update({
+                    "done": True,
+                    "model": model,
+                    "finish_reason": event.get("done_reason", "stop"),
+                    "usage": {
+                        "prompt_tokens": event.get("prompt_eval_count", 0),
+                        "completion_tokens": event.get("eval_count", 0),
+                    },
+                })
+                # Drain the chunked terminator so the connection is reused
+                resp.read()
+                break
+            else:
+                raise RuntimeError("Ollama stream ended without a final message")
+        
+        self._mark_resident(model, self._keep_alive_for(model, kwargs))
+        yield chunk
+    
+    # ── Residency (warm-up and keep_alive) ──
+    
+    def _keep_alive_for(self, model: str, kwargs: Dict[str, Any]) -> Any:
+        """keep_alive to send for ``model`` (None = server default)."""
+        if kwargs.get("keep_alive") is not None:
+            return kwargs["keep_alive"]
+        policy = self.keep_alive
+        if isinstance(policy, dict):
+            for key in (model, _model_key(model), "default"):
+                if key in policy:
+                    return policy[key]
+            return None
+        return policy
+    
+    def _mark_resident(self, model: str, keep_alive: Any) -> None:
+        """
+        Record that ``model`` was just used (Ollama keeps it loaded).
+
+        Runs after the request succeeded, so a keep_alive this parser does
+        not understand is logged and treated as the server default.
+        """
+        seconds = self.DEFAULT_KEEP_ALIVE
+        if keep_alive is not None:
+            try:
+                seconds = _duration_seconds(keep_alive)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Ollama residency of {model}: {e}")
+        key = _model_key(model)
+        with self._resident_lock:
+            if seconds == 0:
+                self._resident.pop(key, None)
+                return
+            entry = self._resident.setdefault(key, {"size": None, "size_vram": None})
+            entry["expires_at"] = time.time() + seconds
+    
+    def preload(
+        self,
+        model: str,
+        keep_alive: Any = None,
+        timeout: float = PRELOAD_TIMEOUT,
+    ) -> bool:
+        """
+        Load ``model`` into memory without generating (an empty chat
+        request), so the first real request does not pay the load time.
+        
+        Returns:
+            True if the model is loaded
+        """
+        if keep_alive is None:
+            keep_alive = self._keep_alive_for(model, {})
+        body: Dict[str, Any] = {"model": model, "messages": []}
+        if keep_alive is not None:
+            body["keep_alive"] = keep_alive
+        
+        started = time.perf_counter()
+        try:
+            self._transport.request_json(
+                "POST", f"{self.base_url}/api/chat", body, timeout=timeout
+            )
+        except Exception as e:
+            logger.warning(f"Ollama preload of {model} failed: {e}")
+            return False
+        
+        self._mark_resident(model, keep_alive)
+        logger.info(f"Ollama preloaded {model} in {time.perf_counter() - started:.1f}s")
+        return True
+    
+    def preload_in_background(self, model: str, keep_alive: Any = None) -> threading.Thread:
+        """Start ``preload`` in a daemon thread and return it."""
+        thread = threading.Thread(
+            target=self.preload,
+            args=(model, keep_alive),
+            daemon=True,
+            name=f"OllamaPreload-{model}",
+        )
+        thread.start()
+        return thread
+    
+    def unload(self, model: str) -> bool:
+        """Ask Ollama to free ``model`` now (keep_alive 0)."""
+        try:
+            self._transport.request_json(
+                "POST",
+                f"{self.base_url}/api/chat",
+                {"model": model, "messages": [], "keep_alive": 0},
+                timeout=30,
+            )
+        except Exception as e:
+            logger.warning(f"Ollama unload of {model} failed: {e}")
+            return False
+        self._mark_resident(model, 0)
+        return True
+    
+    def refresh_residency(self) -> None:
+        """Replace the residency view with the server's (/api/ps)."""
+        try:
+            data = self._transport.request_json(
+                "GET", f"{self.base_url}/api/ps", timeout=5
+            )
+        except Exception as e:
+            logger.debug(f"Ollama /api/ps failed: {e}")
+            return
+        
+        resident = {}
+        for m in data.get("models") or []:
+            expires_at = _parse_timestamp(m.get("expires_at", ""))
+            resident[_model_key(m.get("name") or m.get("model", ""))] = {
+                "expires_at": expires_at if expires_at is not None else float("inf"),
+                "size": m.get("size"),
+                "size_vram": m.get("size_vram"),
+            }
+        with self._resident_lock:
+            self._resident = resident
+    
+    def residency(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Loaded models (cached view: /api/ps at discovery, updated by each
+        request): size, VRAM and seconds until Ollama unloads them.
+        """
+        now = time.time()
+        with self._resident_lock:
+            for key in [k for k, v in self._resident.items() if v["expires_at"] <= now]:
+                del self._resident[key]
+            return {
+                key: {
+                    "size_bytes": entry["size"],
+                    "vram_bytes": entry["size_vram"],
+                    "expires_in_s": (
+                        None if entry["expires_at"] == float("inf")
+                        else round(entry["expires_at"] - now, 1)
+                    ),
+                }
+                for key, entry in self._resident.items()
+            }
+    
     def health(self) -> bool:
         try:
-            import urllib.request
             url = f"{self.base_url}/api/tags"
-            req = urllib.request.Request(url, method="GET")
-            urllib.request.urlopen(req, timeout=3)
-            return True
+            resp = self._transport.request("GET", url, timeout=3, connect_timeout=3)
+            return resp.status < 400
+        except Exception:
+            return False
+    
+    async def ahealth(self) -> bool:
+        try:
+            url = f"{self.base_url}/api/tags"
+            resp = await self._atransport.request(
+                "GET", url, timeout=3, connect_timeout=3
+            )
+            return resp.status < 400
         except Exception:
             return False
 
@@ -209,6 +635,8 @@ class OpenAICompatEngine(EngineBase):
     
     name = "openai_compat"
     
+    max_concurrency = 16
+    
     # Known cloud model prefixes for routing
     CLOUD_PREFIXES = ("gpt-", "claude-", "gemini-", "openrouter/")
     
@@ -217,9 +645,13 @@ class OpenAICompatEngine(EngineBase):
         api_key: str,
         base_url: str = "https://api.nanogpt.com/v1",
         models: List[str] = None,
+        transport: Optional[HTTPTransport] = None,
+        async_transport: Optional[AsyncHTTPTransport] = None,
     ):
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
+        self._transport = transport or get_transport()
+        self._atransport = async_transport or get_async_transport()
         self._known_models = models or [
             "gpt-4o-mini",
             "gpt-4o",
@@ -236,9 +668,6 @@ class OpenAICompatEngine(EngineBase):
         model: str,
         **kwargs
     ) -> Dict[str, Any]:
-        import urllib.request
-        import json
-        
         body = {
             "model": model,
             "messages": messages,
@@ -247,15 +676,40 @@ class OpenAICompatEngine(EngineBase):
         }
         
         url = f"{self.base_url}/chat/completions"
-        data = json.dumps(body).encode()
-        req = urllib.request.Request(url, data=data, method="POST")
-        req.add_header("Content-Type", "application/json")
-        req.add_header("Authorization", f"Bearer {self.api_key}")
-        
-        timeout = kwargs.get("timeout", 60)
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            result = json.loads(resp.read().decode())
+        result = self._transport.request_json(
+            "POST",
+            url,
+            body,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=kwargs.get("timeout", 60),
+        )
+        return self._parse_completion(result, model)
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        body = {
+            "model": model,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", 0.7),
+            "max_tokens": kwargs.get("max_tokens", 2048),
+        }
         
+        url = f"{self.base_url}/chat/completions"
+        result = await self._atransport.request_json(
+            "POST",
+            url,
+            body,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=kwargs.get("timeout", 60),
+        )
+        return self._parse_completion(result, model)
+    
+    @staticmethod
+    def _parse_completion(result: Dict[str, Any], model: str) -> Dict[str, Any]:
         choice = result.get("choices", [{}])[0]
         return {
             "model": model,
@@ -264,9 +718,74 @@ class OpenAICompatEngine(EngineBase):
             "usage": result.get("usage", {}),
         }
     
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream /chat/completions (server-sent events)."""
+        body = {
+            "model": model,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", 0.7),
+            "max_tokens": kwargs.get("max_tokens", 2048),
+            "stream": True,
+            # Usage arrives in a last chunk with empty choices
+            "stream_options": {"include_usage": True},
+        }
+        
+        url = f"{self.base_url}/chat/completions"
+        finish_reason = "stop"
+        usage: Dict[str, Any] = {}
+        
+        with self._transport.stream(
+            "POST",
+            url,
+            body,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Accept": "text/event-stream",
+            },
+            timeout=kwargs.get("timeout", 60),
+        ) as resp:
+            for line in resp.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue  # blank separators, comments, event names
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("error"):
+                    raise RuntimeError(f"Stream error: {event['error']}")
+                if event.get("usage"):
+                    usage = event["usage"]
+                for choice in event.get("choices") or []:
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield {"delta": delta}
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+            # Drain anything after [DONE] so the connection can be reused
+            resp.read()
+        
+        yield {
+            "delta": "",
+            "done": True,
+            "model": model,
+            "finish_reason": finish_reason,
+            "usage": usage,
+        }
+    
     def health(self) -> bool:
         # For cloud APIs, we just check if key is set
         return bool(self.api_key)
+    
+    async def alist_models(self) -> List[str]:
+        return self._known_models
+    
+    async def ahealth(self) -> bool:
+        return bool(self.api_key)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -281,6 +800,144 @@ class EngineStatus:
     latency_ms: float
     models: List[str] = field(default_factory=list)
     last_check: float = field(default_factory=time.time)
+    consecutive_failures: int = 0
+    last_error: str = ""
+
+
+def is_engine_failure(error: BaseException) -> bool:
+    """
+    True if an error means the engine itself is down or overloaded.
+
+    Connection errors, timeouts and 5xx mark the engine unhealthy; a 4xx
+    (unknown model, bad request) is the caller's problem, not the engine's.
+    """
+    if isinstance(error, HTTPStatusError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+class DeadlineExceeded(TimeoutError):
+    """A request's ``deadline`` ran out before any engine answered."""
+
+
+class HealthMonitor:
+    """
+    Background heartbeat loop for a set of engines.
+    
+    Each engine is probed on its own schedule: every ``interval`` seconds
+    while healthy, backing off exponentially (up to ``max_backoff``) while
+    it keeps failing. All delays get ±``jitter`` so several hosts don't
+    probe in lockstep.
+    """
+    
+    def __init__(
+        self,
+        engines: List[Tuple[str, EngineBase]],
+        on_result: Callable[[str, bool, float, str], int],
+        interval: float = 10.0,
+        max_backoff: float = 120.0,
+        jitter: float = 0.1,
+    ):
+        """
+        Args:
+            engines: List of (name, engine) tuples to probe
+            on_result: Callback (name, healthy, latency_ms, error) that stores
+                the result and returns the engine's consecutive failures
+            interval: Seconds between probes of a healthy engine
+            max_backoff: Upper bound for the delay of a failing engine
+            jitter: Relative random spread applied to every delay
+        """
+        self._engines = engines
+        self._on_result = on_result
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        
+        self._next_check: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def delay(self, failures: int) -> float:
+        """Seconds until the next probe of an engine with ``failures``."""
+        if failures <= 0:
+            base = self.interval
+        else:
+            base = min(self.max_backoff, self.interval * (2 ** (failures - 1)))
+        return base * (1 + random.uniform(-self.jitter, self.jitter))
+    
+    def schedule(self, name: str, failures: int) -> None:
+        """(Re)schedule an engine's next probe based on its failure count."""
+        with self._lock:
+            self._next_check[name] = time.monotonic() + self.delay(failures)
+        self._wakeup.set()
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        for name, _ in self._engines:
+            with self._lock:
+                self._next_check.setdefault(name, time.monotonic() + self.delay(0))
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="EngineHealthMonitor"
+        )
+        self._thread.start()
+    
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [n for n, at in self._next_check.items() if at <= now]
+                upcoming = min(self._next_check.values(), default=now + self.interval)
+            
+            if not due:
+                self._wakeup.wait(timeout=max(0.0, upcoming - now))
+                self._wakeup.clear()
+                continue
+            
+            for name, engine in self._engines:
+                if name not in due or self._stop.is_set():
+                    continue
+                error = ""
+                try:
+                    healthy, latency = engine.heartbeat()
+                except Exception as e:
+                    healthy, latency, error = False, 9999.0, str(e)
+                try:
+                    failures = self._on_result(name, healthy, latency, error)
+                except Exception as e:
+                    logger.warning(f"Health result for {name} not recorded: {e}")
+                    failures = 0 if healthy else 1
+                self.schedule(name, failures)
+
+
+@dataclass
+class _BatchItem:
+    """One request of a ``generate_batch`` call."""
+    index: int
+    messages: List[Dict[str, str]]
+    model: str
+    params: Dict[str, Any]
+    key: Optional[str]
+    tokens: int
+    caller: Optional[str] = None
+    attempts: int = 0  # Attempts started (same count as ``generate``)
+    failed: Set[int] = field(default_factory=set)
+    first: Optional[EngineBase] = None  # Engine of the first attempt
+    deadline_at: Optional[float] = None  # Absolute end of the item's ``deadline``
 
 
 class MultiEngine:
@@ -288,10 +945,25 @@ class MultiEngine:
     Provider resilience wrapper — routes requests with fallback.
     
     Features:
-    - Automatic model discovery from all engines
+    - Automatic model discovery from all engines (parallel, bounded by
+      ``discovery_timeout``, single-flight and stale-while-revalidate)
     - Local-first routing (prioritize local engines)
     - Fallback on engine failure
-    - Health monitoring with latency tracking
+    - Streaming (generate_stream) with fallback until the first chunk
+    - asyncio API (agenerate, agather) with per-engine concurrency limits
+    - Opt-in hedged requests and a per-request ``deadline`` across retries
+    - Optional persistent cache of deterministic completions
+    - Batch generation (generate_batch) honouring per-engine quotas
+    - Background health monitoring with latency tracking, started by the
+      first request: routing reads cached health only, real request
+      failures update it immediately
+    - Per-engine EWMA latency, error rate and circuit breaker fed by real
+      requests; opt-in ``routing="latency"`` picks the fastest engine
+      serving a model
+    - Residency-aware routing: engines that already have the model loaded
+      (Ollama /api/ps) are preferred over cold ones
+    - Optional request ledger: tokens, latency, retries, fallback and cache
+      hits per request, tagged with the ``caller`` kwarg
     
     Usage:
         engine = MultiEngine([
@@ -309,11 +981,30 @@ class MultiEngine:
     # Cloud model prefixes for smart routing
     CLOUD_PREFIXES = ("gpt-", "claude-", "gemini-", "openrouter/", "glm-")
     
+    # Successful request latencies kept per engine for the hedge delay
+    LATENCY_WINDOW = 200
+    # Below this many samples the fixed ``hedge_delay`` is used instead
+    HEDGE_MIN_SAMPLES = 20
+    # Completion tokens assumed for quota accounting when max_tokens is unset
+    BATCH_COMPLETION_ESTIMATE = 512
+    
     def __init__(
         self,
         engines: List[Tuple[str, EngineBase]],
         fallback_order: List[str] = None,
         refresh_interval: float = 30.0,
+        health_interval: float = 10.0,
+        monitor: bool = True,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_delay: float = 1.0,
+        hedge_workers: int = 32,
+        cache: Optional[CompletionCache] = None,
+        routing: str = "priority",
+        failure_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        discovery_timeout: float = 5.0,
+        ledger: Optional[RequestLedger] = None,
     ):
         """
         Initialize MultiEngine with ordered providers.
@@ -322,6 +1013,28 @@ class MultiEngine:
             engines: List of (name, engine) tuples
             fallback_order: Custom fallback order (default: local → cloud → mock)
             refresh_interval: Model discovery refresh interval (seconds)
+            health_interval: Heartbeat interval of the background monitor
+            monitor: Run the background health monitor thread. It starts
+                with the first routed request (or ``start_monitor()``), so
+                building a MultiEngine starts no thread
+            hedge: Hedge every request by default (per call: ``hedge=``)
+            hedge_percentile: Latency percentile of the primary engine after
+                which the hedge request is sent
+            hedge_delay: Hedge delay (seconds) until an engine has
+                ``HEDGE_MIN_SAMPLES`` latency samples
+            hedge_workers: Threads available to sync hedged requests
+            cache: Completion cache, used for ``temperature=0`` requests
+                and for calls with ``cache=True``
+            routing: ``"priority"`` (first engine that listed the model) or
+                ``"latency"`` (lowest expected latency among the engines
+                serving the model)
+            failure_threshold: Consecutive request failures that open an
+                engine's circuit breaker
+            breaker_reset: Seconds an open breaker waits before a trial
+            discovery_timeout: Overall limit of one model discovery round
+                (engines are discovered in parallel)
+            ledger: Request ledger recording every generation (flushed,
+                not closed, by ``close``)
         """
         self._engines = engines
         self._fallback_order = fallback_order or ["local", "cloud", "mock"]
@@ -330,84 +1043,410 @@ class MultiEngine:
         self._model_map: Dict[str, EngineBase] = {}
         self._engine_status: Dict[str, EngineStatus] = {}
         self._last_refresh: float = 0
+        self._status_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._discovery_timeout = discovery_timeout
         
         # Always include mock as final fallback
         has_mock = any(name == "mock" for name, _ in engines)
         if not has_mock:
             self._engines.append(("mock", MockEngine()))
         
+        if routing not in ("priority", "latency"):
+            raise ValueError(f"Unknown routing policy: {routing}")
+        self._routing = routing
+        self._model_engines: Dict[str, List[EngineBase]] = {}
+        self._stats: Dict[str, EngineStats] = {
+            name: EngineStats(
+                latency_window=self.LATENCY_WINDOW,
+                breaker=CircuitBreaker(
+                    failure_threshold=failure_threshold, reset_timeout=breaker_reset
+                ),
+            )
+            for name, _ in self._engines
+        }
+        
+        self._names: Dict[int, str] = {id(eng): name for name, eng in self._engines}
+        self._limiters: Dict[str, RateLimiter] = {
+            name: RateLimiter(eng.requests_per_minute, eng.tokens_per_minute)
+            for name, eng in self._engines
+            if eng.requests_per_minute or eng.tokens_per_minute
+        }
+        self._slots: Dict[Tuple[int, int], Tuple[Any, asyncio.Semaphore]] = {}
+        self._slots_lock = threading.Lock()
+        
+        self._hedge = hedge
+        self._hedge_percentile = hedge_percentile
+        self._hedge_delay = hedge_delay
+        self._hedge_workers = hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._request_stats = {"hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self._cache = cache
+        self._ledger = ledger
+        
         # Initial discovery
         self._refresh_map()
+        
+        self._monitor = HealthMonitor(
+            self._engines, self._record_health, interval=health_interval
+        )
+        self._monitor_pending = monitor
+        self._monitor_start_lock = threading.Lock()
     
-    def _refresh_map(self) -> None:
-        """Discover available models from all engines."""
-        now = time.time()
-        if now - self._last_refresh < self._refresh_interval:
-            return
+    def _refresh_map(self, wait: bool = False) -> None:
+        """
+        Rediscover models once the map is older than ``refresh_interval``.
         
-        self._model_map.clear()
+        Single-flight: one discovery runs at a time and concurrent callers
+        never start another. Once a map exists, a due refresh runs in the
+        background while callers keep routing on the current map
+        (stale-while-revalidate); only the first discovery, or
+        ``wait=True``, blocks.
+        """
+        if time.time() - self._last_refresh < self._refresh_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            # Another caller is discovering: wait only if there is no map yet
+            if wait or not self._last_refresh:
+                with self._refresh_lock:
+                    pass
+            return
+        if self._last_refresh and not wait:
+            threading.Thread(
+                target=self._discover, daemon=True, name="ModelMapRefresh"
+            ).start()
+            return
+        self._discover()
+    
+    def _discover_engine(self, name: str, engine: EngineBase) -> EngineStatus:
+        """Heartbeat and list the models of one engine."""
+        try:
+            healthy, latency = engine.heartbeat()
+            models = engine.list_models() if healthy else []
+            if healthy:
+                engine.refresh_residency()
+            return EngineStatus(
+                name=name,
+                healthy=healthy,
+                latency_ms=latency,
+                models=models,
+                consecutive_failures=0 if healthy else 1,
+            )
+        except Exception as e:
+            logger.warning(f"Engine {name} discovery failed: {e}")
+            return EngineStatus(
+                name=name,
+                healthy=False,
+                latency_ms=9999,
+                models=[],
+                consecutive_failures=1,
+                last_error=str(e),
+            )
+    
+    def _discover(self) -> None:
+        """
+        One discovery round over all engines in parallel (caller holds
+        ``_refresh_lock``, released here).
         
-        for name, engine in self._engines:
-            try:
-                healthy, latency = engine.heartbeat()
-                models = engine.list_models() if healthy else []
-                
-                self._engine_status[name] = EngineStatus(
-                    name=name,
-                    healthy=healthy,
-                    latency_ms=latency,
-                    models=models,
+        Bounded by ``discovery_timeout`` overall: an engine that has not
+        answered by then keeps its previous status and models, or is
+        marked unhealthy if it never answered; its probe finishes in the
+        background and is ignored.
+        """
+        try:
+            if time.time() - self._last_refresh < self._refresh_interval:
+                return  # Refreshed while we waited for the lock
+            started = time.time()
+            
+            # Daemon threads: a probe stuck past the deadline must not hold
+            # up interpreter exit the way executor workers would
+            results: Dict[str, EngineStatus] = {}
+            
+            def probe(name: str, engine: EngineBase) -> None:
+                results[name] = self._discover_engine(name, engine)
+            
+            threads = [
+                threading.Thread(
+                    target=probe, args=(name, engine), daemon=True,
+                    name=f"EngineDiscovery-{name}",
                 )
+                for name, engine in self._engines
+            ]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + self._discovery_timeout
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            
+            model_map: Dict[str, EngineBase] = {}
+            model_engines: Dict[str, List[EngineBase]] = {}
+            
+            with self._status_lock:
+                # Engine order, not completion order: the first engine that
+                # lists a model owns it
+                for name, engine in self._engines:
+                    status = results.get(name)
+                    if status is not None:
+                        self._engine_status[name] = status
+                    else:
+                        logger.warning(
+                            f"Engine {name} discovery exceeded {self._discovery_timeout}s"
+                        )
+                        status = self._engine_status.get(name)
+                        if status is None:
+                            status = self._engine_status[name] = EngineStatus(
+                                name=name,
+                                healthy=False,
+                                latency_ms=9999,
+                                consecutive_failures=1,
+                                last_error="discovery timed out",
+                            )
+                    
+                    # Map each model to its engine
+                    for model_id in status.models:
+                        if model_id not in model_map:
+                            model_map[model_id] = engine
+                        model_engines.setdefault(model_id, []).append(engine)
                 
-                # Map each model to its engine
-                for model_id in models:
-                    if model_id not in self._model_map:
-                        self._model_map[model_id] = engine
-                        
-            except Exception as e:
-                logger.warning(f"Engine {name} discovery failed: {e}")
-                self._engine_status[name] = EngineStatus(
-                    name=name,
-                    healthy=False,
-                    latency_ms=9999,
-                    models=[],
+                # Swap in one step: concurrent routing never sees a half-built map
+                self._model_map = model_map
+                self._model_engines = model_engines
+            self._last_refresh = started
+            logger.info(f"Model map refreshed: {len(self._model_map)} models available")
+        finally:
+            self._refresh_lock.release()
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Cached health state
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _is_healthy(self, engine: EngineBase) -> bool:
+        """Cached health of an engine (no network I/O)."""
+        status = self._engine_status.get(self._names.get(id(engine), ""))
+        return status.healthy if status else True
+    
+    def _engine_stats(self, engine: EngineBase) -> Optional[EngineStats]:
+        return self._stats.get(self._names.get(id(engine), ""))
+    
+    def _is_available(self, engine: EngineBase, exclude: Set[int] = frozenset()) -> bool:
+        """
+        Healthy, not excluded and admitted by its circuit breaker.
+        
+        The breaker check is last: in half-open state it hands out the
+        single trial request, so only call this for an engine about to be used.
+        """
+        if id(engine) in exclude or not self._is_healthy(engine):
+            return False
+        stats = self._engine_stats(engine)
+        return stats.breaker.allow() if stats else True
+    
+    def _expected_latency(self, engine: EngineBase) -> float:
+        """Expected seconds per request (heartbeat latency until measured)."""
+        stats = self._engine_stats(engine)
+        status = self._engine_status.get(self._names.get(id(engine), ""))
+        default = status.latency_ms / 1000 if status else 0.0
+        return stats.expected_latency(default) if stats else default
+    
+    def _record_health(
+        self, name: str, healthy: bool, latency_ms: float, error: str = ""
+    ) -> int:
+        """
+        Store a heartbeat or request outcome. Returns consecutive failures.
+        
+        When an engine recovers, its models are listed again so the
+        model map routes to it without waiting for the next refresh.
+        """
+        with self._status_lock:
+            status = self._engine_status.get(name)
+            if status is None:
+                status = self._engine_status[name] = EngineStatus(
+                    name=name, healthy=healthy, latency_ms=latency_ms
                 )
+            recovered = healthy and not status.healthy
+            status.healthy = healthy
+            status.latency_ms = latency_ms
+            status.last_check = time.time()
+            if healthy:
+                status.consecutive_failures = 0
+                status.last_error = ""
+            else:
+                status.consecutive_failures += 1
+                status.last_error = error
+            failures = status.consecutive_failures
         
-        self._last_refresh = now
-        logger.info(f"Model map refreshed: {len(self._model_map)} models available")
+        if recovered:
+            logger.info(f"Engine {name} recovered")
+            if not status.models:
+                self._adopt_models(name)
+        return failures
     
-    def _engine_for(self, model: str, retry_on_failure: bool = True) -> EngineBase:
+    def _adopt_models(self, name: str) -> None:
+        """List a recovered engine's models and add them to the map."""
+        engine = next((eng for n, eng in self._engines if n == name), None)
+        if engine is None:
+            return
+        try:
+            models = engine.list_models()
+        except Exception as e:
+            logger.warning(f"Engine {name} list_models failed: {e}")
+            return
+        with self._status_lock:
+            self._engine_status[name].models = models
+            model_map = dict(self._model_map)
+            model_engines = {m: list(engs) for m, engs in self._model_engines.items()}
+            for model_id in models:
+                model_map.setdefault(model_id, engine)
+                serving = model_engines.setdefault(model_id, [])
+                if engine not in serving:
+                    serving.append(engine)
+            self._model_map = model_map
+            self._model_engines = model_engines
+    
+    def _report_outcome(
+        self,
+        engine: EngineBase,
+        error: Optional[BaseException],
+        elapsed: Optional[float] = None,
+    ) -> None:
+        """Feed a real request outcome into the health state and stats."""
+        name = self._names.get(id(engine))
+        if name is None:
+            return
+        status = self._engine_status.get(name)
+        stats = self._stats.get(name)
+        if error is None or not is_engine_failure(error):
+            # A 4xx still means the engine answered
+            if stats is not None:
+                stats.record_success(elapsed if error is None else None)
+            if status is not None and not status.healthy:
+                self._record_health(name, True, status.latency_ms)
+                self._monitor.schedule(name, 0)
+            return
+        if stats is not None and stats.record_failure():
+            logger.warning(f"Circuit breaker for engine {name} opened")
+        latency = status.latency_ms if status else 9999.0
+        failures = self._record_health(name, False, latency, str(error))
+        logger.warning(f"Engine {name} marked unhealthy: {error}")
+        # The monitor probes it again after the backoff delay
+        self._monitor.schedule(name, failures)
+    
+    def start_monitor(self) -> None:
+        """Start the background health monitor (idempotent)."""
+        with self._monitor_start_lock:
+            self._monitor_pending = False
+            self._monitor.start()
+    
+    def _ensure_monitor(self) -> None:
+        """Start the monitor on the first request (when enabled)."""
+        if self._monitor_pending:
+            with self._monitor_start_lock:
+                if self._monitor_pending:
+                    self._monitor_pending = False
+                    self._monitor.start()
+    
+    def close(self) -> None:
+        """Stop the background health monitor and the hedge threads."""
+        with self._monitor_start_lock:
+            self._monitor_pending = False
+        self._monitor.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._ledger is not None:
+            self._ledger.flush()
+    
+    def __enter__(self) -> "MultiEngine":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Routing
+    # ─────────────────────────────────────────────────────────────────────
+    
+    @staticmethod
+    def _is_resident(engine: EngineBase, model: str) -> bool:
+        """Whether ``model`` is loaded in ``engine`` (no cold-load on use)."""
+        resident = engine.residency()
+        return bool(resident) and _model_key(model) in resident
+    
+    def _lookup(self, model: str, exclude: Set[int]) -> Optional[EngineBase]:
+        """
+        Engine serving ``model`` according to the routing policy. When
+        several engines serve it, those that already have it loaded come
+        first (a cold load costs seconds).
+        """
+        if self._routing == "latency":
+            candidates = [
+                eng for eng in self._model_engines.get(model, ())
+                if id(eng) not in exclude and self._is_healthy(eng)
+                and self._engine_stats(eng).breaker.available()
+            ]
+            ranked = sorted(
+                candidates,
+                key=lambda eng: (not self._is_resident(eng, model), self._expected_latency(eng)),
+            )
+            for eng in ranked:
+                if self._is_available(eng, exclude):
+                    return eng
+            return None
+        candidates = self._model_engines.get(model, ())
+        if len(candidates) > 1:
+            for eng in candidates:
+                if self._is_resident(eng, model) and self._is_available(eng, exclude):
+                    return eng
+        engine = self._model_map.get(model)
+        if engine and self._is_available(engine, exclude):
+            return engine
+        return None
+    
+    def _engine_for(
+        self,
+        model: str,
+        retry_on_failure: bool = True,
+        exclude: Set[int] = frozenset(),
+    ) -> EngineBase:
         """
         Find engine for model with fallback logic.
         
         Routing strategy:
-        1. Direct model map lookup
-        2. Refresh and retry (model may be new)
+        1. Model lookup (first engine listing it, or the fastest one with
+           ``routing="latency"``)
+        2. Refresh and retry (model may be new; once a map exists the
+           refresh runs in the background and this lookup sees the old map)
         3. Cloud prefix detection → route to cloud engine
         4. Fallback chain: local → cloud → mock
+        
+        Health comes from the cached state kept by the monitor; no probe
+        is sent on the request path. Engines whose circuit breaker is open
+        and the ids in ``exclude`` (engines that already failed this
+        request) are skipped.
         """
+        self._ensure_monitor()
+        
         # Step 1: Direct lookup
-        engine = self._model_map.get(model)
-        if engine and engine.health():
+        engine = self._lookup(model, exclude)
+        if engine:
             return engine
         
         # Step 2: Refresh and retry
         if retry_on_failure:
             self._refresh_map()
-            engine = self._model_map.get(model)
-            if engine and engine.health():
+            engine = self._lookup(model, exclude)
+            if engine:
                 return engine
         
         # Step 3: Cloud prefix detection
         if any(model.startswith(p) for p in self.CLOUD_PREFIXES):
             for name, eng in self._engines:
-                if name in ("cloud", "openai_compat") and eng.health():
+                if name in ("cloud", "openai_compat") and self._is_available(eng, exclude):
                     return eng
         
         # Step 4: Fallback chain
         for name in self._fallback_order:
             for eng_name, eng in self._engines:
-                if eng_name == name and eng.health():
+                if eng_name == name and self._is_available(eng, exclude):
                     logger.info(f"Using fallback engine: {name} for model {model}")
                     return eng
         
@@ -418,6 +1457,235 @@ class MultiEngine:
         
         raise RuntimeError("No healthy engine available")
     
+    # ─────────────────────────────────────────────────────────────────────
+    # Hedging and deadlines
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _count(self, key: str) -> None:
+        with self._status_lock:
+            self._request_stats[key] += 1
+    
+    def _hedge_after(self, engine: EngineBase) -> float:
+        """Seconds to wait for ``engine`` before sending the hedge request."""
+        stats = self._engine_stats(engine)
+        if stats is None or len(stats.latencies) < self.HEDGE_MIN_SAMPLES:
+            return self._hedge_delay
+        return stats.percentile(self._hedge_percentile)
+    
+    def _hedge_partner(
+        self, primary: EngineBase, exclude: Set[int] = frozenset()
+    ) -> Optional[EngineBase]:
+        """Next healthy engine after ``primary`` in the fallback order."""
+        primary_name = self._names.get(id(primary))
+        order = list(self._fallback_order)
+        if primary_name in order:
+            index = order.index(primary_name)
+            order = order[index + 1:] + order[:index]
+        for name in order:
+            # Mock would always win the race with a canned answer
+            if name in ("mock", primary_name):
+                continue
+            for eng_name, eng in self._engines:
+                if eng_name == name and eng is not primary and self._is_available(eng, exclude):
+                    return eng
+        return None
+    
+    @staticmethod
+    def _deadline_at(deadline: Optional[float]) -> Optional[float]:
+        """Absolute ``time.monotonic()`` end of a relative deadline."""
+        return None if deadline is None else time.monotonic() + deadline
+    
+    def _deadline_exceeded(self, model: str) -> DeadlineExceeded:
+        self._count("deadline_exceeded")
+        return DeadlineExceeded(f"Deadline exceeded for model {model}")
+    
+    def _attempt_kwargs(
+        self, kwargs: Dict[str, Any], deadline_at: Optional[float], model: str
+    ) -> Dict[str, Any]:
+        """Engine kwargs for one attempt, with ``timeout`` capped by the deadline."""
+        if deadline_at is None:
+            return kwargs
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise self._deadline_exceeded(model)
+        timeout = kwargs.get("timeout")
+        return {**kwargs, "timeout": remaining if timeout is None else min(timeout, remaining)}
+    
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._slots_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._hedge_workers, thread_name_prefix="MultiEngineHedge"
+                )
+            return self._executor
+    
+    def _call_engine(
+        self,
+        engine: EngineBase,
+        messages: List[Dict[str, str]],
+        model: str,
+        kwargs: Dict[str, Any],
+        deadline_at: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """One timed ``engine.generate`` call with its outcome reported."""
+        started = time.perf_counter()
+        try:
+            result = engine.generate(messages, model, **kwargs)
+        except Exception as e:
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                # Cut short by the caller's budget, not an engine failure
+                raise self._deadline_exceeded(model) from e
+            self._report_outcome(engine, e)
+            raise
+        self._report_outcome(engine, None, time.perf_counter() - started)
+        return result
+    
+    def _hedged_generate(
+        self,
+        primary: EngineBase,
+        messages: List[Dict[str, str]],
+        model: str,
+        kwargs: Dict[str, Any],
+        deadline_at: Optional[float],
+        failed: Optional[Set[int]] = None,
+    ) -> Tuple[EngineBase, Dict[str, Any]]:
+        """
+        Race ``primary`` against the next engine once it is slower than usual.
+        
+        Sync engine calls cannot be interrupted: the losing call is left to
+        finish in its worker thread and its result is dropped. Every engine
+        whose call failed is added to ``failed``, so retries skip the
+        backup as well as the primary.
+        
+        Returns:
+            (winning engine, result)
+        """
+        pool = self._hedge_executor()
+        futures = {
+            pool.submit(self._call_engine, primary, messages, model, kwargs, deadline_at): primary
+        }
+        delay = self._hedge_after(primary)
+        if deadline_at is not None:
+            delay = min(delay, max(0.0, deadline_at - time.monotonic()))
+        done, _ = wait_futures(futures, timeout=delay)
+        if not done:
+            backup = self._hedge_partner(primary, failed or frozenset())
+            if backup is not None:
+                self._count("hedged")
+                future = pool.submit(self._call_engine, backup, messages, model, kwargs, deadline_at)
+                futures[future] = backup
+        
+        pending = set(futures)
+        error: Optional[BaseException] = None
+        while pending:
+            timeout = None
+            if deadline_at is not None:
+                timeout = max(0.0, deadline_at - time.monotonic())
+            done, pending = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()
+                raise self._deadline_exceeded(model)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    if failed is not None:
+                        failed.add(id(futures[future]))
+                    continue
+                for other in pending:
+                    other.cancel()
+                if futures[future] is not primary:
+                    self._count("hedge_wins")
+                return futures[future], future.result()
+        raise error
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Request ledger
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _record(
+        self,
+        model: str,
+        caller: Optional[str],
+        started: float,
+        engine: Optional[EngineBase] = None,
+        result: Optional[Dict[str, Any]] = None,
+        attempts: int = 1,
+        first: Optional[EngineBase] = None,
+        cache_hit: bool = False,
+        error: Optional[BaseException] = None,
+        ttfb: Optional[float] = None,
+    ) -> None:
+        """
+        Ledger entry of one request. ``first`` is the engine its first
+        attempt went to: any other serving engine counts as a fallback.
+        ``ttfb`` (time to the first chunk) is only passed by streaming
+        calls; other rows leave it empty.
+        """
+        if self._ledger is None:
+            return
+        self._ledger.record_result(
+            result,
+            self._names.get(id(engine)) if engine is not None else None,
+            model,
+            caller=caller,
+            ttfb=ttfb,
+            latency=time.perf_counter() - started,
+            retries=attempts - 1,
+            fallback=engine is not None and first is not None and engine is not first,
+            cache_hit=cache_hit,
+            error=type(error).__name__ if error is not None else None,
+        )
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Completion cache
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        kwargs: Dict[str, Any],
+        use_cache: Optional[bool],
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Cache key and stored result of a request.
+        
+        Only deterministic requests are cached unless the caller opts in:
+        ``cache=None`` means "only if temperature is 0", ``cache=False``
+        never. The key is None when the request is not cacheable.
+        """
+        if self._cache is None or use_cache is False:
+            return None, None
+        if use_cache is None and kwargs.get("temperature") != 0:
+            return None, None
+        key = cache_key(model, messages, kwargs)
+        try:
+            hit = self._cache.get(key)
+        except Exception as e:  # A broken cache must not break generation
+            logger.warning(f"Completion cache lookup failed: {e}")
+            return None, None
+        if hit is not None:
+            hit["cached"] = True
+        return key, hit
+    
+    def _cache_store(
+        self,
+        key: Optional[str],
+        engine: EngineBase,
+        model: str,
+        result: Dict[str, Any],
+        started: float,
+    ) -> Dict[str, Any]:
+        """Store a real engine's result under ``key`` (mock answers are not cached)."""
+        if key is None or self._names.get(id(engine)) == "mock":
+            return result
+        try:
+            self._cache.put(key, model, result, time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Completion cache store failed: {e}")
+        return result
+    
     def generate(
         self,
         messages: List[Dict[str, str]],
@@ -430,32 +1698,528 @@ class MultiEngine:
         Args:
             messages: Chat messages list
             model: Model ID to route
-            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            **kwargs: Additional parameters (temperature, max_tokens, etc.).
+                ``deadline`` (seconds) bounds the whole call including
+                retries; ``hedge`` overrides the instance hedging default;
+                ``cache`` forces (True) or skips (False) the completion cache;
+                ``caller`` tags the request in the ledger.
         
         Returns:
-            Completion dict with content, usage, etc.
+            Completion dict with content, usage, etc. (``cached=True``
+            when served from the completion cache)
+        
+        Raises:
+            DeadlineExceeded: ``deadline`` ran out before an engine answered
         """
         max_retries = kwargs.get("max_retries", 2)
+        hedge = kwargs.pop("hedge", self._hedge)
+        caller = kwargs.pop("caller", None)
+        deadline_at = self._deadline_at(kwargs.pop("deadline", None))
+        started = time.perf_counter()
+        key, hit = self._cache_lookup(messages, model, kwargs, kwargs.pop("cache", None))
+        if hit is not None:
+            self._record(model, caller, started, result=hit, cache_hit=True)
+            return hit
+        failed: Set[int] = set()
+        first: Optional[EngineBase] = None
         
         for attempt in range(max_retries + 1):
+            engine = None
             try:
-                engine = self._engine_for(model, retry_on_failure=(attempt > 0))
-                return engine.generate(messages, model, **kwargs)
+                call_kwargs = self._attempt_kwargs(kwargs, deadline_at, model)
+                engine = self._engine_for(model, attempt > 0, failed)
+                first = first or engine
+                if hedge:
+                    engine, result = self._hedged_generate(
+                        engine, messages, model, call_kwargs, deadline_at, failed
+                    )
+                else:
+                    result = self._call_engine(
+                        engine, messages, model, call_kwargs, deadline_at
+                    )
+                result = self._cache_store(key, engine, model, result, started)
+                self._record(model, caller, started, engine, result, attempt + 1, first)
+                return result
                 
+            except DeadlineExceeded as e:
+                self._record(model, caller, started, engine, attempts=attempt + 1, error=e)
+                raise
             except Exception as e:
                 logger.warning(f"Generate attempt {attempt + 1} failed: {e}")
+                if engine is not None:
+                    # Retries go to another engine instead of hammering this one
+                    failed.add(id(engine))
                 
                 if attempt == max_retries:
                     # Final fallback: mock engine
                     for name, eng in self._engines:
                         if name == "mock":
                             logger.error(f"All engines failed, using mock for {model}")
-                            return eng.generate(messages, model, **kwargs)
+                            result = eng.generate(messages, model, **kwargs)
+                            self._record(model, caller, started, eng, result, attempt + 1, first)
+                            return result
                     
+                    self._record(model, caller, started, engine, attempts=attempt + 1, error=e)
                     raise RuntimeError(f"All engines failed for model {model}: {e}")
         
         raise RuntimeError("Unexpected state in generate")
     
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a completion with automatic routing and fallback.
+        
+        Falls back to the next engine only while nothing has been yielded:
+        once a chunk reached the caller, a failure is raised instead of
+        silently restarting the answer on another engine.
+        
+        Yields:
+            ``{"delta": str}`` chunks, then a final chunk with
+            ``done=True``, ``finish_reason`` and ``usage``
+        """
+        max_retries = kwargs.get("max_retries", 2)
+        caller = kwargs.pop("caller", None)
+        started = time.perf_counter()
+        failed: Set[int] = set()
+        first: Optional[EngineBase] = None
+        
+        for attempt in range(max_retries + 1):
+            engine = None
+            ttfb: Optional[float] = None
+            final: Optional[Dict[str, Any]] = None
+            try:
+                engine = self._engine_for(model, attempt > 0, failed)
+                first = first or engine
+                for chunk in engine.generate_stream(messages, model, **kwargs):
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - started
+                    if chunk.get("done"):
+                        final = chunk
+                    yield chunk
+                self._report_outcome(engine, None)
+                self._record(
+                    model, caller, started, engine, final, attempt + 1, first, ttfb=ttfb
+                )
+                return
+                
+            except Exception as e:
+                if engine is not None:
+                    self._report_outcome(engine, e)
+                    failed.add(id(engine))
+                if ttfb is not None:
+                    self._record(
+                        model, caller, started, engine, attempts=attempt + 1, error=e, ttfb=ttfb
+                    )
+                    raise
+                logger.warning(f"Stream attempt {attempt + 1} failed: {e}")
+                
+                if attempt == max_retries:
+                    for name, eng in self._engines:
+                        if name == "mock":
+                            logger.error(f"All engines failed, using mock for {model}")
+                            for chunk in eng.generate_stream(messages, model, **kwargs):
+                                if chunk.get("done"):
+                                    final = chunk
+                                yield chunk
+                            self._record(model, caller, started, eng, final, attempt + 1, first)
+                            return
+                    
+                    self._record(model, caller, started, engine, attempts=attempt + 1, error=e)
+                    raise RuntimeError(f"All engines failed for model {model}: {e}")
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Batch generation
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _estimate_tokens(
+        self, messages: List[Dict[str, str]], params: Dict[str, Any]
+    ) -> int:
+        """Rough request cost for tokens/min quotas (~4 chars per token)."""
+        prompt = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        return prompt + int(params.get("max_tokens") or self.BATCH_COMPLETION_ESTIMATE)
+    
+    def generate_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrency: int = 8,
+        return_exceptions: bool = True,
+    ) -> List[Any]:
+        """
+        Run many generations on a pool of worker threads.
+        
+        Each request is routed to an engine queue. Idle workers take the
+        next item from any queue whose engine has a free concurrency slot
+        (``engine.max_concurrency``) and quota (``requests_per_minute`` /
+        ``tokens_per_minute``), so a throttled provider only delays its
+        own items. A failed item is re-queued on another engine, up to
+        ``max_retries`` (item kwarg, default 2) times.
+        
+        An item ``deadline`` works as in ``generate`` and counts from this
+        call, so time spent queued uses it up; an item out of time fails
+        with ``DeadlineExceeded`` and is not retried. Hedging does not
+        apply to batches (it would bypass the per-engine quotas): an item
+        with ``hedge=True`` fails with ``ValueError``.
+        
+        Args:
+            requests: Dicts with ``messages``, ``model`` and optional
+                generate kwargs (temperature, max_tokens, cache, ...)
+            max_concurrency: Worker threads
+            return_exceptions: Put failures in the result list instead of
+                raising the first one
+        
+        Returns:
+            Results in the same order as ``requests``
+        """
+        results: List[Any] = [None] * len(requests)
+        queues: Dict[int, Deque[_BatchItem]] = {}
+        in_flight: Dict[int, int] = {}
+        engines: Dict[int, EngineBase] = {}
+        cond = threading.Condition()
+        pending = 0
+        
+        def enqueue(item: _BatchItem, engine: EngineBase) -> None:
+            engines[id(engine)] = engine
+            queues.setdefault(id(engine), deque()).append(item)
+            in_flight.setdefault(id(engine), 0)
+        
+        def route(item: _BatchItem) -> Optional[EngineBase]:
+            try:
+                return self._engine_for(item.model, item.attempts > 0, item.failed)
+            except Exception as e:
+                results[item.index] = e
+                return None
+        
+        for index, request in enumerate(requests):
+            try:
+                params = dict(request)
+                messages = params.pop("messages")
+                model = params.pop("model")
+            except Exception as e:
+                results[index] = e
+                continue
+            if params.pop("hedge", None):
+                results[index] = ValueError("hedge is not supported by generate_batch")
+                continue
+            deadline_at = self._deadline_at(params.pop("deadline", None))
+            caller = params.pop("caller", None)
+            looked_up = time.perf_counter()
+            key, hit = self._cache_lookup(messages, model, params, params.pop("cache", None))
+            if hit is not None:
+                self._record(model, caller, looked_up, result=hit, cache_hit=True)
+                results[index] = hit
+                continue
+            item = _BatchItem(
+                index, messages, model, params, key,
+                self._estimate_tokens(messages, params), caller,
+                deadline_at=deadline_at,
+            )
+            engine = route(item)
+            if engine is not None:
+                enqueue(item, engine)
+                pending += 1
+        
+        def take() -> Optional[Tuple[EngineBase, _BatchItem]]:
+            """Next admissible item of any engine (blocks until one is)."""
+            nonlocal pending
+            with cond:
+                while pending:
+                    wait: Optional[float] = None
+                    for engine_id, queue in queues.items():
+                        engine = engines[engine_id]
+                        if not queue or in_flight[engine_id] >= max(1, engine.max_concurrency):
+                            continue
+                        limiter = self._limiters.get(self._names.get(engine_id, ""))
+                        delay = limiter.try_acquire(queue[0].tokens) if limiter else 0.0
+                        if delay == 0.0:
+                            in_flight[engine_id] += 1
+                            return engine, queue.popleft()
+                        wait = delay if wait is None else min(wait, delay)
+                    # Nothing admissible: sleep until a quota refills or a
+                    # running item finishes
+                    cond.wait(timeout=wait)
+                return None
+        
+        def finish(engine: EngineBase, item: _BatchItem, result: Any) -> None:
+            nonlocal pending
+            with cond:
+                in_flight[id(engine)] -= 1
+                results[item.index] = result
+                pending -= 1
+                cond.notify_all()
+        
+        def worker() -> None:
+            nonlocal pending
+            while True:
+                task = take()
+                if task is None:
+                    return
+                engine, item = task
+                item.attempts += 1
+                item.first = item.first or engine
+                started = time.perf_counter()
+                try:
+                    call_kwargs = self._attempt_kwargs(item.params, item.deadline_at, item.model)
+                    result = self._call_engine(
+                        engine, item.messages, item.model, call_kwargs, item.deadline_at
+                    )
+                except Exception as e:
+                    name = self._names.get(id(engine), engine.name)
+                    logger.warning(f"Batch item {item.index} failed on {name}: {e}")
+                    retry = None
+                    if not isinstance(e, DeadlineExceeded):
+                        item.failed.add(id(engine))
+                        if item.attempts <= item.params.get("max_retries", 2):
+                            retry = route(item)
+                    if retry is None:
+                        self._record(
+                            item.model, item.caller, started, engine,
+                            attempts=item.attempts, error=e,
+                        )
+                    with cond:
+                        in_flight[id(engine)] -= 1
+                        if retry is not None:
+                            enqueue(item, retry)
+                        else:
+                            results[item.index] = e
+                            pending -= 1
+                        cond.notify_all()
+                    continue
+                
+                limiter = self._limiters.get(self._names.get(id(engine), ""))
+                if limiter is not None:
+                    usage = result.get("usage") or {}
+                    actual = int(usage.get("prompt_tokens") or 0) + int(
+                        usage.get("completion_tokens") or 0
+                    )
+                    if actual:
+                        limiter.settle(item.tokens, actual)
+                result = self._cache_store(item.key, engine, item.model, result, started)
+                # Latency of the attempt that succeeded (queueing not included)
+                self._record(
+                    item.model, item.caller, started, engine, result, item.attempts, item.first
+                )
+                finish(engine, item, result)
+        
+        if pending:
+            threads = [
+                threading.Thread(target=worker, daemon=True, name=f"MultiEngineBatch-{i}")
+                for i in range(max(1, min(max_concurrency, pending)))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+    
+    # ─────────────────────────────────────────────────────────────────────
+    # Async API
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def _engine_slot(self, engine: EngineBase) -> asyncio.Semaphore:
+        """Per-engine concurrency semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), id(engine))
+        with self._slots_lock:
+            entry = self._slots.get(key)
+            if entry is None or entry[0] is not loop:
+                for stale in [k for k, (lp, _) in self._slots.items() if lp.is_closed()]:
+                    del self._slots[stale]
+                limit = max(1, getattr(engine, "max_concurrency", 8))
+                entry = self._slots[key] = (loop, asyncio.Semaphore(limit))
+            return entry[1]
+    
+    async def _acall_engine(
+        self,
+        engine: EngineBase,
+        messages: List[Dict[str, str]],
+        model: str,
+        kwargs: Dict[str, Any],
+        deadline_at: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Async ``_call_engine``: waits for a slot, then times the call."""
+        async with self._engine_slot(engine):
+            started = time.perf_counter()
+            try:
+                result = await engine.agenerate(messages, model, **kwargs)
+            except Exception as e:
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise self._deadline_exceeded(model) from e
+                self._report_outcome(engine, e)
+                raise
+        self._report_outcome(engine, None, time.perf_counter() - started)
+        return result
+    
+    async def _ahedged_generate(
+        self,
+        primary: EngineBase,
+        messages: List[Dict[str, str]],
+        model: str,
+        kwargs: Dict[str, Any],
+        deadline_at: Optional[float],
+        failed: Optional[Set[int]] = None,
+    ) -> Tuple[EngineBase, Dict[str, Any]]:
+        """Async ``_hedged_generate``: the losing request is cancelled."""
+        tasks = {
+            asyncio.ensure_future(
+                self._acall_engine(primary, messages, model, kwargs, deadline_at)
+            ): primary
+        }
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_after(primary))
+            if not done:
+                backup = self._hedge_partner(primary, failed or frozenset())
+                if backup is not None:
+                    self._count("hedged")
+                    task = asyncio.ensure_future(
+                        self._acall_engine(backup, messages, model, kwargs, deadline_at)
+                    )
+                    tasks[task] = backup
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        if failed is not None:
+                            failed.add(id(tasks[task]))
+                        continue
+                    if tasks[task] is not primary:
+                        self._count("hedge_wins")
+                    return tasks[task], task.result()
+            raise error
+        finally:
+            # Closes the loser's connection instead of reading its answer
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Async generate with the same routing and fallback as ``generate``.
+        
+        At most ``engine.max_concurrency`` calls run against each engine at
+        once; the rest wait on its semaphore without holding a thread.
+        ``deadline`` also bounds that wait.
+        """
+        max_retries = kwargs.get("max_retries", 2)
+        hedge = kwargs.pop("hedge", self._hedge)
+        caller = kwargs.pop("caller", None)
+        deadline_at = self._deadline_at(kwargs.pop("deadline", None))
+        started = time.perf_counter()
+        key, hit = self._cache_lookup(messages, model, kwargs, kwargs.pop("cache", None))
+        if hit is not None:
+            self._record(model, caller, started, result=hit, cache_hit=True)
+            return hit
+        failed: Set[int] = set()
+        first: Optional[EngineBase] = None
+        
+        for attempt in range(max_retries + 1):
+            engine = None
+            try:
+                call_kwargs = self._attempt_kwargs(kwargs, deadline_at, model)
+                if attempt == 0:
+                    engine = self._engine_for(model, False, failed)
+                else:
+                    # May rediscover models (blocking I/O): keep it off the loop
+                    engine = await asyncio.to_thread(self._engine_for, model, True, failed)
+                first = first or engine
+                
+                if hedge:
+                    call = self._ahedged_generate(
+                        engine, messages, model, call_kwargs, deadline_at, failed
+                    )
+                else:
+                    call = self._acall_engine(engine, messages, model, call_kwargs, deadline_at)
+                if deadline_at is None:
+                    outcome = await call
+                else:
+                    try:
+                        outcome = await asyncio.wait_for(call, deadline_at - time.monotonic())
+                    except asyncio.TimeoutError:
+                        if time.monotonic() < deadline_at:
+                            raise
+                        raise self._deadline_exceeded(model)
+                if hedge:
+                    engine, result = outcome
+                else:
+                    result = outcome
+                result = self._cache_store(key, engine, model, result, started)
+                self._record(model, caller, started, engine, result, attempt + 1, first)
+                return result
+                
+            except DeadlineExceeded as e:
+                self._record(model, caller, started, engine, attempts=attempt + 1, error=e)
+                raise
+            except Exception as e:
+                logger.warning(f"Async generate attempt {attempt + 1} failed: {e}")
+                if engine is not None:
+                    failed.add(id(engine))
+                
+                if attempt == max_retries:
+                    for name, eng in self._engines:
+                        if name == "mock":
+                            logger.error(f"All engines failed, using mock for {model}")
+                            result = await eng.agenerate(messages, model, **kwargs)
+                            self._record(model, caller, started, eng, result, attempt + 1, first)
+                            return result
+                    
+                    self._record(model, caller, started, engine, attempts=attempt + 1, error=e)
+                    raise RuntimeError(f"All engines failed for model {model}: {e}")
+        
+        raise RuntimeError("Unexpected state in agenerate")
+    
+    async def agather(
+        self,
+        requests: List[Dict[str, Any]],
+        max_in_flight: int = 16,
+        return_exceptions: bool = True,
+    ) -> List[Any]:
+        """
+        Run many generations concurrently on the current event loop.
+        
+        Args:
+            requests: Dicts with ``messages``, ``model`` and optional
+                generate kwargs (temperature, max_tokens, ...)
+            max_in_flight: Global limit of concurrent generations
+            return_exceptions: Put failures in the result list instead of
+                raising the first one
+        
+        Returns:
+            Results in the same order as ``requests``
+        """
+        limit = asyncio.Semaphore(max(1, max_in_flight))
+        
+        async def run(request: Dict[str, Any]) -> Dict[str, Any]:
+            params = dict(request)
+            messages = params.pop("messages")
+            model = params.pop("model")
+            async with limit:
+                return await self.agenerate(messages, model, **params)
+        
+        return await asyncio.gather(
+            *(run(r) for r in requests), return_exceptions=return_exceptions
+        )
+    
+    async def alist_models(self) -> List[str]:
+        """Async ``list_models`` (discovery runs in a worker thread)."""
+        return await asyncio.to_thread(self.list_models)
+    
     def health(self) -> bool:
         """Check if at least one engine is healthy."""
         return any(status.healthy for status in self._engine_status.values())
@@ -463,6 +2227,7 @@ class MultiEngine:
     def status_report(self) -> Dict[str, Any]:
         """Return detailed status for all engines."""
         self._refresh_map()
+        engines = dict(self._engines)
         
         return {
             "overall_healthy": self.health(),
@@ -472,10 +2237,30 @@ class MultiEngine:
                     "healthy": status.healthy,
                     "latency_ms": round(status.latency_ms, 2),
                     "models": status.models,
+                    "consecutive_failures": status.consecutive_failures,
+                    "last_error": status.last_error,
+                    "last_check": status.last_check,
+                    **(self._stats[name].to_dict() if name in self._stats else {}),
+                    "rate_limit": (
+                        self._limiters[name].to_dict() if name in self._limiters else None
+                    ),
+                    "resident": engines[name].residency() if name in engines else None,
                 }
                 for name, status in self._engine_status.items()
             },
             "model_map_sample": list(self._model_map.keys())[:10],
+            "monitor_running": self._monitor.running,
+            "routing": self._routing,
+            "cache": self._cache.stats() if self._cache is not None else None,
+            "hedging": {
+                "enabled": self._hedge,
+                **self._request_stats,
+                "hedge_after_ms": {
+                    name: round(self._hedge_after(eng) * 1000, 2)
+                    for name, eng in self._engines
+                    if name != "mock"
+                },
+            },
         }
     
     # Convenience methods
@@ -527,25 +2312,11 @@ def create_default_engine(
     return MultiEngine(engines)
 
 
-def get_engine_from_config(config_path: Path = None) -> MultiEngine:
+def _load_config(config_path: Path = None) -> Optional[Dict[str, Any]]:
     """
-    Load MultiEngine from YAML config file.
-    
-    Config format:
-    ```yaml
-    providers:
-      - name: local
-        type: ollama
-        base_url: http://localhost:11434
-      
-      - name: cloud
-        type: openai_compat
-        api_key: ${NANOGPT_API_KEY}
-        base_url: https://api.nanogpt.com/v1
-        models: [gpt-4o-mini, claude-3-haiku]
-    
-    fallback_order: [local, cloud, mock]
-    ```
+    Read the providers config (~/.pa-framework/providers.json or .yaml by
+    default). Returns None if there is none, or if it is YAML and pyyaml
+    is not installed.
     """
     if config_path is None:
         # Try JSON first (stdlib), then YAML
@@ -559,11 +2330,11 @@ def get_engine_from_config(config_path: Path = None) -> MultiEngine:
             config_path = yaml_path
         else:
             logger.info(f"No config at {config_dir}, using defaults")
-            return create_default_engine()
+            return None
     
     if not config_path.exists():
         logger.info(f"No config at {config_path}, using defaults")
-        return create_default_engine()
+        return None
     
     # Load config (JSON stdlib-first, YAML fallback)
     with open(config_path) as f:
@@ -579,7 +2350,50 @@ def get_engine_from_config(config_path: Path = None) -> MultiEngine:
             config = yaml.safe_load(content)
         except ImportError:
             logger.warning("pyyaml not installed, JSON config required")
-            return create_default_engine()
+            return None
+    
+    return config
+
+
+def get_engine_from_config(config_path: Path = None) -> MultiEngine:
+    """
+    Load MultiEngine from YAML config file.
+    
+    Config format:
+    ```yaml
+    providers:
+      - name: local
+        type: ollama
+        base_url: http://localhost:11434
+        keep_alive: 30m              # or -1, 3600, {default: 10m, llama3.2: -1}
+        default_model: llama3.2      # preloaded at session start
+      
+      - name: cloud
+        type: openai_compat
+        api_key: ${NANOGPT_API_KEY}
+        base_url: https://api.nanogpt.com/v1
+        models: [gpt-4o-mini, claude-3-haiku]
+        requests_per_minute: 60      # optional quotas for generate_batch
+        tokens_per_minute: 100000
+    
+    fallback_order: [local, cloud, mock]
+    routing: priority          # or "latency"
+    
+    # Optional: cache deterministic completions (all keys optional)
+    completion_cache:
+      path: ~/.pa-framework/completions.db
+      ttl: 604800
+      max_entries: 10000
+    
+    # Optional: per-request token/latency ledger (report: request_ledger.py)
+    request_ledger:
+      path: ~/.pa-framework/ledger.db
+      retention_days: 30
+    ```
+    """
+    config = _load_config(config_path)
+    if config is None:
+        return create_default_engine()
     
     engines = []
     for p in config.get("providers", []):
@@ -587,7 +2401,10 @@ def get_engine_from_config(config_path: Path = None) -> MultiEngine:
         name = p.get("name", ptype)
         
         if ptype == "ollama":
-            engines.append((name, OllamaEngine(p.get("base_url"))))
+            engines.append((
+                name,
+                OllamaEngine(p.get("base_url"), keep_alive=p.get("keep_alive")),
+            ))
         
         elif ptype == "openai_compat":
             api_key = p.get("api_key", "")
@@ -605,9 +2422,84 @@ def get_engine_from_config(config_path: Path = None) -> MultiEngine:
                     models=p.get("models"),
                 ),
             ))
+        
+        else:
+            continue
+        
+        # Per-provider limits (quotas are honoured by generate_batch)
+        engine = engines[-1][1]
+        for key in ("requests_per_minute", "tokens_per_minute", "max_concurrency"):
+            if p.get(key):
+                setattr(engine, key, p[key])
     
     fallback_order = config.get("fallback_order", ["local", "cloud", "mock"])
-    return MultiEngine(engines, fallback_order=fallback_order)
+    
+    cache = None
+    cache_config = config.get("completion_cache")
+    if cache_config:
+        options = cache_config if isinstance(cache_config, dict) else {}
+        path = options.get("path")
+        cache = CompletionCache(
+            path=Path(path).expanduser() if path else None,
+            ttl=options.get("ttl", CompletionCache.DEFAULT_TTL),
+            max_entries=options.get("max_entries", CompletionCache.DEFAULT_MAX_ENTRIES),
+            max_bytes=options.get("max_bytes", CompletionCache.DEFAULT_MAX_BYTES),
+        )
+    
+    ledger = None
+    ledger_config = config.get("request_ledger")
+    if ledger_config:
+        options = ledger_config if isinstance(ledger_config, dict) else {}
+        path = options.get("path")
+        ledger = RequestLedger(
+            path=Path(path).expanduser() if path else None,
+            flush_interval=options.get("flush_interval", RequestLedger.DEFAULT_FLUSH_INTERVAL),
+            retention_days=options.get("retention_days", RequestLedger.DEFAULT_RETENTION_DAYS),
+        )
+    
+    return MultiEngine(
+        engines,
+        fallback_order=fallback_order,
+        cache=cache,
+        routing=config.get("routing", "priority"),
+        ledger=ledger,
+    )
+
+
+def preload_from_config(config_path: Path = None) -> Dict[str, bool]:
+    """
+    Load the ``default_model`` of every Ollama provider in the config, in
+    parallel. Blocks until loaded: run it in the background (the session
+    start script uses ``python multi_engine.py --preload`` detached).
+    
+    Returns:
+        ``{"<provider>/<model>": loaded}``
+    """
+    config = _load_config(config_path) or {}
+    engines = []
+    for p in config.get("providers", []):
+        if p.get("type") == "ollama" and p.get("default_model"):
+            engine = OllamaEngine(
+                p.get("base_url") or "http://localhost:11434",
+                keep_alive=p.get("keep_alive"),
+            )
+            label = f"{p.get('name', 'ollama')}/{p['default_model']}"
+            engines.append((label, engine, p["default_model"]))
+    
+    results: Dict[str, bool] = {}
+    
+    def load(label: str, engine: OllamaEngine, model: str) -> None:
+        results[label] = engine.preload(model)
+    
+    threads = [
+        threading.Thread(target=load, args=entry, daemon=True, name="OllamaPreload")
+        for entry in engines
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -623,9 +2515,18 @@ if __name__ == "__main__":
     parser.add_argument("--models", action="store_true", help="List available models")
     parser.add_argument("--test", metavar="MODEL", help="Test generate with model")
     parser.add_argument("--api-key", metavar="KEY", help="Cloud API key for testing")
+    parser.add_argument("--stream", action="store_true", help="Stream --test output")
+    parser.add_argument(
+        "--preload", action="store_true",
+        help="Load the configured default Ollama models into memory and exit",
+    )
     
     args = parser.parse_args()
     
+    if args.preload:
+        print(json.dumps({"preloaded": preload_from_config()}, indent=2))
+        raise SystemExit(0)
+    
     engine = create_default_engine(
         cloud_api_key=args.api_key or "",
     )
@@ -644,8 +2545,15 @@ if __name__ == "__main__":
         ]
         
         try:
-            result = engine.generate(test_messages, args.test)
-            print(json.dumps(result, indent=2))
+            if args.stream:
+                for chunk in engine.generate_stream(test_messages, args.test):
+                    print(chunk["delta"], end="", flush=True)
+                    if chunk.get("done"):
+                        print()
+                        print(json.dumps({"usage": chunk.get("usage", {})}, indent=2))
+            else:
+                result = engine.generate(test_messages, args.test)
+                print(json.dumps(result, indent=2))
         except Exception as e:
             print(json.dumps({"error": str(e)}, indent=2))
     
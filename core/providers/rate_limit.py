@@ -0,0 +1,112 @@
+"""
+PA Framework Rate Limiting.
+
+Token buckets for provider quotas (requests/min and tokens/min), used by
+``MultiEngine.generate_batch`` to schedule work per engine.
+
+The limiter never sleeps: ``try_acquire`` either admits a request or
+returns how long until it would, so a scheduler can run other engines'
+work in the meantime instead of blocking a worker on a throttled one.
+"""
+
+from __future__ import annotations
+
+import time
+import threading
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """Bucket of ``capacity`` units refilled at ``per_minute / 60`` per second."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Larger requests wait for a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` units; may go negative (debt repaid by refill)."""
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min quota of one engine.
+
+    Either limit may be None (unlimited). Token costs are estimated when a
+    request is admitted and corrected with ``settle`` once the real usage
+    is known.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """
+        Admit one request costing ``tokens``.
+
+        Returns:
+            0.0 if admitted, else the seconds to wait before retrying
+            (nothing is consumed then)
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self.requests is not None:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(tokens)
+            return 0.0
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct an admitted request's token cost with its real usage."""
+        if self.tokens is None or actual == estimated:
+            return
+        with self._lock:
+            self.tokens.tokens = min(
+                self.tokens.capacity, self.tokens.tokens + estimated - actual
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        def bucket(b: Optional[TokenBucket]) -> Optional[Dict[str, float]]:
+            if b is None:
+                return None
+            return {"per_minute": b.rate * 60, "available": round(max(b.tokens, 0.0), 2)}
+
+        with self._lock:
+            now = time.monotonic()
+            for b in (self.requests, self.tokens):
+                if b is not None:
+                    b._refill(now)
+            return {
+                "requests": bucket(self.requests),
+                "tokens": bucket(self.tokens),
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,474 @@
+"""
+PA Framework Request Ledger.
+
+Token and latency accounting for MultiEngine: one row per request
+(engine, model, caller tag, prompt/completion tokens, time to first
+byte, total latency, retries, fallback, cache hit, error), so capacity
+planning can see which models, engines and callers consume tokens and
+time.
+
+Time to first byte (``ttfb_ms``) only applies to streaming calls
+(``generate_stream``): it is the delay until the first chunk. A
+non-streamed completion arrives in one piece, so its row leaves the
+column NULL and ``avg_ttfb_ms`` averages the streamed rows only.
+
+Design:
+    - ``record`` only appends a tuple to an in-memory buffer; a daemon
+      thread flushes it every ``flush_interval`` seconds (or once
+      ``batch_size`` rows are waiting) in one SQLite transaction
+    - Each flush also updates an hourly rollup table keyed by
+      (hour, engine, model, caller); raw rows are pruned after
+      ``retention_days`` (checked every ``PRUNE_INTERVAL`` by the flush
+      thread), rollups are kept
+    - A failed flush (locked db, disk full) puts its rows back in the
+      buffer for the next one; at most ``MAX_BUFFERED`` rows are held,
+      the oldest are dropped first
+    - ``report`` aggregates the rollups by any of hour / engine / model /
+      caller, with p95 latency from the raw rows still retained
+
+CLI:
+    python request_ledger.py --since 24h --by model
+    python request_ledger.py --since 7d --by hour,engine --json
+"""
+
+from __future__ import annotations
+
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = Path.home() / ".pa-framework" / "ledger.db"
+
+GROUP_COLUMNS = ("hour", "engine", "model", "caller")
+
+
+class RequestLedger:
+    """
+    Buffered per-request ledger backed by SQLite.
+
+    Safe to share between threads and MultiEngine instances; several
+    processes can append to the same file (SQLite serializes writes).
+    """
+
+    DEFAULT_FLUSH_INTERVAL = 2.0
+    DEFAULT_BATCH_SIZE = 256
+    DEFAULT_RETENTION_DAYS = 30
+    MAX_BUFFERED = 50_000  # Rows kept while flushes keep failing
+    PRUNE_INTERVAL = 3600.0  # Seconds between retention prunes
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS requests (
+            ts                REAL NOT NULL,
+            engine            TEXT NOT NULL,
+            model             TEXT NOT NULL,
+            caller            TEXT NOT NULL,
+            prompt_tokens     INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            ttfb_ms           REAL,             -- streaming only
+            latency_ms        REAL NOT NULL,
+            retries           INTEGER NOT NULL,
+            fallback          INTEGER NOT NULL,
+            cache_hit         INTEGER NOT NULL,
+            error             TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_requests_ts ON requests(ts);
+
+        CREATE TABLE IF NOT EXISTS hourly (
+            hour              INTEGER NOT NULL,
+            engine            TEXT NOT NULL,
+            model             TEXT NOT NULL,
+            caller            TEXT NOT NULL,
+            requests          INTEGER NOT NULL,
+            errors            INTEGER NOT NULL,
+            prompt_tokens     INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            latency_ms_sum    REAL NOT NULL,
+            latency_ms_max    REAL NOT NULL,
+            ttfb_ms_sum       REAL NOT NULL,
+            ttfb_count        INTEGER NOT NULL,
+            retries           INTEGER NOT NULL,
+            fallbacks         INTEGER NOT NULL,
+            cache_hits        INTEGER NOT NULL,
+            PRIMARY KEY (hour, engine, model, caller)
+        );
+    """
+
+    _UPSERT_HOURLY = """
+        INSERT INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (hour, engine, model, caller) DO UPDATE SET
+            requests          = requests + excluded.requests,
+            errors            = errors + excluded.errors,
+            prompt_tokens     = prompt_tokens + excluded.prompt_tokens,
+            completion_tokens = completion_tokens + excluded.completion_tokens,
+            latency_ms_sum    = latency_ms_sum + excluded.latency_ms_sum,
+            latency_ms_max    = MAX(latency_ms_max, excluded.latency_ms_max),
+            ttfb_ms_sum       = ttfb_ms_sum + excluded.ttfb_ms_sum,
+            ttfb_count        = ttfb_count + excluded.ttfb_count,
+            retries           = retries + excluded.retries,
+            fallbacks         = fallbacks + excluded.fallbacks,
+            cache_hits        = cache_hits + excluded.cache_hits
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        retention_days: float = DEFAULT_RETENTION_DAYS,
+    ):
+        """
+        Args:
+            path: SQLite file (default: ~/.pa-framework/ledger.db)
+            flush_interval: Seconds between background flushes
+            batch_size: Buffered rows that trigger an early flush
+            retention_days: Age after which raw rows are pruned (rollups stay)
+        """
+        self.path = Path(path) if path is not None else DEFAULT_LEDGER_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+
+        self._buffer: List[Tuple] = []
+        self._buffer_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._last_prune = time.monotonic()
+
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self._SCHEMA)
+            self._prune_locked()
+            self._conn.commit()
+
+        self._thread = threading.Thread(
+            target=self._flush_loop, daemon=True, name="RequestLedgerFlush"
+        )
+        self._thread.start()
+
+    # ── Recording ──
+
+    def record(
+        self,
+        engine: Optional[str],
+        model: str,
+        caller: Optional[str] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        ttfb: Optional[float] = None,
+        latency: float = 0.0,
+        retries: int = 0,
+        fallback: bool = False,
+        cache_hit: bool = False,
+        error: Optional[str] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        """
+        Buffer one request (``ttfb`` and ``latency`` in seconds; ``ttfb``
+        is None for non-streamed calls). Never touches the disk: the
+        background thread writes it.
+        """
+        row = (
+            ts if ts is not None else time.time(),
+            engine or "",
+            model,
+            caller or "",
+            int(prompt_tokens or 0),
+            int(completion_tokens or 0),
+            ttfb * 1000 if ttfb is not None else None,
+            latency * 1000,
+            retries,
+            int(fallback),
+            int(cache_hit),
+            error,
+        )
+        with self._buffer_lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def record_result(
+        self,
+        result: Optional[Dict[str, Any]],
+        engine: Optional[str],
+        model: str,
+        **fields: Any,
+    ) -> None:
+        """``record`` taking the token counts from a completion's ``usage``."""
+        usage = (result or {}).get("usage") or {}
+        self.record(
+            engine,
+            model,
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            **fields,
+        )
+
+    # ── Persistence ──
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_prune >= self.PRUNE_INTERVAL:
+                    self.prune()
+            except Exception as e:  # Keep the thread alive (disk full, locked db)
+                logger.warning(f"Request ledger flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write the buffered rows and update the hourly rollups. Returns rows written."""
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        rollups: Dict[Tuple, List[float]] = {}
+        for row in rows:
+            ts, engine, model, caller, prompt, completion, ttfb, latency, retries, fallback, hit, error = row
+            key = (int(ts // 3600) * 3600, engine, model, caller)
+            agg = rollups.get(key)
+            if agg is None:
+                agg = rollups[key] = [0, 0, 0, 0, 0.0, 0.0, 0.0, 0, 0, 0, 0]
+            agg[0] += 1
+            agg[1] += error is not None
+            agg[2] += prompt
+            agg[3] += completion
+            agg[4] += latency
+            agg[5] = max(agg[5], latency)
+            if ttfb is not None:
+                agg[6] += ttfb
+                agg[7] += 1
+            agg[8] += retries
+            agg[9] += fallback
+            agg[10] += hit
+
+        try:
+            with self._db_lock:
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+                    self._conn.executemany(
+                        self._UPSERT_HOURLY, [key + tuple(agg) for key, agg in rollups.items()]
+                    )
+                    self._conn.commit()
+                except BaseException:
+                    self._conn.rollback()
+                    raise
+        except Exception:
+            self._requeue(rows)
+            raise
+        return len(rows)
+
+    def _requeue(self, rows: List[Tuple]) -> None:
+        """Put the rows of a failed flush back in front of newer ones."""
+        with self._buffer_lock:
+            merged = rows + self._buffer
+            dropped = len(merged) - self.MAX_BUFFERED
+            if dropped > 0:
+                merged = merged[dropped:]
+                logger.warning(f"Request ledger buffer full: dropped {dropped} oldest rows")
+            self._buffer = merged
+
+    def prune(self) -> int:
+        """Delete raw rows older than ``retention_days``. Returns rows deleted."""
+        with self._db_lock:
+            deleted = self._prune_locked()
+            self._conn.commit()
+        self._last_prune = time.monotonic()
+        return deleted
+
+    def _prune_locked(self) -> int:
+        cutoff = time.time() - self.retention_days * 86400
+        return self._conn.execute("DELETE FROM requests WHERE ts < ?", (cutoff,)).rowcount
+
+    # ── Reporting ──
+
+    def report(
+        self,
+        since: Optional[float] = None,
+        by: Sequence[str] = ("model",),
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregated usage since ``since`` (epoch; None = everything).
+
+        Args:
+            since: Start of the window (rounded down to the hour)
+            by: Grouping columns, any of hour / engine / model / caller
+
+        Returns:
+            One dict per group, sorted by total tokens (or by hour)
+        """
+        by = list(by)
+        unknown = [col for col in by if col not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown group column(s): {', '.join(unknown)}")
+        self.flush()
+
+        start = int(since // 3600) * 3600 if since is not None else 0
+        select = ", ".join(by) + ", " if by else ""
+        group = f"GROUP BY {', '.join(by)}" if by else ""
+        with self._db_lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT {select}
+                    SUM(requests), SUM(errors), SUM(prompt_tokens), SUM(completion_tokens),
+                    SUM(latency_ms_sum), MAX(latency_ms_max), SUM(ttfb_ms_sum), SUM(ttfb_count),
+                    SUM(retries), SUM(fallbacks), SUM(cache_hits)
+                FROM hourly WHERE hour >= ? {group}
+                """,
+                (start,),
+            ).fetchall()
+            p95 = self._latency_p95_locked(start, by)
+
+        report = []
+        for row in rows:
+            keys, values = row[:len(by)], row[len(by):]
+            (requests, errors, prompt, completion, lat_sum, lat_max,
+             ttfb_sum, ttfb_n, retries, fallbacks, hits) = values
+            if not requests:
+                continue
+            entry: Dict[str, Any] = dict(zip(by, keys))
+            if "hour" in entry:
+                entry["hour"] = datetime.fromtimestamp(entry["hour"]).strftime("%Y-%m-%d %H:00")
+            entry.update({
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4),
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": prompt + completion,
+                "avg_latency_ms": round(lat_sum / requests, 2),
+                "p95_latency_ms": p95.get(tuple(keys)),
+                "max_latency_ms": round(lat_max, 2),
+                "avg_ttfb_ms": round(ttfb_sum / ttfb_n, 2) if ttfb_n else None,
+                "retries": retries,
+                "fallbacks": fallbacks,
+                "cache_hits": hits,
+                "cache_hit_rate": round(hits / requests, 4),
+            })
+            report.append(entry)
+
+        if "hour" in by:
+            report.sort(key=lambda e: e["hour"])
+        else:
+            report.sort(key=lambda e: e["total_tokens"], reverse=True)
+        return report
+
+    def _latency_p95_locked(self, start: float, by: List[str]) -> Dict[Tuple, float]:
+        """p95 latency per group from the raw rows still retained."""
+        columns = [
+            "CAST(ts / 3600 AS INTEGER) * 3600" if col == "hour" else col for col in by
+        ]
+        select = ", ".join(columns + ["latency_ms"])
+        samples: Dict[Tuple, List[float]] = {}
+        for row in self._conn.execute(
+            f"SELECT {select} FROM requests WHERE ts >= ?", (start,)
+        ):
+            samples.setdefault(tuple(row[:-1]), []).append(row[-1])
+        p95 = {}
+        for key, values in samples.items():
+            values.sort()
+            p95[key] = round(values[min(len(values) - 1, int(0.95 * len(values)))], 2)
+        return p95
+
+    def close(self) -> None:
+        """Flush what is buffered and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def __enter__(self) -> "RequestLedger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_SINCE = re.compile(r"^(\d+(?:\.\d+)?)([mhd])$")
+_SINCE_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def parse_since(value: str) -> float:
+    """Epoch of a relative window like "30m", "24h" or "7d"."""
+    match = _SINCE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid window: {value!r} (use e.g. 30m, 24h, 7d)")
+    return time.time() - float(match.group(1)) * _SINCE_UNITS[match.group(2)]
+
+
+# (header, report field) of the CLI table after the grouping columns
+_TABLE_COLUMNS = (
+    ("requests", "requests"),
+    ("errors", "errors"),
+    ("prompt_tok", "prompt_tokens"),
+    ("compl_tok", "completion_tokens"),
+    ("avg_ms", "avg_latency_ms"),
+    ("p95_ms", "p95_latency_ms"),
+    ("ttfb_ms", "avg_ttfb_ms"),
+    ("fallbacks", "fallbacks"),
+    ("cache_hits", "cache_hits"),
+)
+
+
+def _format_table(report: List[Dict[str, Any]], by: List[str]) -> str:
+    headers = by + [header for header, _ in _TABLE_COLUMNS]
+    fields = by + [field for _, field in _TABLE_COLUMNS]
+    rows = [
+        ["-" if entry.get(f) is None else str(entry[f]) for f in fields]
+        for entry in report
+    ]
+    widths = [max([len(h)] + [len(r[i]) for r in rows]) for i, h in enumerate(headers)]
+    lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in rows]
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI Interface
+# ─────────────────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PA request ledger report")
+    parser.add_argument("--path", type=Path, default=None, help="Ledger database")
+    parser.add_argument("--since", default="24h", help="Window: 30m, 24h, 7d or 'all'")
+    parser.add_argument(
+        "--by", default="model",
+        help=f"Comma-separated grouping: {', '.join(GROUP_COLUMNS)}",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    by = [col.strip() for col in args.by.split(",") if col.strip()]
+    since = None if args.since == "all" else parse_since(args.since)
+
+    with RequestLedger(args.path) as ledger:
+        report = ledger.report(since=since, by=by)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif not report:
+        print("No requests recorded in this window")
+    else:
+        print(_format_table(report, by))
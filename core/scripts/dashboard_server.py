@@ -13,6 +13,9 @@ Qué hace:
   - Lanzamiento del TUI opencode externo en una terminal nueva (best effort).
   - API `/api/models/free`: detecta modelos free disponibles.
   - API `/config` POST: guarda configuración (ej. modelo seleccionado).
+  - Prober en segundo plano: `/api/status` y `/api/opencode/sessions` leen
+    el estado cacheado de opencode (instalado / sirviendo) en vez de
+    sondearlo en cada request.
 
 Esencia respetada: local-first, zero-config, stdlib-only, loopback-only (127.0.0.1).
 
@@ -46,6 +49,7 @@ import select_free_model as sfm  # noqa: E402  (v0.4.1-beta: catálogo usable au
 
 OPENCODE_PORT = 47371          # puerto fijo del opencode serve gestionado
 SERVER_PORT_DEFAULT = 8760     # puerto del dashboard bridge
+PROBE_INTERVAL = 5.0           # segundos entre sondeos del prober de opencode
 EDITABLE_FILES = {             # archivos .md editables desde el dashboard
     "master": CORE_DIR / ".context" / "MASTER.md",
     "profile": CORE_DIR / ".context" / "profile.md",
@@ -112,6 +116,85 @@ def opencode_serving() -> bool:
     return st == 200
 
 
+def ping_payload(model_id: str, result: dict) -> dict:
+    """Respuesta de /api/models/test a partir de un ping de select_free_model."""
+    return {
+        "ok": result["ok"],
+        "requested": model_id,
+        "used_model": model_id if result["ok"] else None,
+        "error": None if result["ok"] else result["detail"],
+        "latency_ms": result["latency_ms"],
+        "checked_at": result["checked_at"],
+        "cached": result["cached"],
+    }
+
+
+class OpencodeProber:
+    """Estado de opencode (instalado / sirviendo) refrescado en segundo plano.
+
+    Los handlers leen el último sondeo sin bloquear: con el serve caído o
+    colgado, `/api/status` responde igual de rápido. Las acciones que
+    cambian el estado (ensure, un oc_call que falla) lo corrigen al
+    momento con `mark()` o piden un sondeo inmediato con `refresh()`.
+    """
+
+    def __init__(self, interval: float = PROBE_INTERVAL):
+        self.interval = interval
+        self.exe: str | None = None
+        self.serving = False
+        self.checked_at: float | None = None  # time.time() del último sondeo
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def probe(self) -> None:
+        """Sondear ahora (bloqueante: lo llama el thread del prober)."""
+        self.exe = opencode_installed()
+        self.serving = opencode_serving()
+        self.checked_at = time.time()
+
+    def start(self) -> None:
+        # opencode_installed es barato: disponible desde el primer request
+        self.exe = opencode_installed()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="opencode-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def refresh(self) -> None:
+        """Pedir un sondeo inmediato (no espera el resultado)."""
+        self._wake.set()
+
+    def mark(self, serving: bool) -> None:
+        """Fijar el estado ya conocido por una acción (ensure, oc_call)."""
+        self.serving = serving
+        self.checked_at = time.time()
+
+    def snapshot(self) -> dict:
+        return {
+            "installed": bool(self.exe),
+            "serving": self.serving,
+            "checked_at": self.checked_at,
+        }
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.probe()
+            except Exception as e:  # el prober nunca debe morir
+                log(f"prober: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+_prober = OpencodeProber()
+
+
 def free_port(preferred: int) -> int:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         try:
@@ -126,6 +209,7 @@ def opencode_ensure() -> dict:
     """Arranca `opencode serve` si no está corriendo. Idempotente."""
     with _opencode_proc["lock"]:
         if opencode_serving():
+            _prober.mark(True)
             return {"ok": True, "already": True, "port": _opencode_proc.get("port") or OPENCODE_PORT}
         exe = opencode_installed()
         if not exe:
@@ -145,9 +229,12 @@ def opencode_ensure() -> dict:
         for _ in range(30):
             time.sleep(0.5)
             if opencode_serving():
+                _prober.mark(True)
                 return {"ok": True, "already": False, "port": port}
             if proc.poll() is not None:
+                _prober.mark(False)
                 return {"ok": False, "error": f"opencode serve murió (exit {proc.returncode})"}
+        _prober.refresh()
         return {"ok": False, "error": "opencode serve no respondió a tiempo"}
 
 
@@ -253,16 +340,20 @@ class Handler(BaseHTTPRequestHandler):
                     "version": (REPO_ROOT / "VERSION").read_text(encoding="utf-8").strip()
                                if (REPO_ROOT / "VERSION").exists() else "?",
                 },
+                # estado del prober en segundo plano: nunca bloquea
                 "opencode": {
-                    "installed": bool(opencode_installed()),
-                    "serving": opencode_serving(),
+                    **_prober.snapshot(),
                     "port": _opencode_proc.get("port") or OPENCODE_PORT,
                 },
             })
         if path == "/api/opencode/sessions":
-            if not opencode_serving():
+            if not _prober.serving:
                 return self._json({"ok": False, "error": "opencode serve no activo"}, 503)
             st, data = oc_call("/session")
+            if st == -1:
+                # el serve cayó desde el último sondeo
+                _prober.mark(False)
+                _prober.refresh()
             return self._json({"ok": st == 200, "sessions": data if st == 200 else None,
                                "error": None if st == 200 else data}, 200 if st == 200 else 502)
         if path.startswith("/api/opencode/messages/"):
@@ -294,8 +385,10 @@ class Handler(BaseHTTPRequestHandler):
             if not r.get("ok"):
                 return self._json({"ok": False, "error": r.get("error", "opencode no disponible")}, 503)
             models = sfm.get_usable_models(r["port"])
+            pings = sfm._load_ping_cache()
             models_payload = [
-                {"id": m["id"], "status": m["status"], "badge": oc_auth.provider_auth_badge(m["status"]), "free": m.get("free", True)}
+                {"id": m["id"], "status": m["status"], "badge": oc_auth.provider_auth_badge(m["status"]), "free": m.get("free", True),
+                 "ping": sfm.cached_ping(m["id"], pings)}
                 for m in models
             ]
             # cred-first ya garantizado por get_usable_models
@@ -305,6 +398,8 @@ class Handler(BaseHTTPRequestHandler):
             # v0.4.1-beta: ping REAL del modelo seleccionado — verifica que la
             # credencial FUNCIONA (no solo que existe). Un modelo "detectado"
             # sin creds que funcione es exactamente el bug reportado.
+            # El resultado se cachea por modelo (TTL) y lo comparte la CLI;
+            # ?fresh=1 fuerza un ping nuevo.
             q = path  # solo GET
             model_id = (self.path.split("?", 1)[1] if "?" in self.path else "")
             from urllib.parse import parse_qs
@@ -312,32 +407,19 @@ class Handler(BaseHTTPRequestHandler):
             mid_param = (params.get("model", [""])[0] or "").strip()
             if not mid_param:
                 return self._json({"ok": False, "error": "parámetro model requerido"}, 400)
+            if "/" not in mid_param:
+                return self._json({"ok": False, "error": "formato provider/model"}, 400)
+            fresh = params.get("fresh", ["0"])[0] in ("1", "true")
+            if not fresh:
+                # Resultado vigente del cache de pings (compartido con la CLI)
+                hit = sfm.cached_ping(mid_param)
+                if hit is not None:
+                    return self._json(ping_payload(mid_param, hit))
             ensure = opencode_ensure()
             if not ensure.get("ok"):
                 return self._json({"ok": False, "error": ensure.get("error")}, 503)
-            provider_id, _, model_name = mid_param.partition("/")
-            if not model_name:
-                return self._json({"ok": False, "error": "formato provider/model"}, 400)
-            st, sess = oc_call("/session", "POST", {"title": "PA model test"})
-            if st != 200 or not isinstance(sess, dict):
-                return self._json({"ok": False, "error": f"crear sesión: {sess}"}, 502)
-            sid = sess.get("id")
-            st, resp = oc_call(
-                f"/session/{sid}/message", "POST",
-                {"parts": [{"type": "text", "text": "ping"}],
-                 "model": {"providerID": provider_id, "modelID": model_name}},
-                timeout=60,
-            )
-            info = resp.get("info", {}) if isinstance(resp, dict) else {}
-            used = f"{info.get('providerID')}/{info.get('modelID')}"
-            ok = st == 200 and info.get("modelID") == model_name
-            return self._json({
-                "ok": ok,
-                "status": st,
-                "used_model": used,
-                "requested": mid_param,
-                "error": None if ok else (resp if not isinstance(resp, dict) else resp.get("error")),
-            })
+            result = sfm.ping_model(ensure["port"], mid_param, fresh=True)
+            return self._json(ping_payload(mid_param, result))
 
         if path == "/api/config/model":
             # v0.4.0-beta: modelo ACTUAL desde .opencode/config.json (sin exponer el archivo crudo)
@@ -490,8 +572,9 @@ def main():
     srv = ThreadingHTTPServer((args.host, args.port), Handler)
     log(f"http://{args.host}:{args.port}  (Ctrl+C para detener)")
     log(f"repo: {REPO_ROOT}")
-    if opencode_installed():
-        log(f"opencode: {opencode_installed()} (serve se arranca on-demand vía /api/opencode/ensure)")
+    _prober.start()
+    if _prober.exe:
+        log(f"opencode: {_prober.exe} (serve se arranca on-demand vía /api/opencode/ensure)")
     else:
         log("opencode: NO detectado — chat no disponible hasta instalarlo")
     try:
@@ -499,6 +582,7 @@ def main():
     except KeyboardInterrupt:
         log("deteniendo…")
     finally:
+        _prober.stop()
         proc = _opencode_proc.get("proc")
         if proc and proc.poll() is None:
             proc.terminate()
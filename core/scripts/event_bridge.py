@@ -25,6 +25,10 @@ Uso:
     bridge.subscribe(EventType.FILE_MODIFIED, on_file_changed)
     bridge.start_listening()  # Inicia thread de escucha
 
+    # Modo broker (opcional, POSIX): fan-out por Unix socket en vez de polling
+    bridge = EventBridge(instance_id="cli-001", use_broker=True)
+    # o bien: export PA_EVENT_BROKER=1
+
 Autor: FreakingJSON-PA Framework
 Versión: 1.0.0
 """
@@ -47,12 +51,19 @@ import time
 import uuid
 import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum, auto
-from typing import Dict, List, Callable, Optional, Any
+from typing import Dict, List, Callable, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
+from collections import deque
+from contextlib import contextmanager
 from queue import Queue, Empty
 
+sys.path.insert(0, str(Path(__file__).parent))
+from instance_registry import InstanceRegistry
+from file_lock import FileLock, LockTimeoutError
+from event_broker import BROKER_SUPPORTED, BrokerConnection, EventBroker
+
 
 class EventType(Enum):
     """Tipos de eventos soportados"""
@@ -67,6 +78,7 @@ class EventType(Enum):
     FILE_CONFLICT = "file_conflict"  # Conflicto detectado
     FILE_LOCKED = "file_locked"  # Archivo lockeado
     FILE_UNLOCKED = "file_unlocked"  # Archivo deslockeado
+    LOCK_STATS = "lock_stats"  # Métricas de contención de locks
 
     # Eventos de sesión
     SESSION_CREATED = "session_created"  # Nueva sesión creada
@@ -86,15 +98,19 @@ class Event:
     timestamp: str
     source: str  # instance_id que generó el evento
     data: Dict[str, Any]
+    seq: Optional[int] = None  # Secuencia del log (asignada al persistir)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        result = {
             "id": self.id,
             "type": self.type,
             "timestamp": self.timestamp,
             "source": self.source,
             "data": self.data,
         }
+        if self.seq is not None:
+            result["seq"] = self.seq
+        return result
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Event":
@@ -104,6 +120,7 @@ class Event:
             timestamp=data["timestamp"],
             source=data["source"],
             data=data["data"],
+            seq=data.get("seq"),
         )
 
     @classmethod
@@ -120,23 +137,90 @@ class Event:
         )
 
 
+class _PendingBatch:
+    """Lote de eventos esperando un único append (group commit)"""
+
+    __slots__ = ("events", "done", "error")
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class _GroupCommit:
+    """
+    Estado de group commit compartido por todos los bridges del proceso
+    que escriben al mismo log (ej. ``notify_file_modified`` crea un bridge
+    por llamada).
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending: Optional[_PendingBatch] = None
+        self.write_lock = threading.Lock()
+        self.seq_lock: Optional[FileLock] = None
+
+
 class EventBridge:
     """
     Puente de eventos file-based para comunicación entre CLIs.
 
-    Cada instancia escribe a un archivo de eventos compartido.
-    Se usa un thread para polling eficiente de nuevos eventos.
+    Cada instancia escribe a un log de eventos compartido, dividido en
+    segmentos de tamaño acotado (``.events/<fecha>/seg-NNNNNN.jsonl``).
+    Los segmentos sellados se compactan (se descartan heartbeats superados
+    y eventos expirados) y el estado más reciente de cada instancia queda
+    en un snapshot pequeño. Se usa un thread para hacer tail incremental
+    (por offset) del segmento activo.
+
+    Cada evento recibe un número de secuencia monotónico al persistirse
+    (bajo un lock entre procesos), así el orden del archivo coincide con
+    el orden de ``seq``. Los publish concurrentes del mismo proceso se
+    agrupan (group commit): mientras un lote se escribe, los siguientes
+    eventos se acumulan y salen juntos en un solo append + flush. Un consumidor con nombre (``consumer``) guarda su
+    cursor en disco y al reiniciar retoma exactamente donde quedó.
     """
 
     DEFAULT_POLL_INTERVAL = 0.5  # 500ms
     EVENTS_FILE = "events.jsonl"
     MAX_EVENTS = 1000  # Rotación de eventos
-
-    def __init__(self, instance_id: str, session_date: Optional[str] = None):
+    SEGMENT_MAX_BYTES = 1024 * 1024  # 1 MB por segmento
+    EVENT_TTL_SECONDS = 6 * 3600  # Eventos más viejos se descartan al compactar
+    SEGMENT_PREFIX = "seg-"
+    SNAPSHOT_FILE = "snapshot.json"
+    BROKER_SOCKET = "broker.sock"
+    BROKER_LOCK = "broker.lock"
+    BROKER_ENV = "PA_EVENT_BROKER"  # "1" activa el modo broker por defecto
+    BROKER_CONNECT_ATTEMPTS = 3
+    BROKER_IDS_MAX = 4096  # IDs entregados en modo broker recordados
+    SEQ_FILE = "seq"
+    SEQ_LOCK_TIMEOUT = 10.0  # segundos esperando el lock de secuencia
+    CURSORS_DIR = "cursors"
+    CURSOR_FLUSH_INTERVAL = 0.5  # segundos entre escrituras del cursor
+    GROUP_COMMIT_MAX = 256  # eventos máximos por append
+    GROUP_COMMIT_WINDOW = 0.0  # segundos extra esperando más eventos por lote
+    FSYNC_ON_COMMIT = True  # publish retorna con el lote ya en disco
+
+    _group_commits: Dict[str, _GroupCommit] = {}
+    _group_commits_lock = threading.Lock()
+
+    def __init__(
+        self,
+        instance_id: str,
+        session_date: Optional[str] = None,
+        registry: Optional[InstanceRegistry] = None,
+        use_broker: Optional[bool] = None,
+        consumer: Optional[str] = None,
+    ):
         """
         Args:
             instance_id: ID único de esta instancia CLI
             session_date: Fecha de sesión (default: hoy)
+            registry: Registro de instancias compartido (default: se abre on-demand)
+            use_broker: Usar el broker local por Unix socket si está disponible
+                (default: variable de entorno PA_EVENT_BROKER)
+            consumer: Nombre del consumidor para persistir su cursor y
+                retomar desde ahí al reiniciar (default: sin cursor)
         """
         self.instance_id = instance_id
         self.session_date = session_date or datetime.now().strftime("%Y-%m-%d")
@@ -145,8 +229,13 @@ class EventBridge:
         self.events_dir = Path("core/.context/sessions/.events")
         self.events_dir.mkdir(parents=True, exist_ok=True)
 
-        # Archivo de eventos para hoy
-        self.events_file = self.events_dir / f"{self.session_date}.jsonl"
+        # Segmentos de eventos para hoy (+ archivo legacy de un solo bloque)
+        self.log_dir = self.events_dir / self.session_date
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.legacy_events_file = self.events_dir / f"{self.session_date}.jsonl"
+        self.snapshot_file = self.log_dir / self.SNAPSHOT_FILE
+        self.seq_file = self.log_dir / self.SEQ_FILE
+        self.consumer = consumer
 
         # Subscribers: {event_type: [callbacks]}
         self._subscribers: Dict[str, List[Callable[[Event], None]]] = {}
@@ -156,20 +245,379 @@ class EventBridge:
         self._listening = False
         self._listener_thread: Optional[threading.Thread] = None
         self._last_event_time: Optional[str] = None
-        self._processed_events: set = set()
+
+        # Última secuencia leída del log y última entregada a los callbacks
+        self._last_seq = 0
+        self._delivered_seq = 0
+        self._committed_seq = 0
+        self._last_cursor_flush = 0.0
+
+        # Posición de tail: (segmento, offset en bytes, inode del segmento)
+        self._tail_segment = 0
+        self._tail_offset = 0
+        self._tail_inode: Optional[int] = None
 
         # Queue para eventos entrantes (thread-safe)
         self._event_queue: Queue = Queue()
         self._worker_thread: Optional[threading.Thread] = None
 
-        # Lock para operaciones de archivo
+        # Lock para operaciones de archivo (threads) + lock de secuencia (procesos)
         self._file_lock = threading.Lock()
+        self._group = self._get_group_commit(self.log_dir)
+
+        # Registro materializado de instancias (se abre on-demand)
+        self._registry: Optional[InstanceRegistry] = registry
+
+        # Modo broker: conexión al broker y, si esta instancia lo levantó, el broker
+        if use_broker is None:
+            use_broker = os.environ.get(self.BROKER_ENV, "").lower() in (
+                "1", "true", "yes", "on",
+            )
+        self.use_broker = bool(use_broker) and BROKER_SUPPORTED
+        self.broker_socket = self.events_dir / self.BROKER_SOCKET
+        self._broker: Optional[EventBroker] = None
+        self._broker_conn: Optional[BrokerConnection] = None
+        self._broker_tailer: Optional["EventBridge"] = None
+        self._broker_lock = threading.Lock()
+
+        # El broker entrega antes de persistir (sin seq): los IDs entregados
+        # evitan repetir un evento que llega por el log y por el broker
+        self._broker_ids: set = set()
+        self._broker_id_order: deque = deque()
+
+    # ------------------------------------------------------------------
+    # Segmentos
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, number: int) -> Path:
+        """Ruta del segmento ``number`` (0 = archivo legacy del día)"""
+        if number == 0:
+            return self.legacy_events_file
+        return self.log_dir / f"{self.SEGMENT_PREFIX}{number:06d}.jsonl"
+
+    def _list_segments(self) -> List[Tuple[int, Path]]:
+        """Lista los segmentos existentes ordenados (legacy primero)"""
+        segments = []
+        if self.legacy_events_file.exists():
+            segments.append((0, self.legacy_events_file))
+
+        for path in self.log_dir.glob(f"{self.SEGMENT_PREFIX}*.jsonl"):
+            try:
+                number = int(path.stem[len(self.SEGMENT_PREFIX):])
+            except ValueError:
+                continue
+            segments.append((number, path))
+
+        segments.sort(key=lambda item: item[0])
+        return segments
+
+    def _active_segment(self) -> Tuple[int, Path]:
+        """Obtiene el segmento activo (el de mayor número), creándolo si no existe"""
+        segments = [s for s in self._list_segments() if s[0] > 0]
+        if segments:
+            return segments[-1]
+
+        path = self._segment_path(1)
+        path.touch()
+        return 1, path
 
     def _get_events_file(self) -> Path:
-        """Obtiene el archivo de eventos, creándolo si no existe"""
-        if not self.events_file.exists():
-            self.events_file.touch()
-        return self.events_file
+        """Obtiene el segmento activo de eventos, creándolo si no existe"""
+        return self._active_segment()[1]
+
+    @contextmanager
+    def _sequencer(self):
+        """Lock entre procesos que serializa la asignación de seq + append"""
+        group = self._group
+        with group.write_lock:
+            if group.seq_lock is None:
+                group.seq_lock = FileLock(
+                    str(self.log_dir / f"{self.session_date}.seq"), self.instance_id
+                )
+            if not group.seq_lock.acquire(timeout=self.SEQ_LOCK_TIMEOUT):
+                raise LockTimeoutError(
+                    f"No se pudo adquirir el lock de secuencia de {self.log_dir}"
+                )
+            try:
+                yield
+            finally:
+                group.seq_lock.release()
+
+    def _read_seq(self) -> int:
+        """Última secuencia asignada (se recupera del log si falta el archivo)"""
+        try:
+            return int(self.seq_file.read_text(encoding="utf-8").strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return self._recover_seq()
+
+    def _recover_seq(self) -> int:
+        """Busca la mayor secuencia presente en los segmentos"""
+        for number, path in reversed(self._list_segments()):
+            seqs = [e.seq for e in self._read_segment(path) if e.seq is not None]
+            if seqs:
+                return max(seqs)
+        return 0
+
+    def _write_seq(self, seq: int):
+        temp = self.seq_file.with_name(f"{self.SEQ_FILE}.{os.getpid()}.tmp")
+        temp.write_text(str(seq), encoding="utf-8")
+        os.replace(temp, self.seq_file)
+
+    def _append_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Asigna secuencias y escribe los eventos al segmento activo en un
+        solo append; rota y compacta si el segmento superó el tamaño máximo.
+        Requiere el lock de secuencia y ``self._file_lock`` tomados.
+
+        Returns:
+            Los mismos eventos, con ``seq`` asignado
+        """
+        seq = self._read_seq()
+        # Reservar antes de escribir: un crash deja un hueco, nunca duplicados
+        self._write_seq(seq + len(events))
+
+        lines = []
+        for event in events:
+            seq += 1
+            event["seq"] = seq
+            lines.append(json.dumps(event, ensure_ascii=False) + "\n")
+
+        number, path = self._active_segment()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+            f.flush()
+            if self.FSYNC_ON_COMMIT:
+                os.fsync(f.fileno())
+            size = f.tell()
+
+        if size >= self.SEGMENT_MAX_BYTES:
+            self._segment_path(number + 1).touch()
+            self._compact_sealed(number + 1)
+
+        return events
+
+    @classmethod
+    def _get_group_commit(cls, log_dir: Path) -> _GroupCommit:
+        key = str(log_dir.resolve())
+        with cls._group_commits_lock:
+            group = cls._group_commits.get(key)
+            if group is None:
+                group = cls._group_commits[key] = _GroupCommit()
+            return group
+
+    def _commit(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Persiste eventos con group commit y retorna cuando están en disco.
+
+        El primer publicador de un lote es el líder: espera a que termine
+        la escritura anterior (tiempo en el que otros publicadores se suman
+        a su lote), cierra el lote y lo escribe en un solo append. Los
+        demás solo esperan a que el líder termine.
+        """
+        group = self._group
+        with group.cond:
+            batch = group.pending
+            leader = batch is None or len(batch.events) >= self.GROUP_COMMIT_MAX
+            if leader:
+                batch = group.pending = _PendingBatch()
+            start = len(batch.events)
+            batch.events.extend(events)
+            if len(batch.events) >= self.GROUP_COMMIT_MAX:
+                group.cond.notify_all()
+
+        if leader:
+            # Cualquier fallo del líder (incluido no obtener el lock de
+            # secuencia) se entrega a todo el lote: nadie queda esperando
+            try:
+                with self._sequencer(), self._file_lock:
+                    with group.cond:
+                        if self.GROUP_COMMIT_WINDOW > 0:
+                            group.cond.wait_for(
+                                lambda: len(batch.events) >= self.GROUP_COMMIT_MAX,
+                                timeout=self.GROUP_COMMIT_WINDOW,
+                            )
+                        if group.pending is batch:
+                            group.pending = None
+                    self._append_events(batch.events)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                with group.cond:
+                    if group.pending is batch:
+                        group.pending = None
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.events[start:start + len(events)]
+
+    @staticmethod
+    def _parse_lines(lines) -> List[Event]:
+        """Parsea líneas JSONL ignorando las corruptas o incompletas"""
+        events = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(Event.from_dict(json.loads(line)))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+        return events
+
+    def _read_segment(self, path: Path) -> List[Event]:
+        """Lee todos los eventos de un segmento"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return self._parse_lines(f)
+        except FileNotFoundError:
+            return []
+
+    # ------------------------------------------------------------------
+    # Snapshot y compactación
+    # ------------------------------------------------------------------
+
+    def _load_snapshot(self) -> Dict[str, Any]:
+        """Carga el snapshot de estado por instancia (vacío si no existe)"""
+        try:
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot, dict):
+                snapshot.setdefault("instances", {})
+                snapshot.setdefault("through_segment", 0)
+                return snapshot
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {"instances": {}, "through_segment": 0}
+
+    def _save_snapshot(self, snapshot: Dict[str, Any]):
+        """Guarda el snapshot de forma atómica (temp + replace)"""
+        snapshot["updated"] = datetime.now().isoformat()
+        temp = self.snapshot_file.with_name(
+            f"{self.SNAPSHOT_FILE}.{os.getpid()}.tmp"
+        )
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp, self.snapshot_file)
+
+    @staticmethod
+    def _fold_instance_state(instances: Dict[str, Dict[str, Any]], event: Event):
+        """Aplica un evento de heartbeat/salida al estado por instancia"""
+        if event.type == EventType.INSTANCE_HEARTBEAT.value:
+            instance_id = event.data.get("instance_id")
+            if instance_id:
+                instances[instance_id] = {
+                    "instance_id": instance_id,
+                    "last_heartbeat": event.timestamp,
+                    "model": event.data.get("model", "unknown"),
+                    "status": "active",
+                }
+
+        elif event.type == EventType.INSTANCE_LEFT.value:
+            instance_id = event.data.get("instance_id")
+            if instance_id in instances:
+                instances[instance_id]["status"] = "disconnected"
+
+    def _compact_events(self, events: List[Event]) -> List[Event]:
+        """
+        Descarta heartbeats superados (queda solo el último por instancia,
+        y ninguno si la instancia salió después) y eventos expirados.
+        """
+        cutoff = datetime.now() - timedelta(seconds=self.EVENT_TTL_SECONDS)
+        heartbeat_types = (
+            EventType.INSTANCE_HEARTBEAT.value,
+            EventType.INSTANCE_LEFT.value,
+        )
+
+        # Recorrer hacia atrás: el primer heartbeat visto es el vigente
+        seen_instances = set()
+        kept = []
+        for event in reversed(events):
+            try:
+                if datetime.fromisoformat(event.timestamp) < cutoff:
+                    continue
+            except ValueError:
+                pass
+
+            if event.type in heartbeat_types:
+                instance_id = event.data.get("instance_id")
+                if event.type == EventType.INSTANCE_HEARTBEAT.value:
+                    if instance_id in seen_instances:
+                        continue
+                seen_instances.add(instance_id)
+
+            kept.append(event)
+
+        kept.reverse()
+        return kept
+
+    def _compact_sealed(self, active_number: int) -> int:
+        """
+        Compacta los segmentos sellados aún no compactados. Se llama con
+        el lock de secuencia tomado, así ningún escritor está haciendo
+        append a un segmento sellado mientras se reescribe.
+
+        Returns:
+            Número de eventos descartados
+        """
+        snapshot = self._load_snapshot()
+        through = snapshot["through_segment"]
+        dropped = 0
+
+        # El log legacy es anterior al segmento 1: su estado entra al
+        # snapshot junto con el primer segmento compactado, y a partir de
+        # ahí los lectores ya no lo aplican encima del snapshot
+        legacy = (
+            self._read_segment(self.legacy_events_file) if through == 0 else []
+        )
+
+        for number, path in self._list_segments():
+            if number == 0 or number <= through or number >= active_number:
+                continue
+
+            for event in legacy:
+                self._fold_instance_state(snapshot["instances"], event)
+            legacy = []
+
+            events = self._read_segment(path)
+            for event in events:
+                self._fold_instance_state(snapshot["instances"], event)
+
+            kept = self._compact_events(events)
+            dropped += len(events) - len(kept)
+
+            if kept:
+                temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                with open(temp, "w", encoding="utf-8") as f:
+                    for event in kept:
+                        f.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+                os.replace(temp, path)
+            else:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+            through = number
+
+        if through != snapshot["through_segment"]:
+            snapshot["through_segment"] = through
+            self._save_snapshot(snapshot)
+
+        return dropped
+
+    def compact(self) -> int:
+        """
+        Compacta los segmentos sellados del día.
+
+        Returns:
+            Número de eventos descartados
+        """
+        with self._sequencer(), self._file_lock:
+            number, _ = self._active_segment()
+            return self._compact_sealed(number)
 
     def publish(self, event_type: EventType, data: Dict[str, Any]) -> Event:
         """
@@ -180,19 +628,173 @@ class EventBridge:
             data: Datos del evento
 
         Returns:
-            El evento creado
+            El evento creado (con ``seq`` si se persistió en modo archivo)
+
+        Raises:
+            LockTimeoutError: Si el lock de secuencia sigue ocupado tras
+                ``SEQ_LOCK_TIMEOUT`` (modo archivo)
+            OSError: Si falla la escritura al log
+
+        Las notificaciones best-effort (hooks, heartbeats) usan
+        ``try_publish``, que registra el error en vez de propagarlo.
         """
         event = Event.create(event_type, self.instance_id, data)
 
-        # Escribir al archivo (append)
-        with self._file_lock:
-            events_file = self._get_events_file()
-            with open(events_file, "a", encoding="utf-8") as f:
-                json_line = json.dumps(event.to_dict(), ensure_ascii=False)
-                f.write(json_line + "\n")
+        if event_type == EventType.INSTANCE_LEFT and self.registry is not None:
+            try:
+                self.registry.remove(data.get("instance_id", self.instance_id))
+            except Exception:
+                pass
+
+        # Modo broker: fan-out inmediato; el broker persiste de forma asíncrona
+        if self.use_broker and self._publish_via_broker(event):
+            return event
+
+        # Escribir al segmento activo (group commit) con secuencia asignada
+        event.seq = self._commit([event.to_dict()])[0]["seq"]
 
         return event
 
+    def try_publish(
+        self, event_type: EventType, data: Dict[str, Any]
+    ) -> Optional[Event]:
+        """
+        Publica sin propagar errores de lock o de disco (notificaciones
+        best-effort). Retorna None si el evento no se pudo publicar.
+        """
+        try:
+            return self.publish(event_type, data)
+        except (LockTimeoutError, OSError) as e:
+            print(f"[EventBridge] No se pudo publicar {event_type.value}: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Modo broker
+    # ------------------------------------------------------------------
+
+    def _connect_broker(self, start: bool) -> Optional[BrokerConnection]:
+        """
+        Conecta al broker local; si no hay y ``start`` es True, lo levanta
+        en este proceso. Retorna None si el modo broker no está disponible.
+        """
+        with self._broker_lock:
+            conn = self._broker_conn
+            if conn is not None and conn.connected:
+                return conn
+
+            for attempt in range(self.BROKER_CONNECT_ATTEMPTS):
+                conn = BrokerConnection(
+                    self.broker_socket, self.instance_id, subscribe=self._listening
+                )
+                if conn.connect():
+                    self._broker_conn = conn
+                    return conn
+
+                if not start:
+                    return None
+
+                if self._broker is None:
+                    # Posicionar el tail externo antes de levantar el broker,
+                    # así ningún append en modo archivo queda sin reenviar
+                    self._broker_tailer = EventBridge(
+                        self.instance_id, self.session_date,
+                        registry=self._registry, use_broker=False,
+                    )
+                    self._broker_tailer._seek_to_end()
+                    broker = EventBroker(
+                        self.broker_socket,
+                        self.events_dir / self.BROKER_LOCK,
+                        on_persist=self._persist_broker_events,
+                        poll_external=self._poll_external_events,
+                        poll_interval=self.DEFAULT_POLL_INTERVAL,
+                    )
+                    if broker.start():
+                        self._broker = broker
+                        continue
+
+                # Otro proceso está levantando el broker: reintentar
+                time.sleep(0.05 * (attempt + 1))
+
+            return None
+
+    def _publish_via_broker(self, event: Event) -> bool:
+        """Publica por el broker. Retorna False si hay que usar modo archivo"""
+        conn = self._connect_broker(start=False)
+        if conn is not None and conn.send([event.to_dict()]):
+            return True
+        return False
+
+    def _persist_broker_events(
+        self, events: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Callback del thread escritor del broker: asigna seq y hace append durable"""
+        return self._commit(events)
+
+    def _poll_external_events(self) -> List[Dict[str, Any]]:
+        """Callback del broker: eventos escritos al log en modo archivo"""
+        if self._broker_tailer is None:
+            return []
+        return [e.to_dict() for e in self._broker_tailer._read_new_events()]
+
+    def _seek_to_end(self):
+        """Posiciona el tail al final del log (ignora el historial)"""
+        with self._file_lock:
+            segments = self._list_segments()
+            if not segments:
+                return
+            self._tail_segment, path = segments[-1]
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return
+            self._tail_offset = stat.st_size
+            self._tail_inode = stat.st_ino
+
+    def _listen_broker(self, conn: BrokerConnection):
+        """Thread de escucha en modo broker; cae a polling si el broker muere"""
+        # Ponerse al día con el log (igual que el modo archivo); lo leído
+        # puede llegar otra vez por el broker si se publicó al conectar
+        for event in self._read_new_events():
+            self._remember_broker_id(event.id)
+            self._event_queue.put(event)
+
+        while self._listening:
+            messages = conn.receive()
+            if messages is None:
+                break
+
+            for data in messages:
+                try:
+                    event = Event.from_dict(data)
+                except (KeyError, TypeError):
+                    continue
+                # Los eventos externos llegan con seq: descartar lo ya
+                # leído del log. Los del broker no lo tienen aún.
+                if event.seq is not None:
+                    if event.seq <= self._last_seq:
+                        continue
+                    self._last_seq = event.seq
+                if event.id in self._broker_ids:
+                    continue
+                self._remember_broker_id(event.id)
+                self._event_queue.put(event)
+
+        if not self._listening:
+            return
+
+        # Broker caído: seguir en modo archivo de forma transparente
+        print("[EventBridge] Broker desconectado, usando modo archivo")
+        self.use_broker = False
+        with self._broker_lock:
+            self._broker_conn = None
+        self._poll_events()
+
+    def _remember_broker_id(self, event_id: str):
+        self._broker_ids.add(event_id)
+        self._broker_id_order.append(event_id)
+        if len(self._broker_id_order) > self.BROKER_IDS_MAX:
+            self._broker_ids.discard(self._broker_id_order.popleft())
+
     def subscribe(self, event_type: EventType, callback: Callable[[Event], None]):
         """
         Suscribe un callback a un tipo de evento específico.
@@ -238,9 +840,20 @@ class EventBridge:
 
         self._listening = True
 
-        # Thread de polling
+        # Consumidor con cursor: retomar exactamente donde quedó
+        if self.consumer:
+            self._resume_from(self.load_cursor())
+
+        # Thread de escucha: broker (si está disponible) o polling del log
+        conn = self._connect_broker(start=True) if self.use_broker else None
+        if conn is not None and conn.send([{"hello": self.instance_id, "subscribe": True}]):
+            target, args = self._listen_broker, (conn,)
+        else:
+            target, args = self._poll_events, ()
+
         self._listener_thread = threading.Thread(
-            target=self._poll_events,
+            target=target,
+            args=args,
             daemon=True,
             name=f"EventBridge-{self.instance_id}",
         )
@@ -255,7 +868,7 @@ class EventBridge:
         self._worker_thread.start()
 
         # Notificar unión
-        self.publish(
+        self.try_publish(
             EventType.INSTANCE_JOINED,
             {"instance_id": self.instance_id, "timestamp": datetime.now().isoformat()},
         )
@@ -267,12 +880,24 @@ class EventBridge:
 
         self._listening = False
 
-        # Notificar salida
-        self.publish(
+        # Si esta instancia es el broker, detenerlo primero: los demás
+        # clientes caen a modo archivo y verán la salida en el log
+        if self._broker is not None:
+            self._broker.stop()
+            self._broker = None
+            self.use_broker = False
+
+        # Notificar salida (también la quita del registro materializado)
+        self.try_publish(
             EventType.INSTANCE_LEFT,
             {"instance_id": self.instance_id, "timestamp": datetime.now().isoformat()},
         )
 
+        with self._broker_lock:
+            if self._broker_conn is not None:
+                self._broker_conn.close()
+                self._broker_conn = None
+
         # Esperar threads
         if self._listener_thread and self._listener_thread.is_alive():
             self._listener_thread.join(timeout=1.0)
@@ -280,6 +905,8 @@ class EventBridge:
         if self._worker_thread and self._worker_thread.is_alive():
             self._worker_thread.join(timeout=1.0)
 
+        self._flush_cursor(force=True)
+
     def _poll_events(self):
         """Thread que hace polling del archivo de eventos"""
         while self._listening:
@@ -288,9 +915,7 @@ class EventBridge:
                 events = self._read_new_events()
 
                 for event in events:
-                    # Ignorar eventos propios (opcional, configurable)
-                    if event.source != self.instance_id:
-                        self._event_queue.put(event)
+                    self._event_queue.put(event)
 
                 # Pequeña pausa para no saturar CPU
                 time.sleep(self.DEFAULT_POLL_INTERVAL)
@@ -301,127 +926,264 @@ class EventBridge:
                 time.sleep(self.DEFAULT_POLL_INTERVAL)
 
     def _read_new_events(self) -> List[Event]:
-        """Lee eventos nuevos desde el archivo"""
+        """Lee eventos nuevos haciendo tail por offset desde la última posición"""
         events = []
 
         try:
-            events_file = self._get_events_file()
-
             with self._file_lock:
-                with open(events_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        try:
-                            data = json.loads(line)
-                            event = Event.from_dict(data)
-
-                            # Evitar procesar el mismo evento dos veces
-                            if event.id not in self._processed_events:
-                                events.append(event)
-                                self._processed_events.add(event.id)
+                for number, path in self._list_segments():
+                    if number < self._tail_segment:
+                        continue
+                    if number > self._tail_segment:
+                        self._tail_segment = number
+                        self._tail_offset = 0
+                        self._tail_inode = None
+
+                    for event in self._read_segment_tail(path):
+                        if event.id in self._broker_ids:
+                            continue  # ya entregado por el broker
+                        # Evitar procesar el mismo evento dos veces (un
+                        # segmento compactado se relee desde el inicio)
+                        if event.seq is not None:
+                            if event.seq <= self._last_seq:
+                                continue
+                            self._last_seq = event.seq
+                        events.append(event)
 
-                                # Mantener tamaño del set controlado
-                                if len(self._processed_events) > self.MAX_EVENTS:
-                                    self._processed_events.clear()
-
-                        except json.JSONDecodeError:
-                            continue
-
-        except FileNotFoundError:
-            pass
         except Exception as e:
             print(f"[EventBridge] Error leyendo eventos: {e}")
 
         return events
 
+    def _read_segment_tail(self, path: Path) -> List[Event]:
+        """Lee las líneas completas nuevas de un segmento desde el offset actual"""
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+
+                # Segmento reescrito por compactación o truncado: releer
+                if (
+                    self._tail_inode is not None and stat.st_ino != self._tail_inode
+                ) or stat.st_size < self._tail_offset:
+                    self._tail_offset = 0
+                self._tail_inode = stat.st_ino
+
+                f.seek(self._tail_offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return []
+
+        # Solo consumir hasta el último salto de línea (append en curso)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return []
+        self._tail_offset += end + 1
+
+        return self._parse_lines(chunk[: end + 1].decode("utf-8", "replace").splitlines())
+
     def _process_events(self):
         """Thread que procesa eventos de la queue"""
         while self._listening:
             try:
                 # Esperar evento con timeout
                 event = self._event_queue.get(timeout=0.5)
-
-                # Notificar a subscribers específicos
-                if event.type in self._subscribers:
-                    for callback in self._subscribers[event.type]:
-                        try:
-                            callback(event)
-                        except Exception as e:
-                            print(f"[EventBridge] Error en callback: {e}")
-
-                # Notificar a subscribers globales
-                for callback in self._global_subscribers:
-                    try:
-                        callback(event)
-                    except Exception as e:
-                        print(f"[EventBridge] Error en callback global: {e}")
-
-                self._event_queue.task_done()
-
             except Empty:
+                self._flush_cursor()
                 continue
+
+            try:
+                # Ignorar eventos propios (solo avanzan el cursor)
+                if event.source != self.instance_id:
+                    self._dispatch(event)
             except Exception as e:
                 print(f"[EventBridge] Error procesando evento: {e}")
+            finally:
+                if event.seq is not None:
+                    self._delivered_seq = event.seq
+                self._event_queue.task_done()
+
+            if self._event_queue.empty():
+                self._flush_cursor()
+
+    def _dispatch(self, event: Event):
+        """Notifica un evento a los subscribers"""
+        # Notificar a subscribers específicos
+        if event.type in self._subscribers:
+            for callback in self._subscribers[event.type]:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[EventBridge] Error en callback: {e}")
+
+        # Notificar a subscribers globales
+        for callback in self._global_subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[EventBridge] Error en callback global: {e}")
+
+    # ------------------------------------------------------------------
+    # Cursores y replay
+    # ------------------------------------------------------------------
+
+    def _cursor_path(self) -> Path:
+        return self.log_dir / self.CURSORS_DIR / f"{self.consumer}.json"
+
+    def load_cursor(self) -> int:
+        """Última secuencia procesada por este consumidor (0 si no hay cursor)"""
+        if not self.consumer:
+            return 0
+        try:
+            with open(self._cursor_path(), "r", encoding="utf-8") as f:
+                return int(json.load(f).get("seq", 0))
+        except (FileNotFoundError, json.JSONDecodeError, ValueError, TypeError):
+            return 0
+
+    def commit_cursor(self, seq: int):
+        """Persiste el cursor del consumidor de forma atómica"""
+        if not self.consumer:
+            return
+        path = self._cursor_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "updated": datetime.now().isoformat()}, f)
+        os.replace(temp, path)
+        self._committed_seq = seq
+
+    def _flush_cursor(self, force: bool = False):
+        """Escribe el cursor si avanzó (a lo sumo cada CURSOR_FLUSH_INTERVAL)"""
+        if not self.consumer or self._delivered_seq <= self._committed_seq:
+            return
+        now = time.time()
+        if not force and now - self._last_cursor_flush < self.CURSOR_FLUSH_INTERVAL:
+            return
+        self._last_cursor_flush = now
+        try:
+            self.commit_cursor(self._delivered_seq)
+        except OSError as e:
+            print(f"[EventBridge] Error guardando cursor: {e}")
+
+    def _segment_first_seq(self, path: Path) -> Optional[int]:
+        """Secuencia del primer evento de un segmento (None si vacío/legacy)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    events = self._parse_lines([line])
+                    if events:
+                        return events[0].seq
+        except FileNotFoundError:
+            pass
+        return None
+
+    def _segments_since(self, since: int) -> List[Tuple[int, Path]]:
+        """Segmentos que pueden contener eventos con seq > since"""
+        segments = [s for s in self._list_segments() if s[0] > 0]
+        for index in range(len(segments) - 1, -1, -1):
+            first = self._segment_first_seq(segments[index][1])
+            if first is not None and first <= since + 1:
+                return segments[index:]
+        return segments
+
+    def _resume_from(self, seq: int):
+        """Posiciona el tail para entregar solo eventos con seq > ``seq``"""
+        with self._file_lock:
+            segments = self._segments_since(seq)
+            self._last_seq = seq
+            self._delivered_seq = self._committed_seq = seq
+            self._tail_segment = segments[0][0] if segments else 1
+            self._tail_offset = 0
+            self._tail_inode = None
+
+    def replay(self, since: int = 0) -> List[Event]:
+        """
+        Devuelve los eventos del día con ``seq > since``, en orden.
+
+        Los segmentos compactados ya no contienen heartbeats superados
+        ni eventos expirados.
+        """
+        events = []
+        with self._file_lock:
+            for _, path in self._segments_since(since):
+                events.extend(
+                    e for e in self._read_segment(path)
+                    if e.seq is not None and e.seq > since
+                )
+        return events
+
+    @property
+    def registry(self) -> Optional[InstanceRegistry]:
+        """Registro materializado de instancias (None si SQLite no está disponible)"""
+        if self._registry is None:
+            try:
+                self._registry = InstanceRegistry()
+            except Exception as e:
+                print(f"[EventBridge] Registro de instancias no disponible: {e}")
+                return None
+        return self._registry
 
     def get_active_instances(self, timeout_seconds: int = 60) -> List[Dict[str, Any]]:
         """
         Obtiene lista de instancias activas basado en heartbeats recientes.
 
+        Consulta el registro materializado (O(instancias activas)); si no
+        está disponible, reconstruye el estado desde el log de eventos.
+
         Args:
             timeout_seconds: Segundos desde último heartbeat para considerar activa
 
         Returns:
             Lista de dicts con info de instancias
         """
-        instances = {}
-        cutoff_time = time.time() - timeout_seconds
+        registry = self.registry
+        if registry is not None:
+            try:
+                return registry.active(timeout_seconds)
+            except Exception as e:
+                print(f"[EventBridge] Error consultando registro: {e}")
 
-        try:
-            events_file = self._get_events_file()
+        return self._active_instances_from_log(timeout_seconds)
 
-            with self._file_lock:
-                with open(events_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        try:
-                            data = json.loads(line)
-                            event = Event.from_dict(data)
-
-                            if event.type == EventType.INSTANCE_HEARTBEAT.value:
-                                instance_id = event.data.get("instance_id")
-                                if instance_id:
-                                    instances[instance_id] = {
-                                        "instance_id": instance_id,
-                                        "last_heartbeat": event.timestamp,
-                                        "model": event.data.get("model", "unknown"),
-                                        "status": "active",
-                                    }
-
-                            elif event.type == EventType.INSTANCE_LEFT.value:
-                                instance_id = event.data.get("instance_id")
-                                if instance_id in instances:
-                                    instances[instance_id]["status"] = "disconnected"
-
-                        except (json.JSONDecodeError, KeyError):
-                            continue
+    def _active_instances_from_log(self, timeout_seconds: int) -> List[Dict[str, Any]]:
+        """Reconstruye las instancias activas desde snapshot + segmentos"""
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
 
-        except FileNotFoundError:
-            pass
+        # Estado compactado + solo los segmentos aún no compactados
+        with self._file_lock:
+            snapshot = self._load_snapshot()
+            instances = snapshot["instances"]
+            through = snapshot["through_segment"]
+            for number, path in self._list_segments():
+                # El legacy (0) ya está en el snapshot si hubo compactación
+                if number <= through and (number > 0 or through > 0):
+                    continue
+                for event in self._read_segment(path):
+                    self._fold_instance_state(instances, event)
 
         # Filtrar solo activos recientes
-        active = [i for i in instances.values() if i["status"] == "active"]
+        active = []
+        for info in instances.values():
+            if info["status"] != "active":
+                continue
+            try:
+                if datetime.fromisoformat(info["last_heartbeat"]) < cutoff:
+                    continue
+            except ValueError:
+                continue
+            active.append(info)
 
         return active
 
     def send_heartbeat(self, model: Optional[str] = None):
         """Envía un heartbeat para mantener la instancia como activa"""
-        self.publish(
+        registry = self.registry
+        if registry is not None:
+            try:
+                registry.heartbeat(self.instance_id, model=model, pid=os.getpid())
+            except Exception as e:
+                print(f"[EventBridge] Error actualizando registro: {e}")
+
+        self.try_publish(
             EventType.INSTANCE_HEARTBEAT,
             {
                 "instance_id": self.instance_id,
@@ -452,7 +1214,8 @@ def notify_file_modified(
     session_date: Optional[str] = None,
 ):
     """
-    Notifica que un archivo fue modificado.
+    Notifica que un archivo fue modificado (best-effort: un lock de
+    secuencia ocupado se registra, no se propaga al hook).
 
     Args:
         file_path: Ruta del archivo modificado
@@ -461,7 +1224,7 @@ def notify_file_modified(
         session_date: Fecha de sesión (opcional)
     """
     bridge = EventBridge(instance_id, session_date)
-    bridge.publish(
+    bridge.try_publish(
         EventType.FILE_MODIFIED,
         {
             "file": file_path,
@@ -478,7 +1241,8 @@ def notify_conflict(
     session_date: Optional[str] = None,
 ):
     """
-    Notifica un conflicto entre instancias.
+    Notifica un conflicto entre instancias (best-effort, como
+    ``notify_file_modified``).
 
     Args:
         file_path: Ruta del archivo en conflicto
@@ -487,7 +1251,7 @@ def notify_conflict(
         session_date: Fecha de sesión (opcional)
     """
     bridge = EventBridge(instance_id, session_date)
-    bridge.publish(
+    bridge.try_publish(
         EventType.FILE_CONFLICT,
         {
             "file": file_path,
@@ -507,13 +1271,19 @@ if __name__ == "__main__":
     parser.add_argument(
         "--action",
         "-a",
-        choices=["listen", "publish", "list-instances"],
+        choices=["listen", "publish", "list-instances", "compact", "replay"],
         default="listen",
         help="Acción a realizar",
     )
     parser.add_argument("--event-type", "-t", help="Tipo de evento para publish")
     parser.add_argument("--data", "-d", help="Datos JSON para publish")
     parser.add_argument("--session-date", "-s", help="Fecha de sesión")
+    parser.add_argument(
+        "--consumer", "-c", help="Nombre de consumidor (cursor persistente)"
+    )
+    parser.add_argument(
+        "--since", type=int, default=0, help="Secuencia desde la cual hacer replay"
+    )
 
     args = parser.parse_args()
 
@@ -521,7 +1291,9 @@ if __name__ == "__main__":
         print(f"🔊 Iniciando escucha como {args.instance_id}...")
         print("Presiona Ctrl+C para salir\n")
 
-        bridge = EventBridge(args.instance_id, args.session_date)
+        bridge = EventBridge(
+            args.instance_id, args.session_date, consumer=args.consumer
+        )
 
         def on_event(event):
             print(f"[{event.type}] desde {event.source}")
@@ -560,3 +1332,13 @@ if __name__ == "__main__":
                 print(f"    Último heartbeat: {inst['last_heartbeat']}")
         else:
             print("No hay instancias activas")
+
+    elif args.action == "compact":
+        bridge = EventBridge(args.instance_id, args.session_date)
+        dropped = bridge.compact()
+        print(f"[OK] Compactación completada: {dropped} eventos descartados")
+
+    elif args.action == "replay":
+        bridge = EventBridge(args.instance_id, args.session_date)
+        for event in bridge.replay(since=args.since):
+            print(json.dumps(event.to_dict(), ensure_ascii=False))
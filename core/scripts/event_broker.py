@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+event_broker.py - Broker local (Unix domain socket) para el EventBridge
+Para FreakingJSON-PA Multi-CLI Framework
+
+Modo opcional de baja latencia: la primera instancia que escucha levanta
+un broker en un thread propio; las demás se conectan al socket. Cada
+lote recibido se reenvía (fan-out) de inmediato a los suscriptores y se
+encola para un thread escritor, que lo persiste al log JSONL (donde
+recibe su número de secuencia). Ni los publicadores ni los suscriptores
+esperan al disco; los eventos del broker llegan sin ``seq`` (lo tienen
+solo en el log).
+
+Cada suscriptor tiene un buffer de salida no bloqueante: el loop nunca
+espera a un cliente lento. Si su buffer supera ``SEND_BUFFER_MAX`` se le
+desconecta (vuelve al modo archivo y se pone al día desde el log).
+
+Protocolo: JSON por línea. La primera línea de cada cliente es un saludo
+``{"hello": "<instance_id>", "subscribe": true|false}``; el resto son
+eventos con el mismo formato que ``Event.to_dict()`` en ambos sentidos.
+
+El broker vive mientras viva el proceso que lo levantó. Si muere, los
+clientes lo detectan (EOF) y vuelven al modo archivo de forma
+transparente.
+
+Autor: FreakingJSON-PA Framework
+Versión: 1.0.0
+"""
+
+import os
+import json
+import time
+import queue
+import socket
+import selectors
+import threading
+from pathlib import Path
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# El broker requiere Unix domain sockets y flock (POSIX)
+BROKER_SUPPORTED = hasattr(socket, "AF_UNIX") and fcntl is not None
+
+
+class _BrokerClient:
+    """Conexión de un cliente en el lado del broker"""
+
+    __slots__ = ("sock", "fd", "buffer", "outbox", "subscribe", "instance_id")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.buffer = b""
+        self.outbox = bytearray()  # Pendiente de enviar (socket no bloqueante)
+        self.subscribe = False
+        self.instance_id: Optional[str] = None
+
+
+class EventBroker:
+    """
+    Servidor de eventos sobre Unix domain socket.
+
+    Solo un proceso puede ser el broker: el dueño mantiene un flock
+    exclusivo sobre ``lock_path`` mientras vive (el kernel lo libera si
+    el proceso muere, así un socket huérfano se detecta y se reemplaza).
+    """
+
+    SEND_BUFFER_MAX = 4 * 1024 * 1024  # Cliente con más pendiente se desconecta
+    SEEN_IDS_MAX = 4096  # IDs recientes para no reenviar eventos propios
+
+    def __init__(
+        self,
+        socket_path: Path,
+        lock_path: Path,
+        on_persist: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        poll_external: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+        poll_interval: float = 0.5,
+    ):
+        """
+        Args:
+            socket_path: Ruta del socket Unix
+            lock_path: Archivo de lock que identifica al dueño del broker
+            on_persist: Callback que persiste un lote de eventos (append al
+                log); lo llama el thread escritor, fuera del loop
+            poll_external: Callback que devuelve eventos escritos al log por
+                publicadores en modo archivo (se reenvían a los suscriptores)
+            poll_interval: Intervalo para consultar ``poll_external``
+        """
+        self.socket_path = Path(socket_path)
+        self.lock_path = Path(lock_path)
+        self.on_persist = on_persist
+        self.poll_external = poll_external
+        self.poll_interval = poll_interval
+
+        self._server: Optional[socket.socket] = None
+        self._lock_fd: Optional[int] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._clients: Dict[int, _BrokerClient] = {}
+        self._running = False
+        self._loop_thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writes: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue()
+        self._last_external_poll = 0.0
+
+        self._seen_order: Deque[str] = deque()
+        self._seen_ids: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """
+        Intenta convertirse en el broker.
+
+        Returns:
+            True si este proceso quedó como broker, False si ya hay otro
+        """
+        if not BROKER_SUPPORTED or self._running:
+            return self._running
+
+        fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        try:
+            # Tenemos el lock: cualquier socket existente es huérfano
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(str(self.socket_path))
+            server.listen(64)
+            server.setblocking(False)
+        except OSError:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            return False
+
+        self._lock_fd = fd
+        self._server = server
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(server, selectors.EVENT_READ, None)
+        self._running = True
+
+        self._writer_thread = threading.Thread(
+            target=self._write_loop, daemon=True, name="EventBrokerWriter"
+        )
+        self._writer_thread.start()
+        self._loop_thread = threading.Thread(
+            target=self._loop, daemon=True, name="EventBroker"
+        )
+        self._loop_thread.start()
+        return True
+
+    def stop(self):
+        """Detiene el broker y libera el socket"""
+        if not self._running:
+            return
+        self._running = False
+
+        if self._loop_thread and self._loop_thread.is_alive():
+            self._loop_thread.join(timeout=2.0)
+
+        # Terminar de persistir lo encolado antes de soltar el lock
+        self._writes.put(None)
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._writer_thread.join(timeout=10.0)
+
+        for client in list(self._clients.values()):
+            self._drop(client)
+        if self._selector:
+            self._selector.close()
+        if self._server:
+            self._server.close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # ------------------------------------------------------------------
+    # Loop principal (accept + lectura + fan-out); persistencia aparte
+    # ------------------------------------------------------------------
+
+    def _loop(self):
+        while self._running:
+            try:
+                ready = self._selector.select(timeout=self.poll_interval)
+            except (OSError, ValueError):
+                break
+
+            batch: List[Dict[str, Any]] = []
+            for key, mask in ready:
+                if key.data is None:
+                    self._accept()
+                    continue
+                client = key.data
+                if mask & selectors.EVENT_WRITE:
+                    self._flush(client)
+                if mask & selectors.EVENT_READ and client.fd in self._clients:
+                    batch.extend(self._read_client(client))
+
+            if batch:
+                # Fan-out primero; el disco no retrasa la entrega
+                self._writes.put(batch)
+
+            # Eventos que publicadores en modo archivo agregaron al log
+            now = time.monotonic()
+            if self.poll_external and (
+                now - self._last_external_poll >= self.poll_interval
+            ):
+                self._last_external_poll = now
+                try:
+                    external = [
+                        e for e in self.poll_external() if self._remember(e.get("id"))
+                    ]
+                except Exception as e:
+                    print(f"[EventBroker] Error leyendo log: {e}")
+                    external = []
+                batch = external + batch
+
+            if batch:
+                self._broadcast(batch)
+
+    def _write_loop(self):
+        """Thread escritor: persiste los lotes encolados, agrupando los pendientes"""
+        while True:
+            batch = self._writes.get()
+            stop = batch is None
+            events = batch or []
+            while True:
+                try:
+                    more = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                else:
+                    events.extend(more)
+            if events:
+                self._persist(events)
+            if stop:
+                return
+
+    def _accept(self):
+        try:
+            sock, _ = self._server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        client = _BrokerClient(sock)
+        self._clients[client.fd] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _read_client(self, client: _BrokerClient) -> List[Dict[str, Any]]:
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return []
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return []
+
+        client.buffer += data
+        *lines, client.buffer = client.buffer.split(b"\n")
+
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(message, dict):
+                continue
+            if "hello" in message:
+                client.instance_id = message.get("hello")
+                client.subscribe = bool(message.get("subscribe"))
+                continue
+            if self._remember(message.get("id")):
+                events.append(message)
+        return events
+
+    def _broadcast(self, events: List[Dict[str, Any]]):
+        payload = "".join(
+            json.dumps(e, ensure_ascii=False) + "\n" for e in events
+        ).encode("utf-8")
+        for client in list(self._clients.values()):
+            if not client.subscribe:
+                continue
+            if len(client.outbox) + len(payload) > self.SEND_BUFFER_MAX:
+                print(f"[EventBroker] Cliente {client.instance_id} no lee: desconectado")
+                self._drop(client)
+                continue
+            pending = bool(client.outbox)
+            client.outbox += payload
+            if not pending:
+                self._flush(client)
+
+    def _flush(self, client: _BrokerClient):
+        """Envía lo que el socket acepte sin bloquear; el resto espera EVENT_WRITE"""
+        try:
+            while client.outbox:
+                sent = client.sock.send(client.outbox)
+                del client.outbox[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(client)
+            return
+
+        events = selectors.EVENT_READ
+        if client.outbox:
+            events |= selectors.EVENT_WRITE
+        try:
+            if self._selector.get_key(client.sock).events != events:
+                self._selector.modify(client.sock, events, client)
+        except (KeyError, ValueError):
+            pass
+
+    def _drop(self, client: _BrokerClient):
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError, OSError):
+            pass
+        self._clients.pop(client.fd, None)
+        try:
+            client.sock.close()
+        except OSError:
+            pass
+
+    def _remember(self, event_id: Optional[str]) -> bool:
+        """Registra un ID visto. Retorna False si ya se había visto"""
+        if not event_id:
+            return True
+        if event_id in self._seen_ids:
+            return False
+        self._seen_ids.add(event_id)
+        self._seen_order.append(event_id)
+        if len(self._seen_order) > self.SEEN_IDS_MAX:
+            self._seen_ids.discard(self._seen_order.popleft())
+        return True
+
+    def _persist(self, events: List[Dict[str, Any]]):
+        """Persiste un lote (thread escritor); los errores solo se registran"""
+        try:
+            self.on_persist(events)
+        except Exception as e:
+            print(f"[EventBroker] Error persistiendo eventos: {e}")
+
+
+class BrokerConnection:
+    """Conexión de una instancia (cliente) al broker"""
+
+    CONNECT_TIMEOUT = 0.5
+
+    def __init__(self, socket_path: Path, instance_id: str, subscribe: bool):
+        self.socket_path = Path(socket_path)
+        self.instance_id = instance_id
+        self.subscribe = subscribe
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._buffer = b""
+
+    def connect(self) -> bool:
+        """Conecta y saluda al broker. Retorna False si no hay broker"""
+        if not BROKER_SUPPORTED:
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(self.socket_path))
+            hello = {"hello": self.instance_id, "subscribe": self.subscribe}
+            sock.sendall((json.dumps(hello) + "\n").encode("utf-8"))
+        except OSError:
+            sock.close()
+            return False
+        sock.settimeout(None)
+        self._sock = sock
+        return True
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def send(self, events: List[Dict[str, Any]]) -> bool:
+        """Envía eventos al broker. Retorna False si la conexión se perdió"""
+        if self._sock is None:
+            return False
+        payload = "".join(
+            json.dumps(e, ensure_ascii=False) + "\n" for e in events
+        ).encode("utf-8")
+        try:
+            with self._send_lock:
+                self._sock.sendall(payload)
+            return True
+        except OSError:
+            self.close()
+            return False
+
+    def receive(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Bloquea hasta recibir eventos del broker.
+
+        Returns:
+            Lista de eventos, o None si el broker se desconectó
+        """
+        sock = self._sock
+        if sock is None:
+            return None
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                self.close()
+                return None
+
+            self._buffer += data
+            *lines, self._buffer = self._buffer.split(b"\n")
+            events = []
+            for line in lines:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+            if events:
+                return events
+
+    def close(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
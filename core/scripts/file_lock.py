@@ -12,6 +12,15 @@ Uso:
         # código seguro
         pass
 
+    # Lector/escritor: varios lectores a la vez, un escritor exclusivo
+    lock = FileLock("MASTER.md")
+    if lock.acquire_shared(timeout=5.0):
+        ...
+
+    # Varios recursos a la vez, en orden canónico (sin deadlocks)
+    with lock_many(["a.md", "b.md"], timeout=5.0, shared=["a.md"]):
+        pass
+
     # Manual
     lock = FileLock("archivo.txt")
     if lock.acquire(timeout=5.0):
@@ -21,6 +30,20 @@ Uso:
         finally:
             lock.release()
 
+Backends:
+    kernel  - flock() de POSIX; el kernel lo libera si el proceso muere.
+              Con ``timeout=None`` el que espera bloquea en el kernel y
+              despierta apenas se libera. Con timeout, flock() bloqueante
+              no se puede cancelar: se reintenta no bloqueante con backoff
+              corto (1-10ms), así que el traspaso tarda hasta 10ms y no
+              quedan threads ni descriptores colgados al vencer.
+              ``is_locked`` consulta /proc/locks sin tomar el lock (Linux).
+              El JSON del dueño es solo metadata. Soporta locks
+              compartidos (lectores) y exclusivos.
+    legacy  - archivo .lock creado de forma exclusiva + polling (Windows);
+              un lock compartido se trata como exclusivo
+    auto    - kernel si está disponible, si no legacy (default)
+
 Autor: FreakingJSON-PA Framework
 Versión: 1.0.0
 """
@@ -44,13 +67,44 @@ import atexit
 import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 
+sys.path.insert(0, str(Path(__file__).parent))
+from lock_stats import get_lock_stats
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 # Detección de plataforma
 IS_WINDOWS = os.name == "nt"
 IS_POSIX = os.name == "posix"
+KERNEL_LOCKS_SUPPORTED = fcntl is not None and hasattr(fcntl, "flock")
+
+PROC_LOCKS = Path("/proc/locks")
+
+
+def _proc_flocked(stat: os.stat_result) -> Optional[bool]:
+    """
+    True si /proc/locks lista un flock sobre el inodo de ``stat``.
+
+    Retorna None si /proc/locks no existe o no se puede leer.
+    """
+    device = f"{os.major(stat.st_dev):02x}:{os.minor(stat.st_dev):02x}:{stat.st_ino}"
+    try:
+        with open(PROC_LOCKS, "r") as f:
+            for line in f:
+                fields = line.split()
+                # "1: FLOCK ADVISORY WRITE <pid> <maj>:<min>:<inodo> ..."; las
+                # líneas "->" son procesos esperando, no dueños
+                if len(fields) > 5 and fields[1] == "FLOCK" and fields[5] == device:
+                    return True
+    except OSError:
+        return None
+    return False
 
 
 @dataclass
@@ -75,26 +129,59 @@ class FileLock:
     """
     Implementación cross-platform de file locking.
 
-    Usa archivo .lock con metadata JSON para máxima compatibilidad.
+    Usa archivo .lock con metadata JSON del dueño. En POSIX la exclusión
+    la da ``flock`` (backend ``kernel``); en Windows, la creación
+    exclusiva del archivo más polling (backend ``legacy``).
     Soporta timeout, auto-release, y detección de procesos muertos.
+
+    Cada adquisición registra tiempo de espera, tiempo retenido, timeouts
+    y locks huérfanos rotos en ``lock_stats`` (ver ``lock_stats.py``).
+
+    Con el backend kernel el archivo .lock nunca se borra: borrarlo
+    mientras otro proceso espera sobre el mismo inode rompería la
+    exclusión. Al liberar solo se vacía la metadata.
     """
 
     DEFAULT_TIMEOUT = 300.0  # 5 minutos
     DEFAULT_POLL_INTERVAL = 0.1  # 100ms
+    KERNEL_BACKOFF_MIN = 0.001  # primer reintento de flock no bloqueante
+    KERNEL_BACKOFF_MAX = 0.01  # tope del backoff (latencia de traspaso)
     LOCK_EXTENSION = ".lock"
-
-    def __init__(self, resource_path: str, instance_id: Optional[str] = None):
+    BACKENDS = ("auto", "kernel", "legacy")
+
+    def __init__(
+        self,
+        resource_path: str,
+        instance_id: Optional[str] = None,
+        backend: str = "auto",
+        lock_dir: Optional[Path] = None,
+    ):
         """
         Args:
             resource_path: Ruta al archivo a lockear
             instance_id: ID único de la instancia CLI (auto-generado si no se provee)
+            backend: "auto", "kernel" (flock, solo POSIX) o "legacy"
+            lock_dir: Carpeta del archivo .lock (default: sessions/.locks del
+                repo actual). Para recursos fuera del repo (ej. ~/.pa-framework)
+                todos los procesos deben usar la misma.
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend de lock desconocido: {backend}")
+        if backend == "auto":
+            backend = "kernel" if KERNEL_LOCKS_SUPPORTED else "legacy"
+        elif backend == "kernel" and not KERNEL_LOCKS_SUPPORTED:
+            raise ValueError("El backend kernel requiere fcntl.flock (POSIX)")
+
         self.resource_path = Path(resource_path).resolve()
-        self.lock_path = self._get_lock_path()
+        self.lock_path = self._get_lock_path(lock_dir)
         self.instance_id = instance_id or self._generate_instance_id()
+        self.backend = backend
         self.pid = os.getpid()
         self._owned = False
         self._lock_info: Optional[LockInfo] = None
+        self._fd: Optional[int] = None  # descriptor con el flock tomado (kernel)
+        self.shared = False  # modo del lock poseído (solo backend kernel)
+        self._acquired_at = 0.0
 
         # Auto-release al salir
         atexit.register(self._cleanup_at_exit)
@@ -105,10 +192,10 @@ class FileLock:
 
         return f"cli-{uuid.uuid4().hex[:8]}"
 
-    def _get_lock_path(self) -> Path:
+    def _get_lock_path(self, lock_dir: Optional[Path] = None) -> Path:
         """Obtiene la ruta del archivo de lock"""
-        # Locks se almacenan en sessions/.locks/
-        base_dir = Path("core/.context/sessions/.locks")
+        # Locks se almacenan en sessions/.locks/ salvo que se indique otra carpeta
+        base_dir = Path(lock_dir) if lock_dir else Path("core/.context/sessions/.locks")
         base_dir.mkdir(parents=True, exist_ok=True)
 
         # Nombre del lock basado en el recurso
@@ -117,6 +204,9 @@ class FileLock:
 
     def _is_lock_valid(self) -> bool:
         """Verifica si un lock existente es válido (proceso vivo + no expirado)"""
+        if self.backend == "kernel":
+            return self._owned or self._is_kernel_locked()
+
         if not self.lock_path.exists():
             return False
 
@@ -132,18 +222,24 @@ class FileLock:
 
             if datetime.now() > expiration:
                 # Lock expirado, limpiar
-                self._break_lock()
+                self._break_stale_lock()
                 return False
 
             # Verificar si el proceso sigue vivo
             if IS_WINDOWS:
-                return self._is_process_alive_windows(lock_info.pid)
+                alive = self._is_process_alive_windows(lock_info.pid)
             else:
-                return self._is_process_alive_posix(lock_info.pid)
+                alive = self._is_process_alive_posix(lock_info.pid)
+            if not alive:
+                # Dueño muerto sin liberar: limpiar para poder crear el nuestro
+                self._break_stale_lock()
+            return alive
 
-        except (json.JSONDecodeError, KeyError, FileNotFoundError):
+        except (json.JSONDecodeError, KeyError, TypeError):
             # Lock corrupto, limpiar
-            self._break_lock()
+            self._break_stale_lock()
+            return False
+        except FileNotFoundError:
             return False
 
     def _is_process_alive_windows(self, pid: int) -> bool:
@@ -170,63 +266,254 @@ class FileLock:
 
     def _break_lock(self):
         """Fuerza la eliminación de un lock (uso interno)"""
+        if self.backend == "kernel":
+            # Un flock ajeno no se puede romper; solo se limpia la metadata
+            try:
+                with open(self.lock_path, "r+") as f:
+                    f.truncate(0)
+            except OSError:
+                pass
+            return
+
         try:
             if self.lock_path.exists():
                 self.lock_path.unlink()
         except OSError:
             pass
 
-    def acquire(self, timeout: float = DEFAULT_TIMEOUT, blocking: bool = True) -> bool:
+    def _break_stale_lock(self):
+        self._break_lock()
+        get_lock_stats().record_stale_break(self.resource_name)
+
+    @property
+    def resource_name(self) -> str:
+        """Nombre del recurso para métricas (nombre del archivo de lock)"""
+        return self.lock_path.name[: -len(self.LOCK_EXTENSION)]
+
+    def _new_lock_info(self, timeout: Optional[float]) -> LockInfo:
+        return LockInfo(
+            instance_id=self.instance_id,
+            pid=self.pid,
+            timestamp=datetime.now().isoformat(),
+            # Vigencia del lock legacy: sin timeout de espera, la default
+            timeout=self.DEFAULT_TIMEOUT if timeout is None else timeout,
+            resource=str(self.resource_path),
+        )
+
+    # ------------------------------------------------------------------
+    # Backend kernel (flock)
+    # ------------------------------------------------------------------
+
+    def _open_lock_fd(self) -> int:
+        return os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _is_kernel_locked(self) -> bool:
+        """
+        True si otro descriptor tiene el flock tomado.
+
+        En Linux se busca el inodo en /proc/locks, sin tomar el lock (una
+        sonda con flock haría fallar un acquire no bloqueante concurrente).
+        Sin /proc, la sonda es un LOCK_SH no bloqueante: solo detecta
+        escritores y nunca choca con otros lectores.
+        """
+        try:
+            stat = os.stat(self.lock_path)
+        except OSError:
+            return False
+        held = _proc_flocked(stat)
+        if held is not None:
+            return held
+
+        try:
+            fd = self._open_lock_fd()
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            return False
+        finally:
+            os.close(fd)
+
+    def _acquire_kernel(
+        self, timeout: Optional[float], blocking: bool, shared: bool = False
+    ) -> Optional[int]:
+        """
+        Toma el flock (compartido o exclusivo). Retorna el descriptor o
+        None si no se pudo.
+
+        El caso sin contención es un solo flock no bloqueante. Sin timeout
+        (None) se espera con flock bloqueante. Con timeout se reintenta con
+        backoff exponencial (de ``KERNEL_BACKOFF_MIN`` a
+        ``KERNEL_BACKOFF_MAX``): un flock bloqueante no se puede cancelar,
+        y dejarlo en un thread abandonado tomaría el lock sin dueño cuando
+        se liberara.
+        """
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        fd = self._open_lock_fd()
+        if blocking and timeout is None:
+            try:
+                fcntl.flock(fd, operation)
+            except BaseException:
+                os.close(fd)
+                raise
+            return fd
+
+        deadline = time.monotonic() + (timeout if blocking else 0)
+        delay = self.KERNEL_BACKOFF_MIN
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                os.close(fd)
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.KERNEL_BACKOFF_MAX)
+
+    def _write_owner(self, fd: int):
+        """Escribe la metadata JSON del dueño en el archivo de lock"""
+        payload = json.dumps(self._lock_info.to_dict(), indent=2).encode("utf-8")
+        try:
+            # Metadata previa = un dueño murió sin liberar (el kernel soltó el flock)
+            if os.pread(fd, 1, 0):
+                get_lock_stats().record_stale_break(self.resource_name)
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, payload, 0)
+        except OSError:
+            pass  # La metadata es informativa; el lock ya es nuestro
+
+    def _release_kernel(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        if not self.shared:
+            try:
+                os.ftruncate(fd, 0)
+            except OSError:
+                pass
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Backend legacy (archivo exclusivo + polling)
+    # ------------------------------------------------------------------
+
+    def _try_create_legacy(self) -> bool:
+        """
+        Crea el archivo de lock con la metadata ya escrita.
+
+        Se escribe a un temp único y se publica con ``os.link``, que falla
+        si el lock ya existe (a diferencia de ``rename``, que lo pisaría).
+        """
+        temp_lock = self.lock_path.with_name(
+            f"{self.lock_path.name}.{self.pid}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(temp_lock, "w") as f:
+                json.dump(self._lock_info.to_dict(), f, indent=2)
+            os.link(temp_lock, self.lock_path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            try:
+                temp_lock.unlink()
+            except OSError:
+                pass
+
+    def acquire(
+        self,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        blocking: bool = True,
+        shared: bool = False,
+    ) -> bool:
         """
         Intenta adquirir el lock.
 
         Args:
-            timeout: Tiempo máximo de espera (segundos)
+            timeout: Tiempo máximo de espera (segundos); None espera sin
+                límite (backend kernel: bloquea en el kernel)
             blocking: Si False, retorna inmediatamente si no puede lockear
+            shared: True para lock de lectura (compatible con otros lectores);
+                el backend legacy lo trata como exclusivo
 
         Returns:
-            True si el lock fue adquirido, False si no
+            True si el lock fue adquirido, False si no. Si ya se poseía,
+            retorna True sin cambiar el modo.
         """
         if self._owned:
             return True  # Ya tenemos el lock
 
+        start = time.perf_counter()
+        acquired = self._acquire(timeout, blocking, shared)
+        now = time.perf_counter()
+        if acquired:
+            self._acquired_at = now
+            get_lock_stats().record_acquire(self.resource_name, now - start)
+        elif blocking:
+            get_lock_stats().record_timeout(self.resource_name, now - start)
+        return acquired
+
+    def _acquire(self, timeout: Optional[float], blocking: bool, shared: bool) -> bool:
+        if self.backend == "kernel":
+            fd = self._acquire_kernel(timeout, blocking, shared)
+            if fd is None:
+                return False
+            self._fd = fd
+            self._lock_info = self._new_lock_info(timeout)
+            self._owned = True
+            self.shared = shared
+            # Los lectores son anónimos: solo el escritor deja metadata
+            if not shared:
+                self._write_owner(fd)
+            return True
+
         start_time = time.time()
 
         while True:
             # Verificar si podemos adquirir el lock
             if not self._is_lock_valid():
-                # Intentar crear nuestro lock
+                # Intentar crear nuestro lock (creación exclusiva)
                 try:
-                    self._lock_info = LockInfo(
-                        instance_id=self.instance_id,
-                        pid=self.pid,
-                        timestamp=datetime.now().isoformat(),
-                        timeout=timeout,
-                        resource=str(self.resource_path),
-                    )
-
-                    # Write atomically
-                    temp_lock = self.lock_path.with_suffix(".tmp")
-                    with open(temp_lock, "w") as f:
-                        json.dump(self._lock_info.to_dict(), f, indent=2)
-
-                    # Atomic rename
-                    temp_lock.rename(self.lock_path)
-
-                    self._owned = True
-                    return True
+                    self._lock_info = self._new_lock_info(timeout)
+                    if self._try_create_legacy():
+                        self._owned = True
+                        return True
 
                 except (OSError, IOError):
                     # Alguien más lo tomó justo antes, reintentar
                     pass
 
             # Verificar timeout
-            if not blocking or (time.time() - start_time) >= timeout:
+            if not blocking or (
+                timeout is not None and (time.time() - start_time) >= timeout
+            ):
                 return False
 
             # Esperar antes de reintentar
             time.sleep(self.DEFAULT_POLL_INTERVAL)
 
+    def acquire_shared(
+        self, timeout: float = DEFAULT_TIMEOUT, blocking: bool = True
+    ) -> bool:
+        """Adquiere el lock en modo lectura (varios lectores a la vez)"""
+        return self.acquire(timeout=timeout, blocking=blocking, shared=True)
+
+    def acquire_exclusive(
+        self, timeout: float = DEFAULT_TIMEOUT, blocking: bool = True
+    ) -> bool:
+        """Adquiere el lock en modo escritura (exclusivo)"""
+        return self.acquire(timeout=timeout, blocking=blocking, shared=False)
+
     def release(self) -> bool:
         """
         Libera el lock si lo poseemos.
@@ -237,6 +524,15 @@ class FileLock:
         if not self._owned:
             return False
 
+        held = time.perf_counter() - self._acquired_at
+        if self.backend == "kernel":
+            get_lock_stats().record_release(self.resource_name, held)
+            self._release_kernel()
+            self._owned = False
+            self.shared = False
+            self._lock_info = None
+            return True
+
         try:
             if self.lock_path.exists():
                 with open(self.lock_path, "r") as f:
@@ -246,6 +542,7 @@ class FileLock:
 
                 # Solo liberar si somos los dueños
                 if lock_info.instance_id == self.instance_id:
+                    get_lock_stats().record_release(self.resource_name, held)
                     self.lock_path.unlink()
                     self._owned = False
                     self._lock_info = None
@@ -271,11 +568,15 @@ class FileLock:
         if not self.lock_path.exists():
             return None
 
+        # Con flock, metadata sin lock tomado es de un dueño que ya murió
+        if self.backend == "kernel" and not self._is_lock_valid():
+            return None
+
         try:
             with open(self.lock_path, "r") as f:
                 data = json.load(f)
             return LockInfo.from_dict(data)
-        except (json.JSONDecodeError, FileNotFoundError):
+        except (json.JSONDecodeError, FileNotFoundError, TypeError):
             return None
 
     def is_locked(self) -> bool:
@@ -342,7 +643,10 @@ def release_lock(lock: FileLock) -> bool:
 
 @contextmanager
 def lock_resource(
-    resource_path: str, timeout: float = 300.0, instance_id: Optional[str] = None
+    resource_path: str,
+    timeout: float = 300.0,
+    instance_id: Optional[str] = None,
+    shared: bool = False,
 ):
     """
     Context manager para lockear un recurso.
@@ -351,9 +655,13 @@ def lock_resource(
         with lock_resource("archivo.txt", timeout=5.0) as lock:
             # código seguro
             pass
+
+        with lock_resource("MASTER.md", shared=True):
+            # solo lectura, concurrente con otros lectores
+            pass
     """
     lock = FileLock(resource_path, instance_id)
-    if not lock.acquire(timeout=timeout):
+    if not lock.acquire(timeout=timeout, shared=shared):
         owner = lock.get_owner()
         owner_info = f" (owned by {owner.instance_id})" if owner else ""
         raise LockTimeoutError(
@@ -366,6 +674,84 @@ def lock_resource(
         lock.release()
 
 
+def acquire_many(
+    resource_paths: Iterable[str],
+    timeout: float = 300.0,
+    instance_id: Optional[str] = None,
+    shared: Iterable[str] = (),
+) -> List[FileLock]:
+    """
+    Adquiere locks sobre varios recursos en orden canónico (por ruta del
+    archivo de lock), así dos instancias que piden el mismo conjunto en
+    distinto orden no se bloquean mutuamente.
+
+    Args:
+        resource_paths: Recursos a lockear
+        timeout: Timeout total en segundos (para todo el conjunto)
+        instance_id: ID de instancia (opcional)
+        shared: Subconjunto de recursos a lockear en modo lectura
+
+    Returns:
+        Lista de FileLock adquiridos (en orden canónico)
+
+    Raises:
+        LockTimeoutError: Si algún recurso no se pudo lockear (se liberan
+            los ya adquiridos)
+    """
+    shared_paths = {Path(p).resolve() for p in shared}
+
+    # Un lock por archivo .lock; si se pide en ambos modos, gana exclusivo
+    wanted: Dict[Path, FileLock] = {}
+    modes: Dict[Path, bool] = {}
+    for resource in resource_paths:
+        lock = FileLock(resource, instance_id)
+        is_shared = lock.resource_path in shared_paths
+        if lock.lock_path in wanted:
+            modes[lock.lock_path] = modes[lock.lock_path] and is_shared
+            continue
+        wanted[lock.lock_path] = lock
+        modes[lock.lock_path] = is_shared
+
+    deadline = None if timeout is None else time.time() + timeout
+    acquired: List[FileLock] = []
+    for lock_path in sorted(wanted, key=str):
+        lock = wanted[lock_path]
+        remaining = None if deadline is None else max(0.0, deadline - time.time())
+        if not lock.acquire(timeout=remaining, shared=modes[lock_path]):
+            for held in reversed(acquired):
+                held.release()
+            owner = lock.get_owner()
+            owner_info = f" (owned by {owner.instance_id})" if owner else ""
+            raise LockTimeoutError(
+                f"Timeout adquiriendo lock para {lock.resource_path}{owner_info}"
+            )
+        acquired.append(lock)
+    return acquired
+
+
+@contextmanager
+def lock_many(
+    resource_paths: Iterable[str],
+    timeout: float = 300.0,
+    instance_id: Optional[str] = None,
+    shared: Iterable[str] = (),
+):
+    """
+    Context manager para lockear varios recursos (ver ``acquire_many``).
+
+    Uso:
+        with lock_many(["MASTER.md", "recordatorios.md"], shared=["MASTER.md"]):
+            # leer MASTER.md, editar recordatorios.md
+            pass
+    """
+    locks = acquire_many(resource_paths, timeout, instance_id, shared)
+    try:
+        yield locks
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+
 # CLI para testing
 if __name__ == "__main__":
     import sys
@@ -377,6 +763,10 @@ if __name__ == "__main__":
         "--timeout", "-t", type=float, default=5.0, help="Timeout en segundos"
     )
     parser.add_argument("--instance-id", "-i", help="ID de instancia")
+    parser.add_argument(
+        "--backend", "-b", choices=FileLock.BACKENDS, default="auto",
+        help="Backend de locking",
+    )
     parser.add_argument(
         "--action",
         "-a",
@@ -387,7 +777,7 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    lock = FileLock(args.resource, args.instance_id)
+    lock = FileLock(args.resource, args.instance_id, backend=args.backend)
 
     if args.action == "acquire":
         print(f"Intentando lockear {args.resource} (timeout: {args.timeout}s)...")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+instance_registry.py - Registro materializado de instancias CLI activas
+Para FreakingJSON-PA Multi-CLI Framework
+
+Tabla SQLite pequeña (una fila por instancia) que se actualiza en cada
+heartbeat. Consultar las instancias activas cuesta O(instancias activas)
+en vez de re-leer el log de eventos o un archivo por instancia. Las
+entradas sin heartbeat dentro del TTL se consideran expiradas y se
+purgan en las escrituras.
+
+``sweep()`` hace la limpieza de instancias muertas en una sola pasada:
+un listado de /proc (Linux) para todas las PIDs, con ``os.kill(pid, 0)``
+como fallback. Entre todas las instancias se ejecuta como mucho una vez
+por intervalo (la marca de tiempo vive en la misma base).
+
+Uso:
+    from instance_registry import InstanceRegistry
+
+    registry = InstanceRegistry()
+    registry.heartbeat("cli-001", model="GPT-4", pid=os.getpid())
+    active = registry.active(ttl_seconds=60)
+    registry.remove("cli-001")
+    dead = registry.sweep()  # instancias con proceso muerto eliminadas
+
+Autor: FreakingJSON-PA Framework
+Versión: 1.0.0
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def live_pids(pids: Iterable[int]) -> Set[int]:
+    """
+    Retorna el subconjunto de ``pids`` con proceso vivo.
+
+    En Linux basta un listado de /proc para todas; en otros sistemas se
+    prueba cada PID (``os.kill(pid, 0)`` / OpenProcess en Windows).
+    """
+    wanted = {int(pid) for pid in pids if pid}
+    if not wanted:
+        return set()
+
+    proc = Path("/proc")
+    if proc.is_dir() and (proc / "self").exists():
+        try:
+            running = {int(name) for name in os.listdir(proc) if name.isdigit()}
+            return wanted & running
+        except OSError:
+            pass
+
+    return {pid for pid in wanted if _pid_alive(pid)}
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":  # Windows
+        try:
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(1, False, pid)
+            if handle == 0:
+                return False
+            kernel32.CloseHandle(handle)
+            return True
+        except Exception:
+            return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except PermissionError:
+        return True  # Existe, pero es de otro usuario
+    except (OSError, ProcessLookupError):
+        return False
+
+
+class InstanceRegistry:
+    """
+    Registro de instancias respaldado por SQLite (modo WAL).
+
+    Es seguro entre procesos (SQLite serializa escrituras) y entre threads
+    del mismo proceso (conexión compartida protegida por un lock).
+    """
+
+    DEFAULT_TTL = 120.0  # segundos sin heartbeat = expirada
+    PURGE_INTERVAL = 30.0  # purga de expiradas como máximo cada 30s
+    HEARTBEAT_COALESCE = 5.0  # heartbeats sin cambios dentro de 5s no escriben
+    SWEEP_INTERVAL = 60.0  # barrido de procesos muertos (global) cada minuto
+    _NO_FIELDS = json.dumps([None, None, None, {}])
+    DB_FILE = "registry.db"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS instances (
+            instance_id    TEXT PRIMARY KEY,
+            pid            INTEGER,
+            model          TEXT,
+            start_time     TEXT,
+            last_heartbeat REAL NOT NULL,
+            status         TEXT NOT NULL DEFAULT 'active',
+            extra          TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_instances_heartbeat
+            ON instances(last_heartbeat);
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL):
+        """
+        Args:
+            db_path: Ruta a la base SQLite (default: sessions/.instances/registry.db)
+            ttl_seconds: Segundos sin heartbeat para expirar una entrada
+        """
+        if db_path is None:
+            base_dir = Path("core/.context/sessions/.instances")
+            base_dir.mkdir(parents=True, exist_ok=True)
+            db_path = str(base_dir / self.DB_FILE)
+
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._last_beats: Dict[str, Tuple[float, str]] = {}
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=5.0, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self._SCHEMA)
+            self._conn.commit()
+
+    def heartbeat(
+        self,
+        instance_id: str,
+        model: Optional[str] = None,
+        pid: Optional[int] = None,
+        start_time: Optional[str] = None,
+        **extra: Any,
+    ):
+        """
+        Registra/actualiza una instancia como activa (upsert).
+
+        Los campos en None conservan el valor previo; ``extra`` se mezcla
+        con la metadata existente (ej. open_files). Un heartbeat sin
+        cambios a menos de HEARTBEAT_COALESCE del anterior (desde esta
+        conexión) no escribe.
+        """
+        now = time.time()
+        fields = json.dumps([model, pid, start_time, extra], sort_keys=True, default=str)
+        last = self._last_beats.get(instance_id)
+        if (
+            last is not None
+            and now - last[0] < self.HEARTBEAT_COALESCE
+            and fields in (last[1], self._NO_FIELDS)
+        ):
+            return
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM instances WHERE instance_id = ?", (instance_id,)
+            ).fetchone()
+            merged = json.loads(row["extra"]) if row else {}
+            merged.update(extra)
+
+            if row is not None:
+                pid = row["pid"] if pid is None else pid
+                model = row["model"] if model is None else model
+                start_time = start_time or row["start_time"]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO instances "
+                "(instance_id, pid, model, start_time, last_heartbeat, status, extra) "
+                "VALUES (?, ?, ?, ?, ?, 'active', ?)",
+                (
+                    instance_id,
+                    pid,
+                    model,
+                    start_time or datetime.fromtimestamp(now).isoformat(),
+                    now,
+                    json.dumps(merged, ensure_ascii=False),
+                ),
+            )
+            self._purge_expired_locked(now)
+            self._conn.commit()
+            self._last_beats[instance_id] = (now, fields)
+
+    def remove(self, instance_id: str):
+        """Elimina una instancia del registro (salida limpia)"""
+        self._last_beats.pop(instance_id, None)
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM instances WHERE instance_id = ?", (instance_id,)
+            )
+            self._conn.commit()
+
+    def active(self, ttl_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Lista las instancias con heartbeat dentro del TTL.
+
+        Returns:
+            Lista de dicts (instance_id, pid, model, start_time,
+            last_heartbeat ISO, status + metadata extra)
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        cutoff = time.time() - ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM instances WHERE last_heartbeat >= ? "
+                "ORDER BY instance_id",
+                (cutoff,),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get(self, instance_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene la entrada de una instancia (expirada o no)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM instances WHERE instance_id = ?", (instance_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def purge_expired(self) -> int:
+        """Elimina las entradas expiradas. Retorna cuántas se eliminaron"""
+        with self._lock:
+            removed = self._purge_expired_locked(time.time(), force=True)
+            self._conn.commit()
+        return removed
+
+    def sweep(self, min_interval: Optional[float] = None) -> List[str]:
+        """
+        Elimina en una sola pasada las instancias cuyo proceso ya no existe
+        y las expiradas por TTL.
+
+        Args:
+            min_interval: Si se indica, no barre si otra conexión (de
+                cualquier proceso) barrió hace menos de estos segundos
+
+        Returns:
+            IDs de las instancias eliminadas
+        """
+        now = time.time()
+        with self._lock:
+            if min_interval is not None:
+                # Reclamar el turno de barrido de forma atómica
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES ('last_sweep', 0)"
+                )
+                claimed = self._conn.execute(
+                    "UPDATE meta SET value = ? WHERE key = 'last_sweep' AND value <= ?",
+                    (now, now - min_interval),
+                ).rowcount
+                self._conn.commit()
+                if not claimed:
+                    return []
+
+            rows = self._conn.execute(
+                "SELECT instance_id, pid, last_heartbeat FROM instances"
+            ).fetchall()
+
+        alive = live_pids(row["pid"] for row in rows)
+        cutoff = now - self.ttl_seconds
+        dead = [
+            row["instance_id"]
+            for row in rows
+            if (row["pid"] and row["pid"] not in alive) or row["last_heartbeat"] < cutoff
+        ]
+        if not dead:
+            return []
+
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM instances WHERE instance_id = ?", [(i,) for i in dead]
+            )
+            self._conn.commit()
+        for instance_id in dead:
+            self._last_beats.pop(instance_id, None)
+        return dead
+
+    def _purge_expired_locked(self, now: float, force: bool = False) -> int:
+        """Purga expiradas (requiere el lock tomado); acotado por PURGE_INTERVAL"""
+        if not force and now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+        cursor = self._conn.execute(
+            "DELETE FROM instances WHERE last_heartbeat < ?", (now - self.ttl_seconds,)
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        data = json.loads(row["extra"] or "{}")
+        data.update(
+            {
+                "instance_id": row["instance_id"],
+                "pid": row["pid"],
+                "model": row["model"] or "unknown",
+                "start_time": row["start_time"],
+                "last_heartbeat": datetime.fromtimestamp(
+                    row["last_heartbeat"]
+                ).isoformat(),
+                "status": row["status"],
+            }
+        )
+        return data
+
+    def close(self):
+        """Cierra la conexión a la base"""
+        with self._lock:
+            self._conn.close()
+
+
+# CLI para testing
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Instance Registry Utility")
+    parser.add_argument(
+        "--action", "-a", choices=["list", "purge", "sweep"], default="list"
+    )
+    parser.add_argument(
+        "--ttl", "-t", type=float, default=InstanceRegistry.DEFAULT_TTL,
+        help="TTL en segundos",
+    )
+    args = parser.parse_args()
+
+    registry = InstanceRegistry(ttl_seconds=args.ttl)
+
+    if args.action == "list":
+        print(json.dumps(registry.active(), indent=2, ensure_ascii=False))
+    elif args.action == "purge":
+        print(f"[OK] {registry.purge_expired()} entradas expiradas eliminadas")
+    elif args.action == "sweep":
+        removed = registry.sweep()
+        print(f"[OK] {len(removed)} instancias muertas eliminadas")
+        for instance_id in removed:
+            print(f"  - {instance_id}")
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lock_stats.py - Métricas de contención de locks (FileLock)
+Para FreakingJSON-PA Multi-CLI Framework
+
+Cada proceso acumula, por recurso, el tiempo de espera para adquirir,
+el tiempo que se mantuvo el lock, los timeouts y los locks huérfanos
+rotos. Los tiempos van a histogramas logarítmicos (buckets potencia de
+2 en microsegundos): registrar cuesta O(1) y no guarda muestras.
+
+Cada proceso vuelca su snapshot a ``sessions/.locks/stats/<pid>.json``
+(como máximo cada FLUSH_INTERVAL y al salir); el reporte mezcla los
+archivos de todos los procesos. Al generar el reporte, los archivos de
+procesos muertos se acumulan en ``stats/cumulative.json`` y se borran,
+así el directorio no crece con cada sesión.
+
+Uso:
+    python lock_stats.py                 # Tabla con los locks más calientes
+    python lock_stats.py --json          # Reporte completo en JSON
+    python lock_stats.py --action reset  # Borrar estadísticas
+
+Autor: FreakingJSON-PA Framework
+Versión: 1.0.0
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from instance_registry import live_pids
+
+STATS_DIR = Path("core/.context/sessions/.locks/stats")
+CUMULATIVE_FILE = "cumulative.json"
+
+
+class LogHistogram:
+    """
+    Histograma con buckets potencia de 2 (en microsegundos).
+
+    El bucket ``i`` cuenta valores en [2^(i-1), 2^i) µs; el bucket 0
+    cuenta valores menores a 1 µs.
+    """
+
+    BUCKETS = 40  # 2^39 µs ≈ 6 días
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0  # segundos
+        self.max = 0.0  # segundos
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1_000_000)
+        index = min(micros.bit_length(), self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct: float) -> float:
+        """Cota superior (en segundos) del bucket que contiene el percentil"""
+        if not self.count:
+            return 0.0
+        target = pct * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min((1 << index) / 1_000_000, self.max)
+        return self.max
+
+    def merge(self, other: "LogHistogram"):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self) -> Dict[str, float]:
+        """Resumen en milisegundos"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Solo buckets no vacíos: el JSON queda chico
+        return {
+            "buckets": {str(i): c for i, c in enumerate(self.counts) if c},
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogHistogram":
+        hist = cls()
+        for index, count in data.get("buckets", {}).items():
+            hist.counts[min(int(index), cls.BUCKETS - 1)] += count
+        hist.count = data.get("count", 0)
+        hist.total = data.get("total", 0.0)
+        hist.max = data.get("max", 0.0)
+        return hist
+
+
+class ResourceStats:
+    """Métricas de un recurso lockeado"""
+
+    __slots__ = ("acquired", "timeouts", "stale_breaks", "wait", "hold")
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.stale_breaks = 0
+        self.wait = LogHistogram()
+        self.hold = LogHistogram()
+
+    def merge(self, other: "ResourceStats"):
+        self.acquired += other.acquired
+        self.timeouts += other.timeouts
+        self.stale_breaks += other.stale_breaks
+        self.wait.merge(other.wait)
+        self.hold.merge(other.hold)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "stale_breaks": self.stale_breaks,
+            "wait": self.wait.summary(),
+            "hold": self.hold.summary(),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "stale_breaks": self.stale_breaks,
+            "wait": self.wait.to_dict(),
+            "hold": self.hold.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResourceStats":
+        stats = cls()
+        stats.acquired = data.get("acquired", 0)
+        stats.timeouts = data.get("timeouts", 0)
+        stats.stale_breaks = data.get("stale_breaks", 0)
+        stats.wait = LogHistogram.from_dict(data.get("wait", {}))
+        stats.hold = LogHistogram.from_dict(data.get("hold", {}))
+        return stats
+
+
+class LockStats:
+    """
+    Colector de métricas del proceso (thread-safe).
+
+    Usar ``get_lock_stats()`` para obtener la instancia del proceso.
+    """
+
+    FLUSH_INTERVAL = 5.0  # segundos entre volcados a disco
+
+    def __init__(self, stats_dir: Optional[Path] = None):
+        # Ruta absoluta: el volcado al salir no depende del cwd de ese momento
+        self.stats_dir = (Path(stats_dir) if stats_dir else STATS_DIR).resolve()
+        self._resources: Dict[str, ResourceStats] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def _resource(self, resource: str) -> ResourceStats:
+        stats = self._resources.get(resource)
+        if stats is None:
+            stats = self._resources[resource] = ResourceStats()
+        return stats
+
+    def record_acquire(self, resource: str, wait_seconds: float):
+        with self._lock:
+            stats = self._resource(resource)
+            stats.acquired += 1
+            stats.wait.record(wait_seconds)
+            self._dirty = True
+        self._maybe_flush()
+
+    def record_timeout(self, resource: str, wait_seconds: float):
+        with self._lock:
+            stats = self._resource(resource)
+            stats.timeouts += 1
+            stats.wait.record(wait_seconds)
+            self._dirty = True
+        self._maybe_flush()
+
+    def record_release(self, resource: str, hold_seconds: float):
+        with self._lock:
+            self._resource(resource).hold.record(hold_seconds)
+            self._dirty = True
+        self._maybe_flush()
+
+    def record_stale_break(self, resource: str):
+        with self._lock:
+            self._resource(resource).stale_breaks += 1
+            self._dirty = True
+        self._maybe_flush()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Resumen por recurso de este proceso"""
+        with self._lock:
+            return {name: s.summary() for name, s in sorted(self._resources.items())}
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Vuelca las métricas del proceso a ``stats/<pid>.json``"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._last_flush = time.monotonic()
+            self._dirty = False
+            payload = {
+                "pid": os.getpid(),
+                "updated": datetime.now().isoformat(),
+                "resources": {n: s.to_dict() for n, s in self._resources.items()},
+            }
+        try:
+            self.stats_dir.mkdir(parents=True, exist_ok=True)
+            path = self.stats_dir / f"{os.getpid()}.json"
+            temp = path.with_suffix(".tmp")
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(temp, path)
+        except OSError:
+            pass  # Las métricas nunca deben romper el locking
+
+    def reset(self):
+        with self._lock:
+            self._resources.clear()
+            self._dirty = False
+
+
+_process_stats: Optional[LockStats] = None
+_process_stats_lock = threading.Lock()
+
+
+def get_lock_stats() -> LockStats:
+    """Colector de métricas del proceso actual (se vuelca al salir)"""
+    global _process_stats
+    if _process_stats is None:
+        with _process_stats_lock:
+            if _process_stats is None:
+                _process_stats = LockStats()
+                atexit.register(_process_stats.flush)
+    return _process_stats
+
+
+def _read_resources(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("resources", {})
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+
+
+def fold_dead_stats(stats_dir: Optional[Path] = None) -> int:
+    """
+    Acumula en ``cumulative.json`` los archivos de procesos muertos y los borra.
+
+    Lo hace un solo proceso a la vez (flock sobre ``cumulative.lock``); si
+    otro ya está acumulando, no hace nada. Retorna cuántos se acumularon.
+    """
+    stats_dir = Path(stats_dir) if stats_dir else STATS_DIR
+    by_pid = {int(p.stem): p for p in stats_dir.glob("*.json") if p.stem.isdigit()}
+    alive = live_pids(by_pid)  # Un solo listado de procesos para todos los archivos
+    dead = [path for pid, path in by_pid.items() if pid not in alive]
+    if not dead:
+        return 0
+
+    try:
+        fd = os.open(stats_dir / "cumulative.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    except OSError:
+        return 0
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0
+
+        cumulative_path = stats_dir / CUMULATIVE_FILE
+        merged = {
+            name: ResourceStats.from_dict(raw)
+            for name, raw in (_read_resources(cumulative_path) or {}).items()
+        }
+        folded = []
+        for path in dead:
+            resources = _read_resources(path)
+            if resources is None:
+                continue  # Ya acumulado por otro proceso, o ilegible
+            for name, raw in resources.items():
+                merged.setdefault(name, ResourceStats()).merge(ResourceStats.from_dict(raw))
+            folded.append(path)
+        if not folded:
+            return 0
+
+        payload = {
+            "updated": datetime.now().isoformat(),
+            "resources": {n: s.to_dict() for n, s in merged.items()},
+        }
+        temp = cumulative_path.with_suffix(".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temp, cumulative_path)
+        for path in folded:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return len(folded)
+    except OSError:
+        return 0
+    finally:
+        os.close(fd)  # Cerrar el fd suelta el flock
+
+
+def load_report(stats_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Mezcla las métricas de todos los procesos.
+
+    Antes de leer, acumula los archivos de procesos muertos (ver
+    ``fold_dead_stats``).
+
+    Returns:
+        Dict recurso → resumen (acquired, timeouts, stale_breaks, wait, hold),
+        ordenado por tiempo total de espera (los locks más calientes primero)
+    """
+    stats_dir = Path(stats_dir) if stats_dir else STATS_DIR
+    fold_dead_stats(stats_dir)
+    merged: Dict[str, ResourceStats] = {}
+    for path in stats_dir.glob("*.json"):
+        resources = _read_resources(path)
+        if resources is None:
+            continue
+        for name, raw in resources.items():
+            merged.setdefault(name, ResourceStats()).merge(ResourceStats.from_dict(raw))
+
+    ranked = sorted(merged.items(), key=lambda item: item[1].wait.total, reverse=True)
+    return {name: stats.summary() for name, stats in ranked}
+
+
+def reset_stats(stats_dir: Optional[Path] = None) -> int:
+    """Borra los archivos de métricas (incluido el acumulado). Retorna cuántos se eliminaron"""
+    stats_dir = Path(stats_dir) if stats_dir else STATS_DIR
+    removed = 0
+    for path in stats_dir.glob("*.json"):
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    if _process_stats is not None:
+        _process_stats.reset()
+    return removed
+
+
+# CLI
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lock contention stats")
+    parser.add_argument(
+        "--action", "-a", choices=["report", "reset"], default="report"
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    parser.add_argument("--top", "-n", type=int, default=20, help="Recursos a mostrar")
+    args = parser.parse_args()
+
+    if args.action == "reset":
+        print(f"[OK] {reset_stats()} archivos de métricas eliminados")
+    else:
+        report = load_report()
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        elif not report:
+            print("Sin métricas de locks registradas")
+        else:
+            print(
+                f"{'recurso':<32} {'acq':>6} {'tmout':>6} {'stale':>6} "
+                f"{'wait p50':>9} {'wait p99':>9} {'hold p99':>9}"
+            )
+            for name, s in list(report.items())[: args.top]:
+                print(
+                    f"{name[:32]:<32} {s['acquired']:>6} {s['timeouts']:>6} "
+                    f"{s['stale_breaks']:>6} {s['wait']['p50_ms']:>8.1f}ms "
+                    f"{s['wait']['p99_ms']:>8.1f}ms {s['hold']['p99_ms']:>8.1f}ms"
+                )
@@ -22,6 +22,14 @@ Uso:
         # editar archivo
         pass
 
+    # Solo lectura (concurrente con otros lectores)
+    with coord.lock_file("MASTER.md", shared=True):
+        pass
+
+    # Varios archivos a la vez (orden canónico, sin deadlocks)
+    with coord.lock_files(["MASTER.md", "recordatorios.md"], shared=["MASTER.md"]):
+        pass
+
     coord.shutdown()  # Limpieza al salir
 
 Autor: FreakingJSON-PA Framework
@@ -49,14 +57,16 @@ import shutil
 import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any, Set
+from typing import Dict, List, Optional, Callable, Any, Set, Iterable, Union
 from dataclasses import dataclass, asdict
 from contextlib import contextmanager
 
 # Importar módulos del framework
 sys.path.insert(0, str(Path(__file__).parent))
-from file_lock import FileLock, lock_resource, LockTimeoutError
+from file_lock import FileLock, lock_resource, acquire_many, LockTimeoutError
+from lock_stats import get_lock_stats
 from event_bridge import EventBridge, EventType, Event
+from instance_registry import InstanceRegistry, live_pids
 
 
 def safe_print(message: str, file=None):
@@ -107,6 +117,7 @@ class MultiCLICoordinator:
     HEARTBEAT_INTERVAL = 30.0  # segundos
     STALE_THRESHOLD = 120.0  # 2 minutos sin heartbeat = stale
     CLEANUP_INTERVAL = 60.0  # Cleanup cada minuto
+    LOCK_STATS_INTERVAL = 300.0  # Publicar métricas de locks cada 5 minutos
 
     def __init__(
         self,
@@ -135,11 +146,14 @@ class MultiCLICoordinator:
         for d in [self.instances_dir, self.sync_dir, self.conflicts_dir]:
             d.mkdir(parents=True, exist_ok=True)
 
+        # Registro materializado de instancias (compartido con el event bridge)
+        self.registry = InstanceRegistry(ttl_seconds=self.STALE_THRESHOLD)
+
         # Event bridge
         self.event_bridge: Optional[EventBridge] = None
 
         # Locks activos
-        self._active_locks: Dict[str, FileLock] = {}
+        self._active_locks: Dict[int, FileLock] = {}
         self._locks_lock = threading.Lock()
 
         # Threads
@@ -183,11 +197,13 @@ class MultiCLICoordinator:
         if self._running:
             return True
 
-        # Crear archivo de instancia
+        # Registrar instancia
         self._register_instance()
 
         # Iniciar event bridge
-        self.event_bridge = EventBridge(self.instance_id, self.session_date)
+        self.event_bridge = EventBridge(
+            self.instance_id, self.session_date, registry=self.registry
+        )
 
         # Suscribirse a eventos relevantes
         self._setup_event_handlers()
@@ -234,17 +250,19 @@ class MultiCLICoordinator:
 
         # Liberar todos los locks
         with self._locks_lock:
-            for resource, lock in list(self._active_locks.items()):
+            for lock in list(self._active_locks.values()):
                 lock.release()
                 self._notify_user(
-                    "multi-cli", f"[UNLOCK] Lock liberado automáticamente: {resource}"
+                    "multi-cli",
+                    f"[UNLOCK] Lock liberado automáticamente: {lock.resource_path.name}",
                 )
+            self._active_locks.clear()
 
         # Detener event bridge
         if self.event_bridge:
             self.event_bridge.stop_listening()
 
-        # Eliminar archivo de instancia
+        # Quitar instancia del registro
         self._unregister_instance()
 
         # Esperar threads
@@ -257,57 +275,93 @@ class MultiCLICoordinator:
         self._notify_user("multi-cli", f"[BYE] Instancia {self.instance_id} desconectada")
 
     def _register_instance(self):
-        """Crea el archivo de registro de instancia"""
-        instance_info = InstanceInfo(
-            instance_id=self.instance_id,
-            pid=self.pid,
+        """Registra la instancia en el registro compartido"""
+        self.registry.heartbeat(
+            self.instance_id,
             model=self.model,
+            pid=self.pid,
             start_time=self.start_time.isoformat(),
-            last_heartbeat=datetime.now().isoformat(),
-            status="active",
             open_files=[],
         )
+        self._remove_legacy_instance_files()
 
-        instance_file = self.instances_dir / f"{self.instance_id}.json"
-        with open(instance_file, "w") as f:
-            json.dump(instance_info.to_dict(), f, indent=2)
+    def _remove_legacy_instance_files(self):
+        """
+        Migra los cli-*.json de versiones anteriores.
+
+        Solo borra los de procesos muertos o sin heartbeat hace más de
+        STALE_THRESHOLD; los de un CLI viejo que sigue vivo se importan al
+        registro (el archivo queda: ese CLI lo sigue reescribiendo).
+        """
+        now = datetime.now()
+        legacy = []
+        for instance_file in self.instances_dir.glob("cli-*.json"):
+            try:
+                with open(instance_file, "r") as f:
+                    data = json.load(f)
+                last_heartbeat = datetime.fromisoformat(data["last_heartbeat"])
+                pid = int(data["pid"])
+            except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+                # Corrupto o a medio escribir: decide la antigüedad del archivo
+                try:
+                    age = time.time() - instance_file.stat().st_mtime
+                except OSError:
+                    continue
+                data, pid = None, 0
+                last_heartbeat = now - timedelta(seconds=age)
+            legacy.append((instance_file, data, pid, last_heartbeat))
+
+        alive = live_pids(pid for _, _, pid, _ in legacy)
+        for instance_file, data, pid, last_heartbeat in legacy:
+            stale = (now - last_heartbeat).total_seconds() > self.STALE_THRESHOLD
+            if data is None and not stale:
+                continue
+            if data is not None and pid in alive and not stale:
+                try:
+                    self.registry.heartbeat(
+                        data.get("instance_id") or instance_file.stem,
+                        model=data.get("model"),
+                        pid=pid,
+                        start_time=data.get("start_time"),
+                        open_files=data.get("open_files") or [],
+                    )
+                except Exception as e:
+                    print(f"[Coordinator] Error importando {instance_file.name}: {e}")
+                continue
+            try:
+                instance_file.unlink()
+            except OSError:
+                pass
 
     def _unregister_instance(self):
-        """Elimina el archivo de registro de instancia"""
-        instance_file = self.instances_dir / f"{self.instance_id}.json"
+        """Quita la instancia del registro"""
         try:
-            if instance_file.exists():
-                instance_file.unlink()
-        except OSError:
+            self.registry.remove(self.instance_id)
+        except Exception:
             pass
 
     def _update_instance_info(self, **kwargs):
         """Actualiza información de la instancia"""
-        instance_file = self.instances_dir / f"{self.instance_id}.json"
-
         try:
-            if instance_file.exists():
-                with open(instance_file, "r") as f:
-                    data = json.load(f)
-
-                data.update(kwargs)
-                data["last_heartbeat"] = datetime.now().isoformat()
-
-                with open(instance_file, "w") as f:
-                    json.dump(data, f, indent=2)
-        except (OSError, json.JSONDecodeError):
-            pass
+            self.registry.heartbeat(self.instance_id, **kwargs)
+        except Exception as e:
+            print(f"[Coordinator] Error actualizando registro: {e}")
 
     def _heartbeat_loop(self):
         """Loop de heartbeat periódico"""
+        last_stats = time.monotonic()
         while self._running:
             try:
-                # Actualizar archivo de instancia
-                self._update_instance_info()
-
-                # Enviar evento de heartbeat
+                # Un solo heartbeat por tick: el bridge actualiza el registro
+                # y publica el evento
                 if self.event_bridge:
                     self.event_bridge.send_heartbeat(self.model)
+                else:
+                    self._update_instance_info()
+
+                if time.monotonic() - last_stats >= self.LOCK_STATS_INTERVAL:
+                    last_stats = time.monotonic()
+                    self.publish_lock_stats()
 
                 time.sleep(self.HEARTBEAT_INTERVAL)
 
@@ -325,67 +379,38 @@ class MultiCLICoordinator:
                 print(f"[Coordinator] Error en cleanup: {e}")
                 time.sleep(self.CLEANUP_INTERVAL)
 
-    def _cleanup_stale_instances(self):
-        """Elimina instancias que no han enviado heartbeat"""
-        now = datetime.now()
-
-        try:
-            for instance_file in self.instances_dir.glob("cli-*.json"):
-                try:
-                    with open(instance_file, "r") as f:
-                        data = json.load(f)
-
-                    instance_id = data.get("instance_id")
-
-                    # No limpiarnos a nosotros mismos
-                    if instance_id == self.instance_id:
-                        continue
+    def _cleanup_stale_instances(self, force: bool = False) -> List[str]:
+        """
+        Elimina instancias muertas (proceso inexistente o sin heartbeat).
 
-                    last_heartbeat = datetime.fromisoformat(
-                        data.get("last_heartbeat", "2000-01-01")
-                    )
+        Es un solo barrido sobre el registro; entre todas las instancias
+        corre como mucho una vez por CLEANUP_INTERVAL, así el costo no
+        crece con la cantidad de CLIs.
 
-                    if (now - last_heartbeat).total_seconds() > self.STALE_THRESHOLD:
-                        # Verificar si el proceso existe
-                        pid = data.get("pid")
-                        if pid and not self._is_process_alive(pid):
-                            # Proceso muerto, limpiar
-                            instance_file.unlink()
-                            self._notify_user(
-                                "multi-cli",
-                                f"[CLEANUP] Instancia muerta limpiada: {instance_id}",
-                            )
-
-                except (OSError, json.JSONDecodeError, ValueError):
-                    # Archivo corrupto, eliminar
-                    try:
-                        instance_file.unlink()
-                    except OSError:
-                        pass
+        Args:
+            force: Barrer aunque otra instancia lo haya hecho recién
 
+        Returns:
+            IDs de las instancias eliminadas
+        """
+        try:
+            removed = self.registry.sweep(
+                min_interval=None if force else self.CLEANUP_INTERVAL
+            )
         except Exception as e:
             print(f"[Coordinator] Error limpiando instancias: {e}")
+            return []
+
+        for instance_id in removed:
+            if instance_id != self.instance_id:
+                self._notify_user(
+                    "multi-cli", f"[CLEANUP] Instancia muerta limpiada: {instance_id}"
+                )
+        return removed
 
     def _is_process_alive(self, pid: int) -> bool:
         """Verifica si un proceso existe"""
-        if os.name == "nt":  # Windows
-            try:
-                import ctypes
-
-                kernel32 = ctypes.windll.kernel32
-                handle = kernel32.OpenProcess(1, False, pid)
-                if handle == 0:
-                    return False
-                kernel32.CloseHandle(handle)
-                return True
-            except Exception:
-                return False
-        else:  # Unix
-            try:
-                os.kill(pid, 0)
-                return True
-            except (OSError, ProcessLookupError):
-                return False
+        return pid in live_pids([pid])
 
     def _setup_event_handlers(self):
         """Configura handlers de eventos"""
@@ -494,31 +519,12 @@ class MultiCLICoordinator:
         self._notification_callbacks.append(callback)
 
     def get_active_instances(self) -> List[Dict[str, Any]]:
-        """Obtiene todas las instancias activas"""
-        instances = []
-        now = datetime.now()
-
+        """Obtiene todas las instancias activas (consulta al registro materializado)"""
         try:
-            for instance_file in self.instances_dir.glob("cli-*.json"):
-                try:
-                    with open(instance_file, "r") as f:
-                        data = json.load(f)
-
-                    last_heartbeat = datetime.fromisoformat(
-                        data.get("last_heartbeat", "2000-01-01")
-                    )
-
-                    # Solo incluir si heartbeat reciente
-                    if (now - last_heartbeat).total_seconds() <= self.STALE_THRESHOLD:
-                        instances.append(data)
-
-                except (OSError, json.JSONDecodeError, ValueError):
-                    continue
-
+            return self.registry.active(self.STALE_THRESHOLD)
         except Exception as e:
             print(f"[Coordinator] Error leyendo instancias: {e}")
-
-        return instances
+            return []
 
     def get_other_active_instances(self) -> List[Dict[str, Any]]:
         """Obtiene instancias activas excepto la nuestra"""
@@ -529,13 +535,16 @@ class MultiCLICoordinator:
         ]
 
     @contextmanager
-    def lock_file(self, file_path: str, timeout: float = 300.0):
+    def lock_file(self, file_path: str, timeout: float = 300.0, shared: bool = False):
         """
         Context manager para lockear un archivo.
 
         Args:
             file_path: Ruta del archivo a lockear
             timeout: Timeout en segundos
+            shared: True para solo lectura: varias instancias pueden leer a
+                la vez y solo esperan a un escritor. No se notifica a las
+                demás instancias (un lector no las bloquea)
 
         Yields:
             FileLock instance
@@ -543,52 +552,125 @@ class MultiCLICoordinator:
         Raises:
             LockTimeoutError: Si no se puede adquirir el lock
         """
-        lock = FileLock(file_path, self.instance_id)
+        with self.lock_files([file_path], timeout=timeout, shared=shared) as locks:
+            yield locks[0]
+
+    @contextmanager
+    def lock_files(
+        self,
+        file_paths: List[str],
+        timeout: float = 300.0,
+        shared: Union[bool, Iterable[str]] = (),
+    ):
+        """
+        Context manager para lockear varios archivos a la vez.
 
-        # Notificar que vamos a lockear
+        Los locks se toman en orden canónico (ver ``file_lock.acquire_many``),
+        así dos instancias que piden los mismos archivos en distinto orden
+        no quedan en deadlock.
+
+        Args:
+            file_paths: Rutas de los archivos a lockear
+            timeout: Timeout total en segundos
+            shared: True para lockear todos en modo lectura, o la lista de
+                archivos que solo se leen
+
+        Yields:
+            Lista de FileLock adquiridos
+
+        Raises:
+            LockTimeoutError: Si no se puede adquirir algún lock
+        """
+        if isinstance(shared, bool):
+            shared_paths = list(file_paths) if shared else []
+        else:
+            shared_paths = list(shared)
+        # Comparar rutas resueltas, igual que acquire_many ("./a.md" == "a.md")
+        resolved_shared = {Path(p).resolve() for p in shared_paths}
+        exclusive_paths: List[str] = []
+        seen: Set[Path] = set()
+        for file_path in file_paths:
+            resolved = Path(file_path).resolve()
+            if resolved not in resolved_shared and resolved not in seen:
+                seen.add(resolved)
+                exclusive_paths.append(file_path)
+
+        # Notificar que vamos a lockear (solo escrituras)
         if self.event_bridge:
-            self.event_bridge.publish(
-                EventType.FILE_LOCKED,
-                {
-                    "file": file_path,
-                    "instance_id": self.instance_id,
-                    "timestamp": datetime.now().isoformat(),
-                },
-            )
+            for file_path in exclusive_paths:
+                self.event_bridge.try_publish(
+                    EventType.FILE_LOCKED,
+                    {
+                        "file": file_path,
+                        "instance_id": self.instance_id,
+                        "timestamp": datetime.now().isoformat(),
+                    },
+                )
 
+        locks: List[FileLock] = []
         try:
-            if not lock.acquire(timeout=timeout):
-                owner = lock.get_owner()
-                owner_info = f" (owned by {owner.instance_id})" if owner else ""
-                raise LockTimeoutError(
-                    f"No se pudo adquirir lock para {file_path}{owner_info}. "
-                    f"Otra CLI está editando este archivo."
+            try:
+                locks = acquire_many(
+                    file_paths, timeout, self.instance_id, shared=shared_paths
                 )
+            except LockTimeoutError as e:
+                self.publish_lock_stats(reason="timeout", resources=file_paths)
+                raise LockTimeoutError(
+                    f"{e}. Otra CLI está editando este archivo."
+                ) from None
 
-            # Registrar lock activo
+            # Registrar locks activos
             with self._locks_lock:
-                self._active_locks[file_path] = lock
+                for lock in locks:
+                    self._active_locks[id(lock)] = lock
 
-            yield lock
+            yield locks
 
         finally:
-            # Liberar lock
-            lock.release()
-
+            # Liberar locks
             with self._locks_lock:
-                if file_path in self._active_locks:
-                    del self._active_locks[file_path]
+                for lock in reversed(locks):
+                    lock.release()
+                    self._active_locks.pop(id(lock), None)
 
             # Notificar liberación
             if self.event_bridge:
-                self.event_bridge.publish(
-                    EventType.FILE_UNLOCKED,
-                    {
-                        "file": file_path,
-                        "instance_id": self.instance_id,
-                        "timestamp": datetime.now().isoformat(),
-                    },
-                )
+                for file_path in exclusive_paths:
+                    self.event_bridge.try_publish(
+                        EventType.FILE_UNLOCKED,
+                        {
+                            "file": file_path,
+                            "instance_id": self.instance_id,
+                            "timestamp": datetime.now().isoformat(),
+                        },
+                    )
+
+    def publish_lock_stats(
+        self, reason: str = "periodic", resources: Optional[List[str]] = None
+    ):
+        """
+        Publica las métricas de locks de este proceso como evento LOCK_STATS.
+
+        Args:
+            reason: "periodic" o "timeout"
+            resources: Limitar a estos archivos (default: todos)
+        """
+        stats = get_lock_stats().snapshot()
+        if resources is not None:
+            names = {Path(r).name for r in resources}
+            stats = {name: s for name, s in stats.items() if name in names}
+        if not stats or not self.event_bridge:
+            return
+
+        self.event_bridge.try_publish(
+            EventType.LOCK_STATS,
+            {
+                "instance_id": self.instance_id,
+                "reason": reason,
+                "stats": stats,
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
 
     def notify_file_change(self, file_path: str, change_description: str = ""):
         """
@@ -601,7 +683,7 @@ class MultiCLICoordinator:
         self._modified_files.add(file_path)
 
         if self.event_bridge:
-            self.event_bridge.publish(
+            self.event_bridge.try_publish(
                 EventType.FILE_MODIFIED,
                 {
                     "file": file_path,
@@ -722,5 +804,5 @@ if __name__ == "__main__":
     elif args.action == "cleanup":
         print("[CLEANUP] Limpiando instancias muertas...")
         coord = MultiCLICoordinator(args.model)
-        coord._cleanup_stale_instances()
-        print("[OK] Cleanup completado")
+        removed = coord._cleanup_stale_instances(force=True)
+        print(f"[OK] Cleanup completado ({len(removed)} instancias eliminadas)")
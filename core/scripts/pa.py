@@ -902,6 +902,7 @@ def _select_free_model():
         pause()
         return
 
+    pings = sfm._load_ping_cache()
     for i, m in enumerate(models, 1):
         # v0.4.1-beta (feedback N30): catálogo COMPLETO utilizables (creds +
         # free), orden cred-first, badges de credenciales. Nada bloqueado.
@@ -916,6 +917,10 @@ def _select_free_model():
                 badge = m.get("status", "")
             if not m.get("free", True):
                 extra = " (paid)"
+        # Último ping conocido (cache compartido con dashboard y --verify)
+        ping = sfm.ping_badge(mid, pings)
+        if ping:
+            extra += f"  {ping}"
         print(f"  {i}. {mid}" + (f"  [{badge}]" if badge else "") + extra)
 
     raw = input(f"\n  Selecciona un número [1-{len(models)}, Enter=1]: ").strip()
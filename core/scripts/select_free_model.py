@@ -27,6 +27,22 @@ Uso interactivo:
 
 Uso no interactivo (primer modelo free AUTENTICADO):
     python core/scripts/select_free_model.py --auto
+
+Verificación en paralelo (ping real, pool acotado + deadline global):
+    python core/scripts/select_free_model.py --check --auto
+    python core/scripts/select_free_model.py --all --check --want 3 --deadline 60
+
+Los resultados de cada ping (ok/fallo, detalle, latencia) se cachean por
+modelo en ~/.pa-framework/model-pings.json con TTL (PING_TTL; los fallos
+caducan antes, PING_FAIL_TTL). El menú CLI, pa.py y el endpoint
+/api/models/test del dashboard reutilizan ese cache.
+
+El catálogo /config/providers también se cachea en disco
+(~/.pa-framework/provider-catalog.json) por puerto del serve y mtime de
+la config de opencode: dentro de CATALOG_TTL se responde sin tocar el
+serve; pasado el TTL se responde con lo cacheado y se refresca en segundo
+plano. El puerto detectado se recuerda mientras el serve siga vivo.
+Forzar una consulta nueva: --refresh.
 """
 import argparse
 import json
@@ -35,9 +51,9 @@ import shutil
 import socket
 import subprocess
 import sys
+import threading
 import time
-import urllib.error
-import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -45,32 +61,95 @@ REPO_ROOT = SCRIPT_DIR.parent.parent
 CONFIG_PATH = REPO_ROOT / ".opencode" / "config.json"
 PORTS = [47017, 47018, 47019, 47020, 47021]
 
+# Cache de pings por máquina: las credenciales son de la máquina, no del repo
+PING_CACHE_PATH = Path.home() / ".pa-framework" / "model-pings.json"
+PING_TTL = 1800        # un ping OK vale 30 min
+PING_FAIL_TTL = 300    # un fallo, 5 min (el usuario suele corregir creds enseguida)
+PING_TIMEOUT = 60      # por request al serve
+VERIFY_WORKERS = 4     # pings simultáneos (cada uno abre una sesión en el serve)
+VERIFY_DEADLINE = 90   # segundos para verificar todo el lote
+PING_LOCK_TIMEOUT = 5  # espera máx. por el lock del archivo entre procesos
+_PING_LOCK = threading.Lock()
+_ping_file_locks = {}  # ruta del cache → FileLock (uno por proceso)
+
+# Cache del catálogo de proveedores + puerto del serve detectado
+CATALOG_CACHE_PATH = Path.home() / ".pa-framework" / "provider-catalog.json"
+CATALOG_TTL = 300      # catálogo fresco 5 min; luego se sirve y se refresca
+_CATALOG_LOCK = threading.Lock()
+_catalogs = {}         # puerto → {stamp, fetched_at, providers} (memoria)
+_refreshing = set()    # puertos con refresh en segundo plano en curso
+_serve = {"port": None, "proc": None}
+
 sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(SCRIPT_DIR.parent / "providers"))
 import oc_auth  # noqa: E402  (misma carpeta; stdlib-only)
+from file_lock import FileLock  # noqa: E402
+from http_transport import HTTPStatusError, get_transport  # noqa: E402
 
 AUTH_RANK = {"authed_env": 0, "authed_file": 1, "anon": 2, "missing": 3}
 
 
 def find_serve_port():
-    """Retorna el puerto con un serve vivo que responde /config/providers, o None."""
+    """Retorna el puerto con un serve vivo que responde /config/providers, o None.
+
+    El puerto verificado se recuerda (memoria + disco) mientras el serve
+    siga vivo: la comprobación es un connect TCP, no un GET al catálogo.
+    """
+    port = _serve["port"] or _load_catalog_file().get("serve_port")
+    if port and _serve_alive(port):
+        _serve["port"] = port
+        return port
+
+    _serve["port"] = None
     for port in PORTS:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(1)
-            if s.connect_ex(("127.0.0.1", port)) == 0:
-                if _is_real_serve(port):
-                    return port
+        if _port_open(port) and _is_real_serve(port):
+            _remember_serve_port(port)
+            return port
+    _remember_serve_port(None)
     return None
 
 
+def _port_open(port, timeout=1):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+def _serve_alive(port):
+    """¿Sigue vivo el serve del puerto recordado? (sin request HTTP)"""
+    proc = _serve["proc"]
+    if proc is not None and proc.poll() is not None:
+        return False  # el serve que arrancamos murió
+    return _port_open(port, timeout=0.5)
+
+
+def _serve_request(port, path, method="GET", body=None, timeout=15):
+    """Request al serve sobre el transporte keep-alive compartido.
+
+    Las llamadas sucesivas al mismo puerto reutilizan la conexión TCP.
+    Lanza HTTPStatusError si el serve responde con status >= 400.
+    """
+    url = f"http://127.0.0.1:{port}{path}"
+    headers = {"Accept": "application/json"}
+    data = None
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    resp = get_transport().request(method, url, body=data, headers=headers, timeout=timeout)
+    if resp.status >= 400:
+        raise HTTPStatusError(url, resp.status, resp.reason, resp.body)
+    return resp
+
+
+def _serve_json(port, path, timeout=15):
+    """GET al serve y decodifica el JSON de la respuesta."""
+    return _serve_request(port, path, timeout=timeout).json()
+
+
 def _is_real_serve(port):
     """Verifica que el puerto responda como opencode serve (no otro servicio)."""
     try:
-        req = urllib.request.Request(
-            f"http://127.0.0.1:{port}/config/providers",
-            headers={"Accept": "application/json"},
-        )
-        with urllib.request.urlopen(req, timeout=4) as r:
-            return r.status == 200
+        return _serve_request(port, "/config/providers", timeout=4).status == 200
     except Exception:
         return False
 
@@ -102,7 +181,7 @@ def ensure_opencode_serve():
         return None
 
     try:
-        subprocess.Popen(
+        _serve["proc"] = subprocess.Popen(
             [exe, "serve", "--port", "47017", "--hostname", "127.0.0.1"],
             cwd=str(REPO_ROOT),
             stdout=subprocess.DEVNULL,
@@ -123,16 +202,16 @@ def ensure_opencode_serve():
     return None
 
 
-def get_free_models(port, timeout=15):
+def get_free_models(port, timeout=15, refresh=False):
     """Consultar /config/providers y extraer modelos free CON estado de auth.
 
     Retorna lista de dicts {id, provider, model, status} ordenada:
     authed_env → authed_file → anon → missing.
     """
-    return _get_models(port, timeout=timeout, free_only=True)
+    return _get_models(port, timeout=timeout, free_only=True, refresh=refresh)
 
 
-def get_usable_models(port, timeout=15):
+def get_usable_models(port, timeout=15, refresh=False):
     """v0.4.1-beta (feedback N30): TODOS los modelos utilizables, sin bloquear.
 
     Lista el catálogo COMPLETO de proveedores con credenciales (free y paid
@@ -141,25 +220,18 @@ def get_usable_models(port, timeout=15):
     porque la facilidad para el usuario manda. Detectar != usar, pero
     TENER credenciales sí debe implicar poder elegir cualquiera de esos
     modelos y que funcione en la sesión.
+
+    Responde desde el cache del catálogo (ver provider_catalog); el estado
+    de credenciales se evalúa siempre en el momento.
     """
-    return _get_models(port, timeout=timeout, free_only=False)
+    return _get_models(port, timeout=timeout, free_only=False, refresh=refresh)
 
 
-def _get_models(port, timeout=15, free_only=True):
+def _get_models(port, timeout=15, free_only=True, refresh=False):
     """Núcleo compartido del listado de modelos (auth-aware)."""
-    url = f"http://127.0.0.1:{port}/config/providers"
-    try:
-        req = urllib.request.Request(url, headers={"Accept": "application/json"})
-        with urllib.request.urlopen(req, timeout=timeout) as r:
-            data = json.loads(r.read().decode())
-    except Exception:
-        return []
-
-    if not isinstance(data, dict):
-        return []
     out = []
     auth_data = oc_auth.load_auth_json()
-    for p in data.get("providers", []):
+    for p in provider_catalog(port, timeout=timeout, refresh=refresh):
         if not isinstance(p, dict):
             continue
         pid = p.get("id", "")
@@ -207,12 +279,13 @@ def save_selection(model_id):
     print(f"✓ Config actualizado: model = {model_id}")
 
 
-def verify_model(model_id: str, port=None) -> int:
+def verify_model(model_id: str, port=None, fresh=False) -> int:
     """v0.4.1-beta: ping REAL de un modelo específico. Imprime VERIFY_OK si
     respondió (modelo existe + credencial funciona), o la causa exacta.
     Exit codes: 0 ok, 2 sin serve, 3 modelo no está en el catálogo,
     4 credencial/llamada falló. Usado por pa.py --preflight y por el
-    botón "Probar modelo" del dashboard."""
+    botón "Probar modelo" del dashboard. Un resultado vigente en el cache
+    de pings se reutiliza salvo ``fresh=True``."""
     port = port or find_serve_port() or ensure_opencode_serve()
     if port is None:
         print("NO_SERVE")
@@ -233,47 +306,154 @@ def verify_model(model_id: str, port=None) -> int:
             print(f"NOT_IN_CATALOG: {model_id} no existe en el catálogo local")
         return 3
 
-    ok, detail = _ping_model(port, entry)
-    if ok:
-        print(f"VERIFY_OK: {model_id} respondió ({detail})")
+    result = ping_model(port, model_id, fresh=fresh)
+    origin = " [cache]" if result["cached"] else ""
+    if result["ok"]:
+        print(f"VERIFY_OK: {model_id} respondió ({result['detail']}){origin}")
         return 0
-    print(f"PING_FAILED: {model_id} — {detail}")
+    print(f"PING_FAILED: {model_id} — {result['detail']}{origin}")
     return 4
 
 
 def _raw_provider_catalog(port):
     """Catálogo crudo /config/providers (sin filtrar)."""
+    return provider_catalog(port, timeout=10)
+
+
+# --- CACHE DEL CATÁLOGO DE PROVEEDORES ---
+
+def _config_stamp():
+    """mtime más reciente de la config de opencode (invalida el catálogo)."""
+    candidates = [
+        CONFIG_PATH,
+        REPO_ROOT / "opencode.json",
+        REPO_ROOT / "opencode.jsonc",
+        Path.home() / ".config" / "opencode" / "opencode.json",
+        Path.home() / ".config" / "opencode" / "opencode.jsonc",
+        oc_auth.auth_json_path(),
+    ]
+    stamp = 0.0
+    for path in candidates:
+        try:
+            stamp = max(stamp, path.stat().st_mtime)
+        except OSError:
+            continue
+    return stamp
+
+
+def _write_json_atomic(path, data):
+    """Escribir JSON vía tmp + replace (lectores nunca ven un archivo a medias)."""
     try:
-        req = urllib.request.Request(
-            f"http://127.0.0.1:{port}/config/providers",
-            headers={"Accept": "application/json"},
-        )
-        with urllib.request.urlopen(req, timeout=10) as r:
-            return json.loads(r.read().decode()).get("providers", [])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # sin cache todo sigue funcionando, solo más lento
+
+
+def _load_catalog_file():
+    """{serve_port, catalogs: {puerto: {stamp, fetched_at, providers}}}."""
+    try:
+        data = json.loads(CATALOG_CACHE_PATH.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _update_catalog_file(update):
+    with _CATALOG_LOCK:
+        data = _load_catalog_file()
+        update(data)
+        _write_json_atomic(CATALOG_CACHE_PATH, data)
+
+
+def _remember_serve_port(port):
+    _serve["port"] = port
+    if _load_catalog_file().get("serve_port") != port:
+        _update_catalog_file(lambda data: data.__setitem__("serve_port", port))
+
+
+def _cached_catalog(port, stamp):
+    """Entrada del cache (memoria → disco) para ``port`` con la config ``stamp``."""
+    entry = _catalogs.get(port)
+    if entry is None or entry["stamp"] != stamp:
+        entry = _load_catalog_file().get("catalogs", {}).get(str(port))
+        if not isinstance(entry, dict) or entry.get("stamp") != stamp:
+            return None
+        _catalogs[port] = entry
+    return entry
+
+
+def _fetch_catalog(port, stamp, timeout):
+    """GET /config/providers y guardar en el cache. Lanza si el serve falla."""
+    data = _serve_json(port, "/config/providers", timeout=timeout)
+    if not isinstance(data, dict):
+        raise ValueError("respuesta inesperada de /config/providers")
+    entry = {"stamp": stamp, "fetched_at": time.time(), "providers": data.get("providers", [])}
+    _catalogs[port] = entry
+    _update_catalog_file(
+        lambda cache: cache.setdefault("catalogs", {}).__setitem__(str(port), entry))
+    return entry["providers"]
+
+
+def _refresh_in_background(port, stamp, timeout):
+    with _CATALOG_LOCK:
+        if port in _refreshing:
+            return
+        _refreshing.add(port)
+
+    def run():
+        try:
+            _fetch_catalog(port, stamp, timeout)
+        except Exception:
+            pass  # se reintenta en la próxima lectura; lo cacheado sigue sirviendo
+        finally:
+            with _CATALOG_LOCK:
+                _refreshing.discard(port)
+
+    threading.Thread(target=run, name="catalog-refresh", daemon=True).start()
+
+
+def provider_catalog(port, timeout=15, refresh=False):
+    """Lista de proveedores de /config/providers, cacheada.
+
+    Clave: puerto del serve + mtime de la config de opencode. Dentro de
+    CATALOG_TTL responde al instante; pasado el TTL responde con lo
+    cacheado y refresca en segundo plano. Sin cache válido (o con
+    ``refresh=True``) consulta al serve; si falla, usa lo cacheado o [].
+    """
+    stamp = _config_stamp()
+    entry = _cached_catalog(port, stamp)
+    if entry is not None and not refresh:
+        if time.time() - entry["fetched_at"] > CATALOG_TTL:
+            _refresh_in_background(port, stamp, timeout)
+        return entry["providers"]
+    try:
+        return _fetch_catalog(port, stamp, timeout)
     except Exception:
-        return []
+        return entry["providers"] if entry is not None else []
 
 
-def _ping_model(port, entry: dict):
+def _ping_model(port, entry: dict, timeout=PING_TIMEOUT, deadline_at=None):
     """Ping real del modelo (mismo patrón que el bridge del dashboard):
     POST /session (título test) → POST /session/{id}/message con model
     objeto → info.modelID presente en la respuesta = credencial FUNCIONA.
-    Verificado contra opencode serve 1.4.6."""
+    Verificado contra opencode serve 1.4.6.
+
+    ``deadline_at`` (time.monotonic) recorta el timeout de cada request
+    para que un lote no exceda su deadline global."""
     pid, _, mid = entry["id"].partition("/")
     model_obj = {"providerID": pid, "modelID": mid}
-    base = f"http://127.0.0.1:{port}"
     try:
-        def _req(path, method="POST", body=None):
-            data = json.dumps(body).encode() if body is not None else None
-            rq = urllib.request.Request(
-                base + path, method=method, data=data,
-                headers={"Content-Type": "application/json"},
-            )
-            return urllib.request.urlopen(rq, timeout=60)
+        def _req(path, body):
+            t = timeout
+            if deadline_at is not None:
+                t = min(t, max(0.5, deadline_at - time.monotonic()))
+            return _serve_request(port, path, "POST", body, timeout=t).text()
 
         # 1) crear sesión de test
-        with _req("/session", body={"title": "PA model test"}) as r:
-            raw = r.read().decode()
+        raw = _req("/session", {"title": "PA model test"})
         sid = None
         try:
             data = json.loads(raw)
@@ -288,11 +468,10 @@ def _ping_model(port, entry: dict):
             return False, "no se pudo crear sesión"
 
         # 2) mensaje con el modelo objeto
-        with _req(f"/session/{sid}/message", body={
+        events = _req(f"/session/{sid}/message", {
             "model": model_obj,
             "parts": [{"type": "text", "text": "ping"}],
-        }) as r:
-            events = r.read().decode()
+        })
 
         # 3) verificar: si la respuesta trae providerID+modelID del modelo
         #    pedido, la credencial funcionó. Calibrado contra respuesta real
@@ -307,17 +486,143 @@ def _ping_model(port, entry: dict):
         if m_err:
             return False, m_err.group(1)
         return False, "la respuesta no confirmó el modelo (posible fallback silencioso)"
-    except urllib.error.HTTPError as e:
-        detail = ""
-        try:
-            detail = e.read().decode()[:140]
-        except Exception:
-            pass
+    except HTTPStatusError as e:
+        detail = e.body.decode(errors="replace")[:140]
         return False, f"HTTP {e.code} {detail}".strip()
     except Exception as e:
         return False, str(e)[:140]
 
 
+# --- CACHE DE PINGS + VERIFICACIÓN EN PARALELO ---
+
+def _load_ping_cache():
+    """Cache de pings {model_id: {ok, detail, latency_ms, checked_at}}."""
+    try:
+        data = json.loads(PING_CACHE_PATH.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _store_ping(model_id, result):
+    """Persistir un resultado (read-modify-write atómico: tmp + replace).
+
+    El read-modify-write va bajo un FileLock junto al cache (además del
+    lock del proceso), así no se pisa lo que otro proceso (dashboard,
+    pa.py) guarde a la vez. Si el lock no se obtiene a tiempo, el
+    resultado no se persiste: es solo cache.
+    """
+    with _PING_LOCK:
+        lock = _ping_file_locks.get(PING_CACHE_PATH)
+        try:
+            if lock is None:
+                # Crea la carpeta del cache si falta
+                lock = _ping_file_locks[PING_CACHE_PATH] = FileLock(
+                    str(PING_CACHE_PATH), "select-free-model",
+                    lock_dir=PING_CACHE_PATH.parent,
+                )
+            if not lock.acquire(timeout=PING_LOCK_TIMEOUT):
+                return
+        except OSError:
+            return  # sin cache todo sigue funcionando, solo más lento
+        try:
+            cache = _load_ping_cache()
+            cache[model_id] = result
+            _write_json_atomic(PING_CACHE_PATH, cache)
+        finally:
+            lock.release()
+
+
+def cached_ping(model_id, cache=None):
+    """Resultado vigente del cache para ``model_id`` (o None si caducó)."""
+    entry = (cache if cache is not None else _load_ping_cache()).get(model_id)
+    if not isinstance(entry, dict):
+        return None
+    ttl = PING_TTL if entry.get("ok") else PING_FAIL_TTL
+    if time.time() - entry.get("checked_at", 0) > ttl:
+        return None
+    return dict(entry, id=model_id, cached=True)
+
+
+def ping_badge(model_id, cache=None):
+    """Marca corta del último ping para menús: "ping ✓ 1.2s" / "ping ✗" / ""."""
+    entry = cached_ping(model_id, cache)
+    if entry is None:
+        return ""
+    if entry["ok"]:
+        return f"ping ✓ {entry['latency_ms'] / 1000:.1f}s"
+    return "ping ✗"
+
+
+def ping_model(port, model_id, fresh=False, deadline_at=None):
+    """Ping real con cache por modelo.
+
+    Retorna {id, ok, detail, latency_ms, checked_at, cached}. Un fallo
+    causado porque se agotó ``deadline_at`` no se cachea: dice poco del
+    modelo y lo marcaría como roto durante PING_FAIL_TTL.
+    """
+    if not fresh:
+        hit = cached_ping(model_id)
+        if hit is not None:
+            return hit
+    started = time.monotonic()
+    ok, detail = _ping_model(port, {"id": model_id}, deadline_at=deadline_at)
+    result = {
+        "ok": ok,
+        "detail": detail,
+        "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        "checked_at": time.time(),
+    }
+    if ok or deadline_at is None or time.monotonic() < deadline_at:
+        _store_ping(model_id, result)
+    return dict(result, id=model_id, cached=False)
+
+
+def verify_models(port, model_ids, want=None, workers=VERIFY_WORKERS,
+                  deadline=VERIFY_DEADLINE, fresh=False):
+    """Verificar varios modelos en paralelo (pool acotado + deadline global).
+
+    Los resultados vigentes del cache se usan sin tocar la red. Retorna
+    {model_id: resultado} en cuanto ``want`` modelos respondieron OK o se
+    agotó ``deadline``; los modelos sin veredicto no aparecen. Los pings
+    que quedaron en vuelo terminan en segundo plano (acotados por el
+    deadline) y guardan su resultado en el cache.
+    """
+    results = {}
+    pending = []
+    cache = {} if fresh else _load_ping_cache()
+    for mid in dict.fromkeys(model_ids):
+        hit = cached_ping(mid, cache)
+        if hit is not None:
+            results[mid] = hit
+        else:
+            pending.append(mid)
+
+    def done():
+        return want is not None and sum(r["ok"] for r in results.values()) >= want
+
+    if not pending or done():
+        return results
+
+    deadline_at = time.monotonic() + deadline
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ping")
+    futures = {
+        pool.submit(ping_model, port, mid, True, deadline_at): mid for mid in pending
+    }
+    try:
+        while futures and not done():
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            finished, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                results[futures.pop(fut)] = fut.result()
+    finally:
+        # Los pings sin empezar se cancelan; los en vuelo no bloquean
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
 def main():
     ap = argparse.ArgumentParser(
         description="Seleccionar modelo de opencode (auth-aware, sin bloqueos)")
@@ -331,38 +636,70 @@ def main():
         "--all", action="store_true",
         help="Listar TODOS los modelos utilizables (catálogo completo de "
              "proveedores con creds + free), no solo free")
+    ap.add_argument(
+        "--check", action="store_true",
+        help="Ping real en paralelo de los modelos con credenciales antes de listar")
+    ap.add_argument(
+        "--want", type=int, default=None,
+        help="Con --check: parar al encontrar N modelos que responden "
+             "(default: 1 con --auto, todos si no)")
+    ap.add_argument("--workers", type=int, default=VERIFY_WORKERS,
+                    help="Con --check: pings simultáneos")
+    ap.add_argument("--deadline", type=float, default=VERIFY_DEADLINE,
+                    help="Con --check: segundos máximos para verificar el lote")
+    ap.add_argument("--fresh", action="store_true",
+                    help="Ignorar el cache de pings (--verify / --check)")
+    ap.add_argument("--refresh", action="store_true",
+                    help="Consultar el catálogo al serve aunque el cache esté vigente")
     args = ap.parse_args()
 
     if args.verify:
-        return verify_model(args.verify)
+        return verify_model(args.verify, fresh=args.fresh)
 
     port = ensure_opencode_serve()
     if port is None:
         print("NO_SERVE")
         return 1
 
-    models = get_usable_models(port) if args.all else get_free_models(port)
+    models = (get_usable_models(port, refresh=args.refresh) if args.all
+              else get_free_models(port, refresh=args.refresh))
     if not models:
         print("NO_MODELS")
         return 1
 
+    authed = [m for m in models if m["status"] != "missing"]
+    verified = {}
+    if args.check and authed:
+        want = args.want if args.want is not None else (1 if args.auto else None)
+        print(f"Verificando {len(authed)} modelos con credenciales "
+              f"({args.workers} en paralelo, máx {args.deadline:.0f}s)…")
+        verified = verify_models(port, [m["id"] for m in authed], want=want,
+                                 workers=args.workers, deadline=args.deadline,
+                                 fresh=args.fresh)
+
     label = "utilizables (con credenciales + free)" if args.all else "free"
     print(f"Modelos {label} disponibles (con credenciales primero):")
+    cache = _load_ping_cache()
     for i, m in enumerate(models, 1):
         badge = oc_auth.provider_auth_badge(m["status"])
         marker = "✓" if m["status"] != "missing" else "⚠"
         free_tag = "" if m.get("free", True) else " (paid)"
-        print(f"  {i}. {m['id']}  [{badge}] {marker}{free_tag}")
+        ping = ping_badge(m["id"], cache)
+        print(f"  {i}. {m['id']}  [{badge}] {marker}{free_tag}" + (f"  {ping}" if ping else ""))
 
     if args.auto:
-        authed = [m for m in models if m["status"] != "missing"]
         if not authed:
             print("\n[!] Ningún modelo free tiene credenciales en esta máquina.")
             print("    Cómo habilitar:")
             print("      opencode auth login   → login interactivo del proveedor")
             print("      (o exporta la variable de entorno que pide el proveedor)")
             return 2
-        selected = authed[0]
+        # Con --check se prefiere el primero (orden cred-first) que respondió
+        selected = next((m for m in authed if verified.get(m["id"], {}).get("ok")), None)
+        if selected is None:
+            if args.check:
+                print("\n[!] Ningún modelo respondió al ping: se usa el primero con credenciales.")
+            selected = authed[0]
     else:
         try:
             raw = input("\nSelecciona un número (Enter = 1): ").strip()
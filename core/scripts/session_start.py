@@ -88,6 +88,10 @@ CACHE_DIR = CONTEXT_DIR / ".cache"
 WARM_CACHE_PATH = CACHE_DIR / "warm-start.json"
 WARM_CACHE_TTL = 7200  # 2 hours in seconds
 
+# --- PRECARGA DE MODELO LOCAL (Ollama) ---
+PROVIDERS_CONFIG_DIR = Path.home() / ".pa-framework"
+MULTI_ENGINE_SCRIPT = CORE_DIR / "providers" / "multi_engine.py"
+
 # --- GLOBAL COORDINATOR (inicializado en main) ---
 _coordinator = None
 
@@ -436,6 +440,44 @@ def extract_last_session_from_tier(tier_1_data: dict) -> str:
 
 
 # --- MULTI-CLI COORDINATION ---
+def start_model_preload() -> bool:
+    """
+    Precarga en background el modelo local por defecto (``default_model``
+    de los providers Ollama en ~/.pa-framework/providers.json|yaml), para
+    que el primer request no pague el tiempo de carga del modelo.
+
+    Lanza ``multi_engine.py --preload`` como proceso separado: la carga
+    puede tardar más que el arranque y no debe bloquearlo ni cortarse
+    cuando este script termina.
+
+    Returns:
+        True si se lanzó la precarga
+    """
+    has_config = any(
+        (PROVIDERS_CONFIG_DIR / name).exists() for name in ("providers.json", "providers.yaml")
+    )
+    if not has_config or not MULTI_ENGINE_SCRIPT.exists():
+        return False
+
+    options = {
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.DEVNULL,
+    }
+    if sys.platform == "win32":
+        options["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        options["start_new_session"] = True
+
+    try:
+        subprocess.Popen([sys.executable, str(MULTI_ENGINE_SCRIPT), "--preload"], **options)
+        return True
+    except OSError:
+        return False
+
+
 def init_multi_cli_coordinator(model: str = "unknown"):
     """Inicializa el coordinador Multi-CLI."""
     global _coordinator
@@ -953,6 +995,11 @@ def main():
         action="store_true",
         help="Skip context loading entirely (API-Contracts.md compatibility)",
     )
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Do not preload the default local model in Ollama",
+    )
     args = parser.parse_args()
 
     start_time = datetime.now()
@@ -975,6 +1022,11 @@ def main():
     # 0b. Verificar migraciones pendientes (v0.2.0)
     check_pending_migrations()
 
+    # 0c. Precargar el modelo local por defecto (proceso en background):
+    #     la carga en Ollama corre mientras se arma el resto de la sesión
+    if not args.no_preload:
+        start_model_preload()
+
     # Detectar modelo
     model = detect_model_from_env()
 
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""Unit tests for event_bridge.py (segmented, compacting event log)."""
+
+import json
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports (test is in core/scripts/tests/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from event_bridge import Event, EventBridge, EventType, notify_file_modified
+from file_lock import LockTimeoutError
+from event_broker import BROKER_SUPPORTED, BrokerConnection, EventBroker
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """EventBridge usa rutas relativas a core/.context: aislar en tmp."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def bridge(workdir):
+    return EventBridge("cli-test", session_date="2026-01-01")
+
+
+def _small_segments(monkeypatch, size=512):
+    monkeypatch.setattr(EventBridge, "SEGMENT_MAX_BYTES", size)
+
+
+class TestSegments:
+    def test_publish_writes_to_first_segment(self, bridge):
+        event = bridge.publish(EventType.FILE_MODIFIED, {"file": "a.md"})
+
+        number, path = bridge._active_segment()
+        assert number == 1
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[0])["id"] == event.id
+
+    def test_segment_rolls_when_size_exceeded(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        for i in range(20):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{i}.md"})
+
+        numbers = [n for n, _ in bridge._list_segments()]
+        assert len(numbers) > 2
+        assert numbers == sorted(numbers)
+
+    def test_legacy_file_is_read_first(self, bridge):
+        legacy = Event.create(EventType.FILE_MODIFIED, "cli-old", {"file": "x"})
+        bridge.legacy_events_file.write_text(
+            json.dumps(legacy.to_dict()) + "\n", encoding="utf-8"
+        )
+        bridge.publish(EventType.FILE_MODIFIED, {"file": "y"})
+
+        ids = [e.id for e in bridge._read_new_events()]
+        assert ids[0] == legacy.id
+        assert len(ids) == 2
+
+    def test_upgrade_from_legacy_log_keeps_snapshot_state(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        legacy = [
+            Event.create(EventType.INSTANCE_HEARTBEAT, "cli-old", {"instance_id": "cli-old"}),
+            Event.create(EventType.INSTANCE_HEARTBEAT, "cli-keep", {"instance_id": "cli-keep"}),
+        ]
+        bridge.legacy_events_file.write_text(
+            "".join(json.dumps(e.to_dict()) + "\n" for e in legacy), encoding="utf-8"
+        )
+
+        def active():
+            return {i["instance_id"] for i in bridge._active_instances_from_log(60)}
+
+        assert active() == {"cli-old", "cli-keep"}
+
+        # cli-old sale después del log legacy; la compactación lo deja en el snapshot
+        bridge.publish(EventType.INSTANCE_LEFT, {"instance_id": "cli-old"})
+        for i in range(20):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{i}.md"})
+        bridge.compact()
+
+        assert bridge._load_snapshot()["through_segment"] > 0
+        assert active() == {"cli-keep"}
+
+
+class TestTailing:
+    def test_reads_only_new_events(self, bridge):
+        bridge.publish(EventType.FILE_MODIFIED, {"file": "a"})
+        assert len(bridge._read_new_events()) == 1
+        assert bridge._read_new_events() == []
+
+        bridge.publish(EventType.FILE_MODIFIED, {"file": "b"})
+        events = bridge._read_new_events()
+        assert [e.data["file"] for e in events] == ["b"]
+
+    def test_partial_line_is_not_consumed(self, bridge):
+        bridge.publish(EventType.FILE_MODIFIED, {"file": "a"})
+        bridge._read_new_events()
+
+        path = bridge._get_events_file()
+        event = Event.create(EventType.FILE_MODIFIED, "cli-x", {"file": "b"})
+        line = json.dumps(event.to_dict())
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line[:10])
+        assert bridge._read_new_events() == []
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line[10:] + "\n")
+        assert [e.id for e in bridge._read_new_events()] == [event.id]
+
+    def test_follows_segment_rollover(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        for i in range(30):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{i}"})
+
+        files = [e.data["file"] for e in bridge._read_new_events()]
+        assert files == [f"f{i}" for i in range(30)]
+
+
+class TestCompaction:
+    def test_superseded_heartbeats_are_dropped(self, bridge, monkeypatch):
+        _small_segments(monkeypatch, size=4096)
+        for _ in range(40):
+            bridge.send_heartbeat("model-a")
+        bridge.publish(EventType.FILE_MODIFIED, {"file": "keep.md"})
+        for _ in range(40):
+            bridge.send_heartbeat("model-a")
+
+        bridge.compact()
+
+        snapshot = bridge._load_snapshot()
+        assert snapshot["through_segment"] >= 1
+        compacted = [
+            e
+            for n, p in bridge._list_segments()
+            if n <= snapshot["through_segment"]
+            for e in bridge._read_segment(p)
+        ]
+        heartbeats = [
+            e for e in compacted if e.type == EventType.INSTANCE_HEARTBEAT.value
+        ]
+        # A lo sumo un heartbeat por segmento compactado
+        assert len(heartbeats) <= snapshot["through_segment"]
+
+    def test_expired_events_are_dropped(self, bridge):
+        old = Event.create(EventType.FILE_MODIFIED, "cli-old", {"file": "old"})
+        old.timestamp = (
+            datetime.now() - timedelta(seconds=EventBridge.EVENT_TTL_SECONDS + 60)
+        ).isoformat()
+        fresh = Event.create(EventType.FILE_MODIFIED, "cli-new", {"file": "new"})
+
+        kept = bridge._compact_events([old, fresh])
+        assert [e.id for e in kept] == [fresh.id]
+
+    def test_left_instance_drops_its_heartbeats(self, bridge):
+        hb = Event.create(
+            EventType.INSTANCE_HEARTBEAT, "cli-a", {"instance_id": "cli-a"}
+        )
+        left = Event.create(EventType.INSTANCE_LEFT, "cli-a", {"instance_id": "cli-a"})
+
+        kept = bridge._compact_events([hb, left])
+        assert [e.type for e in kept] == [EventType.INSTANCE_LEFT.value]
+
+
+class TestActiveInstances:
+    def test_heartbeat_makes_instance_active(self, bridge):
+        bridge.send_heartbeat("model-a")
+        active = bridge.get_active_instances()
+        assert [i["instance_id"] for i in active] == ["cli-test"]
+        assert active[0]["model"] == "model-a"
+
+    def test_left_instance_is_not_active(self, bridge):
+        bridge.send_heartbeat("model-a")
+        bridge.publish(EventType.INSTANCE_LEFT, {"instance_id": "cli-test"})
+        assert bridge.get_active_instances() == []
+
+    def test_state_survives_compaction(self, workdir, monkeypatch):
+        _small_segments(monkeypatch)
+        other = EventBridge("cli-other", session_date="2026-01-01")
+        other.send_heartbeat("model-b")
+
+        bridge = EventBridge("cli-test", session_date="2026-01-01")
+        for i in range(40):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{i}"})
+        bridge.compact()
+
+        assert bridge._load_snapshot()["through_segment"] >= 1
+        ids = {i["instance_id"] for i in bridge.get_active_instances()}
+        assert "cli-other" in ids
+
+
+class TestSequencing:
+    def test_seq_is_monotonic_across_bridges(self, workdir):
+        a = EventBridge("cli-a", session_date="2026-01-01")
+        b = EventBridge("cli-b", session_date="2026-01-01")
+        seqs = [
+            (a if i % 2 else b).publish(EventType.FILE_MODIFIED, {"i": i}).seq
+            for i in range(10)
+        ]
+        assert seqs == list(range(1, 11))
+
+    def test_seq_recovered_when_sidecar_is_lost(self, bridge):
+        for i in range(3):
+            bridge.publish(EventType.FILE_MODIFIED, {"i": i})
+        bridge.seq_file.unlink()
+        assert bridge.publish(EventType.FILE_MODIFIED, {"i": 3}).seq == 4
+
+    def test_tail_skips_already_seen_seq_after_compaction(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        for i in range(30):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{i}"})
+        first = bridge._read_new_events()
+        bridge.compact()
+        bridge._tail_segment, bridge._tail_offset = 1, 0
+        assert bridge._read_new_events() == []
+        assert [e.seq for e in first] == list(range(1, 31))
+
+
+class TestGroupCommit:
+    def test_concurrent_publishers_share_appends(self, workdir, monkeypatch):
+        appends = []
+        original = EventBridge._append_events
+
+        def counting_append(self, events):
+            appends.append(len(events))
+            time.sleep(0.005)  # ensanchar la ventana de agrupamiento
+            return original(self, events)
+
+        monkeypatch.setattr(EventBridge, "_append_events", counting_append)
+
+        def publish_many(n):
+            bridge = EventBridge(f"cli-{n}", session_date="2026-01-01")
+            for i in range(10):
+                bridge.publish(EventType.FILE_MODIFIED, {"n": n, "i": i})
+
+        threads = [threading.Thread(target=publish_many, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sum(appends) == 80
+        assert len(appends) < 80
+        seqs = [e.seq for e in EventBridge("cli-r", session_date="2026-01-01").replay()]
+        assert seqs == list(range(1, 81))
+
+    def test_publish_returns_after_write(self, bridge):
+        event = bridge.publish(EventType.FILE_MODIFIED, {"file": "a"})
+        assert [e.id for e in bridge.replay(since=event.seq - 1)] == [event.id]
+
+    def test_write_error_reaches_every_publisher(self, bridge, monkeypatch):
+        def failing_append(self, events):
+            raise OSError("disco lleno")
+
+        monkeypatch.setattr(EventBridge, "_append_events", failing_append)
+        with pytest.raises(OSError):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": "a"})
+
+    def test_sequencer_timeout_reaches_every_follower(self, workdir, monkeypatch):
+        original = EventBridge._sequencer
+
+        @contextmanager
+        def failing_sequencer(self):
+            time.sleep(0.05)  # los demás publicadores se suman al lote
+            raise LockTimeoutError("lock de secuencia ocupado")
+            yield
+
+        monkeypatch.setattr(EventBridge, "_sequencer", failing_sequencer)
+        errors = []
+
+        def publish(n):
+            bridge = EventBridge(f"cli-{n}", session_date="2026-01-01")
+            try:
+                bridge.publish(EventType.FILE_MODIFIED, {"n": n})
+            except LockTimeoutError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=publish, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        assert not any(t.is_alive() for t in threads), "un seguidor quedó bloqueado"
+        assert len(errors) == 6
+
+        # El lote fallido no queda pendiente: el siguiente publish escribe
+        monkeypatch.setattr(EventBridge, "_sequencer", original)
+        event = EventBridge("cli-x", session_date="2026-01-01").publish(
+            EventType.FILE_MODIFIED, {"n": "ok"}
+        )
+        assert event.seq == 1
+
+
+class TestBestEffortPublish:
+    @pytest.fixture
+    def busy_sequencer(self, monkeypatch):
+        @contextmanager
+        def busy(self):
+            raise LockTimeoutError("lock de secuencia ocupado")
+            yield
+
+        monkeypatch.setattr(EventBridge, "_sequencer", busy)
+
+    def test_publish_raises_when_sequencer_is_busy(self, bridge, busy_sequencer):
+        with pytest.raises(LockTimeoutError):
+            bridge.publish(EventType.FILE_MODIFIED, {"file": "a"})
+
+    def test_hook_helpers_swallow_lock_timeouts(self, bridge, busy_sequencer, capsys):
+        notify_file_modified("a.md", "edit", "cli-hook", session_date="2026-01-01")
+        assert bridge.try_publish(EventType.FILE_MODIFIED, {"file": "a"}) is None
+        bridge.send_heartbeat("m")
+        assert "No se pudo publicar" in capsys.readouterr().out
+
+
+class TestCursors:
+    def _consume(self, consumer, count):
+        received = []
+        bridge = EventBridge("cli-c", session_date="2026-01-01", consumer=consumer)
+        bridge.subscribe(EventType.FILE_MODIFIED, received.append)
+        bridge.start_listening()
+        deadline = time.time() + 3.0
+        while len(received) < count and time.time() < deadline:
+            time.sleep(0.02)
+        bridge.stop_listening()
+        return received
+
+    def test_consumer_resumes_from_saved_cursor(self, workdir):
+        publisher = EventBridge("cli-p", session_date="2026-01-01")
+        for i in range(3):
+            publisher.publish(EventType.FILE_MODIFIED, {"i": i})
+        assert [e.data["i"] for e in self._consume("indexer", 3)] == [0, 1, 2]
+
+        for i in range(3, 5):
+            publisher.publish(EventType.FILE_MODIFIED, {"i": i})
+        assert [e.data["i"] for e in self._consume("indexer", 2)] == [3, 4]
+
+    def test_cursor_is_per_consumer(self, workdir):
+        publisher = EventBridge("cli-p", session_date="2026-01-01")
+        publisher.publish(EventType.FILE_MODIFIED, {"i": 0})
+        self._consume("a", 1)
+
+        assert len(self._consume("b", 1)) == 1
+        reader = EventBridge("cli-r", session_date="2026-01-01", consumer="a")
+        assert reader.load_cursor() >= 1
+
+
+class TestReplay:
+    def test_replay_since(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        for i in range(30):
+            bridge.publish(EventType.FILE_MODIFIED, {"i": i})
+
+        assert [e.data["i"] for e in bridge.replay(since=25)] == [25, 26, 27, 28, 29]
+        assert len(bridge.replay()) == 30
+
+    def test_replay_skips_earlier_segments(self, bridge, monkeypatch):
+        _small_segments(monkeypatch)
+        for i in range(30):
+            bridge.publish(EventType.FILE_MODIFIED, {"i": i})
+
+        segments = bridge._segments_since(28)
+        assert len(segments) < len(bridge._list_segments())
+
+
+@pytest.mark.skipif(not BROKER_SUPPORTED, reason="broker requiere AF_UNIX + flock")
+class TestBrokerMode:
+    def _wait_for(self, predicate, timeout=3.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_first_listener_starts_broker_and_fans_out(self, workdir):
+        received = []
+        a = EventBridge("cli-a", session_date="2026-01-01", use_broker=True)
+        b = EventBridge("cli-b", session_date="2026-01-01", use_broker=True)
+        a.subscribe(EventType.FILE_MODIFIED, received.append)
+        a.start_listening()
+        b.start_listening()
+        try:
+            assert a._broker is not None and a._broker.running
+            assert b._broker is None
+
+            event = b.publish(EventType.FILE_MODIFIED, {"file": "x.md"})
+            assert self._wait_for(lambda: any(e.id == event.id for e in received))
+
+            # Persistido al log (con seq) por el thread escritor del broker
+            reader = EventBridge("cli-r", session_date="2026-01-01", use_broker=False)
+            assert self._wait_for(
+                lambda: any(e.id == event.id for e in reader._read_new_events())
+            )
+        finally:
+            b.stop_listening()
+            a.stop_listening()
+
+    def test_file_mode_publishers_reach_broker_subscribers(self, workdir):
+        received = []
+        a = EventBridge("cli-a", session_date="2026-01-01", use_broker=True)
+        a.subscribe(EventType.FILE_MODIFIED, received.append)
+        a.start_listening()
+        try:
+            plain = EventBridge("cli-p", session_date="2026-01-01", use_broker=False)
+            event = plain.publish(EventType.FILE_MODIFIED, {"file": "y.md"})
+            assert self._wait_for(lambda: any(e.id == event.id for e in received))
+        finally:
+            a.stop_listening()
+
+    def test_falls_back_to_file_mode_when_broker_dies(self, workdir):
+        received = []
+        a = EventBridge("cli-a", session_date="2026-01-01", use_broker=True)
+        b = EventBridge("cli-b", session_date="2026-01-01", use_broker=True)
+        b.subscribe(EventType.FILE_MODIFIED, received.append)
+        a.start_listening()
+        b.start_listening()
+        try:
+            a.stop_listening()  # el broker vivía en "a"
+            assert self._wait_for(lambda: not b.use_broker)
+
+            c = EventBridge("cli-c", session_date="2026-01-01", use_broker=True)
+            event = c.publish(EventType.FILE_MODIFIED, {"file": "z.md"})
+            assert self._wait_for(lambda: any(e.id == event.id for e in received))
+        finally:
+            b.stop_listening()
+
+
+@pytest.mark.skipif(not BROKER_SUPPORTED, reason="broker requiere AF_UNIX + flock")
+class TestEventBroker:
+    @pytest.fixture
+    def make_broker(self, workdir):
+        brokers = []
+
+        def make(on_persist):
+            broker = EventBroker(Path("b.sock"), Path("b.lock"), on_persist=on_persist)
+            assert broker.start()
+            brokers.append(broker)
+            return broker
+
+        yield make
+        for broker in brokers:
+            broker.stop()
+
+    def _connect(self, name, subscribe):
+        conn = BrokerConnection(Path("b.sock"), name, subscribe=subscribe)
+        assert conn.connect()
+        return conn
+
+    def _event(self, i, size=0):
+        event = Event.create(EventType.FILE_MODIFIED, "cli-p", {"i": i, "pad": "x" * size})
+        return event.to_dict()
+
+    def test_slow_persistence_does_not_delay_fan_out(self, make_broker):
+        persisted = []
+
+        def slow_persist(events):
+            time.sleep(1.0)
+            persisted.extend(events)
+
+        broker = make_broker(slow_persist)
+        subscriber = self._connect("cli-s", subscribe=True)
+        publisher = self._connect("cli-p", subscribe=False)
+        time.sleep(0.05)  # saludos procesados
+
+        started = time.monotonic()
+        publisher.send([self._event(0)])
+        received = subscriber.receive()
+        assert time.monotonic() - started < 0.5
+        assert received[0]["data"]["i"] == 0
+
+        broker.stop()  # drena la cola del escritor
+        assert [e["data"]["i"] for e in persisted] == [0]
+        subscriber.close()
+        publisher.close()
+
+    def test_stalled_subscriber_is_dropped_without_blocking(self, make_broker, monkeypatch):
+        monkeypatch.setattr(EventBroker, "SEND_BUFFER_MAX", 256 * 1024)
+        broker = make_broker(lambda events: None)
+
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.connect("b.sock")
+        stalled.sendall(b'{"hello": "cli-stalled", "subscribe": true}\n')
+        healthy = self._connect("cli-h", subscribe=True)
+        publisher = self._connect("cli-p", subscribe=False)
+        time.sleep(0.05)
+
+        received = []
+        reader = threading.Thread(
+            target=lambda: [received.extend(m) for m in iter(healthy.receive, None)],
+            daemon=True,
+        )
+        reader.start()
+
+        total = 200
+        for i in range(total):
+            publisher.send([self._event(i, size=8192)])
+
+        deadline = time.time() + 5
+        while len(received) < total and time.time() < deadline:
+            time.sleep(0.01)
+        assert [e["data"]["i"] for e in received] == list(range(total))
+        assert len(broker._clients) == 2  # el cliente que no lee quedó fuera
+
+        stalled.close()
+        healthy.close()
+        publisher.close()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Unit tests for file_lock.py (kernel flock and legacy backends)."""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports (test is in core/scripts/tests/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import file_lock
+from file_lock import KERNEL_LOCKS_SUPPORTED, FileLock, LockTimeoutError, lock_many
+
+kernel_only = pytest.mark.skipif(
+    not KERNEL_LOCKS_SUPPORTED, reason="backend kernel requiere fcntl.flock"
+)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """FileLock guarda los locks en core/.context/sessions/.locks: aislar en tmp."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _increment(counter_path: str, rounds: int):
+    lock = FileLock(counter_path, backend="kernel")
+    for _ in range(rounds):
+        assert lock.acquire(timeout=30)
+        try:
+            path = Path(counter_path)
+            value = int(path.read_text() or 0)
+            time.sleep(0.0005)  # ensanchar la ventana de carrera
+            path.write_text(str(value + 1))
+        finally:
+            lock.release()
+
+
+def _hold_and_die(resource: str):
+    lock = FileLock(resource, "cli-dead", backend="kernel")
+    lock.acquire(timeout=5)
+    import os
+    os._exit(0)  # sin release: el kernel debe liberar el flock
+
+
+class TestBackendSelection:
+    def test_unknown_backend_is_rejected(self, workdir):
+        with pytest.raises(ValueError):
+            FileLock("a.md", backend="nfs")
+
+    def test_auto_prefers_kernel(self, workdir):
+        expected = "kernel" if KERNEL_LOCKS_SUPPORTED else "legacy"
+        assert FileLock("a.md").backend == expected
+
+
+@kernel_only
+class TestKernelBackend:
+    def test_exclusive_between_lock_objects(self, workdir):
+        a = FileLock("a.md", "cli-a", backend="kernel")
+        b = FileLock("a.md", "cli-b", backend="kernel")
+        assert a.acquire(timeout=1)
+        assert not b.acquire(blocking=False)
+        assert b.is_locked()
+        assert b.get_owner().instance_id == "cli-a"
+
+        a.release()
+        assert b.acquire(blocking=False)
+        b.release()
+
+    def test_waiter_wakes_on_release(self, workdir):
+        holder = FileLock("a.md", "cli-a", backend="kernel")
+        waiter = FileLock("a.md", "cli-b", backend="kernel")
+        holder.acquire(timeout=1)
+        released_at = []
+
+        def release_soon():
+            time.sleep(0.2)
+            released_at.append(time.perf_counter())
+            holder.release()
+
+        threading.Thread(target=release_soon).start()
+        assert waiter.acquire(timeout=5)
+        waited = time.perf_counter() - released_at[0]
+        waiter.release()
+        assert waited < FileLock.DEFAULT_POLL_INTERVAL
+
+    @pytest.mark.skipif(not file_lock.PROC_LOCKS.exists(), reason="requiere /proc/locks")
+    def test_waiter_without_timeout_blocks_in_kernel(self, workdir):
+        holder = FileLock("a.md", "cli-a", backend="kernel")
+        waiter = FileLock("a.md", "cli-b", backend="kernel")
+        holder.acquire(timeout=1)
+        acquired = threading.Event()
+
+        def wait_forever():
+            waiter.acquire(timeout=None)
+            acquired.set()
+
+        thread = threading.Thread(target=wait_forever)
+        thread.start()
+        # El waiter aparece en /proc/locks como bloqueado ("->"), no sondeando
+        inode = f":{holder.lock_path.stat().st_ino} "
+        deadline = time.monotonic() + 5
+        while not any(
+            "->" in line and inode in line
+            for line in file_lock.PROC_LOCKS.read_text().splitlines()
+        ):
+            assert time.monotonic() < deadline, "el waiter no bloqueó en el kernel"
+            time.sleep(0.01)
+
+        holder.release()
+        assert acquired.wait(5)
+        thread.join()
+        waiter.release()
+
+    @pytest.mark.skipif(not file_lock.PROC_LOCKS.exists(), reason="requiere /proc/locks")
+    def test_is_locked_does_not_take_the_lock(self, workdir, monkeypatch):
+        holder = FileLock("a.md", "cli-a", backend="kernel")
+        probe = FileLock("a.md", "cli-b", backend="kernel")
+        assert not probe.is_locked()
+        holder.acquire(timeout=1)
+
+        calls = []
+        real_flock = file_lock.fcntl.flock
+        monkeypatch.setattr(
+            file_lock.fcntl, "flock", lambda fd, op: calls.append(op) or real_flock(fd, op)
+        )
+        assert probe.is_locked()
+        holder.release()
+        assert not probe.is_locked()
+        assert calls == [file_lock.fcntl.LOCK_UN]  # solo el release del holder
+
+    def test_timeout_does_not_leak_the_lock(self, workdir):
+        holder = FileLock("a.md", "cli-a", backend="kernel")
+        waiter = FileLock("a.md", "cli-b", backend="kernel")
+        holder.acquire(timeout=1)
+        threads = threading.active_count()
+        fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+        assert not waiter.acquire(timeout=0.1)
+
+        # Nada queda esperando el lock tras el timeout
+        assert threading.active_count() == threads
+        if fds is not None:
+            assert len(os.listdir("/proc/self/fd")) == fds
+
+        holder.release()
+        other = FileLock("a.md", "cli-c", backend="kernel")
+        assert other.acquire(blocking=False)
+        other.release()
+
+    def test_release_keeps_file_and_clears_owner(self, workdir):
+        lock = FileLock("a.md", "cli-a", backend="kernel")
+        lock.acquire(timeout=1)
+        lock.release()
+        assert lock.lock_path.exists()
+        assert lock.get_owner() is None
+        assert not lock.is_locked()
+
+    def test_dead_owner_releases_immediately(self, workdir):
+        proc = multiprocessing.Process(target=_hold_and_die, args=("a.md",))
+        proc.start()
+        proc.join()
+
+        lock = FileLock("a.md", "cli-b", backend="kernel")
+        assert lock.get_owner() is None
+        assert lock.acquire(blocking=False)
+        lock.release()
+
+    def test_mutual_exclusion_across_processes(self, workdir):
+        counter = workdir / "counter.txt"
+        counter.write_text("0")
+        procs = [
+            multiprocessing.Process(target=_increment, args=(str(counter), 25))
+            for _ in range(4)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert int(counter.read_text()) == 100
+
+
+@kernel_only
+class TestSharedLocks:
+    def test_readers_share_the_lock(self, workdir):
+        readers = [FileLock("MASTER.md", f"cli-{i}", backend="kernel") for i in range(3)]
+        assert all(r.acquire_shared(timeout=1) for r in readers)
+        assert all(r.shared for r in readers)
+        for r in readers:
+            r.release()
+
+    def test_writer_waits_for_readers(self, workdir):
+        reader = FileLock("MASTER.md", "cli-r", backend="kernel")
+        writer = FileLock("MASTER.md", "cli-w", backend="kernel")
+        reader.acquire_shared(timeout=1)
+        assert not writer.acquire_exclusive(blocking=False)
+
+        reader.release()
+        assert writer.acquire_exclusive(blocking=False)
+        assert not reader.acquire_shared(blocking=False)
+        assert reader.get_owner().instance_id == "cli-w"
+        writer.release()
+
+    def test_reader_does_not_overwrite_owner_metadata(self, workdir):
+        reader = FileLock("MASTER.md", "cli-r", backend="kernel")
+        reader.acquire_shared(timeout=1)
+        assert reader.get_owner() is None
+        reader.release()
+
+
+class TestLockMany:
+    def test_acquires_all_and_releases(self, workdir):
+        with lock_many(["b.md", "a.md", "c.md"], timeout=1) as locks:
+            assert [l.resource_path.name for l in locks] == ["a.md", "b.md", "c.md"]
+            assert all(FileLock(name).is_locked() for name in ("a.md", "b.md", "c.md"))
+        assert not any(FileLock(name).is_locked() for name in ("a.md", "b.md", "c.md"))
+
+    def test_timeout_releases_partial_set(self, workdir):
+        holder = FileLock("b.md", "cli-holder")
+        holder.acquire(timeout=1)
+        try:
+            with pytest.raises(LockTimeoutError):
+                with lock_many(["a.md", "b.md"], timeout=0.2):
+                    pass
+            assert not FileLock("a.md").is_locked()
+        finally:
+            holder.release()
+
+    def test_duplicate_resource_uses_exclusive_mode(self, workdir):
+        # Mismo archivo .lock (mismo nombre), pedido como lectura y escritura
+        with lock_many(["a.md", "sub/a.md"], timeout=1, shared=["a.md"]) as locks:
+            assert len(locks) == 1
+            assert not locks[0].shared
+        with lock_many(["a.md"], timeout=1, shared=["a.md"]) as locks:
+            assert locks[0].shared == KERNEL_LOCKS_SUPPORTED
+
+    def test_opposite_orders_do_not_deadlock(self, workdir):
+        done = []
+
+        def worker(order):
+            for _ in range(20):
+                with lock_many(order, timeout=5):
+                    pass
+            done.append(order)
+
+        threads = [
+            threading.Thread(target=worker, args=(["a.md", "b.md"],)),
+            threading.Thread(target=worker, args=(["b.md", "a.md"],)),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert len(done) == 2
+
+
+class TestLegacyBackend:
+    def test_exclusive_create(self, workdir):
+        a = FileLock("a.md", "cli-a", backend="legacy")
+        b = FileLock("a.md", "cli-b", backend="legacy")
+        assert a.acquire(timeout=1)
+        assert not b.acquire(blocking=False)
+        assert b.get_owner().instance_id == "cli-a"
+
+        assert a.release()
+        assert not a.lock_path.exists()
+        assert b.acquire(blocking=False)
+        b.release()
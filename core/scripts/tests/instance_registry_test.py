@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Unit tests for instance_registry.py (materialized instance registry)."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports (test is in core/scripts/tests/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import instance_registry
+from instance_registry import InstanceRegistry, live_pids
+
+
+@pytest.fixture
+def registry(tmp_path):
+    reg = InstanceRegistry(db_path=str(tmp_path / "registry.db"), ttl_seconds=60)
+    yield reg
+    reg.close()
+
+
+class TestInstanceRegistry:
+    def test_heartbeat_registers_active_instance(self, registry):
+        registry.heartbeat("cli-a", model="GPT-4", pid=123)
+
+        active = registry.active()
+        assert len(active) == 1
+        assert active[0]["instance_id"] == "cli-a"
+        assert active[0]["model"] == "GPT-4"
+        assert active[0]["pid"] == 123
+        assert active[0]["status"] == "active"
+
+    def test_heartbeat_preserves_previous_fields(self, registry):
+        registry.heartbeat("cli-a", model="GPT-4", pid=123, start_time="2026-01-01T00:00:00",
+                           open_files=["a.md"])
+        registry.heartbeat("cli-a")
+
+        info = registry.get("cli-a")
+        assert info["model"] == "GPT-4"
+        assert info["pid"] == 123
+        assert info["start_time"] == "2026-01-01T00:00:00"
+        assert info["open_files"] == ["a.md"]
+
+    def test_remove(self, registry):
+        registry.heartbeat("cli-a")
+        registry.remove("cli-a")
+        assert registry.active() == []
+
+    def test_stale_entries_expire_by_ttl(self, registry, monkeypatch):
+        registry.heartbeat("cli-old")
+        later = time.time() + 120
+        monkeypatch.setattr(time, "time", lambda: later)
+        registry.heartbeat("cli-new")
+
+        assert [i["instance_id"] for i in registry.active()] == ["cli-new"]
+        # La escritura del heartbeat ya purgó la entrada expirada
+        assert registry.get("cli-old") is None
+        assert registry.purge_expired() == 0
+
+    def test_shared_between_connections(self, registry, tmp_path):
+        other = InstanceRegistry(db_path=str(tmp_path / "registry.db"))
+        try:
+            other.heartbeat("cli-b", model="Claude")
+            assert [i["instance_id"] for i in registry.active()] == ["cli-b"]
+        finally:
+            other.close()
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class TestCoalescing:
+    def test_unchanged_heartbeats_are_coalesced(self, registry, monkeypatch):
+        registry.heartbeat("cli-a", model="GPT-4", pid=123)
+        before = registry.get("cli-a")["last_heartbeat"]
+        time.sleep(0.01)
+        registry.heartbeat("cli-a")
+        registry.heartbeat("cli-a", model="GPT-4", pid=123)
+        assert registry.get("cli-a")["last_heartbeat"] == before
+
+    def test_changed_fields_are_written(self, registry):
+        registry.heartbeat("cli-a", model="GPT-4")
+        registry.heartbeat("cli-a", open_files=["a.md"])
+        assert registry.get("cli-a")["open_files"] == ["a.md"]
+
+    def test_heartbeat_after_window_is_written(self, registry, monkeypatch):
+        registry.heartbeat("cli-a")
+        later = time.time() + InstanceRegistry.HEARTBEAT_COALESCE + 1
+        monkeypatch.setattr(time, "time", lambda: later)
+        registry.heartbeat("cli-a")
+        assert registry._conn.execute(
+            "SELECT last_heartbeat FROM instances"
+        ).fetchone()[0] == pytest.approx(later)
+
+
+class TestSweep:
+    def test_live_pids(self):
+        dead = _dead_pid()
+        assert live_pids([os.getpid(), dead]) == {os.getpid()}
+
+    def test_live_pids_without_proc(self, monkeypatch):
+        monkeypatch.setattr(instance_registry, "Path", lambda p: Path("/nonexistent"))
+        dead = _dead_pid()
+        assert live_pids([os.getpid(), dead]) == {os.getpid()}
+
+    def test_sweep_removes_dead_processes(self, registry):
+        registry.heartbeat("cli-alive", pid=os.getpid())
+        registry.heartbeat("cli-dead", pid=_dead_pid())
+        registry.heartbeat("cli-nopid")
+
+        assert registry.sweep() == ["cli-dead"]
+        ids = [i["instance_id"] for i in registry.active()]
+        assert ids == ["cli-alive", "cli-nopid"]
+
+    def test_sweep_runs_once_per_interval_across_connections(self, registry, tmp_path):
+        other = InstanceRegistry(db_path=str(tmp_path / "registry.db"))
+        try:
+            registry.heartbeat("cli-dead", pid=_dead_pid())
+            assert other.sweep(min_interval=60) == ["cli-dead"]
+
+            registry.heartbeat("cli-dead2", pid=_dead_pid())
+            assert registry.sweep(min_interval=60) == []
+            assert registry.sweep() == ["cli-dead2"]
+        finally:
+            other.close()
+
+
+class TestLegacyInstanceFiles:
+    """Cubre: migración de los cli-*.json de versiones anteriores."""
+
+    def _write(self, directory, instance_id, pid, age):
+        path = directory / f"{instance_id}.json"
+        beat = datetime.now() - timedelta(seconds=age)
+        path.write_text(json.dumps({
+            "instance_id": instance_id, "pid": pid, "model": "old",
+            "start_time": beat.isoformat(), "last_heartbeat": beat.isoformat(),
+            "status": "active", "open_files": ["a.md"],
+        }))
+        return path
+
+    def test_only_dead_or_stale_files_are_removed(self, registry, tmp_path):
+        from multi_cli_coordinator import MultiCLICoordinator
+
+        coordinator = MultiCLICoordinator.__new__(MultiCLICoordinator)
+        coordinator.instances_dir = tmp_path
+        coordinator.registry = registry
+        live = self._write(tmp_path, "cli-live", os.getpid(), age=5)
+        dead = self._write(tmp_path, "cli-dead", _dead_pid(), age=5)
+        stale = self._write(tmp_path, "cli-stale", os.getpid(), age=3600)
+        partial = tmp_path / "cli-partial.json"
+        partial.write_text('{"instance_id": ')
+
+        coordinator._remove_legacy_instance_files()
+
+        assert live.exists() and partial.exists()
+        assert not dead.exists() and not stale.exists()
+        imported = registry.get("cli-live")
+        assert imported["pid"] == os.getpid()
+        assert imported["model"] == "old"
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Unit tests for lock_stats.py (lock contention histograms and report)."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports (test is in core/scripts/tests/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import lock_stats
+from file_lock import KERNEL_LOCKS_SUPPORTED, FileLock
+from lock_stats import LockStats, LogHistogram, load_report
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    """Colector del proceso aislado en tmp (y cwd en tmp para los locks)."""
+    monkeypatch.chdir(tmp_path)
+    collector = LockStats(stats_dir=tmp_path / "stats")
+    monkeypatch.setattr(lock_stats, "_process_stats", collector)
+    return collector
+
+
+class TestLogHistogram:
+    def test_percentiles_are_bucket_upper_bounds(self):
+        hist = LogHistogram()
+        for _ in range(99):
+            hist.record(0.001)  # 1 ms
+        hist.record(0.5)
+
+        assert hist.count == 100
+        assert 0.001 <= hist.percentile(0.50) < 0.002
+        assert hist.percentile(1.0) == pytest.approx(0.5)
+        assert hist.summary()["max_ms"] == pytest.approx(500.0)
+
+    def test_roundtrip_and_merge(self):
+        a, b = LogHistogram(), LogHistogram()
+        a.record(0.002)
+        b.record(0.004)
+        merged = LogHistogram.from_dict(a.to_dict())
+        merged.merge(b)
+        assert merged.count == 2
+        assert merged.total == pytest.approx(0.006)
+
+
+class TestLockStats:
+    def test_report_merges_processes(self, tmp_path):
+        for _ in range(2):
+            collector = LockStats(stats_dir=tmp_path)
+            collector.record_acquire("MASTER.md", 0.01)
+            collector.record_timeout("MASTER.md", 1.0)
+            collector.flush()
+            # Simular otro proceso: renombrar el archivo del pid actual
+            path = next(tmp_path.glob("[0-9]*.json"))
+            path.rename(tmp_path / f"other-{len(list(tmp_path.glob('other-*')))}.json")
+
+        report = load_report(tmp_path)
+        assert report["MASTER.md"]["acquired"] == 2
+        assert report["MASTER.md"]["timeouts"] == 2
+        assert report["MASTER.md"]["wait"]["count"] == 4
+
+    def test_report_ranks_hot_locks_first(self, tmp_path):
+        collector = LockStats(stats_dir=tmp_path)
+        collector.record_acquire("cold.md", 0.001)
+        collector.record_acquire("hot.md", 2.0)
+        collector.flush()
+        assert list(load_report(tmp_path)) == ["hot.md", "cold.md"]
+
+    def test_dead_process_files_fold_into_cumulative(self, tmp_path):
+        collector = LockStats(stats_dir=tmp_path)
+        collector.record_acquire("MASTER.md", 0.01)
+        collector.flush()
+        live = tmp_path / f"{os.getpid()}.json"
+        for dead_pid in (2 ** 22 + 1, 2 ** 22 + 2):
+            (tmp_path / f"{dead_pid}.json").write_bytes(live.read_bytes())
+
+        report = load_report(tmp_path)
+        assert report["MASTER.md"]["acquired"] == 3
+        assert sorted(p.name for p in tmp_path.glob("*.json")) == sorted(
+            [live.name, lock_stats.CUMULATIVE_FILE]
+        )
+
+        # Leer de nuevo no vuelve a sumar lo acumulado
+        assert load_report(tmp_path)["MASTER.md"]["acquired"] == 3
+        assert lock_stats.fold_dead_stats(tmp_path) == 0
+
+    def test_flush_writes_json(self, tmp_path):
+        collector = LockStats(stats_dir=tmp_path)
+        collector.record_stale_break("a.md")
+        collector.flush()
+        data = json.loads(next(tmp_path.glob("*.json")).read_text())
+        assert data["resources"]["a.md"]["stale_breaks"] == 1
+
+
+class TestFileLockInstrumentation:
+    def test_acquire_hold_and_timeout_are_recorded(self, stats):
+        holder = FileLock("a.md", "cli-a")
+        holder.acquire(timeout=1)
+        waiter = FileLock("a.md", "cli-b")
+        assert not waiter.acquire(timeout=0.05)
+        holder.release()
+
+        snap = stats.snapshot()["a.md"]
+        assert snap["acquired"] == 1
+        assert snap["timeouts"] == 1
+        assert snap["hold"]["count"] == 1
+        assert snap["wait"]["max_ms"] >= 50
+
+    def test_nonblocking_probe_is_not_a_timeout(self, stats):
+        holder = FileLock("a.md", "cli-a")
+        holder.acquire(timeout=1)
+        assert not FileLock("a.md", "cli-b").acquire(blocking=False)
+        holder.release()
+        assert stats.snapshot()["a.md"]["timeouts"] == 0
+
+    @pytest.mark.skipif(not KERNEL_LOCKS_SUPPORTED, reason="requiere flock")
+    def test_orphaned_metadata_counts_as_stale_break(self, stats):
+        lock = FileLock("a.md", "cli-a", backend="kernel")
+        lock.lock_path.write_text(json.dumps({"instance_id": "cli-dead"}))
+        lock.acquire(timeout=1)
+        lock.release()
+        assert stats.snapshot()["a.md"]["stale_breaks"] == 1
+
+    def test_legacy_dead_owner_is_broken(self, stats):
+        lock = FileLock("a.md", "cli-a", backend="legacy")
+        lock.lock_path.write_text(json.dumps({
+            "instance_id": "cli-dead", "pid": 2 ** 22 + 1,
+            "timestamp": "2099-01-01T00:00:00", "timeout": 60, "resource": "a.md",
+        }))
+        assert lock.acquire(timeout=1)
+        lock.release()
+        assert stats.snapshot()["a.md"]["stale_breaks"] == 1
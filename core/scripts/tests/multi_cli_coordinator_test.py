@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for multi_cli_coordinator.py (lock_files).
+
+Cubre:
+  1. Eventos FILE_LOCKED/FILE_UNLOCKED solo para escrituras, comparando
+     rutas resueltas como acquire_many
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports (test is in core/scripts/tests/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from event_bridge import EventType
+from multi_cli_coordinator import MultiCLICoordinator
+
+
+class _RecordingBridge:
+    def __init__(self):
+        self.published = []
+
+    def try_publish(self, event_type, data):
+        self.published.append((event_type, data["file"]))
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    """Coordinador sin registro, threads ni señales (solo lo que usa lock_files)."""
+    monkeypatch.chdir(tmp_path)
+    coord = MultiCLICoordinator.__new__(MultiCLICoordinator)
+    coord.instance_id = "cli-test"
+    coord.event_bridge = _RecordingBridge()
+    coord._active_locks = {}
+    coord._locks_lock = threading.Lock()
+    return coord
+
+
+class TestLockFiles:
+    def test_shared_paths_match_after_normalization(self, coordinator):
+        with coordinator.lock_files(["a.md", "b.md"], timeout=1, shared=["./a.md"]) as locks:
+            assert len(locks) == 2
+
+        published = coordinator.event_bridge.published
+        assert published == [
+            (EventType.FILE_LOCKED, "b.md"),
+            (EventType.FILE_UNLOCKED, "b.md"),
+        ]
+
+    def test_same_file_twice_is_announced_once(self, coordinator):
+        with coordinator.lock_files(["a.md", "./a.md"], timeout=1):
+            pass
+        assert [e for e, _ in coordinator.event_bridge.published] == [
+            EventType.FILE_LOCKED,
+            EventType.FILE_UNLOCKED,
+        ]
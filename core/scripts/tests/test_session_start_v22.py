@@ -587,3 +587,31 @@ class TestVersion:
 # --- MAIN ---
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
+
+
+# --- TEST: Model Preload ---
+
+class TestModelPreload:
+    """Tests for start_model_preload() (background Ollama warm-up)."""
+
+    def test_no_config_does_not_spawn(self, tmp_path):
+        with patch.object(session_start, "PROVIDERS_CONFIG_DIR", tmp_path), \
+             patch.object(session_start.subprocess, "Popen") as popen:
+            assert session_start.start_model_preload() is False
+            popen.assert_not_called()
+
+    def test_spawns_detached_preload(self, tmp_path):
+        (tmp_path / "providers.json").write_text("{}", encoding="utf-8")
+        with patch.object(session_start, "PROVIDERS_CONFIG_DIR", tmp_path), \
+             patch.object(session_start.subprocess, "Popen") as popen:
+            assert session_start.start_model_preload() is True
+
+        cmd = popen.call_args[0][0]
+        assert cmd[-2:] == [str(session_start.MULTI_ENGINE_SCRIPT), "--preload"]
+        assert popen.call_args[1]["stdout"] == session_start.subprocess.DEVNULL
+
+    def test_spawn_failure_is_ignored(self, tmp_path):
+        (tmp_path / "providers.json").write_text("{}", encoding="utf-8")
+        with patch.object(session_start, "PROVIDERS_CONFIG_DIR", tmp_path), \
+             patch.object(session_start.subprocess, "Popen", side_effect=OSError("no exec")):
+            assert session_start.start_model_preload() is False
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests del cache de completions (core/providers/completion_cache.py)
+
+Cubre:
+  1. Clave canónica: orden de dicts y opciones de transporte no cuentan
+  2. Persistencia SQLite entre instancias
+  3. Expiración por TTL y evicción LRU por entradas/bytes
+  4. MultiEngine: solo temperature=0 u opt-in, mock nunca se cachea,
+     estadísticas en status_report
+
+Run: pytest tests/completion_cache_test.py -v
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROVIDERS_DIR = Path(__file__).resolve().parent.parent / "core" / "providers"
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from completion_cache import CompletionCache, cache_key  # noqa: E402
+from multi_engine import EngineBase, MultiEngine  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "resume esto"}]
+
+
+class CountingEngine(EngineBase):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def list_models(self):
+        return ["llama3.2"]
+
+    def generate(self, messages, model, **kwargs):
+        self.calls += 1
+        return {
+            "content": f"respuesta {self.calls}",
+            "model": model,
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+        }
+
+    def health(self):
+        return True
+
+
+@pytest.fixture
+def cache(tmp_path):
+    store = CompletionCache(tmp_path / "completions.db")
+    yield store
+    store.close()
+
+
+def _result(content="ok"):
+    return {"content": content, "usage": {"prompt_tokens": 4, "completion_tokens": 2}}
+
+
+class TestCacheKey:
+    def test_dict_order_does_not_matter(self):
+        a = cache_key("m", [{"role": "user", "content": "x"}], {"temperature": 0, "top_p": 1})
+        b = cache_key("m", [{"content": "x", "role": "user"}], {"top_p": 1, "temperature": 0})
+        assert a == b
+
+    def test_transport_options_are_ignored(self):
+        base = cache_key("m", MESSAGES, {"temperature": 0})
+        assert base == cache_key("m", MESSAGES, {"temperature": 0, "timeout": 5, "max_retries": 1})
+
+    def test_keep_alive_is_ignored(self):
+        base = cache_key("m", MESSAGES, {"temperature": 0})
+        assert base == cache_key("m", MESSAGES, {"temperature": 0, "keep_alive": "30m"})
+        assert base == cache_key("m", MESSAGES, {"temperature": 0, "keep_alive": -1})
+
+    def test_sampling_kwargs_change_key(self):
+        base = cache_key("m", MESSAGES, {"temperature": 0})
+        assert base != cache_key("m", MESSAGES, {"temperature": 0, "max_tokens": 10})
+        assert base != cache_key("other", MESSAGES, {"temperature": 0})
+
+
+class TestCompletionCache:
+    def test_roundtrip_and_stats(self, cache):
+        assert cache.get("k") is None
+        cache.put("k", "m", _result(), latency=1.5)
+
+        assert cache.get("k") == _result()
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["saved_tokens"] == 6
+        assert stats["saved_latency_s"] == 1.5
+        assert stats["entries"] == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "completions.db"
+        first = CompletionCache(path)
+        first.put("k", "m", _result("guardado"))
+        first.close()
+
+        second = CompletionCache(path)
+        assert second.get("k")["content"] == "guardado"
+        second.close()
+
+    def test_ttl_expiry(self, cache):
+        cache.put("k", "m", _result())
+        cache.ttl = 0
+        assert cache.get("k") is None
+
+    def test_lru_eviction_by_entries(self, tmp_path):
+        store = CompletionCache(tmp_path / "c.db", max_entries=2)
+        store.put("a", "m", _result("a"))
+        store.put("b", "m", _result("b"))
+        store.get("a")  # "b" queda como la menos usada
+        store.put("c", "m", _result("c"))
+
+        assert store.get("b") is None
+        assert store.get("a") is not None and store.get("c") is not None
+        store.close()
+
+    def test_eviction_by_bytes(self, tmp_path):
+        store = CompletionCache(tmp_path / "c.db", max_bytes=300)
+        for i in range(5):
+            store.put(str(i), "m", _result("x" * 100))
+        stats = store.stats()
+        assert stats["size_bytes"] <= 300
+        assert stats["entries"] < 5
+        assert store.get("4") is not None  # la más reciente sobrevive
+        store.close()
+
+
+class TestMultiEngineCache:
+    def test_deterministic_requests_are_cached(self, cache):
+        local = CountingEngine()
+        with MultiEngine([("local", local)], monitor=False, cache=cache) as engine:
+            first = engine.generate(MESSAGES, "llama3.2", temperature=0)
+            second = engine.generate(MESSAGES, "llama3.2", temperature=0, timeout=5)
+            report = engine.status_report()["cache"]
+
+        assert local.calls == 1
+        assert second["content"] == first["content"]
+        assert second["cached"] is True and "cached" not in first
+        assert report["hits"] == 1 and report["saved_tokens"] == 10
+
+    def test_sampled_requests_skip_cache_unless_opted_in(self, cache):
+        local = CountingEngine()
+        with MultiEngine([("local", local)], monitor=False, cache=cache) as engine:
+            engine.generate(MESSAGES, "llama3.2", temperature=0.7)
+            engine.generate(MESSAGES, "llama3.2", temperature=0.7)
+            assert local.calls == 2
+
+            engine.generate(MESSAGES, "llama3.2", temperature=0.7, cache=True)
+            engine.generate(MESSAGES, "llama3.2", temperature=0.7, cache=True)
+            assert local.calls == 3
+
+            engine.generate(MESSAGES, "llama3.2", temperature=0, cache=False)
+            assert local.calls == 4
+
+    def test_mock_fallback_is_not_cached(self, cache):
+        local = CountingEngine()
+        local.generate = lambda *a, **k: (_ for _ in ()).throw(ConnectionRefusedError("down"))
+        with MultiEngine([("local", local)], monitor=False, cache=cache) as engine:
+            engine.generate(MESSAGES, "llama3.2", temperature=0)
+        assert cache.stats()["entries"] == 0
+
+    def test_async_path_uses_cache(self, cache):
+        local = CountingEngine()
+        with MultiEngine([("local", local)], monitor=False, cache=cache) as engine:
+            engine.generate(MESSAGES, "llama3.2", temperature=0)
+            result = asyncio.run(engine.agenerate(MESSAGES, "llama3.2", temperature=0))
+        assert result["cached"] is True
+        assert local.calls == 1
+
+    def test_no_cache_by_default(self):
+        with MultiEngine([("local", CountingEngine())], monitor=False) as engine:
+            assert engine.status_report()["cache"] is None
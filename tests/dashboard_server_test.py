@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests del prober de opencode del dashboard (core/scripts/dashboard_server.py)
+
+Cubre:
+  1. OpencodeProber: sondeo en segundo plano, refresh inmediato y mark()
+  2. /api/status y /api/opencode/sessions responden desde el estado
+     cacheado aunque el serve esté colgado
+
+Run: pytest tests/dashboard_server_test.py -v
+"""
+import importlib.util
+import json
+import sys
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / "core" / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+spec = importlib.util.spec_from_file_location("dashboard_server", SCRIPT_DIR / "dashboard_server.py")
+ds = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ds)
+
+
+def _wait(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout esperando al prober"
+        time.sleep(0.01)
+
+
+class SlowServe:
+    """Reemplazo de opencode_serving: tarda ``delay`` y devuelve ``up``"""
+
+    def __init__(self, delay=0.0, up=True):
+        self.delay = delay
+        self.up = up
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.up
+
+
+@pytest.fixture
+def prober():
+    p = ds.OpencodeProber(interval=60)
+    yield p
+    p.stop()
+
+
+class TestOpencodeProber:
+    def test_probes_in_background(self, prober):
+        with patch.object(ds, "opencode_installed", return_value="/usr/bin/opencode"), \
+             patch.object(ds, "opencode_serving", SlowServe()):
+            prober.start()
+            _wait(lambda: prober.checked_at is not None)
+        assert prober.snapshot()["installed"] and prober.snapshot()["serving"]
+
+    def test_refresh_probes_immediately(self, prober):
+        serve = SlowServe(up=False)
+        with patch.object(ds, "opencode_installed", return_value=None), \
+             patch.object(ds, "opencode_serving", serve):
+            prober.start()
+            _wait(lambda: serve.calls == 1)
+            serve.up = True
+            prober.refresh()
+            _wait(lambda: prober.serving)
+        assert serve.calls == 2
+
+    def test_mark_sets_known_state(self, prober):
+        prober.mark(True)
+        assert prober.snapshot()["serving"] is True
+        assert prober.checked_at is not None
+
+
+class TestStatusEndpoints:
+    @pytest.fixture
+    def server(self, prober):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), ds.Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        with patch.object(ds, "_prober", prober):
+            yield f"http://127.0.0.1:{srv.server_address[1]}"
+        srv.shutdown()
+        srv.server_close()
+
+    def _get(self, url):
+        try:
+            with urllib.request.urlopen(url, timeout=5) as r:
+                return r.status, json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_status_does_not_wait_for_hung_serve(self, server, prober):
+        with patch.object(ds, "opencode_installed", return_value="/usr/bin/opencode"), \
+             patch.object(ds, "opencode_serving", SlowServe(delay=1.0)):
+            prober.start()
+            started = time.monotonic()
+            st, data = self._get(server + "/api/status")
+            elapsed = time.monotonic() - started
+        assert st == 200 and elapsed < 0.5
+        assert data["opencode"]["installed"] is True
+        assert data["opencode"]["serving"] is False  # aún sin veredicto
+
+    def test_sessions_short_circuits_when_down(self, server, prober):
+        prober.mark(False)
+        with patch.object(ds, "oc_call") as oc_call:
+            st, data = self._get(server + "/api/opencode/sessions")
+        assert st == 503 and not data["ok"]
+        oc_call.assert_not_called()
+
+    def test_sessions_marks_down_on_connection_error(self, server, prober):
+        prober.mark(True)
+        with patch.object(ds, "oc_call", return_value=(-1, "connection refused")):
+            st, _ = self._get(server + "/api/opencode/sessions")
+        assert st == 502
+        assert prober.serving is False
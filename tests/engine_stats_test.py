@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests de estadísticas por engine (core/providers/engine_stats.py)
+
+Cubre:
+  1. CircuitBreaker: closed → open → half-open → closed/open
+  2. EngineStats: EWMA, ventana de error rate, percentiles
+
+Run: pytest tests/engine_stats_test.py -v
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROVIDERS_DIR = Path(__file__).resolve().parent.parent / "core" / "providers"
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from engine_stats import CircuitBreaker, EngineStats  # noqa: E402
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        assert not breaker.record_failure(1.0, 1)
+        assert not breaker.record_failure(1.0, 2)
+        assert breaker.record_failure(1.0, 3)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_opens_on_error_rate(self):
+        breaker = CircuitBreaker(failure_threshold=100, error_rate_threshold=0.5, min_requests=10)
+        assert not breaker.record_failure(0.6, 5)  # pocas muestras
+        assert breaker.record_failure(0.6, 10)
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure(1.0, 1)
+        assert not breaker.available()
+        time.sleep(0.06)
+
+        assert breaker.available()
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()  # el trial sigue en vuelo
+
+        assert breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens_with_backoff(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure(1.0, 1)
+        time.sleep(0.06)
+        assert breaker.allow()
+
+        assert breaker.record_failure(1.0, 1)
+        assert breaker.state == CircuitBreaker.OPEN
+        time.sleep(0.06)
+        assert not breaker.available()  # el cool-down ahora es 0.1s
+        assert breaker.trips == 2
+
+
+class TestEngineStats:
+    def test_ewma_latency(self):
+        stats = EngineStats(alpha=0.5)
+        stats.record_success(1.0)
+        stats.record_success(3.0)
+        assert stats.ewma_latency == pytest.approx(2.0)
+
+    def test_error_rate_window(self):
+        stats = EngineStats(error_window=4, breaker=CircuitBreaker(failure_threshold=100))
+        for _ in range(4):
+            stats.record_failure()
+        for _ in range(2):
+            stats.record_success(0.1)
+        assert stats.error_rate == pytest.approx(0.5)
+        assert stats.errors == 4 and stats.requests == 6
+
+    def test_expected_latency_penalizes_errors(self):
+        stats = EngineStats(breaker=CircuitBreaker(failure_threshold=100, min_requests=100))
+        assert stats.expected_latency(0.2) == pytest.approx(0.2)  # sin medir
+        stats.record_success(1.0)
+        stats.record_failure()
+        assert stats.expected_latency(0.2) == pytest.approx(2.0)
+
+    def test_closing_clears_error_window(self):
+        stats = EngineStats(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.0))
+        stats.record_failure()
+        assert stats.record_failure()
+        assert stats.breaker.allow()  # half-open inmediato
+        stats.record_success(0.1)
+        assert stats.breaker.state == CircuitBreaker.CLOSED
+        assert stats.error_rate == 0.0
+
+    def test_percentile(self):
+        stats = EngineStats()
+        assert stats.percentile(0.5) is None
+        for i in range(1, 11):
+            stats.record_success(i / 10)
+        assert stats.percentile(0.5) == pytest.approx(0.6)
+        assert stats.percentile(0.99) == pytest.approx(1.0)
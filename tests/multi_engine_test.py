@@ -0,0 +1,996 @@
+#!/usr/bin/env python3
+"""
+Tests de MultiEngine (core/providers/multi_engine.py)
+
+Cubre:
+  1. Routing sin health checks en el hot path (estado cacheado)
+  2. Fallas reales de requests marcan el engine al instante
+  3. HealthMonitor: backoff con jitter y recuperación en background
+  4. generate_stream: NDJSON (Ollama), SSE (OpenAI) y fallback
+  5. API asyncio: agenerate/agather con límites de concurrencia
+  6. Requests hedged y deadline a través de los reintentos
+  7. Circuit breaker por engine y routing por latencia esperada
+  8. Discovery en paralelo, con deadline, single-flight y stale-while-revalidate
+  9. generate_batch: orden, errores por item, cuotas por engine, deadline
+ 10. Ollama keep_alive, precarga, vista de residencia (/api/ps) y routing
+     que prefiere modelos ya cargados
+
+Run: pytest tests/multi_engine_test.py -v
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROVIDERS_DIR = Path(__file__).resolve().parent.parent / "core" / "providers"
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from http_transport import HTTPStatusError, HTTPTransport  # noqa: E402
+from rate_limit import RateLimiter, TokenBucket  # noqa: E402
+from multi_engine import (  # noqa: E402
+    DeadlineExceeded,
+    EngineBase,
+    HealthMonitor,
+    MockEngine,
+    MultiEngine,
+    OllamaEngine,
+    OpenAICompatEngine,
+    _duration_seconds,
+    preload_from_config,
+)
+
+
+class FakeEngine(EngineBase):
+    """Engine en memoria con contadores y fallas inyectables"""
+
+    def __init__(self, name, models, healthy=True):
+        self.name = name
+        self.models = list(models)
+        self.healthy = healthy
+        self.error = None  # Excepción a lanzar en generate
+        self.health_calls = 0
+        self.generate_calls = 0
+
+    def list_models(self):
+        return self.models if self.healthy else []
+
+    def generate(self, messages, model, **kwargs):
+        self.generate_calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"model": model, "content": self.name, "usage": {}}
+
+    def health(self):
+        self.health_calls += 1
+        return self.healthy
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+MESSAGES = [{"role": "user", "content": "hola"}]
+
+
+@pytest.fixture
+def engines():
+    local = FakeEngine("local", ["llama3.2"])
+    cloud = FakeEngine("cloud", ["gpt-4o-mini"])
+    return local, cloud
+
+
+class TestCachedRouting:
+    def test_generate_does_not_probe_health(self, engines):
+        local, cloud = engines
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            probes = local.health_calls
+            for _ in range(20):
+                assert engine.generate(MESSAGES, "llama3.2")["content"] == "local"
+            assert local.health_calls == probes
+
+    def test_routing_is_fast(self, engines):
+        local, cloud = engines
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            start = time.perf_counter()
+            for _ in range(1000):
+                engine._engine_for("llama3.2")
+            assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+class TestRequestFeedback:
+    def test_connection_error_marks_unhealthy_and_falls_back(self, engines):
+        local, cloud = engines
+        local.error = ConnectionRefusedError("ollama down")
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            result = engine.generate(MESSAGES, "llama3.2")
+            status = engine.status_report()["engines"]["local"]
+
+            assert result["content"] == "cloud"
+            assert local.generate_calls == 1  # no se reintenta el engine caído
+            assert status["healthy"] is False
+            assert status["consecutive_failures"] == 1
+            assert "ollama down" in status["last_error"]
+
+    def test_client_error_keeps_engine_healthy(self, engines):
+        local, cloud = engines
+        local.error = HTTPStatusError("http://x/api/chat", 404, "Not Found")
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            engine.generate(MESSAGES, "llama3.2", max_retries=0)
+            assert engine.status_report()["engines"]["local"]["healthy"] is True
+
+    def test_success_restores_health(self, engines):
+        local, cloud = engines
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            engine._record_health("cloud", False, 10.0, "timeout")
+            assert not engine._is_healthy(cloud)
+            # Un request exitoso (p.ej. vía prefijo cloud) lo rehabilita
+            engine._report_outcome(cloud, None)
+            assert engine.status_report()["engines"]["cloud"]["healthy"] is True
+
+
+class TestHealthMonitor:
+    def test_backoff_grows_and_is_capped(self):
+        monitor = HealthMonitor([], lambda *a: 0, interval=1.0, max_backoff=8.0, jitter=0.1)
+        assert 0.9 <= monitor.delay(0) <= 1.1
+        assert 0.9 <= monitor.delay(1) <= 1.1
+        assert 3.6 <= monitor.delay(3) <= 4.4
+        assert 7.2 <= monitor.delay(10) <= 8.8
+
+    def test_jitter_spreads_delays(self):
+        monitor = HealthMonitor([], lambda *a: 0, interval=1.0, jitter=0.2)
+        assert len({round(monitor.delay(0), 6) for _ in range(20)}) > 1
+
+    def test_monitor_detects_recovery_and_adopts_models(self):
+        local = FakeEngine("local", ["llama3.2"], healthy=False)
+        with MultiEngine([("local", local)], health_interval=0.05) as engine:
+            engine.start_monitor()
+            assert "llama3.2" not in engine.list_models()
+
+            local.healthy = True
+            assert _wait_for(lambda: engine.status_report()["engines"]["local"]["healthy"])
+            assert _wait_for(lambda: "llama3.2" in engine._model_map)
+            assert engine.generate(MESSAGES, "llama3.2")["content"] == "local"
+
+    def test_monitor_marks_engine_down(self):
+        local = FakeEngine("local", ["llama3.2"])
+        with MultiEngine([("local", local)], health_interval=0.05) as engine:
+            engine.start_monitor()
+            local.healthy = False
+            assert _wait_for(lambda: not engine._is_healthy(local))
+
+    def test_close_stops_thread(self, engines):
+        local, _ = engines
+        engine = MultiEngine([("local", local)], health_interval=0.05)
+        engine.start_monitor()
+        assert engine.status_report()["monitor_running"]
+        engine.close()
+        assert not engine.status_report()["monitor_running"]
+
+    def test_monitor_starts_with_first_request(self, engines):
+        local, _ = engines
+        with MultiEngine([("local", local)], health_interval=0.05) as engine:
+            assert not engine.status_report()["monitor_running"]
+            engine.generate(MESSAGES, "llama3.2")
+            assert engine.status_report()["monitor_running"]
+
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            engine.generate(MESSAGES, "llama3.2")
+            assert not engine.status_report()["monitor_running"]
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """Responde /api/chat en NDJSON y /v1/chat/completions en SSE (chunked)"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    TOKENS = ["Hola", " mundo", "!"]
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.bodies.append(body)
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+
+        if self.path == "/api/chat":
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for token in self.TOKENS:
+                line = {"message": {"role": "assistant", "content": token}, "done": False}
+                self._chunk(json.dumps(line).encode() + b"\n")
+            final = {
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "done_reason": "stop",
+                "prompt_eval_count": 5,
+                "eval_count": 3,
+            }
+            self._chunk(json.dumps(final).encode() + b"\n")
+        else:
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for token in self.TOKENS:
+                event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                self._chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+            last = {"choices": [{"index": 0, "delta": {}, "finish_reason": "length"}]}
+            self._chunk(b"data: " + json.dumps(last).encode() + b"\n\n")
+            usage = {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 3}}
+            self._chunk(b"data: " + json.dumps(usage).encode() + b"\n\n")
+            self._chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def stream_server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+    srv.daemon_threads = True
+    srv.bodies = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+class TestStreaming:
+    def test_ollama_ndjson_stream(self, stream_server):
+        transport = HTTPTransport()
+        engine = OllamaEngine(stream_server.url, transport=transport)
+
+        chunks = list(engine.generate_stream(MESSAGES, "llama3.2"))
+        list(engine.generate_stream(MESSAGES, "llama3.2"))
+
+        assert "".join(c["delta"] for c in chunks) == "Hola mundo!"
+        assert chunks[-1]["done"] is True
+        assert chunks[-1]["usage"] == {"prompt_tokens": 5, "completion_tokens": 3}
+        assert stream_server.bodies[0]["stream"] is True
+        assert transport.stats.connections_opened == 1  # el stream drenado se reutiliza
+
+    def test_openai_sse_stream(self, stream_server):
+        transport = HTTPTransport()
+        engine = OpenAICompatEngine("key", base_url=stream_server.url + "/v1", transport=transport)
+
+        chunks = list(engine.generate_stream(MESSAGES, "gpt-4o-mini"))
+
+        assert [c["delta"] for c in chunks[:-1]] == ["Hola", " mundo", "!"]
+        assert chunks[-1]["finish_reason"] == "length"
+        assert chunks[-1]["usage"]["completion_tokens"] == 3
+        assert stream_server.bodies[0]["stream_options"] == {"include_usage": True}
+
+    def test_mock_stream_matches_generate(self):
+        mock = MockEngine()
+        text = "".join(c["delta"] for c in mock.generate_stream(MESSAGES, "m"))
+        assert text == mock.generate(MESSAGES, "m")["content"]
+
+    def test_default_stream_wraps_generate(self, engines):
+        local, _ = engines
+        chunks = list(local.generate_stream(MESSAGES, "llama3.2"))
+        assert chunks[0] == {"delta": "local"}
+        assert chunks[-1]["done"] is True
+
+
+class _BrokenStream(FakeEngine):
+    def __init__(self, name, models, fail_after):
+        super().__init__(name, models)
+        self.fail_after = fail_after
+
+    def generate_stream(self, messages, model, **kwargs):
+        for i in range(self.fail_after):
+            yield {"delta": f"t{i}"}
+        raise ConnectionResetError("stream cortado")
+
+
+class TestMultiEngineStreaming:
+    def test_falls_back_before_first_chunk(self, engines):
+        _, cloud = engines
+        local = _BrokenStream("local", ["llama3.2"], fail_after=0)
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)], monitor=False
+        ) as engine:
+            chunks = list(engine.generate_stream(MESSAGES, "llama3.2"))
+
+            assert chunks[0] == {"delta": "cloud"}
+            assert not engine._is_healthy(local)
+
+    def test_no_fallback_after_first_chunk(self, engines):
+        _, cloud = engines
+        local = _BrokenStream("local", ["llama3.2"], fail_after=2)
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)], monitor=False
+        ) as engine:
+            received = []
+            with pytest.raises(ConnectionResetError):
+                for chunk in engine.generate_stream(MESSAGES, "llama3.2"):
+                    received.append(chunk["delta"])
+
+            assert received == ["t0", "t1"]
+            assert cloud.generate_calls == 0
+
+
+class _AsyncFake(FakeEngine):
+    """Engine async que registra cuántas llamadas hay en vuelo a la vez"""
+
+    def __init__(self, name, models, max_concurrency=8, delay=0.02):
+        super().__init__(name, models)
+        self.max_concurrency = max_concurrency
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def agenerate(self, messages, model, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return {"model": model, "content": messages[0]["content"], "usage": {}}
+        finally:
+            self.in_flight -= 1
+
+
+def _requests(n, model="llama3.2"):
+    return [{"messages": [{"role": "user", "content": str(i)}], "model": model} for i in range(n)]
+
+
+class TestAsyncMultiEngine:
+    def test_agather_keeps_order(self):
+        local = _AsyncFake("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            results = asyncio.run(engine.agather(_requests(20)))
+        assert [r["content"] for r in results] == [str(i) for i in range(20)]
+
+    def test_per_engine_semaphore(self):
+        local = _AsyncFake("local", ["llama3.2"], max_concurrency=2)
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            asyncio.run(engine.agather(_requests(10), max_in_flight=10))
+        assert local.peak == 2
+
+    def test_global_in_flight_limit(self):
+        local = _AsyncFake("local", ["llama3.2"], max_concurrency=50)
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            asyncio.run(engine.agather(_requests(12), max_in_flight=3))
+        assert local.peak == 3
+
+    def test_concurrency_without_threads(self):
+        local = _AsyncFake("local", ["llama3.2"], max_concurrency=50, delay=0.1)
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            threads = threading.active_count()
+            start = time.perf_counter()
+            asyncio.run(engine.agather(_requests(50), max_in_flight=50))
+            elapsed = time.perf_counter() - start
+        assert elapsed < 1.0  # 50 × 0.1s en serie serían 5s
+        assert threading.active_count() <= threads
+
+    def test_agenerate_falls_back_and_marks_unhealthy(self):
+        local = _AsyncFake("local", ["llama3.2"])
+        local.error = ConnectionRefusedError("down")
+        cloud = _AsyncFake("cloud", ["gpt-4o-mini"])
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            result = asyncio.run(engine.agenerate(MESSAGES, "llama3.2"))
+            assert result["content"] == "hola"
+            assert cloud.peak == 1
+            assert not engine._is_healthy(local)
+
+    def test_agather_returns_exceptions_in_place(self):
+        local = _AsyncFake("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            bad = {"messages": MESSAGES}  # sin model
+            results = asyncio.run(engine.agather(_requests(2) + [bad]))
+        assert isinstance(results[2], KeyError)
+        assert results[0]["content"] == "0"
+
+    def test_default_async_runs_sync_engine(self, engines):
+        local, _ = engines
+        result = asyncio.run(local.agenerate(MESSAGES, "llama3.2"))
+        assert result["content"] == "local"
+
+
+class _SlowEngine(FakeEngine):
+    """Engine con latencia fija que respeta ``timeout`` como un transporte real"""
+
+    def __init__(self, name, models, delay):
+        super().__init__(name, models)
+        self.delay = delay
+        self.cancelled = False
+
+    def generate(self, messages, model, **kwargs):
+        timeout = kwargs.get("timeout")
+        if timeout is not None and timeout < self.delay:
+            time.sleep(timeout)
+            raise TimeoutError("timed out")
+        time.sleep(self.delay)
+        return super().generate(messages, model, **kwargs)
+
+    async def agenerate(self, messages, model, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return super().generate(messages, model, **kwargs)
+
+
+def _hedged(local, cloud=None, **options):
+    engines = [("local", local)] + ([("cloud", cloud)] if cloud else [])
+    return MultiEngine(engines, monitor=False, hedge=True, hedge_delay=0.05, **options)
+
+
+class TestHedging:
+    def test_slow_primary_is_hedged(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.5)
+        cloud = _SlowEngine("cloud", ["gpt-4o-mini"], delay=0.0)
+        with _hedged(local, cloud) as engine:
+            start = time.perf_counter()
+            result = engine.generate(MESSAGES, "llama3.2")
+            elapsed = time.perf_counter() - start
+            hedging = engine.status_report()["hedging"]
+
+        assert result["content"] == "cloud"
+        assert elapsed < 0.3
+        assert hedging["hedged"] == 1 and hedging["hedge_wins"] == 1
+
+    def test_fast_primary_is_not_hedged(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.0)
+        cloud = _SlowEngine("cloud", ["gpt-4o-mini"], delay=0.0)
+        with _hedged(local, cloud) as engine:
+            assert engine.generate(MESSAGES, "llama3.2")["content"] == "local"
+            assert engine.status_report()["hedging"]["hedged"] == 0
+        assert cloud.generate_calls == 0
+
+    def test_never_hedges_to_mock(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.15)
+        with _hedged(local) as engine:
+            assert engine.generate(MESSAGES, "llama3.2")["content"] == "local"
+            assert engine.status_report()["hedging"]["hedged"] == 0
+
+    def test_delay_follows_latency_percentile(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.0)
+        with _hedged(local, hedge_percentile=0.5) as engine:
+            assert engine._hedge_after(local) == 0.05  # sin muestras
+            for i in range(MultiEngine.HEDGE_MIN_SAMPLES):
+                engine._report_outcome(local, None, elapsed=i / 1000)
+            assert engine._hedge_after(local) == pytest.approx(0.010)
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_retry_skips_every_engine_the_hedge_tried(self, use_async):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.15)
+        cloud = _SlowEngine("cloud", ["gpt-4o-mini"], delay=0.0)
+        other = _SlowEngine("other", ["qwen3"], delay=0.0)
+        # Un rechazo (no caída) deja a los engines sanos: solo ``failed`` los excluye
+        local.error = cloud.error = ValueError("rejected")
+        with MultiEngine(
+            [("local", local), ("cloud", cloud), ("other", other)],
+            fallback_order=["local", "cloud", "other", "mock"],
+            monitor=False, hedge=True, hedge_delay=0.05,
+        ) as engine:
+            if use_async:
+                result = asyncio.run(engine.agenerate(MESSAGES, "llama3.2", max_retries=1))
+            else:
+                result = engine.generate(MESSAGES, "llama3.2", max_retries=1)
+
+        assert result["content"] == "other"
+        # El backup del hedge también falló: el retry no vuelve a él
+        assert (local.generate_calls, cloud.generate_calls) == (1, 1)
+
+    def test_async_hedge_cancels_loser(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=1.0)
+        cloud = _SlowEngine("cloud", ["gpt-4o-mini"], delay=0.0)
+        with _hedged(local, cloud) as engine:
+            start = time.perf_counter()
+            result = asyncio.run(engine.agenerate(MESSAGES, "llama3.2"))
+            elapsed = time.perf_counter() - start
+
+        assert result["content"] == "cloud"
+        assert elapsed < 0.5
+        assert local.cancelled
+
+
+class TestDeadline:
+    def test_deadline_bounds_sync_call(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.5)
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            start = time.perf_counter()
+            with pytest.raises(DeadlineExceeded):
+                engine.generate(MESSAGES, "llama3.2", deadline=0.1)
+            assert time.perf_counter() - start < 0.3
+            # Cortado por el presupuesto del caller: el engine sigue sano
+            assert engine._is_healthy(local)
+            assert engine.status_report()["hedging"]["deadline_exceeded"] == 1
+
+    def test_deadline_spans_retries(self):
+        local = FakeEngine("local", ["llama3.2"])
+        local.error = ConnectionRefusedError("down")
+        cloud = _SlowEngine("cloud", ["gpt-4o-mini"], delay=0.5)
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            with pytest.raises(DeadlineExceeded):
+                engine.generate(MESSAGES, "llama3.2", deadline=0.2)
+        assert local.generate_calls == 1
+
+    def test_deadline_is_not_passed_to_engines(self):
+        local = FakeEngine("local", ["llama3.2"])
+        seen = {}
+        local.generate = lambda messages, model, **kwargs: seen.update(kwargs) or {"content": "ok"}
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            engine.generate(MESSAGES, "llama3.2", deadline=5.0, hedge=False)
+        assert "deadline" not in seen and "hedge" not in seen
+        assert 0 < seen["timeout"] <= 5.0
+
+    def test_async_deadline_cancels_call(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=1.0)
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            with pytest.raises(DeadlineExceeded):
+                asyncio.run(engine.agenerate(MESSAGES, "llama3.2", deadline=0.1))
+            assert engine._is_healthy(local)
+        assert local.cancelled
+
+
+class TestCircuitBreakerRouting:
+    def test_breaker_stops_hammering_failing_engine(self, engines):
+        local, cloud = engines
+        local.error = HTTPStatusError("http://x/api/chat", 500, "Internal Server Error")
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)], monitor=False, failure_threshold=3
+        ) as engine:
+            for _ in range(6):
+                assert engine.generate(MESSAGES, "llama3.2")["content"] == "cloud"
+                # El heartbeat responde aunque generate falle
+                engine._record_health("local", True, 1.0)
+            status = engine.status_report()["engines"]["local"]
+
+        assert local.generate_calls == 3
+        assert status["circuit"] == "open"
+        assert status["error_rate"] == 1.0
+
+    def test_retry_skips_engine_that_failed(self, engines):
+        local, cloud = engines
+        local.error = HTTPStatusError("http://x/api/chat", 400, "Bad Request")
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            result = engine.generate(MESSAGES, "llama3.2", max_retries=2)
+        assert result["content"] == "cloud"
+        assert local.generate_calls == 1
+
+    def test_half_open_trial_closes_breaker(self, engines):
+        local, cloud = engines
+        local.error = ConnectionResetError("reset")
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)],
+            monitor=False,
+            failure_threshold=1,
+            breaker_reset=0.05,
+        ) as engine:
+            engine.generate(MESSAGES, "llama3.2")
+            local.error = None
+            engine._record_health("local", True, 1.0)
+            assert engine.generate(MESSAGES, "llama3.2")["content"] == "cloud"
+
+            time.sleep(0.06)
+            assert engine.generate(MESSAGES, "llama3.2")["content"] == "local"
+            assert engine.status_report()["engines"]["local"]["circuit"] == "closed"
+
+
+class TestLatencyRouting:
+    def _engines(self):
+        slow = _SlowEngine("slow", ["llama3.2"], delay=0.03)
+        fast = _SlowEngine("fast", ["llama3.2"], delay=0.0)
+        return slow, fast
+
+    def test_latency_policy_prefers_fastest_engine(self):
+        slow, fast = self._engines()
+        with MultiEngine(
+            [("slow", slow), ("fast", fast)], monitor=False, routing="latency"
+        ) as engine:
+            for _ in range(10):
+                engine.generate(MESSAGES, "llama3.2")
+            report = engine.status_report()
+
+        assert slow.generate_calls <= 1  # como mucho una medición
+        assert fast.generate_calls >= 9
+        assert report["routing"] == "latency"
+        assert report["engines"]["fast"]["ewma_latency_ms"] < 10
+
+    def test_priority_policy_keeps_first_engine(self):
+        slow, fast = self._engines()
+        with MultiEngine([("slow", slow), ("fast", fast)], monitor=False) as engine:
+            for _ in range(3):
+                engine.generate(MESSAGES, "llama3.2")
+        assert slow.generate_calls == 3 and fast.generate_calls == 0
+
+    def test_errors_raise_expected_latency(self):
+        slow, fast = self._engines()
+        with MultiEngine(
+            [("slow", slow), ("fast", fast)], monitor=False, routing="latency"
+        ) as engine:
+            engine._report_outcome(slow, None, 0.03)
+            engine._report_outcome(fast, None, 0.01)
+            for _ in range(4):
+                engine._report_outcome(fast, ConnectionResetError("reset"))
+            engine._record_health("fast", True, 1.0)  # sano pero con 80% de error
+            assert engine._lookup("llama3.2", set()) is slow
+
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError):
+            MultiEngine([("local", FakeEngine("local", []))], monitor=False, routing="random")
+
+
+class _SlowDiscovery(FakeEngine):
+    """Engine cuyo heartbeat tarda ``probe_delay`` y cuenta list_models"""
+
+    def __init__(self, name, models, probe_delay=0.0):
+        super().__init__(name, models)
+        self.probe_delay = probe_delay
+        self.list_calls = 0
+
+    def health(self):
+        time.sleep(self.probe_delay)
+        return super().health()
+
+    def list_models(self):
+        self.list_calls += 1
+        return super().list_models()
+
+
+class TestDiscovery:
+    def test_engines_are_discovered_in_parallel(self):
+        engines = [(f"e{i}", _SlowDiscovery(f"e{i}", [f"m{i}"], probe_delay=0.2)) for i in range(4)]
+        start = time.perf_counter()
+        with MultiEngine(engines, monitor=False) as engine:
+            elapsed = time.perf_counter() - start
+            assert {"m0", "m1", "m2", "m3"} <= set(engine.list_models())
+        assert elapsed < 0.6  # en serie serían 0.8s
+
+    def test_global_deadline_skips_hanging_engine(self):
+        local = _SlowDiscovery("local", ["llama3.2"])
+        hung = _SlowDiscovery("cloud", ["gpt-4o-mini"], probe_delay=2.0)
+        start = time.perf_counter()
+        with MultiEngine(
+            [("local", local), ("cloud", hung)], monitor=False, discovery_timeout=0.2
+        ) as engine:
+            elapsed = time.perf_counter() - start
+            status = engine.status_report()["engines"]["cloud"]
+            assert engine._model_map["llama3.2"] is local
+
+        assert elapsed < 1.0
+        assert status["healthy"] is False
+        assert status["last_error"] == "discovery timed out"
+
+    def test_map_order_follows_engine_order(self):
+        slow = _SlowDiscovery("slow", ["shared"], probe_delay=0.1)
+        fast = _SlowDiscovery("fast", ["shared"])
+        with MultiEngine([("slow", slow), ("fast", fast)], monitor=False) as engine:
+            assert engine._model_map["shared"] is slow
+
+    def test_stale_map_is_served_during_refresh(self):
+        local = _SlowDiscovery("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False, refresh_interval=0.05) as engine:
+            local.models = ["llama3.2", "qwen3"]
+            local.probe_delay = 0.3
+            time.sleep(0.06)
+
+            start = time.perf_counter()
+            assert "qwen3" not in engine.list_models()  # mapa viejo, sin bloquear
+            assert time.perf_counter() - start < 0.1
+            assert _wait_for(lambda: "qwen3" in engine._model_map)
+
+    def test_refresh_is_single_flight(self):
+        local = _SlowDiscovery("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False, refresh_interval=0.05) as engine:
+            local.probe_delay = 0.2
+            time.sleep(0.06)
+            calls = local.list_calls
+
+            threads = [threading.Thread(target=engine._refresh_map) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            engine._refresh_map(wait=True)
+
+            assert local.list_calls == calls + 1
+
+    def test_timed_out_engine_keeps_previous_models(self):
+        local = _SlowDiscovery("local", ["llama3.2"])
+        with MultiEngine(
+            [("local", local)], monitor=False, refresh_interval=0.05, discovery_timeout=0.1
+        ) as engine:
+            local.probe_delay = 0.5
+            time.sleep(0.06)
+            engine._refresh_map(wait=True)
+
+            assert engine._model_map["llama3.2"] is local
+            assert engine._is_healthy(local)
+
+
+class _TimedEngine(_SlowEngine):
+    """Registra el instante en que termina cada generate"""
+
+    def __init__(self, name, models, delay):
+        super().__init__(name, models, delay)
+        self.finished = []
+
+    def generate(self, messages, model, **kwargs):
+        result = super().generate(messages, model, **kwargs)
+        self.finished.append(time.perf_counter())
+        return dict(result, content=messages[0]["content"])
+
+
+class TestGenerateBatch:
+    def test_keeps_order_and_reports_item_errors(self, engines):
+        local, cloud = engines
+        batch = _requests(5) + [{"messages": MESSAGES}] + _requests(2, model="gpt-4o-mini")
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            results = engine.generate_batch(batch, max_concurrency=4)
+
+        assert [r["content"] for r in results[:5]] == ["local"] * 5
+        assert isinstance(results[5], KeyError)
+        assert [r["content"] for r in results[6:]] == ["cloud", "cloud"]
+
+    def test_raises_first_error_without_return_exceptions(self, engines):
+        local, _ = engines
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            with pytest.raises(KeyError):
+                engine.generate_batch([{"messages": MESSAGES}], return_exceptions=False)
+
+    def test_runs_concurrently(self):
+        local = _TimedEngine("local", ["llama3.2"], delay=0.05)
+        local.max_concurrency = 10
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            start = time.perf_counter()
+            results = engine.generate_batch(_requests(20), max_concurrency=10)
+            elapsed = time.perf_counter() - start
+        assert [r["content"] for r in results] == [str(i) for i in range(20)]
+        assert elapsed < 0.5  # en serie serían 1s
+
+    def test_engine_concurrency_cap(self):
+        local = _AsyncFake("local", ["llama3.2"], max_concurrency=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def generate(messages, model, **kwargs):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {"content": "ok"}
+
+        local.generate = generate
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            engine.generate_batch(_requests(10), max_concurrency=8)
+        assert peak[0] == 2
+
+    def test_failed_item_moves_to_another_engine(self, engines):
+        local, cloud = engines
+        local.error = ConnectionResetError("reset")
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            results = engine.generate_batch(_requests(3), max_concurrency=1)
+        assert [r["content"] for r in results] == ["cloud"] * 3
+
+    def test_throttled_provider_does_not_stall_local_work(self):
+        local = _TimedEngine("local", ["llama3.2"], delay=0.02)
+        cloud = _TimedEngine("cloud", ["gpt-4o-mini"], delay=0.0)
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            # Ráfaga de 1 y 10 requests/s: 5 items cloud tardan ~0.4s
+            limiter = RateLimiter()
+            limiter.requests = TokenBucket(per_minute=600, capacity=1)
+            engine._limiters["cloud"] = limiter
+
+            batch = _requests(5, model="gpt-4o-mini") + _requests(20)
+            start = time.perf_counter()
+            results = engine.generate_batch(batch, max_concurrency=2)
+            report = engine.status_report()["engines"]["cloud"]["rate_limit"]
+
+        assert all(isinstance(r, dict) for r in results)
+        assert max(local.finished) - start < 0.35
+        assert max(cloud.finished) - start >= 0.35
+        assert report["throttled"] > 0
+
+    def test_item_deadline_is_honoured(self):
+        local = _SlowEngine("local", ["llama3.2"], delay=0.5)
+        batch = [
+            {"messages": MESSAGES, "model": "llama3.2", "deadline": 0.1},
+            {"messages": MESSAGES, "model": "llama3.2", "hedge": True},
+        ]
+        with MultiEngine([("local", local)], monitor=False) as engine:
+            start = time.perf_counter()
+            results = engine.generate_batch(batch)
+            elapsed = time.perf_counter() - start
+
+        assert isinstance(results[0], DeadlineExceeded)
+        assert elapsed < 0.4
+        assert local.generate_calls == 0  # timeout recortado: nunca llegó a responder
+        assert isinstance(results[1], ValueError)
+
+    def test_quota_from_engine_attributes(self, engines):
+        local, cloud = engines
+        cloud.requests_per_minute = 30
+        cloud.tokens_per_minute = 5000
+        with MultiEngine([("local", local), ("cloud", cloud)], monitor=False) as engine:
+            report = engine.status_report()["engines"]
+        assert report["cloud"]["rate_limit"]["requests"]["per_minute"] == pytest.approx(30)
+        assert report["local"]["rate_limit"] is None
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    """/api/tags, /api/ps y /api/chat de Ollama; registra los bodies"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/ps":
+            self._send({"models": self.server.running})
+        else:
+            self._send({"models": [{"name": "llama3.2:latest"}]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.bodies.append(body)
+        self._send({"model": body["model"], "message": {"role": "assistant", "content": "ok"}, "done": True})
+
+
+@pytest.fixture
+def ollama_server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+    srv.daemon_threads = True
+    srv.bodies = []
+    srv.running = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+class _ResidentEngine(FakeEngine):
+    """FakeEngine con una vista de residencia fija"""
+
+    def __init__(self, name, models, resident=()):
+        super().__init__(name, models)
+        self.resident = {m: {"size_bytes": 1, "vram_bytes": 1, "expires_in_s": 60} for m in resident}
+
+    def residency(self):
+        return dict(self.resident)
+
+
+class TestKeepAlive:
+    def test_durations(self):
+        assert _duration_seconds("30m") == 1800
+        assert _duration_seconds("1h30m") == 5400
+        assert _duration_seconds("300") == 300
+        assert _duration_seconds(45) == 45
+        assert _duration_seconds(-1) == float("inf")
+        assert _duration_seconds("-1m") == float("inf")
+        assert _duration_seconds("1m30s") == 90
+        assert _duration_seconds("500us") == pytest.approx(0.0005)
+        with pytest.raises(ValueError):
+            _duration_seconds("pronto")
+
+    def test_unparsed_keep_alive_does_not_fail_the_request(self, ollama_server):
+        engine = OllamaEngine(ollama_server.url, transport=HTTPTransport())
+        result = engine.generate(MESSAGES, "llama3.2", keep_alive="pronto")
+
+        assert result["content"]
+        assert ollama_server.bodies[0]["keep_alive"] == "pronto"
+        assert "llama3.2:latest" in engine._resident  # plazo por defecto del server
+
+    def test_policy_in_chat_body(self, ollama_server):
+        engine = OllamaEngine(
+            ollama_server.url,
+            transport=HTTPTransport(),
+            keep_alive={"default": "10m", "qwen3": -1},
+        )
+        engine.generate(MESSAGES, "llama3.2")
+        engine.generate(MESSAGES, "qwen3")
+        engine.generate(MESSAGES, "llama3.2", keep_alive=0)
+
+        assert [b["keep_alive"] for b in ollama_server.bodies] == ["10m", -1, 0]
+
+    def test_no_policy_leaves_server_default(self, ollama_server):
+        engine = OllamaEngine(ollama_server.url, transport=HTTPTransport())
+        engine.generate(MESSAGES, "llama3.2")
+        assert "keep_alive" not in ollama_server.bodies[0]
+
+
+class TestResidency:
+    def test_preload_sends_empty_chat_and_marks_resident(self, ollama_server):
+        engine = OllamaEngine(ollama_server.url, transport=HTTPTransport(), keep_alive="1h")
+        thread = engine.preload_in_background("llama3.2")
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+        assert ollama_server.bodies == [{"model": "llama3.2", "messages": [], "keep_alive": "1h"}]
+        view = engine.residency()
+        assert list(view) == ["llama3.2:latest"]
+        assert 3590 < view["llama3.2:latest"]["expires_in_s"] <= 3600
+
+    def test_requests_and_unload_update_residency(self, ollama_server):
+        engine = OllamaEngine(ollama_server.url, transport=HTTPTransport())
+        engine.generate(MESSAGES, "llama3.2:latest")
+        assert "llama3.2:latest" in engine.residency()
+
+        assert engine.unload("llama3.2")
+        assert ollama_server.bodies[-1]["keep_alive"] == 0
+        assert engine.residency() == {}
+
+    def test_refresh_from_api_ps(self, ollama_server):
+        ollama_server.running = [
+            {
+                "name": "llama3.2:latest",
+                "size": 3_000_000,
+                "size_vram": 2_000_000,
+                "expires_at": "2999-01-01T10:00:00.123456789-03:00",
+            },
+            {"name": "old:latest", "size": 1, "size_vram": 0, "expires_at": "2000-01-01T00:00:00Z"},
+        ]
+        engine = OllamaEngine(ollama_server.url, transport=HTTPTransport())
+        engine.refresh_residency()
+
+        view = engine.residency()
+        assert list(view) == ["llama3.2:latest"]  # el expirado no cuenta
+        assert view["llama3.2:latest"]["vram_bytes"] == 2_000_000
+
+    def test_preload_from_config(self, ollama_server, tmp_path):
+        config = tmp_path / "providers.json"
+        config.write_text(json.dumps({
+            "providers": [
+                {"name": "local", "type": "ollama", "base_url": ollama_server.url,
+                 "default_model": "llama3.2", "keep_alive": -1},
+                {"name": "otro", "type": "ollama", "base_url": ollama_server.url},
+            ]
+        }))
+        assert preload_from_config(config) == {"local/llama3.2": True}
+        assert ollama_server.bodies == [{"model": "llama3.2", "messages": [], "keep_alive": -1}]
+
+
+class TestResidentRouting:
+    def test_prefers_engine_with_model_loaded(self):
+        cold = _ResidentEngine("cold", ["llama3.2:latest"])
+        warm = _ResidentEngine("warm", ["llama3.2:latest"], resident=["llama3.2:latest"])
+        with MultiEngine([("cold", cold), ("warm", warm)], monitor=False) as engine:
+            assert engine.generate(MESSAGES, "llama3.2:latest")["content"] == "warm"
+            assert engine.status_report()["engines"]["warm"]["resident"]
+
+    def test_priority_order_when_none_loaded(self):
+        first = _ResidentEngine("first", ["llama3.2:latest"])
+        second = _ResidentEngine("second", ["llama3.2:latest"])
+        with MultiEngine([("first", first), ("second", second)], monitor=False) as engine:
+            assert engine.generate(MESSAGES, "llama3.2:latest")["content"] == "first"
+
+    def test_latency_routing_prefers_resident(self):
+        cold = _ResidentEngine("cold", ["llama3.2:latest"])
+        warm = _ResidentEngine("warm", ["llama3.2:latest"], resident=["llama3.2:latest"])
+        with MultiEngine(
+            [("cold", cold), ("warm", warm)], monitor=False, routing="latency"
+        ) as engine:
+            engine._engine_stats(cold).record_success(0.01)
+            engine._engine_stats(warm).record_success(0.5)
+            assert engine.generate(MESSAGES, "llama3.2:latest")["content"] == "warm"
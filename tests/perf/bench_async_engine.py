@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark — MultiEngine asyncio vs threads
+
+Levanta el stub server (en otro proceso) con latencia fija, que simula el
+tiempo de inferencia, y ejecuta N prompts por tres caminos:
+
+    sync     - engine.generate en serie (1 thread)
+    threads  - engine.generate en un ThreadPoolExecutor de C threads
+    async    - engine.agather(max_in_flight=C) en un solo event loop
+
+Reporta req/s y threads usados: con asyncio el throughput crece con la
+concurrencia C sin agregar threads.
+
+Run:
+    python tests/perf/bench_async_engine.py
+    python tests/perf/bench_async_engine.py --requests 400 --concurrency 1 8 32 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PERF_DIR = Path(__file__).resolve().parent
+PROVIDERS_DIR = PERF_DIR.parent.parent / "core" / "providers"
+sys.path.insert(0, str(PERF_DIR))
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from async_transport import AsyncHTTPTransport  # noqa: E402
+from http_transport import HTTPTransport  # noqa: E402
+from multi_engine import MultiEngine, OllamaEngine  # noqa: E402
+from stub_server import start_stub_process  # noqa: E402
+
+MODEL = "stub-small"
+
+
+def _messages(i):
+    return [{"role": "user", "content": f"prompt {i}"}]
+
+
+def _engine(base_url: str, concurrency: int) -> MultiEngine:
+    local = OllamaEngine(
+        base_url,
+        transport=HTTPTransport(pool_size=concurrency),
+        async_transport=AsyncHTTPTransport(pool_size=concurrency),
+    )
+    local.max_concurrency = concurrency
+    return MultiEngine([("local", local)], monitor=False)
+
+
+def bench_sync(engine: MultiEngine, requests: int, concurrency: int):
+    peak = threading.active_count()
+    started = time.perf_counter()
+    for i in range(requests):
+        engine.generate(_messages(i), MODEL)
+    return requests / (time.perf_counter() - started), peak
+
+
+def bench_threads(engine: MultiEngine, requests: int, concurrency: int):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(engine.generate, _messages(i), MODEL) for i in range(requests)]
+        peak = threading.active_count()
+        for future in futures:
+            future.result()
+    return requests / (time.perf_counter() - started), peak
+
+
+def bench_async(engine: MultiEngine, requests: int, concurrency: int):
+    batch = [{"messages": _messages(i), "model": MODEL} for i in range(requests)]
+    peak = 0
+
+    async def run():
+        nonlocal peak
+        task = asyncio.ensure_future(engine.agather(batch, max_in_flight=concurrency))
+        await asyncio.sleep(0.05)
+        peak = threading.active_count()
+        results = await task
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    return requests / (time.perf_counter() - started), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MultiEngine asyncio vs threads")
+    parser.add_argument("--requests", "-n", type=int, default=200)
+    parser.add_argument("--concurrency", "-c", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia del stub")
+    args = parser.parse_args()
+
+    stub, url = start_stub_process(latency=args.latency_ms / 1000.0)
+    print(
+        f"Stub: {url} | {args.requests} requests | "
+        f"latencia {args.latency_ms:.0f}ms | threads del proceso en reposo: "
+        f"{threading.active_count()}\n"
+    )
+    print(f"{'modo':<8} {'conc':>5} {'req/s':>9} {'threads':>8}")
+
+    for concurrency in args.concurrency:
+        for name, bench in (("sync", bench_sync), ("threads", bench_threads), ("async", bench_async)):
+            if name == "sync" and concurrency != args.concurrency[0]:
+                continue  # la línea base no depende de la concurrencia
+            with _engine(url, concurrency) as engine:
+                rate, peak = bench(engine, args.requests, concurrency)
+            conc = 1 if name == "sync" else concurrency
+            print(f"{name:<8} {conc:>5} {rate:>9.1f} {peak:>8}")
+
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark — EventBridge.publish (group commit)
+
+Mide eventos/seg con 1, 10 y 100 publicadores concurrentes, con group
+commit (default) y sin él (GROUP_COMMIT_MAX=1: un append por evento).
+Los publicadores son threads de un mismo proceso, cada uno con su propio
+bridge (como ``notify_file_modified``). Cada corrida usa un directorio
+temporal aislado.
+
+Run:
+    python tests/perf/bench_event_publish.py
+    python tests/perf/bench_event_publish.py --events 200 --publishers 1 10 100
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent / "core" / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from event_bridge import EventBridge, EventType  # noqa: E402
+
+SESSION_DATE = "2026-01-01"
+
+
+def _publish_loop(publisher_id: int, events: int):
+    bridge = EventBridge(f"cli-bench-{publisher_id}", session_date=SESSION_DATE)
+    for i in range(events):
+        bridge.publish(EventType.FILE_MODIFIED, {"file": f"f{publisher_id}-{i}.md"})
+
+
+def run(publishers: int, events: int, batch_max: int) -> float:
+    """Ejecuta una corrida y retorna eventos/seg"""
+    workers = [
+        threading.Thread(target=_publish_loop, args=(p, events))
+        for p in range(publishers)
+    ]
+
+    EventBridge.GROUP_COMMIT_MAX = batch_max
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    total = len(EventBridge("cli-bench-check", session_date=SESSION_DATE).replay())
+    assert total == publishers * events, f"se esperaban {publishers * events}, hay {total}"
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de EventBridge.publish")
+    parser.add_argument("--events", type=int, default=100, help="Eventos por publicador")
+    parser.add_argument(
+        "--publishers", type=int, nargs="+", default=[1, 10, 100],
+        help="Cantidades de publicadores concurrentes",
+    )
+    args = parser.parse_args()
+
+    default_max = EventBridge.GROUP_COMMIT_MAX
+    print(f"EventBridge.publish — {args.events} eventos por publicador")
+    print(f"{'publicadores':>12} {'sin batch ev/s':>16} {'group commit ev/s':>18} {'x':>6}")
+
+    original_cwd = os.getcwd()
+    for publishers in args.publishers:
+        results = []
+        for batch_max in (1, default_max):
+            with tempfile.TemporaryDirectory() as tmp:
+                os.chdir(tmp)
+                try:
+                    results.append(run(publishers, args.events, batch_max))
+                finally:
+                    os.chdir(original_cwd)
+        single, grouped = results
+        print(f"{publishers:>12} {single:>16.0f} {grouped:>18.0f} {grouped / single:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark — FileLock bajo contención (kernel vs legacy)
+
+N procesos compiten por el mismo lock y hacen acquire → sección crítica
+corta → release. Reporta adquisiciones/seg y la latencia de espera
+(p50/p99) de cada backend con 2, 8 y 32 procesos.
+
+Run:
+    python tests/perf/bench_file_lock.py
+    python tests/perf/bench_file_lock.py --rounds 50 --processes 2 8 32
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent / "core" / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from file_lock import KERNEL_LOCKS_SUPPORTED, FileLock  # noqa: E402
+
+HOLD_SECONDS = 0.001  # duración de la sección crítica
+
+
+def _worker(backend: str, rounds: int, start_at: float, results):
+    lock = FileLock("shared.md", f"cli-{os.getpid()}", backend=backend)
+    waits = []
+    while time.time() < start_at:
+        time.sleep(0.001)
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        if not lock.acquire(timeout=120):
+            raise RuntimeError("timeout adquiriendo lock")
+        waits.append(time.perf_counter() - t0)
+        time.sleep(HOLD_SECONDS)
+        lock.release()
+    results.put(waits)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(backend: str, processes: int, rounds: int):
+    """Retorna (adquisiciones/seg, p50 ms, p99 ms)"""
+    results = multiprocessing.Queue()
+    start_at = time.time() + 0.5
+    procs = [
+        multiprocessing.Process(target=_worker, args=(backend, rounds, start_at, results))
+        for _ in range(processes)
+    ]
+    for proc in procs:
+        proc.start()
+    waits = []
+    for _ in procs:
+        waits.extend(results.get())
+    for proc in procs:
+        proc.join()
+    elapsed = time.time() - start_at
+    return (
+        len(waits) / elapsed,
+        _percentile(waits, 0.50) * 1000,
+        _percentile(waits, 0.99) * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de FileLock")
+    parser.add_argument("--rounds", type=int, default=20, help="Adquisiciones por proceso")
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[2, 8, 32],
+        help="Cantidades de procesos compitiendo",
+    )
+    args = parser.parse_args()
+
+    backends = ["legacy"] + (["kernel"] if KERNEL_LOCKS_SUPPORTED else [])
+    print(f"FileLock — {args.rounds} adquisiciones por proceso, "
+          f"sección crítica {HOLD_SECONDS * 1000:.0f} ms")
+    print(f"{'procesos':>8} {'backend':>8} {'acq/s':>8} {'p50 ms':>8} {'p99 ms':>9}")
+
+    original_cwd = os.getcwd()
+    for processes in args.processes:
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                os.chdir(tmp)
+                try:
+                    rate, p50, p99 = run(backend, processes, args.rounds)
+                finally:
+                    os.chdir(original_cwd)
+            print(f"{processes:>8} {backend:>8} {rate:>8.0f} {p50:>8.2f} {p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
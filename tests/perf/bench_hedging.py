@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark — hedged requests en MultiEngine
+
+Levanta dos stubs (en otros procesos): el primario ("local", Ollama) con
+cola lenta — una fracción ``--slow-rate`` de los requests tarda
+``--slow-ms`` — y el respaldo ("cloud", OpenAI-compatible) con latencia
+estable. Ejecuta N prompts en serie con y sin hedging y reporta
+p50/p95/p99, requests hedged y cuántos ganó el respaldo. Los primeros
+``--warmup`` requests no se miden: llenan la ventana de latencias de la
+que sale el delay del hedge.
+
+Con hedging, un request lento del primario se duplica al respaldo tras el
+percentil ``--percentile`` de su latencia reciente: el p99 pasa de
+``--slow-ms`` a ~delay + latencia del respaldo.
+
+Run:
+    python tests/perf/bench_hedging.py
+    python tests/perf/bench_hedging.py --requests 500 --slow-rate 0.05 --slow-ms 500 --async
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PERF_DIR = Path(__file__).resolve().parent
+PROVIDERS_DIR = PERF_DIR.parent.parent / "core" / "providers"
+sys.path.insert(0, str(PERF_DIR))
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from async_transport import AsyncHTTPTransport  # noqa: E402
+from http_transport import HTTPTransport  # noqa: E402
+from multi_engine import MultiEngine, OllamaEngine, OpenAICompatEngine  # noqa: E402
+from stub_server import start_stub_process  # noqa: E402
+
+MODEL = "stub-small"
+
+
+def _engine(primary_url: str, backup_url: str, hedge: bool, percentile: float) -> MultiEngine:
+    local = OllamaEngine(
+        primary_url, transport=HTTPTransport(), async_transport=AsyncHTTPTransport()
+    )
+    cloud = OpenAICompatEngine(
+        api_key="stub",
+        base_url=f"{backup_url}/v1",
+        models=["stub-cloud"],
+        transport=HTTPTransport(),
+        async_transport=AsyncHTTPTransport(),
+    )
+    return MultiEngine(
+        [("local", local), ("cloud", cloud)],
+        monitor=False,
+        hedge=hedge,
+        hedge_percentile=percentile,
+    )
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(engine: MultiEngine, requests: int, warmup: int, use_async: bool):
+    latencies = []
+    messages = [{"role": "user", "content": "hola"}]
+
+    if use_async:
+        async def loop():
+            for _ in range(warmup + requests):
+                started = time.perf_counter()
+                await engine.agenerate(messages, MODEL)
+                latencies.append(time.perf_counter() - started)
+        asyncio.run(loop())
+    else:
+        for _ in range(warmup + requests):
+            started = time.perf_counter()
+            engine.generate(messages, MODEL)
+            latencies.append(time.perf_counter() - started)
+    return latencies[warmup:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests en MultiEngine")
+    parser.add_argument("--requests", "-n", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=MultiEngine.HEDGE_MIN_SAMPLES * 2)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia normal")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fracción lenta del primario")
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="Latencia de la cola lenta")
+    parser.add_argument("--percentile", type=float, default=0.9, help="Percentil del hedge delay")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Usar agenerate")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000.0
+    primary, primary_url = start_stub_process(
+        latency=latency, slow_rate=args.slow_rate, slow_latency=args.slow_ms / 1000.0
+    )
+    backup, backup_url = start_stub_process(latency=latency)
+    mode = "async" if args.use_async else "sync"
+    print(
+        f"{args.requests} requests ({mode}) | latencia {args.latency_ms:.0f}ms | "
+        f"{args.slow_rate:.0%} del primario a {args.slow_ms:.0f}ms\n"
+    )
+    print(f"{'hedge':<6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'hedged':>7} {'ganó':>5}")
+
+    for hedge in (False, True):
+        with _engine(primary_url, backup_url, hedge, args.percentile) as engine:
+            latencies = run(engine, args.requests, args.warmup, args.use_async)
+            stats = engine.status_report()["hedging"]
+        ms = [x * 1000 for x in latencies]
+        print(
+            f"{'on' if hedge else 'off':<6} {statistics.median(ms):>8.1f} "
+            f"{_percentile(ms, 0.95):>8.1f} {_percentile(ms, 0.99):>8.1f} {max(ms):>8.1f} "
+            f"{stats['hedged']:>7} {stats['hedge_wins']:>5}"
+        )
+
+    primary.terminate()
+    backup.terminate()
+
+
+if __name__ == "__main__":
+    main()
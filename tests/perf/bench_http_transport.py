@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark — transporte HTTP keep-alive vs urllib
+
+Levanta el stub server local y compara el costo por request de:
+
+    urllib   - urllib.request.urlopen (conexión TCP nueva por llamada,
+               como hacían los engines antes)
+    pooled   - HTTPTransport (conexiones http.client persistentes)
+    engine   - OllamaEngine.generate sobre el transporte pooled
+
+Reporta latencia media/p50/p99 por request y conexiones abiertas.
+Con ``--threads`` varios clientes comparten el mismo transporte.
+
+Run:
+    python tests/perf/bench_http_transport.py
+    python tests/perf/bench_http_transport.py --requests 2000 --threads 4
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Callable, List
+
+PERF_DIR = Path(__file__).resolve().parent
+PROVIDERS_DIR = PERF_DIR.parent.parent / "core" / "providers"
+sys.path.insert(0, str(PERF_DIR))
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from http_transport import HTTPTransport  # noqa: E402
+from multi_engine import OllamaEngine  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+CHAT_BODY = {"model": "stub-small", "messages": MESSAGES, "stream": False}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _urllib_chat(base_url: str) -> Callable[[], None]:
+    data = json.dumps(CHAT_BODY).encode()
+
+    def call():
+        req = urllib.request.Request(f"{base_url}/api/chat", data=data, method="POST")
+        req.add_header("Content-Type", "application/json")
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            json.loads(resp.read().decode())
+
+    return call
+
+
+def _pooled_chat(base_url: str, transport: HTTPTransport) -> Callable[[], None]:
+    def call():
+        transport.request_json("POST", f"{base_url}/api/chat", CHAT_BODY, timeout=10)
+
+    return call
+
+
+def _engine_chat(engine: OllamaEngine) -> Callable[[], None]:
+    def call():
+        engine.generate(MESSAGES, "stub-small")
+
+    return call
+
+
+def run(call: Callable[[], None], requests: int, threads: int):
+    """Retorna (latencias en segundos, tiempo total)"""
+    per_thread = max(1, requests // threads)
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            call()
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del transporte HTTP")
+    parser.add_argument("--requests", "-n", type=int, default=1000)
+    parser.add_argument("--threads", "-t", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia del stub")
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency_ms / 1000.0)
+    base_url = server.url
+
+    pooled = HTTPTransport(pool_size=max(8, args.threads))
+    engine_transport = HTTPTransport(pool_size=max(8, args.threads))
+    cases = [
+        ("urllib", _urllib_chat(base_url), None),
+        ("pooled", _pooled_chat(base_url, pooled), pooled),
+        ("engine", _engine_chat(OllamaEngine(base_url, transport=engine_transport)), engine_transport),
+    ]
+
+    print(f"Stub: {base_url} | {args.requests} requests | {args.threads} threads\n")
+    print(f"{'modo':<8} {'req/s':>9} {'media':>9} {'p50':>9} {'p99':>9} {'conexiones':>11}")
+    results = {}
+    for name, call, transport in cases:
+        call()  # calentar (primera conexión, imports)
+        before = server.connections
+        latencies, elapsed = run(call, args.requests, args.threads)
+        mean = sum(latencies) / len(latencies)
+        results[name] = mean
+        print(
+            f"{name:<8} {len(latencies) / elapsed:>9.0f} {mean * 1000:>7.3f}ms "
+            f"{_percentile(latencies, 0.50) * 1000:>7.3f}ms "
+            f"{_percentile(latencies, 0.99) * 1000:>7.3f}ms "
+            f"{server.connections - before:>11}"
+        )
+        if transport is not None:
+            transport.close()
+
+    saved = results["urllib"] - results["pooled"]
+    print(
+        f"\nAhorro por request: {saved * 1000:.3f}ms "
+        f"({saved / results['urllib'] * 100:.0f}% menos que urllib)"
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark — MultiEngine contra stubs locales
+
+Levanta tres stubs en otros procesos: un primario sano y otro con fallos
+inyectados ("local", Ollama ``/api/chat``), y el respaldo ("cloud",
+OpenAI ``/v1/chat/completions``).
+Ejecuta tres escenarios con ``--concurrency`` threads y reporta
+throughput, p50/p99 y conexiones nuevas abiertas en los stubs (reuso de
+conexiones):
+
+    generate   - requests sin streaming contra el primario
+    stream     - generate_stream: p50/p99 hasta el primer token (TTFT) y total
+    fallback   - el primario inyecta errores (500/429/cortes): cuántos
+                 requests terminan bien, cuántos sirvió cada engine y
+                 cuántas veces abrió el circuit breaker; el monitor
+                 (``--health-interval``) devuelve el primario a la rotación
+
+Run:
+    python tests/perf/bench_multi_engine.py
+    python tests/perf/bench_multi_engine.py -n 1000 --concurrency 16 --latency "lognormal:20,0.5"
+    python tests/perf/bench_multi_engine.py --tokens 64 --tokens-per-second 400 --error-rate 0.2 --json
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PERF_DIR = Path(__file__).resolve().parent
+PROVIDERS_DIR = PERF_DIR.parent.parent / "core" / "providers"
+sys.path.insert(0, str(PERF_DIR))
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from http_transport import HTTPTransport  # noqa: E402
+from multi_engine import MultiEngine, OllamaEngine, OpenAICompatEngine  # noqa: E402
+from stub_server import LatencyDistribution, fetch_stats, start_stub_process  # noqa: E402
+
+MODEL = "stub-small"
+MESSAGES = [{"role": "user", "content": "hola, resume esto en una línea"}]
+
+
+def _engine(primary_url: str, backup_url: str, health_interval: float) -> MultiEngine:
+    local = OllamaEngine(primary_url, transport=HTTPTransport())
+    cloud = OpenAICompatEngine(
+        api_key="stub", base_url=f"{backup_url}/v1", models=[MODEL], transport=HTTPTransport()
+    )
+    # El monitor devuelve el primario a la rotación tras un fallo
+    return MultiEngine(
+        [("local", local), ("cloud", cloud)], health_interval=health_interval
+    )
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _served(before, after):
+    """Completions que el stub respondió bien entre dos snapshots"""
+    return after["completions"] - before["completions"]
+
+
+def _new_connections(before, after):
+    # La conexión del fetch_stats posterior también cuenta
+    return after["connections"] - before["connections"] - 1
+
+
+def _generate(engine):
+    started = time.perf_counter()
+    engine.generate(MESSAGES, MODEL)
+    return time.perf_counter() - started, None
+
+
+def _stream(engine):
+    started = time.perf_counter()
+    first = None
+    for chunk in engine.generate_stream(MESSAGES, MODEL):
+        if first is None:
+            first = time.perf_counter() - started
+    return time.perf_counter() - started, first
+
+
+def run(engine, call, requests: int, concurrency: int):
+    """Ejecuta ``call`` N veces; devuelve (latencias, ttfts, errores, segundos)"""
+    latencies, ttfts, errors = [], [], 0
+
+    def one(_):
+        try:
+            return call(engine)
+        except Exception:
+            return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for result in pool.map(one, range(requests)):
+            if result is None:
+                errors += 1
+                continue
+            latencies.append(result[0])
+            if result[1] is not None:
+                ttfts.append(result[1])
+    return latencies, ttfts, errors, time.perf_counter() - started
+
+
+def scenario(name, call, primary_url, backup_url, args):
+    with _engine(primary_url, backup_url, args.health_interval) as engine:
+        engine.generate(MESSAGES, MODEL)  # discovery + primera conexión
+        before = {"local": fetch_stats(primary_url), "cloud": fetch_stats(backup_url)}
+        latencies, ttfts, errors, elapsed = run(engine, call, args.requests, args.concurrency)
+        after = {"local": fetch_stats(primary_url), "cloud": fetch_stats(backup_url)}
+        engines = engine.status_report()["engines"]
+
+    ms = [x * 1000 for x in latencies] or [0.0]
+    report = {
+        "scenario": name,
+        "requests": args.requests,
+        "ok": len(latencies),
+        "failed": errors,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "p50_ms": round(statistics.median(ms), 2),
+        "p99_ms": round(_percentile(ms, 0.99), 2),
+        "new_connections": sum(_new_connections(before[k], after[k]) for k in before),
+        "served": {k: _served(before[k], after[k]) for k in before},
+        "circuit_trips": {k: engines[k]["circuit_trips"] for k in before},
+    }
+    if ttfts:
+        ttft_ms = [x * 1000 for x in ttfts]
+        report["ttft_p50_ms"] = round(statistics.median(ttft_ms), 2)
+        report["ttft_p99_ms"] = round(_percentile(ttft_ms, 0.99), 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MultiEngine contra stubs locales")
+    parser.add_argument("--requests", "-n", type=int, default=500)
+    parser.add_argument("--concurrency", "-c", type=int, default=8)
+    parser.add_argument(
+        "--latency", type=LatencyDistribution.parse, default=LatencyDistribution.parse("normal:10,3"),
+        help='Latencia hasta el primer token en ms ("20", "lognormal:20,0.5", ...)',
+    )
+    parser.add_argument("--tokens", type=int, default=16, help="Tokens por respuesta")
+    parser.add_argument("--tokens-per-second", type=float, default=800.0)
+    parser.add_argument("--error-rate", type=float, default=0.1, help="500 del primario (fallback)")
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="429 del primario (fallback)")
+    parser.add_argument("--drop-rate", type=float, default=0.02, help="Cortes del primario (fallback)")
+    parser.add_argument("--health-interval", type=float, default=0.2, help="Heartbeat del monitor (s)")
+    parser.add_argument("--json", action="store_true", help="Imprimir el reporte como JSON")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # Los fallos inyectados son esperados
+
+    stub = {
+        "distribution": args.latency,
+        "completion_tokens": args.tokens,
+        "tokens_per_second": args.tokens_per_second,
+    }
+    faults = {
+        "error_rate": args.error_rate,
+        "throttle_rate": args.throttle_rate,
+        "drop_rate": args.drop_rate,
+    }
+    healthy, healthy_url = start_stub_process(**stub)
+    flaky, flaky_url = start_stub_process(**stub, **faults)
+    backup, backup_url = start_stub_process(**stub)
+
+    try:
+        reports = [
+            scenario("generate", _generate, healthy_url, backup_url, args),
+            scenario("stream", _stream, healthy_url, backup_url, args),
+            scenario("fallback", _generate, flaky_url, backup_url, args),
+        ]
+    finally:
+        for proc in (healthy, flaky, backup):
+            proc.terminate()
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(
+        f"{args.requests} requests | {args.concurrency} threads | latencia {args.latency} | "
+        f"{args.tokens} tokens a {args.tokens_per_second:.0f}/s\n"
+        f"fallback: primario con {args.error_rate:.0%} 500, {args.throttle_rate:.0%} 429, "
+        f"{args.drop_rate:.0%} cortes\n"
+    )
+    print(
+        f"{'escenario':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'ttft p50':>9} "
+        f"{'ok':>6} {'local':>6} {'cloud':>6} {'trips':>6} {'conexiones':>11}"
+    )
+    for r in reports:
+        ttft = f"{r['ttft_p50_ms']:.1f}" if "ttft_p50_ms" in r else "-"
+        print(
+            f"{r['scenario']:<10} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{ttft:>9} {r['ok']:>6} {r['served']['local']:>6} {r['served']['cloud']:>6} "
+            f"{r['circuit_trips']['local']:>6} {r['new_connections']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
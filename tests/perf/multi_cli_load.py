@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Multi-CLI load harness
+
+Lanza N instancias simuladas (un proceso cada una, con su propio
+MultiCLICoordinator + EventBridge + FileLock) sobre un directorio de
+contexto temporal compartido. Cada instancia ejecuta una mezcla
+configurable de operaciones durante ``--duration`` segundos:
+
+    heartbeat - EventBridge.send_heartbeat
+    lock      - coord.lock_file sobre uno de ``--files`` archivos compartidos
+    read      - coord.lock_file(shared=True) (lector)
+    notify    - evento FILE_MODIFIED (como notify_file_change)
+    session   - append al archivo de sesión del día bajo lock exclusivo
+
+Reporta (JSON): throughput, percentiles de espera de locks, latencia de
+entrega de eventos, eventos perdidos/duplicados, escrituras de sesión
+perdidas y CPU por instancia. No requiere servicios externos.
+
+Run:
+    python tests/perf/multi_cli_load.py --instances 8 --duration 10
+    python tests/perf/multi_cli_load.py --instances 16 --mix lock=1,notify=4 --broker
+    python tests/perf/multi_cli_load.py --output report.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent / "core" / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+DEFAULT_MIX = "heartbeat=1,lock=2,read=2,notify=4,session=1"
+OPERATIONS = ("heartbeat", "lock", "read", "notify", "session")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'lock=2,notify=4' → {'lock': 2.0, 'notify': 4.0}"""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida en --mix: {name}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("--mix debe tener al menos una operación con peso > 0")
+    return mix
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Percentiles en milisegundos"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _instance(index: int, args: Dict[str, Any], ready, start, stop, results):
+    """Proceso de una instancia simulada"""
+    # El coordinador notifica por stdout: silenciar
+    sys.stdout = open(os.devnull, "w")
+    os.chdir(args["context_dir"])
+    os.environ["PA_EVENT_BROKER"] = "1" if args["broker"] else "0"
+
+    from event_bridge import EventType
+    from multi_cli_coordinator import MultiCLICoordinator
+
+    instance_id = f"sim-{index:03d}"
+    coord = MultiCLICoordinator(model=f"sim-model-{index % 3}", instance_id=instance_id)
+
+    received: List[Any] = []
+    received_lock = threading.Lock()
+
+    def on_modified(event):
+        sent_at = event.data.get("sent_at")
+        if sent_at is None:
+            return
+        with received_lock:
+            received.append((event.source, event.data.get("op"), time.time() - sent_at))
+
+    coord.start()
+    coord.event_bridge.subscribe(EventType.FILE_MODIFIED, on_modified)
+    ready.put(instance_id)
+    start.wait()
+
+    rng = random.Random(args["seed"] + index)
+    names = list(args["mix"])
+    weights = [args["mix"][n] for n in names]
+    files = [f"shared-{i}.md" for i in range(args["files"])]
+    hold = args["hold_ms"] / 1000.0
+    session_file = coord.get_session_file_with_merge()
+
+    counts = {name: 0 for name in OPERATIONS}
+    errors = 0
+    lock_waits: Dict[str, List[float]] = {"lock": [], "read": [], "session": []}
+    sent = 0
+    cpu_start = os.times()
+    deadline = time.time() + args["duration"]
+
+    while time.time() < deadline:
+        op = rng.choices(names, weights)[0]
+        try:
+            if op == "heartbeat":
+                coord.event_bridge.send_heartbeat(coord.model)
+
+            elif op in ("lock", "read"):
+                t0 = time.perf_counter()
+                with coord.lock_file(rng.choice(files), timeout=30, shared=op == "read"):
+                    lock_waits[op].append(time.perf_counter() - t0)
+                    time.sleep(hold)
+
+            elif op == "notify":
+                sent += 1
+                coord.event_bridge.publish(
+                    EventType.FILE_MODIFIED,
+                    {
+                        "file": rng.choice(files),
+                        "change": "load-test",
+                        "instance_id": instance_id,
+                        "op": sent,
+                        "sent_at": time.time(),
+                    },
+                )
+
+            elif op == "session":
+                t0 = time.perf_counter()
+                with coord.lock_file(str(session_file), timeout=30):
+                    lock_waits["session"].append(time.perf_counter() - t0)
+                    with open(session_file, "a", encoding="utf-8") as f:
+                        f.write(f"{instance_id} {counts['session']}\n")
+
+            counts[op] += 1
+        except Exception:
+            errors += 1
+
+    cpu_end = os.times()
+    ready.put(("done", instance_id))
+    stop.wait()
+
+    coord.shutdown()
+    with received_lock:
+        delivered = list(received)
+    results.put(
+        {
+            "instance_id": instance_id,
+            "counts": counts,
+            "errors": errors,
+            "lock_waits": lock_waits,
+            "sent": sent,
+            "received": delivered,
+            "cpu_seconds": (cpu_end.user - cpu_start.user)
+            + (cpu_end.system - cpu_start.system),
+        }
+    )
+
+
+def run(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta la carga y retorna el reporte"""
+    ctx = multiprocessing.get_context("spawn" if os.name == "nt" else "fork")
+    ready, results = ctx.Queue(), ctx.Queue()
+    start, stop = ctx.Event(), ctx.Event()
+
+    procs = [
+        ctx.Process(target=_instance, args=(i, args, ready, start, stop, results))
+        for i in range(args["instances"])
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get(timeout=60)
+
+    started = time.time()
+    start.set()
+    for _ in procs:
+        ready.get(timeout=args["duration"] + 120)
+    elapsed = time.time() - started
+
+    # Dar tiempo a que los últimos eventos lleguen a todos
+    time.sleep(args["settle"])
+    stop.set()
+    reports = [results.get(timeout=60) for _ in procs]
+    for proc in procs:
+        proc.join(timeout=10)
+
+    return build_report(args, reports, elapsed)
+
+
+def build_report(
+    args: Dict[str, Any], reports: List[Dict[str, Any]], elapsed: float
+) -> Dict[str, Any]:
+    counts = {name: sum(r["counts"][name] for r in reports) for name in OPERATIONS}
+    total_ops = sum(counts.values())
+    sent = {r["instance_id"]: r["sent"] for r in reports}
+
+    # Cada notify debe llegar exactamente una vez a cada una de las otras N-1
+    latencies: List[float] = []
+    duplicates = 0
+    delivered = 0
+    for report in reports:
+        seen = set()
+        for source, op, latency in report["received"]:
+            if source == report["instance_id"] or source not in sent:
+                continue
+            if (source, op) in seen:
+                duplicates += 1
+                continue
+            seen.add((source, op))
+            latencies.append(latency)
+        delivered += len(seen)
+    expected = sum(sent.values()) * (len(reports) - 1)
+
+    session_file = next(
+        Path(args["context_dir"], "core/.context/sessions").glob("*.md"), None
+    )
+    session_lines = (
+        len(session_file.read_text(encoding="utf-8").splitlines()) if session_file else 0
+    )
+
+    cpu = [r["cpu_seconds"] for r in reports]
+    return {
+        "config": {k: v for k, v in args.items() if k != "context_dir"},
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput": {
+            "ops_total": total_ops,
+            "ops_per_second": round(total_ops / elapsed, 1) if elapsed else 0.0,
+            "by_operation": counts,
+            "errors": sum(r["errors"] for r in reports),
+        },
+        "lock_wait": {
+            kind: percentiles([w for r in reports for w in r["lock_waits"][kind]])
+            for kind in ("lock", "read", "session")
+        },
+        "events": {
+            "sent": sum(sent.values()),
+            "expected_deliveries": expected,
+            "delivered": delivered,
+            "lost": expected - delivered,
+            "duplicates": duplicates,
+            "latency": percentiles(latencies),
+        },
+        "session_writes": {
+            "expected": counts["session"],
+            "written": session_lines,
+            "lost": counts["session"] - session_lines,
+        },
+        "cpu": {
+            "total_seconds": round(sum(cpu), 3),
+            "per_instance_mean_seconds": round(sum(cpu) / len(cpu), 3) if cpu else 0.0,
+            "per_instance_max_seconds": round(max(cpu), 3) if cpu else 0.0,
+            "utilization_per_instance": round(sum(cpu) / len(cpu) / elapsed, 3)
+            if cpu and elapsed
+            else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-CLI load harness")
+    parser.add_argument("--instances", "-n", type=int, default=8)
+    parser.add_argument("--duration", "-d", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos por operación")
+    parser.add_argument("--files", type=int, default=4, help="Archivos compartidos a lockear")
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="Tiempo con el lock tomado")
+    parser.add_argument("--settle", type=float, default=2.0, help="Espera final de entregas")
+    parser.add_argument("--broker", action="store_true", help="EventBridge en modo broker")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", "-o", help="Archivo donde guardar el reporte JSON")
+    cli = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pa-multi-cli-") as context_dir:
+        report = run(
+            {
+                "instances": cli.instances,
+                "duration": cli.duration,
+                "mix": parse_mix(cli.mix),
+                "files": cli.files,
+                "hold_ms": cli.hold_ms,
+                "settle": cli.settle,
+                "broker": cli.broker,
+                "seed": cli.seed,
+                "context_dir": context_dir,
+            }
+        )
+
+    text = json.dumps(report, indent=2)
+    if cli.output:
+        Path(cli.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
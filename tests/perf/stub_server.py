@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Stub inference server
+
+Servidor HTTP/1.1 local (keep-alive) que imita las rutas que usan los
+engines de ``core/providers``:
+
+    GET  /api/tags             - Ollama: lista de modelos
+    POST /api/chat             - Ollama: chat (NDJSON si "stream" es true,
+                                 como en Ollama es el default)
+    POST /v1/chat/completions  - OpenAI-compatible (también /chat/completions),
+                                 SSE con "stream": true
+    GET  /stub/stats           - Contadores del stub (no cuenta como request)
+
+Sirve para medir el costo del transporte y el comportamiento de
+MultiEngine sin un Ollama ni API keys reales:
+
+    - Latencia hasta el primer token: fija (``--latency-ms``) o una
+      distribución (``--latency "lognormal:20,0.5"``)
+    - Cola lenta: ``--slow-rate`` de los requests tarda ``--slow-ms``
+    - Tokens: ``--tokens`` por respuesta (recortado por max_tokens /
+      num_predict) emitidos a ``--tokens-per-second`` (0 = al instante)
+    - Errores inyectados: ``--error-rate`` (500), ``--throttle-rate`` (429
+      con Retry-After) y ``--drop-rate`` (cierra la conexión sin responder)
+
+Run:
+    python tests/perf/stub_server.py --port 11435
+    python tests/perf/stub_server.py --port 11435 --latency-ms 5
+    python tests/perf/stub_server.py --latency-ms 20 --slow-rate 0.05 --slow-ms 500
+    python tests/perf/stub_server.py --latency "normal:30,10" --tokens 64 --tokens-per-second 200
+    python tests/perf/stub_server.py --error-rate 0.1 --throttle-rate 0.05 --drop-rate 0.01
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+STUB_MODELS = ["stub-small", "stub-large"]
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Distribución de la latencia hasta el primer token (segundos).
+
+    ``kind``: fixed (a), uniform (a..b), normal (media a, desvío b),
+    lognormal (mediana a, sigma b) o exponential (media a).
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __post_init__(self):
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Distribución desconocida: {self.kind} (usar {', '.join(self.KINDS)})")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Parsea "tipo:a[,b]" con valores en milisegundos ("20" = fixed:20)"""
+        kind, _, values = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        params = [float(v) / 1000.0 for v in values.split(",") if v.strip()]
+        if kind == "lognormal" and len(params) > 1:
+            params[1] *= 1000.0  # sigma no es un tiempo
+        return cls(kind, *params[:2])
+
+    def __str__(self) -> str:
+        if self.kind == "lognormal":
+            return f"lognormal:{self.a * 1000:g},{self.b:g}"
+        values = [self.a] if self.kind in ("fixed", "exponential") else [self.a, self.b]
+        return f"{self.kind}:" + ",".join(f"{v * 1000:g}" for v in values)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            value = random.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = random.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * random.lognormvariate(0.0, self.b) if self.a > 0 else 0.0
+        elif self.kind == "exponential":
+            value = random.expovariate(1.0 / self.a) if self.a > 0 else 0.0
+        else:
+            value = self.a
+        return max(0.0, value)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handler de las rutas Ollama/OpenAI del stub"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Headers y body salen en writes separados: sin esto Nagle + delayed ACK
+    # suman ~40ms a cada respuesta sobre una conexión reutilizada
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de la base
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def _first_token_delay(self) -> float:
+        server = self.server
+        if server.slow_rate and random.random() < server.slow_rate:
+            return server.slow_latency
+        return server.distribution.sample()
+
+    def _inject_error(self) -> bool:
+        """Aplica la inyección de errores; True si ya se respondió"""
+        server = self.server
+        roll = random.random()
+        if roll < server.drop_rate:
+            server.count("dropped")
+            self.close_connection = True  # Sin respuesta: el cliente ve un EOF
+            return True
+        roll -= server.drop_rate
+        if roll < server.throttle_rate:
+            server.count("throttled")
+            self._send_json(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            return True
+        roll -= server.throttle_rate
+        if roll < server.error_rate:
+            server.count("errors")
+            self._send_json(500, {"error": "injected failure"})
+            return True
+        return False
+
+    def _tokens(self, body: Dict[str, Any]) -> Tuple[List[str], str]:
+        """Tokens de la respuesta y finish reason según max_tokens / num_predict"""
+        limit = body.get("max_tokens") or (body.get("options") or {}).get("num_predict")
+        count = self.server.completion_tokens
+        reason = "stop"
+        if limit and 0 < int(limit) < count:
+            count, reason = int(limit), "length"
+        return ["stub"] + [" reply"] * (count - 1) if count else [], reason
+
+    def _token_pause(self):
+        if self.server.tokens_per_second > 0:
+            time.sleep(1.0 / self.server.tokens_per_second)
+
+    @staticmethod
+    def _prompt_tokens(body: Dict[str, Any]) -> int:
+        chars = sum(len(str(m.get("content", ""))) for m in body.get("messages") or [])
+        return max(1, chars // 4)
+
+    # ── Chunked transfer (streaming sobre keep-alive) ──
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/stub/stats":
+            self._send_json(200, self.server.stats())
+            return
+        self.server.count_request()
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": m} for m in STUB_MODELS]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.server.count_request()
+        body = self._read_json()
+        if self._inject_error():
+            return
+        model = body.get("model", STUB_MODELS[0])
+        time.sleep(self._first_token_delay())
+
+        if self.path in ("/api/chat", "/v1/chat/completions", "/chat/completions"):
+            self.server.count("completions")
+        if self.path == "/api/chat":
+            if body.get("stream", True):
+                self._ollama_stream(body, model)
+            else:
+                self._ollama_chat(body, model)
+        elif self.path in ("/v1/chat/completions", "/chat/completions"):
+            if body.get("stream"):
+                self._openai_stream(body, model)
+            else:
+                self._openai_chat(body, model)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    # ── Ollama ──
+
+    def _ollama_chat(self, body: Dict[str, Any], model: str):
+        tokens, reason = self._tokens(body)
+        for _ in tokens:
+            self._token_pause()
+        self.server.count("tokens", len(tokens))
+        self._send_json(
+            200,
+            {
+                "model": model,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "done": True,
+                "done_reason": reason,
+                "prompt_eval_count": self._prompt_tokens(body),
+                "eval_count": len(tokens),
+            },
+        )
+
+    def _ollama_stream(self, body: Dict[str, Any], model: str):
+        tokens, reason = self._tokens(body)
+        self.server.count("streams")
+        self._start_chunked("application/x-ndjson")
+        for i, token in enumerate(tokens):
+            if i:
+                self._token_pause()
+            event = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+            self._write_chunk(json.dumps(event).encode() + b"\n")
+        self.server.count("tokens", len(tokens))
+        final = {
+            "model": model,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": reason,
+            "prompt_eval_count": self._prompt_tokens(body),
+            "eval_count": len(tokens),
+        }
+        self._write_chunk(json.dumps(final).encode() + b"\n")
+        self._end_chunked()
+
+    # ── OpenAI ──
+
+    def _openai_chat(self, body: Dict[str, Any], model: str):
+        tokens, reason = self._tokens(body)
+        for _ in tokens:
+            self._token_pause()
+        self.server.count("tokens", len(tokens))
+        self._send_json(
+            200,
+            {
+                "id": "stub",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": reason,
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": self._prompt_tokens(body),
+                    "completion_tokens": len(tokens),
+                },
+            },
+        )
+
+    def _openai_stream(self, body: Dict[str, Any], model: str):
+        tokens, reason = self._tokens(body)
+        self.server.count("streams")
+        self._start_chunked("text/event-stream")
+
+        def event(choices, **extra):
+            payload = {"id": "stub", "object": "chat.completion.chunk", "model": model, "choices": choices}
+            payload.update(extra)
+            self._write_chunk(b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+        for i, token in enumerate(tokens):
+            if i:
+                self._token_pause()
+            event([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+        self.server.count("tokens", len(tokens))
+        event([{"index": 0, "delta": {}, "finish_reason": reason}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event([], usage={"prompt_tokens": self._prompt_tokens(body), "completion_tokens": len(tokens)})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+
+class StubServer(ThreadingHTTPServer):
+    """Servidor stub con contadores de requests, conexiones y errores inyectados"""
+
+    daemon_threads = True
+    # El backlog por defecto (5) descarta SYNs cuando muchos clientes
+    # conectan a la vez y el reintento del kernel tarda ~1s
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        distribution: Optional[LatencyDistribution] = None,
+        completion_tokens: int = 2,
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        drop_rate: float = 0.0,
+    ):
+        """
+        Args:
+            latency: Latencia fija hasta el primer token (si no hay ``distribution``)
+            slow_rate / slow_latency: Fracción de requests con latencia ``slow_latency``
+            distribution: Distribución de la latencia hasta el primer token
+            completion_tokens: Tokens por respuesta
+            tokens_per_second: Ritmo de generación (0 = al instante)
+            error_rate / throttle_rate / drop_rate: Fracción de 500 / 429 / cortes
+        """
+        super().__init__(address, StubHandler)
+        self.distribution = distribution or LatencyDistribution("fixed", latency)
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.completion_tokens = completion_tokens
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.requests = 0
+        self.connections = 0
+        self.counters = {"completions": 0, "streams": 0, "tokens": 0, "errors": 0, "throttled": 0, "dropped": 0}
+        self._counter_lock = threading.Lock()
+
+    @property
+    def latency(self) -> float:
+        return self.distribution.a
+
+    def count_request(self):
+        with self._counter_lock:
+            self.requests += 1
+
+    def count(self, counter: str, amount: int = 1):
+        with self._counter_lock:
+            self.counters[counter] += amount
+
+    def stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return dict(self.counters, requests=self.requests, connections=self.connections)
+
+    def process_request(self, request, client_address):
+        with self._counter_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def handle_error(self, request, client_address):
+        pass  # Cliente que cortó la conexión (p. ej. hedge cancelado)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, **options) -> StubServer:
+    """Levanta el stub en un thread daemon (port 0 = puerto libre)"""
+    server = StubServer(("127.0.0.1", port), latency=latency, **options)
+    threading.Thread(target=server.serve_forever, daemon=True, name="StubServer").start()
+    return server
+
+
+def _serve_process(port_queue, latency: float, slow_rate: float, slow_latency: float, options):
+    server = StubServer(
+        ("127.0.0.1", 0), latency=latency, slow_rate=slow_rate, slow_latency=slow_latency, **options
+    )
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stub_process(
+    latency: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 0.0, **options
+):
+    """
+    Levanta el stub en otro proceso (no compite por el GIL del cliente).
+    ``options`` son los demás argumentos de ``StubServer``; los contadores
+    se leen con ``fetch_stats(url)``.
+
+    Returns:
+        (proceso, url) — terminar con ``proceso.terminate()``
+    """
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    proc = ctx.Process(
+        target=_serve_process,
+        args=(port_queue, latency, slow_rate, slow_latency, options),
+        daemon=True,
+    )
+    proc.start()
+    port = port_queue.get(timeout=30)
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def fetch_stats(url: str) -> Dict[str, int]:
+    """Contadores de un stub (``GET /stub/stats``)"""
+    with urllib.request.urlopen(f"{url}/stub/stats", timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub inference server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia por request")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fracción de requests lentos")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="Latencia de los requests lentos")
+    parser.add_argument(
+        "--latency", type=LatencyDistribution.parse, default=None,
+        help='Distribución en ms: "uniform:10,50", "normal:20,5", "lognormal:20,0.5", "exponential:20"',
+    )
+    parser.add_argument("--tokens", type=int, default=2, help="Tokens por respuesta")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Ritmo de generación")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fracción de conexiones cortadas")
+    args = parser.parse_args()
+
+    server = StubServer(
+        ("127.0.0.1", args.port),
+        latency=args.latency_ms / 1000.0,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_ms / 1000.0,
+        distribution=args.latency,
+        completion_tokens=args.tokens,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        drop_rate=args.drop_rate,
+    )
+    print(f"Stub escuchando en {server.url} (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
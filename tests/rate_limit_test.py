@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests de rate limiting por engine (core/providers/rate_limit.py)
+
+Cubre:
+  1. TokenBucket: ráfaga hasta capacity, espera según la tasa
+  2. RateLimiter: requests/min y tokens/min juntos, sin consumo parcial
+  3. settle: corrección del costo estimado con el uso real
+
+Run: pytest tests/rate_limit_test.py -v
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROVIDERS_DIR = Path(__file__).resolve().parent.parent / "core" / "providers"
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from rate_limit import RateLimiter, TokenBucket  # noqa: E402
+
+
+class TestTokenBucket:
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(per_minute=60)  # 1 por segundo, ráfaga de 60
+        now = time.monotonic()
+        for _ in range(60):
+            assert bucket.wait_time(1, now) == 0.0
+            bucket.consume(1)
+        assert bucket.wait_time(1, now) == pytest.approx(1.0, abs=0.01)
+
+    def test_refill(self):
+        bucket = TokenBucket(per_minute=600, capacity=1)  # 10 por segundo
+        bucket.consume(1)
+        assert bucket.wait_time(1, time.monotonic()) > 0
+        time.sleep(0.11)
+        assert bucket.wait_time(1, time.monotonic()) == 0.0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        bucket = TokenBucket(per_minute=100)
+        assert bucket.wait_time(500, time.monotonic()) == 0.0
+
+
+class TestRateLimiter:
+    def test_unlimited(self):
+        limiter = RateLimiter()
+        assert all(limiter.try_acquire(10_000) == 0.0 for _ in range(100))
+
+    def test_requests_per_minute(self):
+        limiter = RateLimiter(requests_per_minute=2)
+        assert limiter.try_acquire() == 0.0
+        assert limiter.try_acquire() == 0.0
+        assert limiter.try_acquire() == pytest.approx(30.0, abs=0.1)
+        assert limiter.throttled == 1
+
+    def test_token_refusal_does_not_consume_request(self):
+        limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=100)
+        assert limiter.try_acquire(100) == 0.0
+        assert limiter.try_acquire(50) > 0
+        # El request rechazado no gastó cupo de requests/min
+        assert limiter.requests.tokens == pytest.approx(9, abs=0.01)
+
+    def test_settle_refunds_overestimate(self):
+        limiter = RateLimiter(tokens_per_minute=1000)
+        limiter.try_acquire(800)
+        limiter.settle(800, 100)
+        assert limiter.to_dict()["tokens"]["available"] == pytest.approx(900, abs=1)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Tests del ledger de requests (core/providers/request_ledger.py)
+
+Cubre:
+  1. Buffer en memoria, flush por lote y en background
+  2. Rollups por hora/engine/modelo/caller y p95 desde las filas crudas
+  3. Retención: las filas crudas se podan (también desde el hilo de flush),
+     los rollups quedan
+  4. Un flush fallido devuelve las filas al buffer, con tope
+  5. MultiEngine: engine, caller, tokens, retries, fallback, cache hit y
+     TTFB de streaming
+
+Run: pytest tests/request_ledger_test.py -v
+"""
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROVIDERS_DIR = Path(__file__).resolve().parent.parent / "core" / "providers"
+sys.path.insert(0, str(PROVIDERS_DIR))
+
+from completion_cache import CompletionCache  # noqa: E402
+from multi_engine import EngineBase, MultiEngine  # noqa: E402
+from request_ledger import RequestLedger, parse_since  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "hola"}]
+
+
+class FailingConn:
+    """Conexión que falla al escribir, como una db bloqueada"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def executemany(self, sql, rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class UsageEngine(EngineBase):
+    """Engine con usage fijo; registra los kwargs recibidos"""
+
+    def __init__(self, name, models, error=None):
+        self.name = name
+        self.models = models
+        self.error = error
+        self.kwargs = []
+
+    def list_models(self):
+        return self.models
+
+    def generate(self, messages, model, **kwargs):
+        self.kwargs.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return {
+            "model": model,
+            "content": self.name,
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+        }
+
+    def health(self):
+        return True
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    store = RequestLedger(tmp_path / "ledger.db", flush_interval=60)
+    yield store
+    store.close()
+
+
+def _rows(ledger):
+    with ledger._db_lock:
+        return ledger._conn.execute(
+            "SELECT engine, model, caller, prompt_tokens, completion_tokens, "
+            "ttfb_ms, retries, fallback, cache_hit, error FROM requests ORDER BY ts"
+        ).fetchall()
+
+
+class TestLedger:
+    def test_record_is_buffered_until_flush(self, ledger):
+        ledger.record("local", "llama3.2", latency=0.1)
+        assert _rows(ledger) == []
+        assert ledger.flush() == 1
+        assert len(_rows(ledger)) == 1
+
+    def test_background_flush_on_full_batch(self, tmp_path):
+        with RequestLedger(tmp_path / "l.db", flush_interval=60, batch_size=3) as store:
+            for _ in range(3):
+                store.record("local", "m", latency=0.01)
+            deadline = time.monotonic() + 3
+            while not _rows(store) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(_rows(store)) == 3
+
+    def test_report_by_model(self, ledger):
+        for latency in (0.1, 0.2, 0.3):
+            ledger.record("local", "llama3.2", "kb", 100, 20, latency=latency)
+        ledger.record("cloud", "gpt-4o-mini", "kb", 50, 10, latency=1.0, error="HTTPStatusError")
+        ledger.record("local", "llama3.2", "chat", 0, 0, latency=0.0, cache_hit=True)
+
+        report = {r["model"]: r for r in ledger.report()}
+        local = report["llama3.2"]
+        assert local["requests"] == 4
+        assert local["total_tokens"] == 360
+        assert local["avg_latency_ms"] == pytest.approx(150.0)
+        assert local["p95_latency_ms"] == pytest.approx(300.0)
+        assert local["cache_hit_rate"] == 0.25
+        assert report["gpt-4o-mini"]["error_rate"] == 1.0
+        assert list(report) == ["llama3.2", "gpt-4o-mini"]  # por tokens
+
+    def test_report_by_hour_and_caller(self, ledger):
+        now = time.time()
+        ledger.record("local", "m", "kb", 10, 0, latency=0.1, ts=now - 7200)
+        ledger.record("local", "m", "kb", 10, 0, latency=0.1, ts=now)
+        ledger.record("local", "m", "chat", 10, 0, latency=0.1, ts=now)
+
+        hours = ledger.report(by=["hour"])
+        assert [h["requests"] for h in hours] == [1, 2]
+        recent = ledger.report(since=now - 60, by=["caller"])
+        assert {r["caller"]: r["requests"] for r in recent} == {"kb": 1, "chat": 1}
+
+    def test_unknown_group_column(self, ledger):
+        with pytest.raises(ValueError):
+            ledger.report(by=["prompt"])
+
+    def test_rollups_survive_retention(self, tmp_path):
+        path = tmp_path / "l.db"
+        with RequestLedger(path) as store:
+            store.record("local", "m", prompt_tokens=7, latency=0.1, ts=time.time() - 86400)
+        with RequestLedger(path, retention_days=0.5) as store:
+            report = store.report()
+            assert _rows(store) == []
+        assert report[0]["prompt_tokens"] == 7
+        assert report[0]["p95_latency_ms"] is None
+
+    def test_flush_loop_prunes_periodically(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(RequestLedger, "PRUNE_INTERVAL", 0.0)
+        with RequestLedger(tmp_path / "l.db", flush_interval=0.05, retention_days=0.5) as store:
+            store.record("local", "m", ts=time.time() - 86400)
+            store.flush()
+            deadline = time.time() + 5
+            while _rows(store) and time.time() < deadline:
+                time.sleep(0.05)
+            assert _rows(store) == []
+
+    def test_failed_flush_requeues_rows(self, ledger):
+        ledger.record("local", "viejo")
+        real = ledger._conn
+        ledger._conn = FailingConn(real)
+        with pytest.raises(sqlite3.OperationalError):
+            ledger.flush()
+        ledger._conn = real
+        ledger.record("local", "nuevo")
+        assert ledger.flush() == 2
+        assert [r[1] for r in _rows(ledger)] == ["viejo", "nuevo"]
+        report = ledger.report(by=("engine",))
+        assert report[0]["requests"] == 2  # el rollup no se duplica
+
+    def test_requeue_is_capped(self, ledger, monkeypatch):
+        monkeypatch.setattr(RequestLedger, "MAX_BUFFERED", 2)
+        for model in ("a", "b", "c"):
+            ledger.record("local", model)
+        real = ledger._conn
+        ledger._conn = FailingConn(real)
+        with pytest.raises(sqlite3.OperationalError):
+            ledger.flush()
+        ledger._conn = real
+        ledger.flush()
+        assert [r[1] for r in _rows(ledger)] == ["b", "c"]  # se pierden las más viejas
+
+    def test_parse_since(self):
+        assert time.time() - parse_since("24h") == pytest.approx(86400, abs=5)
+        assert time.time() - parse_since("7d") == pytest.approx(7 * 86400, abs=5)
+        with pytest.raises(ValueError):
+            parse_since("ayer")
+
+
+class TestMultiEngineLedger:
+    def test_records_engine_caller_and_usage(self, ledger):
+        local = UsageEngine("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False, ledger=ledger) as engine:
+            engine.generate(MESSAGES, "llama3.2", caller="consolidation")
+
+        assert "caller" not in local.kwargs[0]
+        assert _rows(ledger) == [
+            ("local", "llama3.2", "consolidation", 10, 5, None, 0, 0, 0, None)
+        ]
+
+    def test_records_retry_and_fallback(self, ledger):
+        local = UsageEngine("local", ["llama3.2"], error=ConnectionResetError("reset"))
+        cloud = UsageEngine("cloud", ["gpt-4o-mini"])
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)], monitor=False, ledger=ledger
+        ) as engine:
+            engine.generate(MESSAGES, "llama3.2")
+
+        row = _rows(ledger)[0]
+        assert row[0] == "cloud"
+        assert row[6:8] == (1, 1)  # un retry, servido por fallback
+
+    def test_records_cache_hits(self, ledger, tmp_path):
+        cache = CompletionCache(tmp_path / "c.db")
+        local = UsageEngine("local", ["llama3.2"])
+        with MultiEngine(
+            [("local", local)], monitor=False, ledger=ledger, cache=cache
+        ) as engine:
+            engine.generate(MESSAGES, "llama3.2", temperature=0, caller="a")
+            engine.generate(MESSAGES, "llama3.2", temperature=0, caller="b")
+        cache.close()
+
+        rows = _rows(ledger)
+        assert [r[8] for r in rows] == [0, 1]
+        assert rows[1][0] == ""  # ningún engine atendió el hit
+
+    def test_stream_records_ttfb(self, ledger):
+        local = UsageEngine("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False, ledger=ledger) as engine:
+            chunks = list(engine.generate_stream(MESSAGES, "llama3.2", caller="cli"))
+
+        assert chunks[-1]["done"]
+        row = _rows(ledger)[0]
+        assert row[:5] == ("local", "llama3.2", "cli", 10, 5)
+        assert row[5] is not None
+
+    def test_ttfb_average_only_counts_streams(self, ledger):
+        local = UsageEngine("local", ["llama3.2"])
+        with MultiEngine([("local", local)], monitor=False, ledger=ledger) as engine:
+            engine.generate(MESSAGES, "llama3.2")
+            list(engine.generate_stream(MESSAGES, "llama3.2"))
+
+        generate_row, stream_row = _rows(ledger)
+        assert generate_row[5] is None
+        report = ledger.report(by=["model"])[0]
+        assert report["requests"] == 2
+        assert report["avg_ttfb_ms"] == pytest.approx(stream_row[5], abs=0.01)
+
+    def test_batch_records_each_item(self, ledger):
+        local = UsageEngine("local", ["llama3.2"])
+        batch = [{"messages": MESSAGES, "model": "llama3.2", "caller": "eval"}] * 4
+        with MultiEngine([("local", local)], monitor=False, ledger=ledger) as engine:
+            engine.generate_batch(batch, max_concurrency=2)
+
+        report = ledger.report(by=["caller"])
+        assert report[0]["caller"] == "eval" and report[0]["requests"] == 4
+
+    @pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_batch_records_retry_like_generate(self, ledger):
+        for run in ("generate", "generate_batch"):
+            local = UsageEngine("local", ["llama3.2"], error=ConnectionResetError("reset"))
+            cloud = UsageEngine("cloud", ["gpt-4o-mini"])
+            with MultiEngine(
+                [("local", local), ("cloud", cloud)], monitor=False, ledger=ledger
+            ) as engine:
+                if run == "generate":
+                    engine.generate(MESSAGES, "llama3.2")
+                else:
+                    engine.generate_batch([{"messages": MESSAGES, "model": "llama3.2"}])
+
+        generate_row, batch_row = _rows(ledger)
+        assert batch_row[0] == "cloud"
+        assert batch_row[6:8] == generate_row[6:8] == (1, 1)
+
+        # Sin engines sanos: dos intentos fallidos = un retry, como en generate
+        local = UsageEngine("local", ["llama3.2"], error=ConnectionResetError("reset"))
+        cloud = UsageEngine("cloud", ["gpt-4o-mini"], error=ConnectionResetError("reset"))
+        with MultiEngine(
+            [("local", local), ("cloud", cloud)], monitor=False, ledger=ledger
+        ) as engine:
+            engine._engines = [(n, e) for n, e in engine._engines if n != "mock"]
+            results = engine.generate_batch(
+                [{"messages": MESSAGES, "model": "llama3.2", "max_retries": 1}],
+                return_exceptions=True,
+            )
+        assert isinstance(results[0], ConnectionResetError)
+        assert len(local.kwargs) + len(cloud.kwargs) == 2
+        assert _rows(ledger)[-1][6] == 1
+        assert _rows(ledger)[-1][9] == "ConnectionResetError"
+
+    def test_failure_is_recorded(self, ledger):
+        local = UsageEngine("local", ["llama3.2"], error=ConnectionResetError("reset"))
+        with MultiEngine([("local", local)], monitor=False, ledger=ledger) as engine:
+            engine._engines = [(n, e) for n, e in engine._engines if n != "mock"]
+            with pytest.raises(RuntimeError):
+                engine.generate(MESSAGES, "llama3.2", max_retries=0)
+        assert _rows(ledger)[-1][0] == "local"
+        assert _rows(ledger)[-1][9] == "ConnectionResetError"
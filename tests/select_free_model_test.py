@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Tests de la verificación de modelos de select_free_model
+
+Cubre:
+  1. Cache de pings por modelo: TTL distinto para OK y fallos
+  2. verify_models: pool acotado en paralelo, parada temprana con want,
+     deadline global y reuso del cache sin tocar la red
+  3. Fallos por deadline agotado no se cachean; escrituras concurrentes
+     de varios procesos no se pisan (FileLock junto al cache)
+  4. verify_model (--verify) reutiliza el cache
+  5. Catálogo de proveedores cacheado por puerto + mtime de config, con
+     refresh en segundo plano, y puerto del serve recordado mientras viva
+
+Run: pytest tests/select_free_model_test.py -v
+"""
+import importlib.util
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / "core" / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+spec = importlib.util.spec_from_file_location("select_free_model", SCRIPT_DIR / "select_free_model.py")
+sfm = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sfm)
+
+MODELS = [f"prov/m{i}" for i in range(8)]
+
+
+def _store_many(path, prefix, count):
+    sfm.PING_CACHE_PATH = path
+    for i in range(count):
+        sfm._store_ping(f"{prefix}/m{i}", {"ok": True, "checked_at": time.time()})
+
+
+class FakePing:
+    """Reemplazo de _ping_model: latencia fija, modelos rotos configurables"""
+
+    def __init__(self, delay=0.1, broken=()):
+        self.delay = delay
+        self.broken = set(broken)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, port, entry, timeout=60, deadline_at=None):
+        with self._lock:
+            self.calls.append(entry["id"])
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if entry["id"] in self.broken:
+            return False, "HTTP 401 unauthorized"
+        return True, "respondió con el modelo pedido"
+
+
+@pytest.fixture(autouse=True)
+def ping_cache(tmp_path):
+    path = tmp_path / "model-pings.json"
+    with patch.object(sfm, "PING_CACHE_PATH", path):
+        yield path
+        # Pings que siguieron en vuelo tras el deadline guardan al terminar
+        for thread in threading.enumerate():
+            if thread.name.startswith("ping"):
+                thread.join()
+
+
+@pytest.fixture(autouse=True)
+def lock_stats_dir(tmp_path, monkeypatch):
+    """Las métricas del FileLock del cache de pings van a tmp, no al repo."""
+    import lock_stats
+
+    monkeypatch.setattr(lock_stats, "_process_stats", lock_stats.LockStats(tmp_path / "stats"))
+
+
+@pytest.fixture(autouse=True)
+def catalog_cache(tmp_path):
+    sfm._catalogs.clear()
+    sfm._serve.update(port=None, proc=None)
+    with patch.object(sfm, "CATALOG_CACHE_PATH", tmp_path / "catalog.json"), \
+         patch.object(sfm, "_config_stamp", return_value=1.0):
+        yield
+    sfm._catalogs.clear()
+    sfm._serve.update(port=None, proc=None)
+
+
+class FakeServe:
+    """Reemplazo de _serve_json para /config/providers"""
+
+    def __init__(self, models=("big-pickle",)):
+        self.models = list(models)
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, port, path, timeout=15):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionRefusedError("serve caído")
+        models = {m: {"cost": {"input": 0, "output": 0}} for m in self.models}
+        return {"providers": [{"id": "opencode", "models": models}]}
+
+
+class TestPingCache:
+    def test_result_is_cached(self):
+        fake = FakePing(delay=0)
+        with patch.object(sfm, "_ping_model", fake):
+            first = sfm.ping_model(47017, "prov/m0")
+            second = sfm.ping_model(47017, "prov/m0")
+        assert first["ok"] and not first["cached"]
+        assert second["cached"] and second["latency_ms"] == first["latency_ms"]
+        assert fake.calls == ["prov/m0"]
+
+    def test_failures_expire_sooner(self):
+        fake = FakePing(delay=0, broken={"prov/m1"})
+        with patch.object(sfm, "_ping_model", fake):
+            sfm.ping_model(47017, "prov/m0")
+            sfm.ping_model(47017, "prov/m1")
+        later = time.time() + sfm.PING_FAIL_TTL + 1
+        with patch.object(sfm.time, "time", return_value=later):
+            assert sfm.cached_ping("prov/m0")["ok"]
+            assert sfm.cached_ping("prov/m1") is None
+
+    def test_fresh_bypasses_cache(self):
+        fake = FakePing(delay=0)
+        with patch.object(sfm, "_ping_model", fake):
+            sfm.ping_model(47017, "prov/m0")
+            sfm.ping_model(47017, "prov/m0", fresh=True)
+        assert len(fake.calls) == 2
+
+    def test_concurrent_processes_keep_every_entry(self, ping_cache):
+        ctx = multiprocessing.get_context("fork")
+        procs = [
+            ctx.Process(target=_store_many, args=(ping_cache, f"p{n}", 30))
+            for n in range(3)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        assert len(sfm._load_ping_cache()) == 90
+
+    def test_badge(self):
+        with patch.object(sfm, "_ping_model", FakePing(delay=0, broken={"prov/m1"})):
+            sfm.ping_model(47017, "prov/m0")
+            sfm.ping_model(47017, "prov/m1")
+        assert sfm.ping_badge("prov/m0").startswith("ping ✓")
+        assert sfm.ping_badge("prov/m1") == "ping ✗"
+        assert sfm.ping_badge("prov/otro") == ""
+
+
+class TestVerifyModels:
+    def test_runs_in_parallel_with_bounded_pool(self):
+        fake = FakePing(delay=0.1)
+        started = time.monotonic()
+        with patch.object(sfm, "_ping_model", fake):
+            results = sfm.verify_models(47017, MODELS, workers=4)
+        assert set(results) == set(MODELS)
+        assert fake.peak == 4
+        assert time.monotonic() - started < 0.6  # serie: 0.8s
+
+    def test_stops_after_enough_working_models(self):
+        fake = FakePing(delay=0.05, broken={"prov/m0"})
+        with patch.object(sfm, "_ping_model", fake):
+            results = sfm.verify_models(47017, MODELS, want=2, workers=2)
+        assert sum(r["ok"] for r in results.values()) >= 2
+        assert len(fake.calls) < len(MODELS)
+
+    def test_deadline_returns_partial_results(self):
+        fake = FakePing(delay=0.3)
+        started = time.monotonic()
+        with patch.object(sfm, "_ping_model", fake):
+            results = sfm.verify_models(47017, MODELS, workers=2, deadline=0.1)
+        assert results == {}
+        assert time.monotonic() - started < 0.3
+
+    def test_cached_models_skip_network(self):
+        fake = FakePing(delay=0)
+        with patch.object(sfm, "_ping_model", fake):
+            sfm.ping_model(47017, "prov/m0")
+            results = sfm.verify_models(47017, ["prov/m0", "prov/m1"])
+        assert results["prov/m0"]["cached"]
+        assert fake.calls == ["prov/m0", "prov/m1"]
+
+    def test_cached_results_count_towards_want(self):
+        fake = FakePing(delay=0)
+        with patch.object(sfm, "_ping_model", fake):
+            sfm.ping_model(47017, "prov/m3")
+            sfm.verify_models(47017, MODELS, want=1)
+        assert fake.calls == ["prov/m3"]
+
+    def test_deadline_failures_are_not_cached(self):
+        def timed_out(port, entry, timeout=60, deadline_at=None):
+            time.sleep(0.1)
+            return False, "timed out"
+
+        with patch.object(sfm, "_ping_model", timed_out):
+            result = sfm.ping_model(47017, "prov/m0", deadline_at=time.monotonic() + 0.05)
+        assert not result["ok"]
+        assert sfm.cached_ping("prov/m0") is None
+
+
+class TestVerifyModel:
+    def test_reuses_cached_ping(self, capsys):
+        fake = FakePing(delay=0)
+        entry = {"id": "prov/m0", "provider": "prov", "model": "m0", "status": "anon"}
+        with patch.object(sfm, "_ping_model", fake), \
+             patch.object(sfm, "get_usable_models", return_value=[entry]):
+            assert sfm.verify_model("prov/m0", port=47017) == 0
+            assert sfm.verify_model("prov/m0", port=47017) == 0
+        out = capsys.readouterr().out
+        assert out.count("VERIFY_OK") == 2 and "[cache]" in out
+        assert len(fake.calls) == 1
+
+
+class TestProviderCatalogCache:
+    def test_second_call_is_served_from_cache(self):
+        serve = FakeServe()
+        with patch.object(sfm, "_serve_json", serve):
+            first = sfm.get_usable_models(47017)
+            second = sfm.get_usable_models(47017)
+        assert first == second and first[0]["id"] == "opencode/big-pickle"
+        assert serve.calls == 1
+
+    def test_cache_persists_on_disk(self):
+        serve = FakeServe()
+        with patch.object(sfm, "_serve_json", serve):
+            sfm.get_usable_models(47017)
+            sfm._catalogs.clear()  # otro proceso: sin memoria
+            sfm.get_usable_models(47017)
+        assert serve.calls == 1
+
+    def test_keyed_by_port_and_config_mtime(self):
+        serve = FakeServe()
+        with patch.object(sfm, "_serve_json", serve):
+            sfm.get_usable_models(47017)
+            sfm.get_usable_models(47018)
+            with patch.object(sfm, "_config_stamp", return_value=2.0):
+                sfm.get_usable_models(47017)
+        assert serve.calls == 3
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        serve = FakeServe()
+        with patch.object(sfm, "_serve_json", serve):
+            sfm.get_usable_models(47017)
+            serve.models = ["nuevo-free"]
+            sfm._catalogs[47017]["fetched_at"] -= sfm.CATALOG_TTL + 1
+
+            stale = sfm.get_usable_models(47017)
+            assert stale[0]["id"] == "opencode/big-pickle"
+            deadline = time.monotonic() + 2
+            while 47017 in sfm._refreshing or serve.calls < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert sfm.get_usable_models(47017)[0]["id"] == "opencode/nuevo-free"
+
+    def test_refresh_failure_keeps_cached_catalog(self):
+        serve = FakeServe()
+        with patch.object(sfm, "_serve_json", serve):
+            sfm.get_usable_models(47017)
+            serve.fail = True
+            models = sfm.get_usable_models(47017, refresh=True)
+        assert models[0]["id"] == "opencode/big-pickle"
+        assert serve.calls == 2
+
+    def test_no_serve_and_no_cache(self):
+        serve = FakeServe()
+        serve.fail = True
+        with patch.object(sfm, "_serve_json", serve):
+            assert sfm.get_usable_models(47017) == []
+
+
+class TestServePortCache:
+    def test_port_is_probed_once_while_serve_lives(self):
+        probes = []
+        with patch.object(sfm, "_port_open", return_value=True), \
+             patch.object(sfm, "_is_real_serve", side_effect=lambda p: probes.append(p) or True):
+            assert sfm.find_serve_port() == 47017
+            sfm._serve["port"] = None  # otro proceso: se lee del disco
+            assert sfm.find_serve_port() == 47017
+        assert probes == [47017]
+
+    def test_dead_serve_is_probed_again(self):
+        open_ports = {47018}
+        with patch.object(sfm, "_port_open", side_effect=lambda p, timeout=1: p in open_ports), \
+             patch.object(sfm, "_is_real_serve", return_value=True):
+            assert sfm.find_serve_port() == 47018
+            open_ports.clear()
+            assert sfm.find_serve_port() is None
+            open_ports.add(47020)
+            assert sfm.find_serve_port() == 47020
+
+    def test_spawned_serve_exit_invalidates_port(self):
+        class DeadProc:
+            def poll(self):
+                return 1
+
+        sfm._serve.update(port=47017, proc=DeadProc())
+        with patch.object(sfm, "_port_open", return_value=False) as port_open, \
+             patch.object(sfm, "_is_real_serve", return_value=True):
+            assert sfm.find_serve_port() is None
+        # Ni siquiera se intenta el connect al puerto recordado: solo el sondeo
+        assert port_open.call_count == len(sfm.PORTS)
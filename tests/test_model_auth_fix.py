@@ -96,6 +96,14 @@ class TestProviderAuthStatus:
 class TestGetFreeModelsAuthAware:
     """La lista free debe ser auth-aware: dicts {id, status} cred-first."""
 
+    @pytest.fixture(autouse=True)
+    def _isolated_catalog_cache(self, tmp_path):
+        # El catálogo se cachea en disco: cada test consulta su serve fake
+        sfm._catalogs.clear()
+        with patch.object(sfm, "CATALOG_CACHE_PATH", tmp_path / "catalog.json"):
+            yield
+        sfm._catalogs.clear()
+
     def _fake_catalog(self):
         return {
             "providers": [
@@ -114,10 +122,7 @@ class TestGetFreeModelsAuthAware:
 
     def test_returns_dicts_with_status(self):
         with patch.object(sfm, "_is_real_serve", return_value=True), \
-             patch("urllib.request.urlopen") as mock_urlopen:
-            mock_urlopen.return_value.__enter__.return_value.status = 200
-            mock_urlopen.return_value.__enter__.return_value.read.return_value = \
-                json.dumps(self._fake_catalog()).encode()
+             patch.object(sfm, "_serve_json", return_value=self._fake_catalog()):
             env = {k: v for k, v in os.environ.items()
                    if k not in ("NANO_GPT_API_KEY", "ZHIPU_API_KEY", "OPENCODE_API_KEY")}
             with patch.dict(os.environ, env, clear=True), \
@@ -131,10 +136,7 @@ class TestGetFreeModelsAuthAware:
 
     def test_cred_first_ordering(self):
         with patch.object(sfm, "_is_real_serve", return_value=True), \
-             patch("urllib.request.urlopen") as mock_urlopen:
-            mock_urlopen.return_value.__enter__.return_value.status = 200
-            mock_urlopen.return_value.__enter__.return_value.read.return_value = \
-                json.dumps(self._fake_catalog()).encode()
+             patch.object(sfm, "_serve_json", return_value=self._fake_catalog()):
             env = {k: v for k, v in os.environ.items() if k != "NANO_GPT_API_KEY"}
             with patch.dict(os.environ, env, clear=True), \
                  patch.object(oc_auth, "load_auth_json",